@@ -0,0 +1,52 @@
+"""
+Фоновый агент SaveConfe (saveconfe-agent)
+Блокировка и учёт времени без графического интерфейса
+"""
+import os
+import sys
+import signal
+import logging
+
+from core.admin_check import is_admin
+from core.database import Database, init_db
+from core.agent import Agent
+from core.metrics import metrics_port_from_args
+from core.log_pipeline import setup_logging
+
+# Снимок правил, журнал, database.env и логи лежат рядом с агентом: при запуске
+# из планировщика заданий при загрузке рабочий каталог — System32
+os.chdir(os.path.dirname(os.path.abspath(sys.executable if getattr(sys, 'frozen', False) else __file__)))
+
+# Настройка логирования: запись в файл и консоль в отдельном потоке,
+# ротация со сжатием, --log-json включает формат JSON lines
+setup_logging('saveconfe-agent.log', sys.argv[1:])
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Главная функция агента"""
+    try:
+        # Агент не показывает окон и не перезапускает себя с повышением прав
+        if not is_admin():
+            logger.error("Для работы агента требуются права администратора")
+            return 1
+
+        # Блокировка включается по локальному снимку правил сразу; база данных
+        # подготавливается и сверяется в основном цикле агента, когда станет доступна
+        # --metrics[=порт] включает метрики цикла мониторинга и их выдачу для Prometheus
+        agent = Agent(Database(ensure_exists=False), prepare_database=init_db,
+                      metrics_port=metrics_port_from_args(sys.argv[1:]))
+        for name in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), lambda signum, frame: agent.stop())
+        agent.run()
+        return 0
+
+    except Exception as e:
+        logger.critical(f"Критическая ошибка агента: {e}", exc_info=True)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Бенчмарки для SaveConfe
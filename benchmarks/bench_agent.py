@@ -0,0 +1,90 @@
+"""
+Бенчмарк памяти и простоя фонового агента в сравнении с окном
+
+Запускает в отдельном процессе агент (Agent.run) и, для сравнения,
+главное окно с включённым мониторингом (Qt без экрана) на временной
+базе SQLite. После прогрева замеряет резидентную память, количество
+потоков и процессорное время за окно простоя.
+
+Запуск:
+    python -m benchmarks.bench_agent [секунд_простоя]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+
+ROOT = Path(__file__).resolve().parent.parent
+
+AGENT = r"""
+import sys
+from core.database import Database
+from core.agent import Agent
+
+Agent(Database(sys.argv[1])).run()
+"""
+
+GUI = r"""
+import sys
+from PyQt6.QtWidgets import QApplication
+from core.database import Database
+from core.auth import AuthManager
+
+app = QApplication(sys.argv)
+from ui.main_window import MainWindow
+
+auth = AuthManager(Database(sys.argv[1]), bcrypt_rounds=4)
+auth.create_admin("admin", "admin")
+auth.login("admin", "admin")
+window = MainWindow(auth_manager=auth)
+window.show()
+window.blocker.enable_blocking()
+window.monitor.start_monitoring()
+app.exec()
+"""
+
+
+def _measure(code: str, url: str, cwd: str, idle: float, warmup: float = 3.0) -> tuple:
+    """Память (МБ), потоки и загрузка процессора (%) процесса в простое"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    process = subprocess.Popen([sys.executable, "-c", code, url], cwd=cwd, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(warmup)
+        info = psutil.Process(process.pid)
+        before = info.cpu_times()
+        started = time.perf_counter()
+        time.sleep(idle)
+        after = info.cpu_times()
+        elapsed = time.perf_counter() - started
+        cpu = (after.user + after.system - before.user - before.system) / elapsed * 100
+        return info.memory_info().rss / 2 ** 20, info.num_threads(), cpu
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    idle = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.path.insert(0, str(ROOT))
+        from core.database import Database
+        from models.base import Base
+
+        for name, code in (("агент", AGENT), ("окно", GUI)):
+            url = f"sqlite:///{Path(tmp) / (name + '.db')}"
+            db = Database(url)
+            Base.metadata.create_all(db.engine)
+            db.engine.dispose()
+            rss, threads, cpu = _measure(code, url, tmp, idle)
+            print(f"{name}: память {rss:>7.1f} МБ, потоков {threads:>3}, процессор в простое {cpu:>6.2f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Бенчмарк шины событий: задержка потока мониторинга медленным подписчиком
+
+Публикует поток начислений нескольких сессий, как это делает монитор,
+подписчику, который обрабатывает событие за заданное время (окно или
+IPC под нагрузкой). Сравнивается время публикации при вызове подписчика
+в потоке публикации и через ограниченную очередь с объединением начислений.
+
+Запуск:
+    python -m benchmarks.bench_events [количество_событий] [мс_на_событие]
+"""
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run(count: int, handler_ms: float, **options):
+    from core.events import EventBus
+    from core.monitor import MonitorEvent, EVENT_ACCRUAL
+
+    bus = EventBus()
+    handled = []
+
+    def handler(event):
+        time.sleep(handler_ms / 1000)
+        handled.append(event)
+
+    subscription = bus.subscribe(handler, MonitorEvent, name='slow', **options)
+    now = datetime.now()
+    events = [MonitorEvent(EVENT_ACCRUAL, f"app{i % 20}.exe", now, session_key=f"{i % 20:032d}",
+                           start_time=now, used_minutes=i / 100) for i in range(count)]
+    started = time.perf_counter()
+    for event in events:
+        bus.publish(event)
+    published = time.perf_counter() - started
+    stats = subscription.stats()
+    bus.close()
+    return published, stats
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    handler_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    sys.path.insert(0, str(ROOT))
+
+    print(f"событий: {count}, обработка подписчиком {handler_ms} мс")
+    inline, _ = run(count, handler_ms)
+    print(f"без очереди:       {inline * 1000:>9.1f} мс в потоке публикации")
+    queued, stats = run(count, handler_ms, max_queue=1000)
+    print(f"очередь:           {queued * 1000:>9.1f} мс (отброшено {stats.dropped}, очередь до {stats.max_queued})")
+    from core.monitor import accrual_key
+    coalesced, stats = run(count, handler_ms, max_queue=1000, coalesce=accrual_key)
+    print(f"очередь+объед.:    {coalesced * 1000:>9.1f} мс (объединено {stats.coalesced}, "
+          f"очередь до {stats.max_queued})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Бенчмарк потока событий IPC: событий в секунду
+
+Запускает IpcServer в этом процессе и подписчика в отдельном процессе
+(IpcClient), публикует события из потока, как это делает монитор,
+и замеряет время до получения подписчиком последнего события.
+Медленный подписчик получает события пачками, поэтому количество
+кадров меньше количества событий.
+
+Запуск:
+    python -m benchmarks.bench_ipc [количество_событий] [размер_пачки]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CLIENT = r"""
+import sys
+from core.ipc import IpcClient
+
+count = int(sys.argv[2])
+with IpcClient(sys.argv[1]) as client:
+    client.subscribe()
+    print("ready", flush=True)
+    events = client.events(timeout=60)
+    for _ in range(count):
+        next(events)
+    print(f"done {client.dropped}", flush=True)
+"""
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    max_batch = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    sys.path.insert(0, str(ROOT))
+    from core.ipc import IpcServer, event_to_message
+    from core.monitor import MonitorEvent, EVENT_ACCRUAL
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = rf'\\.\pipe\saveconfe-bench-{os.getpid()}' if sys.platform == 'win32' else str(Path(tmp) / 'bench.sock')
+        server = IpcServer(agent=None, address=address, max_batch=max_batch, max_pending=count)
+        server.start()
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+        client = subprocess.Popen([sys.executable, "-c", CLIENT, address, str(count)],
+                                  env=env, stdout=subprocess.PIPE, text=True)
+        try:
+            assert client.stdout.readline().strip() == "ready", "подписчик не подключился"
+            now = datetime.now()
+            message = event_to_message(MonitorEvent(EVENT_ACCRUAL, "game.exe", now, session_key="k" * 32,
+                                                    start_time=now, used_minutes=12.0, remaining_minutes=48.0))
+            started = time.perf_counter()
+            for _ in range(count):
+                server.publish(message)
+            published = time.perf_counter() - started
+            done = client.stdout.readline().split()
+            elapsed = time.perf_counter() - started
+        finally:
+            client.stdout.close()
+            client.wait(timeout=60)
+            server.stop()
+
+    print(f"событий: {count}, пачка до {max_batch}")
+    print(f"публикация: {count / published:>12,.0f} событий/с")
+    print(f"доставка:   {count / elapsed:>12,.0f} событий/с ({elapsed:.2f} с, потеряно {done[1]})")
+
+
+if __name__ == "__main__":
+    main()
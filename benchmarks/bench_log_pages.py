@@ -0,0 +1,73 @@
+"""
+Бенчмарк постраничного чтения логов: выборка по ключу против OFFSET
+
+Заполняет временную базу SQLite логами и читает страницы на разной
+глубине через Database.get_usage_logs_page (по ключу последней строки)
+и через LIMIT/OFFSET, как при прокрутке таблицы последних сессий.
+
+Запуск:
+    python -m benchmarks.bench_log_pages [количество_логов] [размер_страницы]
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import select
+
+from core.database import Database
+from models.base import Base
+from models.usage_log import UsageLog, ItemType
+
+ORIGIN = datetime(2024, 1, 1)
+
+
+def _fill(db: Database, count: int):
+    """Заполнение базы логами пачками по 100 000"""
+    for first in range(0, count, 100_000):
+        rows = [{
+            'item_type': ItemType.APP,
+            'item_name': f"app{i % 50}.exe",
+            'start_time': ORIGIN + timedelta(seconds=i * 30),
+            'end_time': ORIGIN + timedelta(seconds=i * 30 + 600),
+            'duration': 10.0,
+        } for i in range(first, min(first + 100_000, count))]
+        with db.engine.begin() as connection:
+            connection.execute(UsageLog.__table__.insert(), rows)
+
+
+def _offset_page(db: Database, offset: int, limit: int) -> list:
+    """Страница через OFFSET (для сравнения)"""
+    stmt = select(UsageLog.id).order_by(UsageLog.start_time.desc(), UsageLog.id.desc())\
+        .offset(offset).limit(limit)
+    with db.engine.connect() as connection:
+        return connection.execute(stmt).all()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(db.engine)
+        _fill(db, count)
+
+        for depth in (0, count // 10, count // 2, count - page_size):
+            # Ключ строки перед страницей: логи идут через 30 секунд, id с 1
+            index = count - depth
+            after = (ORIGIN + timedelta(seconds=index * 30), index + 1) if depth else None
+            started = time.perf_counter()
+            rows = db.get_usage_logs_page(page_size, after=after)
+            keyset = time.perf_counter() - started
+            started = time.perf_counter()
+            expected = _offset_page(db, depth, page_size)
+            offset = time.perf_counter() - started
+            assert [row.id for row in rows] == [row.id for row in expected], "страницы не совпадают"
+            print(f"глубина {depth:>9}: по ключу {keyset * 1000:>8.2f} мс, OFFSET {offset * 1000:>8.2f} мс")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
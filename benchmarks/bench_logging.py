@@ -0,0 +1,63 @@
+"""
+Бенчмарк задержки логирования в вызывающем потоке
+
+Сравнивает прежнюю синхронную запись (FileHandler) с LogPipeline
+(очередь и поток записи) на одинаковых сообщениях и отдельно на
+повторяющемся сообщении о завершении процесса, которое подавляется.
+
+Запуск:
+    python -m benchmarks.bench_logging [количество_сообщений]
+"""
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _per_call(logger: logging.Logger, count: int, message: str) -> float:
+    """Среднее время вызова logger.info, мкс"""
+    started = time.perf_counter()
+    for index in range(count):
+        logger.info(message, index)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sys.path.insert(0, str(ROOT))
+    from core.log_pipeline import LOG_FORMAT, LogPipeline
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logger = logging.getLogger('bench_logging')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+
+        handler = logging.FileHandler(str(Path(tmp) / 'sync.log'), encoding='utf-8')
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+        sync = _per_call(logger, count, "Начато логирование использования: app%d.exe")
+        logger.removeHandler(handler)
+        handler.close()
+
+        results = {}
+        for name, message in (("разные", "Начато логирование использования: app%d.exe"),
+                              ("повторы", "Завершён процесс: game.exe (PID: %d)")):
+            pipeline = LogPipeline(str(Path(tmp) / f'{name}.log'), console=False, queue_size=count + 10)
+            pipeline.start(logger)
+            results[name] = _per_call(logger, count, message)
+            started = time.perf_counter()
+            pipeline.stop()
+            results[name + " (дозапись)"] = (time.perf_counter() - started) * 1000
+
+    print(f"сообщений: {count}")
+    print(f"FileHandler:           {sync:>8.2f} мкс на сообщение")
+    print(f"очередь, разные:       {results['разные']:>8.2f} мкс на сообщение, "
+          f"дозапись при остановке {results['разные (дозапись)']:.0f} мс")
+    print(f"очередь, повторы:      {results['повторы']:>8.2f} мкс на сообщение")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк накладных расходов метрик в цикле мониторинга
+
+Выполняет проверки монитора (Monitor._tick: список процессов, учёт,
+перенос журнала во временную базу SQLite) с выключенными и включёнными
+метриками и отдельно замеряет стоимость одного timer() и inc().
+
+Запуск:
+    python -m benchmarks.bench_metrics [количество_проверок]
+"""
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _ticks(monitor, count: int) -> float:
+    """Медиана длительности проверки, мс"""
+    durations = []
+    for _ in range(count):
+        started = time.perf_counter()
+        monitor._tick()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def _per_call(metrics, count: int = 200_000) -> float:
+    """Стоимость timer() и inc() за одну проверку этапа, нс"""
+    started = time.perf_counter()
+    for _ in range(count):
+        with metrics.timer('bench_seconds', phase='scan'):
+            pass
+        metrics.inc('bench_total')
+    return (time.perf_counter() - started) / count * 1e9
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    sys.path.insert(0, str(ROOT))
+    from core.blocker import Blocker
+    from core.database import Database
+    from core.metrics import Metrics
+    from core.monitor import Monitor
+    from core.samples import SampleJournal
+    from core.scheduler import Scheduler
+    from core.spool import UsageSpool
+    from models.base import Base
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(db.engine)
+        results = {}
+        for enabled in (False, True):
+            monitor = Monitor(Blocker(), Scheduler(), db, spool=UsageSpool(str(Path(tmp) / f'spool{enabled}')),
+                              samples=SampleJournal(str(Path(tmp) / f'samples{enabled}')),
+                              metrics=Metrics(enabled=enabled))
+            monitor._tick()  # восстановление и прогрев
+            results[enabled] = _ticks(monitor, count)
+            monitor.spool.close()
+        db.engine.dispose()
+
+    print(f"проверок: {count}")
+    print(f"метрики выключены: {results[False]:>8.2f} мс на проверку, {_per_call(Metrics()):>6.0f} нс на замер")
+    print(f"метрики включены:  {results[True]:>8.2f} мс на проверку, {_per_call(Metrics(enabled=True)):>6.0f} нс на замер")
+
+
+if __name__ == "__main__":
+    main()
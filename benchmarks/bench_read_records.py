@@ -0,0 +1,86 @@
+"""
+Бенчмарк чтения логов: ORM-объекты против облегчённых записей
+
+Заполняет временную базу SQLite логами и сравнивает скорость чтения
+(строк в секунду) и удерживаемую память (байт на строку).
+
+Запуск:
+    python -m benchmarks.bench_read_records [количество_логов]
+"""
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from core.database import Database
+from models.base import Base
+from models.usage_log import UsageLog, ItemType
+
+
+def _fill(db: Database, count: int):
+    """Заполнение базы логами одной транзакцией"""
+    start = datetime(2024, 1, 1)
+    rows = [{
+        'item_type': ItemType.APP,
+        'item_name': f"app{i % 50}.exe",
+        'start_time': start + timedelta(minutes=i),
+        'end_time': start + timedelta(minutes=i + 1),
+        'duration': 1.0,
+    } for i in range(count)]
+    with db.engine.begin() as connection:
+        connection.execute(UsageLog.__table__.insert(), rows)
+
+
+def _read_orm(db: Database, count: int) -> list:
+    """Чтение логов ORM-объектами (прежний способ)"""
+    session = db.get_session()
+    try:
+        return session.query(UsageLog).order_by(UsageLog.start_time.desc()).limit(count).all()
+    finally:
+        session.close()
+
+
+def _read_records(db: Database, count: int) -> list:
+    """Чтение логов облегчёнными записями"""
+    return db.get_usage_logs(limit=count)
+
+
+def _measure(name: str, reader, db: Database, count: int):
+    """Замер скорости и удерживаемой памяти"""
+    reader(db, count)  # прогрев
+
+    gc.collect()
+    started = time.perf_counter()
+    rows = reader(db, count)
+    elapsed = time.perf_counter() - started
+    del rows
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = reader(db, count)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"{name:<10} {len(rows):>8} строк  {len(rows) / elapsed:>12,.0f} строк/с  "
+          f"{retained / len(rows):>8,.0f} байт/строка")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(db.engine)
+        _fill(db, count)
+
+        _measure("ORM", _read_orm, db, count)
+        _measure("records", _read_records, db, count)
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Бенчмарк отчётов: векторное деление интервалов против построчного
+
+Генерирует интервалы использования за год и распределяет их по часам,
+дням и неделям функцией distribute, а для дней сравнивает с построчным
+делением через split_by_day. Затем строит отчёт через ReportEngine из
+временной базы SQLite, чтобы учесть загрузку логов.
+
+Запуск:
+    python -m benchmarks.bench_reports [количество_интервалов] [количество_логов_в_базе]
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from core.database import Database
+from core.reports import BIN_SECONDS, ReportEngine, distribute
+from core.rollup import split_by_day
+from models.base import Base
+from models.usage_log import UsageLog, ItemType
+
+ORIGIN = datetime(2024, 1, 1)
+DAYS = 364
+
+
+def _generate(count: int):
+    """Интервалы длиной до 6 часов за год, 50 элементов"""
+    rng = np.random.default_rng(0)
+    starts = np.datetime64(ORIGIN, 's') + rng.integers(0, DAYS * 86400, size=count).astype('timedelta64[s]')
+    ends = starts + rng.integers(60, 6 * 3600, size=count).astype('timedelta64[s]')
+    groups = rng.integers(0, 50, size=count)
+    return starts, ends, groups
+
+
+def _python_daily(starts, ends, groups) -> np.ndarray:
+    """Построчное деление по дням (прежний подход)"""
+    result = np.zeros((50, DAYS + 1))
+    for start, end, group in zip(starts.tolist(), ends.tolist(), groups.tolist()):
+        for day, minutes in split_by_day(start, end):
+            result[group, (day - ORIGIN.date()).days] += minutes * 60
+    return result
+
+
+def _fill(db: Database, count: int):
+    """Заполнение базы логами одной транзакцией"""
+    starts, ends, groups = _generate(count)
+    rows = [{
+        'item_type': ItemType.APP,
+        'item_name': f"app{group}.exe",
+        'start_time': start,
+        'end_time': end,
+        'duration': (end - start).total_seconds() / 60,
+    } for start, end, group in zip(starts.tolist(), ends.tolist(), groups.tolist())]
+    with db.engine.begin() as connection:
+        connection.execute(UsageLog.__table__.insert(), rows)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    db_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    starts, ends, groups = _generate(count)
+    origin = np.datetime64(ORIGIN, 's')
+
+    for unit, width in BIN_SECONDS.items():
+        n_bins = -(-(DAYS + 1) * 86400 // width)
+        started = time.perf_counter()
+        distribute(starts, ends, origin, width, n_bins, groups, 50)
+        elapsed = time.perf_counter() - started
+        print(f"векторно  {unit:<5} {count:>9} интервалов  {elapsed:>7.3f} с  "
+              f"{count / elapsed:>12,.0f} интервалов/с")
+
+    started = time.perf_counter()
+    expected = _python_daily(starts, ends, groups)
+    elapsed = time.perf_counter() - started
+    print(f"построчно day   {count:>9} интервалов  {elapsed:>7.3f} с  {count / elapsed:>12,.0f} интервалов/с")
+    vectorized = distribute(starts, ends, origin, 86400, DAYS + 1, groups, 50)
+    assert np.allclose(vectorized, expected), "результаты не совпадают"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(db.engine)
+        _fill(db, db_count)
+        engine = ReportEngine(db)
+        period_end = ORIGIN + timedelta(days=DAYS + 1)
+
+        started = time.perf_counter()
+        intervals = engine.load_intervals(ORIGIN, period_end)
+        loaded = time.perf_counter() - started
+        started = time.perf_counter()
+        engine.usage_report(ORIGIN, period_end, 'day', intervals)
+        engine.heatmap(ORIGIN, period_end, intervals)
+        built = time.perf_counter() - started
+        print(f"ReportEngine {db_count:>9} логов: загрузка {loaded:.3f} с, отчёт и тепловая карта {built:.3f} с")
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
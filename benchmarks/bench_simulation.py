@@ -0,0 +1,44 @@
+"""
+Бенчмарк моделирования суток в виртуальном времени
+
+Прогоняет монитор по случайному сценарию (core.simulation) и выводит
+затраченное время, задержку завершения, расхождение учёта и число
+запросов к базе данных.
+
+Запуск:
+    python -m benchmarks.bench_simulation [запусков] [seed]
+"""
+import logging
+import sys
+import tempfile
+from datetime import datetime, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    launches = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    sys.path.insert(0, str(ROOT))
+    from core.simulation import AppRule, Simulation, random_timeline
+
+    logging.disable(logging.INFO)
+    game, browser = r"C:\Games\game.exe", r"C:\Apps\browser.exe"
+    day = datetime(2024, 3, 4)
+    rules = [AppRule(game, time_limit=120, schedule=(time(8), time(22))), AppRule(browser, time_limit=180)]
+    timeline = random_timeline([game, browser], day, launches=launches, mean_minutes=20, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        report = Simulation(tmp, rules, timeline, day).run(datetime(2024, 3, 5))
+
+    errors = report.accounting_errors().values()
+    print(f"смоделировано: {report.simulated_seconds / 3600:.0f} ч, запусков {launches}, проверок {report.ticks}")
+    print(f"время прогона: {report.wall_seconds:.2f} с")
+    print(f"завершений: {len(report.enforcements)}, наибольшая задержка {report.max_latency:.1f} с, "
+          f"лишних {len(report.unexpected_kills)}")
+    print(f"расхождение учёта: до {max(map(abs, errors), default=0) * 60:.1f} с")
+    print(f"запросов к базе: {report.db_queries}, из них записей {report.db_writes}")
+
+
+if __name__ == "__main__":
+    main()
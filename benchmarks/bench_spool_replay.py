@@ -0,0 +1,73 @@
+"""
+Бенчмарк локального журнала событий: запись с fsync пачками и перенос в базу
+
+Пишет в журнал события множества сессий (начало, контрольные точки,
+завершение), затем переносит их во временную базу SQLite и выводит
+пропускную способность обоих этапов (событий в секунду).
+
+Запуск:
+    python -m benchmarks.bench_spool_replay [количество_сессий] [контрольных_точек_на_сессию]
+"""
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from core.database import Database
+from core.spool import UsageSpool, SpoolReplayer, EVENT_START, EVENT_CHECKPOINT, EVENT_END
+from models.base import Base
+from models.usage_log import ItemType
+
+
+def _write(spool: UsageSpool, sessions: int, checkpoints: int) -> int:
+    """Запись событий сессий в журнал; fsync раз в 512 событий"""
+    start = datetime(2024, 1, 1)
+    written = 0
+    for i in range(sessions):
+        key = uuid.uuid4().hex
+        name = f"app{i % 50}.exe"
+        session_start = start + timedelta(minutes=i)
+        moment = session_start
+        spool.append(EVENT_START, ItemType.APP, key, name, session_start, moment, moment)
+        for _ in range(checkpoints):
+            spool.append(EVENT_CHECKPOINT, ItemType.APP, key, name, session_start,
+                         moment, moment + timedelta(minutes=1))
+            moment += timedelta(minutes=1)
+        spool.append(EVENT_END, ItemType.APP, key, name, session_start,
+                     moment, moment + timedelta(seconds=30))
+        written += checkpoints + 2
+    spool.flush()
+    return written
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    checkpoints = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(db.engine)
+        spool = UsageSpool(str(Path(tmp) / 'usage.spool'))
+
+        started = time.perf_counter()
+        events = _write(spool, sessions, checkpoints)
+        elapsed = time.perf_counter() - started
+        print(f"запись    {events:>9} событий  {events / elapsed:>12,.0f} событий/с  "
+              f"{spool.size() / 1024 / 1024:>8.1f} МБ")
+
+        started = time.perf_counter()
+        replayed = SpoolReplayer(spool, db).replay()
+        elapsed = time.perf_counter() - started
+        print(f"перенос   {replayed:>9} событий  {replayed / elapsed:>12,.0f} событий/с")
+
+        started = time.perf_counter()
+        SpoolReplayer(spool, db).replay()
+        print(f"повтор    {time.perf_counter() - started:.3f} с (события не применяются повторно)")
+
+        spool.close()
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
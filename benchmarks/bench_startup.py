@@ -0,0 +1,105 @@
+"""
+Бенчмарк холодного запуска: время до первой отрисовки главного окна
+
+Каждый запуск — отдельный процесс Python (холодные импорты), который
+входит в систему на временной базе SQLite, создаёт MainWindow,
+показывает его и сообщает о первом проходе цикла событий. Время
+считается от создания процесса. Qt работает без экрана (offscreen).
+
+Если задан порог, медиана выше порога завершает бенчмарк с кодом 1,
+так что его можно использовать как проверку регрессий.
+
+Запуск:
+    python -m benchmarks.bench_startup [количество_запусков] [порог_мс]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = r"""
+import sys
+from core.database import Database
+from core.auth import AuthManager
+
+auth = AuthManager(Database(sys.argv[1]), bcrypt_rounds=4)
+assert auth.login("admin", "admin")
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication(sys.argv)
+from ui.main_window import MainWindow
+
+window = MainWindow(auth_manager=auth)
+window.show()
+
+
+def first_paint():
+    print("shown", flush=True)
+    window.monitor.stop_monitoring()
+    app.quit()
+
+
+QTimer.singleShot(0, first_paint)
+app.exec()
+"""
+
+
+def _prepare(url: str):
+    """Создание базы с администратором"""
+    sys.path.insert(0, str(ROOT))
+    from core.database import Database
+    from core.auth import AuthManager
+    from models.base import Base
+
+    db = Database(url)
+    Base.metadata.create_all(db.engine)
+    AuthManager(db, bcrypt_rounds=4).create_admin("admin", "admin")
+    db.engine.dispose()
+
+
+def _run_once(url: str, cwd: str) -> float:
+    """Один запуск, время до первой отрисовки в секундах"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", CHILD, url], cwd=cwd, env=env,
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            if line.strip() == "shown":
+                return time.perf_counter() - started
+        raise RuntimeError(f"главное окно не показано (код {process.wait()})")
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    max_ms = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        _prepare(url)
+        timings = []
+        for run in range(runs):
+            seconds = _run_once(url, tmp)
+            timings.append(seconds)
+            print(f"запуск {run + 1}: {seconds * 1000:>8.1f} мс")
+
+    median = statistics.median(timings) * 1000
+    print(f"медиана: {median:.1f} мс, минимум: {min(timings) * 1000:.1f} мс")
+    if max_ms is not None and median > max_ms:
+        print(f"РЕГРЕССИЯ: медиана выше порога {max_ms:.0f} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
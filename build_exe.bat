@@ -11,7 +11,16 @@ if errorlevel 1 (
 
 echo Сборка с правами администратора...
 REM Используем --uac-admin для запроса прав администратора при запуске
-pyinstaller --onefile --noconsole --name SaveConfe --uac-admin --icon=resources/icons/icon.ico main.py
+pyinstaller --onefile --noconsole --name SaveConfe --uac-admin --exclude-module pandas --icon=resources/icons/icon.ico main.py
+
+if errorlevel 1 (
+    echo Ошибка сборки!
+    pause
+    exit /b 1
+)
+
+echo Сборка фонового агента (без Qt)...
+pyinstaller --onefile --noconsole --name saveconfe-agent --uac-admin --exclude-module pandas --exclude-module PyQt6 --icon=resources/icons/icon.ico agent.py
 
 if errorlevel 1 (
     echo Ошибка сборки!
@@ -21,7 +30,7 @@ if errorlevel 1 (
 
 echo.
 echo Сборка завершена успешно!
-echo EXE файл находится в папке dist\
+echo EXE файлы находятся в папке dist\ (SaveConfe.exe и saveconfe-agent.exe держите в одной папке)
 echo.
 echo ВАЖНО: EXE файл будет автоматически запрашивать права администратора при запуске.
 pause
@@ -0,0 +1,239 @@
+"""
+Модуль фонового агента блокировки (без графического интерфейса)
+"""
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from threading import Event
+from typing import Callable, Optional
+
+import psutil
+
+from core.database import Database
+from core.blocker import Blocker
+from core.scheduler import Scheduler
+from core.monitor import Monitor, accrual_key
+from core.events import EventBus
+from core.metrics import Metrics, MetricsServer
+from core.profiling import Profiler, profile_seconds_from_env
+from core.rule_repository import RuleRepository
+from core.ipc import IpcServer, DEFAULT_ADDRESS
+from core.rule_snapshot import RuleSnapshotStore, DEFAULT_SNAPSHOT_PATH
+
+logger = logging.getLogger(__name__)
+
+# Файл с PID и временем создания процесса работающего агента
+AGENT_PID_FILE = 'saveconfe-agent.pid'
+
+
+def read_agent_pid(pid_file: str = AGENT_PID_FILE) -> Optional[int]:
+    """
+    PID работающего агента
+
+    PID из файла проверяется вместе со временем создания процесса,
+    поэтому файл, оставшийся после аварийного завершения, не принимается
+    за работающий агент, даже если PID уже занят другим процессом.
+
+    Args:
+        pid_file: Путь к файлу агента
+
+    Returns:
+        Optional[int]: PID или None, если агент не запущен
+    """
+    try:
+        pid, created = Path(pid_file).read_text(encoding='utf-8').split()
+        process = psutil.Process(int(pid))
+        if abs(process.create_time() - float(created)) < 1.0:
+            return process.pid
+    except (OSError, ValueError, psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+    return None
+
+
+def is_agent_running(pid_file: str = AGENT_PID_FILE) -> bool:
+    """Проверка, что фоновый агент запущен"""
+    return read_agent_pid(pid_file) is not None
+
+
+class Agent:
+    """
+    Фоновый агент блокировки
+
+    Держит RuleRepository, Blocker, Scheduler и Monitor без Qt и без
+    окна входа: блокировка работает, пока запущен агент, независимо
+    от графического интерфейса. Основной поток только раз в
+    poll_interval проверяет версию правил, остальное время спит
+    на событии остановки. Окно и другие клиенты подключаются
+    к агенту через IPC (core.ipc).
+
+    Правила и счётчики за день сохраняются в локальный снимок при каждом
+    изменении правил и раз в snapshot_interval. При запуске блокировка
+    включается по снимку до подключения к базе данных, а сверка с базой
+    выполняется первым poll() основного цикла.
+    """
+
+    def __init__(self, database: Optional[Database] = None, poll_interval: float = 5.0,
+                 pid_file: str = AGENT_PID_FILE, ipc_address: Optional[str] = DEFAULT_ADDRESS,
+                 snapshot_path: Optional[str] = DEFAULT_SNAPSHOT_PATH, snapshot_interval: float = 60.0,
+                 prepare_database: Optional[Callable[[], bool]] = None,
+                 metrics_port: Optional[int] = None):
+        """
+        Инициализация агента
+
+        Args:
+            database: Экземпляр Database (по умолчанию MySQL из database.env)
+            poll_interval: Интервал проверки изменений правил в секундах
+            pid_file: Путь к файлу агента
+            ipc_address: Адрес IPC-сервера (None — без IPC)
+            snapshot_path: Файл снимка правил (None — без снимка)
+            snapshot_interval: Интервал сохранения счётчиков в снимок в секундах
+            prepare_database: Подготовка базы (например, init_db), повторяется
+                в основном цикле до успеха; правила из базы читаются после неё
+            metrics_port: Порт выдачи метрик Prometheus на localhost (None — метрики выключены)
+        """
+        self.db = database or Database()
+        self.poll_interval = poll_interval
+        self.pid_file = pid_file
+        self.blocker = Blocker()
+        self.scheduler = Scheduler()
+        self.bus = EventBus()
+        self.rules = RuleRepository(self.db, self.bus)
+        self.metrics = Metrics(enabled=metrics_port is not None)
+        self.monitor = Monitor(self.blocker, self.scheduler, self.db, rules=self.rules, bus=self.bus,
+                               metrics=self.metrics)
+        self.metrics_server = MetricsServer(self.metrics, metrics_port) if metrics_port is not None else None
+        self.db.query_stats.register_metrics(self.metrics)
+        self.profiler = Profiler()
+        # Блокировщик и планировщик получают изменения сразу, в потоке изменения правил
+        self.rules.subscribe(self._on_rules_changed)
+        self.snapshot = RuleSnapshotStore(snapshot_path) if snapshot_path else None
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_saved = 0.0
+        self.prepare_database = prepare_database
+        self._database_ready = prepare_database is None
+        self.ipc = IpcServer(self, ipc_address) if ipc_address else None
+        if self.ipc is not None:
+            # Сериализация для клиентов IPC выполняется в потоках подписок, а не в потоке мониторинга
+            self.monitor.subscribe(self.ipc.publish_monitor_event, name='ipc', max_queue=10000,
+                                   coalesce=accrual_key)
+            self.rules.subscribe(self.ipc.publish_rules_delta, name='ipc-rules', max_queue=1000)
+        self.stop_event = Event()
+
+    def _on_rules_changed(self, delta):
+        """Применение изменения правил к блокировщику и планировщику"""
+        failed = self.blocker.apply_rule_delta(delta)
+        self.scheduler.apply_rule_delta(delta)
+        if failed:
+            logger.warning(f"Не удалось заблокировать сайты: {', '.join(failed)}")
+        # Правила из снимка, ещё не сверенные с базой, повторно не сохраняются
+        if self.rules.db_version is not None:
+            self._save_snapshot()
+
+    def _save_snapshot(self):
+        """Сохранение снимка правил и счётчиков"""
+        if self.snapshot is not None:
+            self.snapshot.save(self.rules, self.monitor.state.used_time)
+            self._snapshot_saved = time.monotonic()
+
+    def _restore_snapshot(self) -> bool:
+        """
+        Загрузка правил и счётчиков за сегодня из снимка
+
+        Returns:
+            bool: True если снимок загружен
+        """
+        if self.snapshot is None:
+            return False
+        started = time.perf_counter()
+        snapshot = self.snapshot.load()
+        if snapshot is None:
+            return False
+        self.scheduler.restore_used_time(snapshot.used_time_for(datetime.now().date()))
+        self.rules.restore(snapshot.sites, snapshot.apps)
+        logger.info(f"Правила восстановлены из снимка от {snapshot.saved_at:%d.%m %H:%M} "
+                    f"(версия {snapshot.db_version}) за {(time.perf_counter() - started) * 1000:.1f} мс")
+        return True
+
+    def profile(self, seconds: float) -> str:
+        """
+        Профилирование потока мониторинга в фоне, без остановки блокировки
+
+        Args:
+            seconds: Длительность, секунды
+
+        Returns:
+            str: Путь к архиву, который появится по окончании
+        """
+        return self.profiler.start(seconds, thread=self.monitor.monitor_thread)
+
+    def start(self):
+        """Включение блокировки по снимку правил и запуск мониторинга (без обращения к базе)"""
+        running = read_agent_pid(self.pid_file)
+        if running is not None and running != os.getpid():
+            raise RuntimeError(f"Агент уже запущен (PID {running})")
+
+        # Блокировка включается до загрузки, чтобы все сайты попали в hosts одной записью
+        self.blocker.enable_blocking()
+        if not self._restore_snapshot():
+            logger.info("Снимка правил нет, правила будут загружены из базы данных")
+        self.monitor.start_monitoring()
+        if self.ipc is not None:
+            # Без IPC блокировка продолжает работать, недоступно только окно и другие клиенты
+            try:
+                self.ipc.start()
+            except Exception as e:
+                logger.error(f"Не удалось запустить IPC-сервер: {e}")
+        if self.metrics_server is not None:
+            try:
+                self.metrics_server.start()
+            except OSError as e:
+                logger.error(f"Не удалось запустить выдачу метрик: {e}")
+        seconds = profile_seconds_from_env()
+        if seconds:
+            self.profile(seconds)
+        # Файл агента появляется, когда окно уже может подключиться по IPC
+        created = psutil.Process().create_time()
+        Path(self.pid_file).write_text(f"{os.getpid()} {created}", encoding='utf-8')
+        logger.info("Агент запущен")
+
+    def run(self):
+        """Работа до вызова stop()"""
+        self.start()
+        try:
+            while True:
+                if not self._database_ready:
+                    self._database_ready = self.prepare_database()
+                # Первый проход сверяет снимок с базой (или загружает правила, если снимка не было)
+                if self._database_ready:
+                    try:
+                        self.rules.poll()
+                    except Exception as e:
+                        logger.error(f"Ошибка проверки изменений правил: {e}")
+                if time.monotonic() - self._snapshot_saved >= self.snapshot_interval:
+                    self._save_snapshot()
+                if self.stop_event.wait(self.poll_interval):
+                    break
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """Запрос остановки (можно вызывать из обработчика сигнала)"""
+        self.stop_event.set()
+
+    def shutdown(self):
+        """Остановка мониторинга, IPC и удаление файла агента"""
+        if self.ipc is not None:
+            self.ipc.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.monitor.stop_monitoring()
+        self.bus.close()
+        self._save_snapshot()
+        try:
+            if read_agent_pid(self.pid_file) == os.getpid():
+                Path(self.pid_file).unlink()
+        except OSError as e:
+            logger.error(f"Ошибка удаления файла агента: {e}")
+        logger.info("Агент остановлен")
@@ -1,42 +1,131 @@
 """
 Модуль авторизации и управления паролями
 """
+import os
+import time
 import bcrypt
 import logging
+from threading import Lock
+from typing import Dict, Optional, Tuple
 from core.database import Database
-from models.user import User, UserRole
+from models.user import UserRole
 
 logger = logging.getLogger(__name__)
 
+# Стоимость bcrypt по умолчанию; задаётся переменной AUTH_BCRYPT_ROUNDS в database.env
+DEFAULT_BCRYPT_ROUNDS = 12
+
+
+def _rounds_from_env() -> int:
+    """Стоимость bcrypt из окружения (4..31)"""
+    try:
+        rounds = int(os.getenv('AUTH_BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS))
+    except ValueError:
+        logger.warning("Некорректное значение AUTH_BCRYPT_ROUNDS, используется значение по умолчанию")
+        return DEFAULT_BCRYPT_ROUNDS
+    return min(max(rounds, 4), 31)
+
+
+class LoginRateLimiter:
+    """
+    Ограничение частоты неудачных попыток входа
+    
+    После free_attempts неудачных попыток подряд имя пользователя
+    блокируется на base_delay секунд, и каждая следующая неудача удваивает
+    блокировку (но не больше max_delay). Пока блокировка действует,
+    пароль не проверяется вовсе, поэтому перебор не нагружает процессор.
+    """
+    
+    def __init__(self, free_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 300.0,
+                 clock=time.monotonic):
+        """
+        Инициализация
+        
+        Args:
+            free_attempts: Количество неудачных попыток без блокировки
+            base_delay: Первая блокировка в секундах
+            max_delay: Максимальная блокировка в секундах
+            clock: Источник времени (для тестов)
+        """
+        self.free_attempts = free_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._failures: Dict[str, Tuple[int, float]] = {}  # {имя: (неудач подряд, блокировка до)}
+        self._lock = Lock()
+    
+    def remaining(self, username: str) -> float:
+        """Сколько секунд осталось до конца блокировки (0 — вход разрешён)"""
+        with self._lock:
+            _, locked_until = self._failures.get(username, (0, 0.0))
+            return max(0.0, locked_until - self._clock())
+    
+    def record_failure(self, username: str):
+        """Учёт неудачной попытки"""
+        with self._lock:
+            failures, _ = self._failures.get(username, (0, 0.0))
+            failures += 1
+            locked_until = 0.0
+            if failures >= self.free_attempts:
+                delay = min(self.base_delay * 2 ** (failures - self.free_attempts), self.max_delay)
+                locked_until = self._clock() + delay
+            self._failures[username] = (failures, locked_until)
+    
+    def reset(self, username: str):
+        """Сброс счётчика после успешного входа"""
+        with self._lock:
+            self._failures.pop(username, None)
+
 
 class AuthManager:
     """
     Менеджер авторизации
     
     Управляет хешированием паролей, проверкой авторизации
-    и созданием пользователей.
+    и созданием пользователей. Проверка пароля занимает заметное время
+    (bcrypt), поэтому методы login и change_password вызываются из UI
+    через DbExecutor, а не в GUI-потоке.
     """
     
-    def __init__(self):
-        """Инициализация менеджера авторизации"""
-        self.db = Database()
+    def __init__(self, database: Optional[Database] = None, bcrypt_rounds: Optional[int] = None,
+                 rate_limiter: Optional[LoginRateLimiter] = None):
+        """
+        Инициализация менеджера авторизации
+        
+        Args:
+            database: Экземпляр Database (по умолчанию создаётся новый)
+            bcrypt_rounds: Стоимость bcrypt (по умолчанию AUTH_BCRYPT_ROUNDS или 12)
+            rate_limiter: Ограничение частоты попыток входа
+        """
+        self.db = database or Database()
+        self.bcrypt_rounds = bcrypt_rounds or _rounds_from_env()
+        self.rate_limiter = rate_limiter or LoginRateLimiter()
         self.current_user = None
     
     @staticmethod
-    def hash_password(password: str) -> str:
+    def hash_password(password: str, rounds: int = DEFAULT_BCRYPT_ROUNDS) -> str:
         """
         Хеширование пароля с использованием bcrypt
         
         Args:
             password: Пароль в открытом виде
+            rounds: Стоимость bcrypt (log2 числа раундов)
             
         Returns:
             str: Хешированный пароль
         """
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=rounds)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     
+    @staticmethod
+    def hash_rounds(password_hash: str) -> Optional[int]:
+        """Стоимость bcrypt, с которой получен хеш ($2b$12$... -> 12)"""
+        try:
+            return int(password_hash.split('$')[2])
+        except (IndexError, ValueError):
+            return None
+    
     @staticmethod
     def verify_password(password: str, password_hash: str) -> bool:
         """
@@ -72,7 +161,7 @@ class AuthManager:
                 logger.warning(f"Пользователь {username} уже существует")
                 return False
             
-            password_hash = self.hash_password(password)
+            password_hash = self.hash_password(password, self.bcrypt_rounds)
             self.db.create_user(username, password_hash, UserRole.ADMIN)
             logger.info(f"Создан администратор: {username}")
             return True
@@ -90,24 +179,38 @@ class AuthManager:
             
         Returns:
             bool: True если авторизация успешна, False иначе
+            (в том числе пока имя заблокировано после неудачных попыток)
         """
         try:
-            user = self.db.get_user_by_username(username)
-            if not user:
-                logger.warning(f"Пользователь {username} не найден")
-                return False
-            
-            if self.verify_password(password, user.password_hash):
-                self.current_user = user
-                logger.info(f"Успешная авторизация: {username}")
-                return True
-            else:
-                logger.warning(f"Неверный пароль для пользователя: {username}")
+            user = self._check_credentials(username, password)
+            if user is None:
                 return False
+            self.current_user = user
+            logger.info(f"Успешная авторизация: {username}")
+            return True
         except Exception as e:
             logger.error(f"Ошибка авторизации: {e}")
             return False
     
+    def verify_credentials(self, username: str, password: str):
+        """
+        Проверка имени и пароля без входа (current_user не меняется)
+
+        Используется для авторизации отдельных подключений, например по IPC.
+
+        Returns:
+            UserRecord или None
+        """
+        try:
+            return self._check_credentials(username, password, rehash=False)
+        except Exception as e:
+            logger.error(f"Ошибка проверки учётных данных: {e}")
+            return None
+
+    def lockout_remaining(self, username: str) -> float:
+        """Сколько секунд вход для пользователя ещё заблокирован"""
+        return self.rate_limiter.remaining(username)
+    
     def change_password(self, username: str, old_password: str, new_password: str) -> bool:
         """
         Смена пароля
@@ -121,24 +224,53 @@ class AuthManager:
             bool: True если пароль успешно изменён
         """
         try:
-            if not self.login(username, old_password):
+            if self._check_credentials(username, old_password, rehash=False) is None:
                 return False
             
-            session = self.db.get_session()
-            try:
-                user = session.query(User).filter(User.username == username).first()
-                if user:
-                    user.password_hash = self.hash_password(new_password)
-                    session.commit()
-                    logger.info(f"Пароль изменён для пользователя: {username}")
-                    return True
-                return False
-            finally:
-                session.close()
+            password_hash = self.hash_password(new_password, self.bcrypt_rounds)
+            if self.db.update_user_password(username, password_hash):
+                logger.info(f"Пароль изменён для пользователя: {username}")
+                return True
+            return False
         except Exception as e:
             logger.error(f"Ошибка смены пароля: {e}")
             return False
     
+    def _check_credentials(self, username: str, password: str, rehash: bool = True):
+        """
+        Проверка имени и пароля с учётом ограничения попыток
+        
+        Если хеш получен с другой стоимостью bcrypt, чем настроена сейчас,
+        после успешной проверки он пересчитывается и сохраняется.
+        
+        Returns:
+            UserRecord или None
+        """
+        remaining = self.rate_limiter.remaining(username)
+        if remaining > 0:
+            logger.warning(f"Вход для {username} заблокирован ещё на {remaining:.0f} с")
+            return None
+        
+        user = self.db.get_user_by_username(username)
+        if not user:
+            logger.warning(f"Пользователь {username} не найден")
+            self.rate_limiter.record_failure(username)
+            return None
+        
+        if not self.verify_password(password, user.password_hash):
+            logger.warning(f"Неверный пароль для пользователя: {username}")
+            self.rate_limiter.record_failure(username)
+            return None
+        
+        self.rate_limiter.reset(username)
+        if rehash and self.hash_rounds(user.password_hash) != self.bcrypt_rounds:
+            try:
+                self.db.update_user_password(username, self.hash_password(password, self.bcrypt_rounds))
+                logger.info(f"Хеш пароля {username} пересчитан со стоимостью {self.bcrypt_rounds}")
+            except Exception as e:
+                logger.error(f"Ошибка пересчёта хеша пароля: {e}")
+        return user
+    
     def is_authenticated(self) -> bool:
         """Проверка, авторизован ли текущий пользователь"""
         return self.current_user is not None
@@ -2,28 +2,49 @@
 Модуль автозапуска приложения при старте Windows
 """
 import os
+import subprocess
+import sys
 import winreg
 import logging
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Задача планировщика Windows, запускающая фонового агента при загрузке
+AGENT_TASK_NAME = "SaveConfe Agent"
+
+
+def agent_command() -> list:
+    """
+    Команда запуска фонового агента рядом с текущим приложением
+
+    Returns:
+        list: saveconfe-agent.exe рядом с EXE окна или python с agent.py из исходников
+    """
+    if getattr(sys, 'frozen', False):
+        return [str(Path(sys.executable).with_name('saveconfe-agent.exe'))]
+    return [sys.executable, str(Path(__file__).resolve().parent.parent / 'agent.py')]
+
 
 class AutostartManager:
     """
     Менеджер автозапуска приложения
     
-    Добавляет/удаляет приложение в автозагрузку Windows через реестр.
+    Добавляет/удаляет приложение в автозагрузку Windows через реестр,
+    а фонового агента — в планировщик заданий: задача запускается при
+    загрузке системы от имени SYSTEM, до входа пользователя и без запроса UAC.
     """
     
-    def __init__(self, app_name: str = "SaveConfe"):
+    def __init__(self, app_name: str = "SaveConfe", agent_task: str = AGENT_TASK_NAME):
         """
         Инициализация менеджера автозапуска
         
         Args:
             app_name: Название приложения в автозагрузке
+            agent_task: Название задачи агента в планировщике заданий
         """
         self.app_name = app_name
+        self.agent_task = agent_task
         self.registry_key = r"Software\Microsoft\Windows\CurrentVersion\Run"
     
     def is_enabled(self) -> bool:
@@ -110,4 +131,73 @@ class AutostartManager:
         except Exception as e:
             logger.error(f"Ошибка отключения автозапуска: {e}")
             return False
-
+    
+    def _schtasks(self, *args) -> subprocess.CompletedProcess:
+        """Вызов schtasks без окна консоли"""
+        return subprocess.run(['schtasks', *args], capture_output=True, text=True,
+                              creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    
+    def is_agent_enabled(self) -> bool:
+        """
+        Проверка, зарегистрирован ли запуск агента при загрузке
+        
+        Returns:
+            bool: True если задача агента существует
+        """
+        try:
+            return self._schtasks('/Query', '/TN', self.agent_task).returncode == 0
+        except Exception as e:
+            logger.error(f"Ошибка проверки автозапуска агента: {e}")
+            return False
+    
+    def enable_agent(self, command: list) -> bool:
+        """
+        Регистрация запуска агента при загрузке Windows
+        
+        Args:
+            command: Исполняемый файл агента и его аргументы (см. agent_command)
+            
+        Returns:
+            bool: True если задача создана
+        """
+        try:
+            # Последний элемент — EXE агента или agent.py
+            if not os.path.exists(command[-1]):
+                logger.error(f"Файл не найден: {command[-1]}")
+                return False
+            
+            result = self._schtasks('/Create', '/F', '/TN', self.agent_task,
+                                    '/TR', subprocess.list2cmdline(command),
+                                    '/SC', 'ONSTART', '/RU', 'SYSTEM', '/RL', 'HIGHEST')
+            if result.returncode != 0:
+                logger.error(f"Ошибка включения автозапуска агента: {result.stderr.strip()}")
+                return False
+            
+            logger.info(f"Автозапуск агента включён: {subprocess.list2cmdline(command)}")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка включения автозапуска агента: {e}")
+            return False
+    
+    def disable_agent(self) -> bool:
+        """
+        Удаление запуска агента при загрузке
+        
+        Returns:
+            bool: True если задачи нет (удалена или не была создана)
+        """
+        try:
+            if not self.is_agent_enabled():
+                logger.info("Автозапуск агента уже отключён")
+                return True
+            
+            result = self._schtasks('/Delete', '/F', '/TN', self.agent_task)
+            if result.returncode != 0:
+                logger.error(f"Ошибка отключения автозапуска агента: {result.stderr.strip()}")
+                return False
+            
+            logger.info("Автозапуск агента отключён")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка отключения автозапуска агента: {e}")
+            return False
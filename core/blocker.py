@@ -7,6 +7,8 @@ import logging
 from typing import List
 from pathlib import Path
 
+from core.processes import SYSTEM_PROCESSES
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,13 +19,37 @@ class Blocker:
     Блокирует сайты через файл hosts и завершает процессы приложений.
     """
     
-    def __init__(self):
-        """Инициализация блокировщика"""
+    def __init__(self, processes=None):
+        """
+        Инициализация блокировщика
+        
+        Args:
+            processes: Источник процессов (по умолчанию psutil)
+        """
+        self.processes = processes or SYSTEM_PROCESSES
         self.hosts_path = Path(r"C:\Windows\System32\drivers\etc\hosts")
         self.blocked_sites = set()
         self.blocked_apps = set()
         self.is_blocking_enabled = False
     
+    @staticmethod
+    def normalize_domain(url: str) -> str:
+        """
+        Нормализация URL до домена
+        
+        Приводит к нижнему регистру, убирает протокол, путь и префикс www.
+        
+        Args:
+            url: URL сайта (например, "https://www.youtube.com/watch")
+            
+        Returns:
+            str: Домен (например, "youtube.com") или пустая строка
+        """
+        domain = url.strip().lower().replace('http://', '').replace('https://', '').split('/')[0].strip()
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return domain
+    
     def enable_blocking(self):
         """Включение блокировки"""
         self.is_blocking_enabled = True
@@ -45,11 +71,7 @@ class Blocker:
             bool: True если успешно заблокирован
         """
         try:
-            # Убираем протокол и путь, оставляем только домен
-            domain = url.replace('http://', '').replace('https://', '').split('/')[0].strip()
-            # Убираем www. если есть
-            if domain.startswith('www.'):
-                domain = domain[4:]
+            domain = self.normalize_domain(url)
             
             if not domain:
                 logger.error(f"Пустой домен после обработки URL: {url}")
@@ -130,10 +152,7 @@ class Blocker:
             bool: True если успешно разблокирован
         """
         try:
-            domain = url.replace('http://', '').replace('https://', '').split('/')[0].strip()
-            # Убираем www. если есть
-            if domain.startswith('www.'):
-                domain = domain[4:]
+            domain = self.normalize_domain(url)
             
             if not domain:
                 logger.error(f"Пустой домен после обработки URL: {url}")
@@ -191,6 +210,74 @@ class Blocker:
             logger.error(f"Ошибка разблокировки сайта {url}: {e}", exc_info=True)
             return False
     
+    def update_hosts(self, add_urls: List[str], remove_urls: List[str]) -> List[str]:
+        """
+        Пакетное изменение hosts файла: одно чтение и одна запись
+        
+        Используется для массового импорта правил, где поштучные
+        block_site/unblock_site перечитывали бы файл на каждый сайт.
+        
+        Args:
+            add_urls: URL сайтов для блокировки
+            remove_urls: URL сайтов для разблокировки
+            
+        Returns:
+            List[str]: URL сайтов, которые не удалось заблокировать
+        """
+        add_domains = {}
+        for url in add_urls:
+            domain = self.normalize_domain(url)
+            if domain:
+                add_domains.setdefault(domain, url)
+        remove_domains = {self.normalize_domain(url) for url in remove_urls} - set(add_domains)
+        remove_domains.discard('')
+        
+        if not add_domains and not remove_domains:
+            return []
+        
+        try:
+            with open(self.hosts_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except (PermissionError, FileNotFoundError) as e:
+            logger.error(f"Не удалось прочитать hosts файл: {e}")
+            self.blocked_sites.update(add_domains)
+            self.blocked_sites.difference_update(remove_domains)
+            return list(add_domains.values())
+        
+        new_lines = []
+        present = set()
+        for line in lines:
+            tokens = line.split('#', 1)[0].split()
+            if line.startswith('# SaveConfe block: '):
+                if line[len('# SaveConfe block: '):].strip() in remove_domains:
+                    continue
+            elif len(tokens) >= 2 and tokens[0] in ('127.0.0.1', '::1'):
+                if remove_domains.intersection(tokens[1:]):
+                    continue
+                present.update(tokens[1:])
+            new_lines.append(line)
+        
+        if new_lines and not new_lines[-1].endswith('\n'):
+            new_lines[-1] += '\n'
+        for domain in add_domains:
+            if domain in present:
+                continue
+            new_lines.append(f"# SaveConfe block: {domain}\n")
+            new_lines.append(f"127.0.0.1 {domain}\n")
+            new_lines.append(f"::1 {domain}\n")
+        
+        self.blocked_sites.update(add_domains)
+        self.blocked_sites.difference_update(remove_domains)
+        try:
+            with open(self.hosts_path, 'w', encoding='utf-8') as f:
+                f.writelines(new_lines)
+        except Exception as e:
+            logger.error(f"Ошибка записи в hosts файл: {e}")
+            return list(add_domains.values())
+        
+        logger.info(f"hosts обновлён: +{len(add_domains)} / -{len(remove_domains)} сайтов")
+        return []
+    
     def block_app(self, app_path: str) -> bool:
         """
         Добавление приложения в список блокировки
@@ -241,7 +328,7 @@ class Blocker:
         
         killed_count = 0
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe']):
+            for proc in self.processes.process_iter(['pid', 'name', 'exe']):
                 try:
                     # Безопасное получение пути к исполняемому файлу
                     exe_path = proc.info.get('exe')
@@ -251,15 +338,11 @@ class Blocker:
                         # Проверяем, есть ли это приложение в списке блокировки
                         for blocked_path in self.blocked_apps:
                             if normalized_exe.endswith(blocked_path) or blocked_path in normalized_exe:
-                                try:
-                                    proc.terminate()
+                                # Процесс может быть уже завершён или нет прав
+                                if self.processes.terminate(proc.info['pid']):
                                     killed_count += 1
                                     proc_name = proc.info.get('name', 'Unknown')
-                                    proc_pid = proc.info.get('pid', 'Unknown')
-                                    logger.info(f"Завершён процесс: {proc_name} (PID: {proc_pid})")
-                                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                    # Процесс уже завершён или нет прав
-                                    pass
+                                    logger.info(f"Завершён процесс: {proc_name} (PID: {proc.info['pid']})")
                                 break
                 except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                     continue
@@ -281,7 +364,7 @@ class Blocker:
         """
         running_apps = []
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'exe']):
+            for proc in self.processes.process_iter(['pid', 'name', 'exe']):
                 try:
                     # Безопасное получение пути к исполняемому файлу
                     exe_path = proc.info.get('exe')
@@ -318,9 +401,7 @@ class Blocker:
         for site in sites:
             try:
                 # Нормализуем домен так же, как в block_site
-                domain = site.replace('http://', '').replace('https://', '').split('/')[0].strip()
-                if domain.startswith('www.'):
-                    domain = domain[4:]
+                domain = self.normalize_domain(site)
                 if domain:
                     normalized_sites.add(domain)
             except Exception as e:
@@ -333,4 +414,36 @@ class Blocker:
         """Загрузка списка заблокированных приложений"""
         self.blocked_apps = {os.path.normpath(app).lower() for app in apps}
         logger.info(f"Загружено {len(apps)} заблокированных приложений")
-
+    
+    def apply_rule_delta(self, delta) -> List[str]:
+        """
+        Применение изменения правил из RuleRepository
+        
+        При включённой блокировке сайты сразу добавляются в hosts
+        или удаляются из него, иначе обновляется только список.
+        
+        Args:
+            delta: Экземпляр RuleDelta
+            
+        Returns:
+            List[str]: URL сайтов, которые не удалось заблокировать
+        """
+        failed = []
+        if self.is_blocking_enabled:
+            # Все изменения сайтов записываются в hosts за одну запись
+            failed = self.update_hosts([rule.url for rule in delta.added_sites],
+                                       [rule.url for rule in delta.removed_sites])
+        else:
+            for rule in delta.removed_sites:
+                self.blocked_sites.discard(self.normalize_domain(rule.url))
+            for rule in delta.added_sites:
+                domain = self.normalize_domain(rule.url)
+                if domain:
+                    self.blocked_sites.add(domain)
+        
+        for rule in delta.removed_apps:
+            self.unblock_app(rule.app_path)
+        for rule in delta.added_apps:
+            self.block_app(rule.app_path)
+        
+        return failed
@@ -0,0 +1,184 @@
+"""
+Модуль данных для графиков использования
+"""
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core.reports import BIN_SECONDS, ReportEngine
+from core.samples import SampleReader
+
+logger = logging.getLogger(__name__)
+
+# Минимальная ширина столбца графика в пикселях
+MIN_BAR_PX = 8
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Прореживание линейного ряда методом Largest-Triangle-Three-Buckets
+
+    Ряд делится на threshold - 2 корзины, и из каждой берётся точка,
+    образующая наибольший треугольник с выбранной точкой предыдущей
+    корзины и средней точкой следующей. Пики и провалы сохраняются
+    лучше, чем при усреднении или шаге через n точек.
+
+    Args:
+        x: Координаты X (по возрастанию)
+        y: Значения
+        threshold: Количество точек результата
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Прореженные x и y
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Границы корзин: первая и последняя точки выбираются всегда
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_start = end if end < next_end else n - 1
+        avg_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        avg_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return x[selected], y[selected]
+
+
+def unit_for_width(start: datetime, end: datetime, width_px: int, min_bar_px: int = MIN_BAR_PX) -> str:
+    """
+    Самые узкие интервалы, столбцы которых помещаются в ширину графика
+
+    Args:
+        start: Начало периода
+        end: Конец периода
+        width_px: Ширина области графика в пикселях
+        min_bar_px: Минимальная ширина столбца
+
+    Returns:
+        str: 'hour', 'day' или 'week'
+    """
+    span = (end - start).total_seconds()
+    for unit, width in BIN_SECONDS.items():
+        if span / width * min_bar_px <= width_px:
+            return unit
+    return 'week'
+
+
+@dataclass(frozen=True)
+class StackedSeries:
+    """
+    Данные графика с накоплением
+
+    Attributes:
+        unit: Ширина интервала ('hour', 'day', 'week')
+        labels: Подписи интервалов
+        names: Названия рядов (элементов), последний может быть «Другое»
+        minutes: Минуты, матрица [ряд, интервал]
+    """
+    unit: str
+    labels: List[str]
+    names: List[str]
+    minutes: np.ndarray
+
+
+@dataclass(frozen=True)
+class LineSeries:
+    """
+    Данные линейного графика
+
+    Attributes:
+        x: Моменты (секунды Unix)
+        y: Значения
+        source_points: Количество точек до прореживания
+    """
+    x: np.ndarray
+    y: np.ndarray
+    source_points: int
+
+
+class ChartDataSource:
+    """
+    Подготовка данных графиков под ширину виджета
+
+    Столбцы берутся из уже разбитых по интервалам отчётов ReportEngine
+    (с кэшем), причём ширина интервала выбирается так, чтобы столбцы
+    помещались в виджет. Поминутный ряд из журнала отсчётов
+    прореживается методом LTTB до ширины виджета. Методы выполняют
+    запросы и вызываются из пула потоков.
+    """
+
+    def __init__(self, report_engine: ReportEngine, samples: Optional[SampleReader] = None):
+        """
+        Инициализация
+
+        Args:
+            report_engine: Построитель отчётов
+            samples: Читатель журнала отсчётов (по умолчанию каталог samples)
+        """
+        self.reports = report_engine
+        self.samples = samples or SampleReader()
+
+    def stacked_usage(self, start: datetime, end: datetime, width_px: int,
+                      top: int = 8) -> StackedSeries:
+        """
+        Использование по интервалам с накоплением по элементам
+
+        Args:
+            start: Начало периода
+            end: Конец периода
+            width_px: Ширина области графика
+            top: Сколько элементов показать отдельно (остальные — «Другое»)
+
+        Returns:
+            StackedSeries: Ряды графика
+        """
+        unit = unit_for_width(start, end, width_px)
+        report = self.reports.usage_report(start, end, unit)
+        order = np.argsort(-report.totals(), kind='stable')
+        names = [report.items[position][1] for position in order[:top]]
+        minutes = report.minutes[order[:top]]
+        if len(order) > top:
+            names.append("Другое")
+            minutes = np.vstack([minutes, report.minutes[order[top:]].sum(axis=0)])
+        return StackedSeries(unit, report.bin_labels(), names, minutes.reshape(len(names), len(report.bins)))
+
+    def heatmap(self, start: datetime, end: datetime) -> np.ndarray:
+        """Тепловая карта 7×24 (дни недели × часы) в минутах"""
+        return self.reports.heatmap(start, end)
+
+    def concurrency(self, start_date: date, end_date: date, width_px: int) -> LineSeries:
+        """
+        Количество одновременно запущенных приложений по минутам
+
+        Args:
+            start_date: Начальная дата (включительно)
+            end_date: Конечная дата (включительно)
+            width_px: Ширина области графика (не больше точки на пиксель)
+
+        Returns:
+            LineSeries: Прореженный ряд
+        """
+        days = (end_date - start_date).days + 1
+        values = np.zeros(days * 1440)
+        recorded = set(self.samples.days())
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            if day in recorded:
+                values[offset * 1440:(offset + 1) * 1440] = self.samples.minute_heatmap(day)
+        origin = datetime.combine(start_date, time.min).timestamp()
+        x = origin + np.arange(len(values)) * 60.0
+        sx, sy = lttb(x, values, max(3, width_px))
+        return LineSeries(sx, sy, len(values))
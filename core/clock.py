@@ -0,0 +1,72 @@
+"""
+Модуль источников времени: системное и виртуальное время
+"""
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Системное время: datetime.now(), time.monotonic() и time.sleep()"""
+
+    def now(self) -> datetime:
+        """Текущее местное время"""
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        """Монотонное время в секундах"""
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        """Ожидание"""
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Виртуальное время для моделирования
+
+    Время стоит на месте, пока его не сдвинут advance() или set();
+    sleep() не ждёт, а сдвигает время. Один виртуальный день
+    моделируется за доли секунды.
+    """
+
+    def __init__(self, start: datetime):
+        """
+        Инициализация
+
+        Args:
+            start: Начальный момент
+        """
+        self._start = start
+        self._now = start
+
+    def now(self) -> datetime:
+        """Текущее виртуальное время"""
+        return self._now
+
+    def monotonic(self) -> float:
+        """Секунды с начального момента"""
+        return (self._now - self._start).total_seconds()
+
+    def sleep(self, seconds: float):
+        """Сдвиг времени вместо ожидания"""
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        """Сдвиг времени вперёд"""
+        self._now += timedelta(seconds=seconds)
+
+    def set(self, moment: datetime):
+        """
+        Переход к моменту
+
+        Raises:
+            ValueError: Момент раньше текущего
+        """
+        if moment < self._now:
+            raise ValueError(f"Виртуальное время не идёт назад: {moment} < {self._now}")
+        self._now = moment
+
+
+# Общий экземпляр системного времени (значение по умолчанию для компонентов)
+SYSTEM_CLOCK = SystemClock()
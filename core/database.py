@@ -2,7 +2,9 @@
 Модуль для работы с базой данных MySQL
 """
 import os
-from sqlalchemy import create_engine, inspect
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import create_engine, inspect, func, delete, select, update, text, bindparam, or_
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
@@ -12,7 +14,15 @@ from models.user import User, UserRole
 from models.site_rule import SiteRule
 from models.app_rule import AppRule
 from models.usage_log import UsageLog, ItemType
+from models.usage_daily import UsageDaily
+from models.rules_version import RulesVersion
+from models.spool_offset import SpoolOffset
+from models.records import (UserRecord, SiteRuleRecord, AppRuleRecord, UsageLogRecord,
+                            record_from_entity)
 from models.base import Base
+from core.rollup import accumulate_daily, rows_from_totals
+from core.spool import EVENT_START, EVENT_END
+from core.query_stats import QueryStats
 
 # Загружаем переменные окружения (будет перезагружено в __init__)
 # Сначала пробуем database.env, потом .env
@@ -30,8 +40,31 @@ class Database:
     правилами блокировки и логами использования.
     """
     
-    def __init__(self):
-        """Инициализация подключения к базе данных"""
+    # Размер пачки строк для массовых вставок
+    BULK_CHUNK_SIZE = 1000
+    
+    def __init__(self, url: Optional[str] = None, ensure_exists: bool = True):
+        """
+        Инициализация подключения к базе данных
+        
+        Args:
+            url: Строка подключения SQLAlchemy. Если не указана,
+                 используется MySQL из настроек database.env
+            ensure_exists: Проверить (и создать) базу MySQL сразу. Без проверки
+                 конструктор не подключается к серверу: движок SQLAlchemy
+                 подключается при первом запросе
+        """
+        # Задержка, строки и вызывающий метод каждого запроса
+        self.query_stats = QueryStats()
+        # Готовые операторы _upsert по (таблица, ключ, колонки, accumulate)
+        self._upsert_statements = {}
+        if url is not None:
+            self.database = url
+            self.engine = create_engine(url, echo=False)
+            self.query_stats.attach(self.engine)
+            self.SessionLocal = sessionmaker(bind=self.engine)
+            return
+        
         # Загружаем из database.env или .env
         env_file = 'database.env' if os.path.exists('database.env') else '.env'
         load_dotenv(env_file)
@@ -44,7 +77,8 @@ class Database:
         
         self.engine = None
         self.SessionLocal = None
-        self._ensure_database_exists()
+        if ensure_exists:
+            self._ensure_database_exists()
         self._connect()
     
     def _ensure_database_exists(self):
@@ -95,6 +129,7 @@ class Database:
                 pool_pre_ping=True,
                 echo=False
             )
+            self.query_stats.attach(self.engine)
             self.SessionLocal = sessionmaker(bind=self.engine)
             logger.info(f"Подключение к базе данных {self.database} установлено")
         except Exception as e:
@@ -105,6 +140,105 @@ class Database:
         """Получение сессии базы данных"""
         return self.SessionLocal()
     
+    def _fetch_records(self, record_type, stmt) -> list:
+        """
+        Выполнение SELECT с загрузкой строк сразу в записи record_type
+        
+        Запрос идёт через Core-соединение без ORM-сессии: объекты
+        сущностей не создаются, а результат не зависит от сессии.
+        """
+        with self.engine.connect() as connection:
+            return list(map(record_type._make, connection.execute(stmt)))
+    
+    @staticmethod
+    def _record_columns(model, record_type) -> list:
+        """Колонки таблицы модели в порядке полей записи"""
+        return [model.__table__.c[name] for name in record_type._fields]
+    
+    def _upsert(self, session: Session, model, rows: list, key_columns: list,
+                update_columns: list, accumulate: bool = False):
+        """
+        Вставка строк с обновлением при конфликте уникального ключа
+        
+        Для MySQL используется INSERT ... ON DUPLICATE KEY UPDATE,
+        для SQLite (тесты) — INSERT ... ON CONFLICT DO UPDATE.
+        
+        Args:
+            session: Сессия, в транзакции которой выполняется вставка
+            model: Модель SQLAlchemy
+            rows: Список словарей со значениями
+            key_columns: Колонки уникального ключа
+            update_columns: Колонки, обновляемые при конфликте
+                            (пустой список — существующие строки не трогаются)
+            accumulate: Прибавлять новые значения к существующим вместо замены
+        """
+        if not rows:
+            return
+        
+        cache_key = (model.__tablename__, tuple(key_columns), tuple(update_columns), accumulate)
+        stmt = self._upsert_statements.get(cache_key)
+        if stmt is None:
+            stmt = self._upsert_statement(model, key_columns, update_columns, accumulate)
+            self._upsert_statements[cache_key] = stmt
+        # Один и тот же оператор с executemany: SQLAlchemy компилирует его
+        # один раз, а драйвер отправляет пачку строк
+        for offset in range(0, len(rows), self.BULK_CHUNK_SIZE):
+            session.execute(stmt, rows[offset:offset + self.BULK_CHUNK_SIZE])
+    
+    def _upsert_statement(self, model, key_columns: list, update_columns: list,
+                          accumulate: bool):
+        """Оператор INSERT с обновлением при конфликте для диалекта движка"""
+        table = model.__table__
+        if self.engine.dialect.name == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table)
+            new_values = stmt.inserted
+            stmt = stmt.on_duplicate_key_update({
+                col: (table.c[col] + new_values[col]) if accumulate else new_values[col]
+                for col in update_columns
+            } or {col: table.c[col] for col in key_columns})
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table)
+            new_values = stmt.excluded
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=key_columns,
+                    set_={
+                        col: (table.c[col] + new_values[col]) if accumulate else new_values[col]
+                        for col in update_columns
+                    }
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=key_columns)
+        return stmt
+    
+    # Версия правил
+    RULES_VERSION_ID = 1
+    
+    def _bump_rules_version(self, session: Session):
+        """Увеличение версии правил в транзакции текущей сессии"""
+        updated = session.query(RulesVersion)\
+            .filter(RulesVersion.id == self.RULES_VERSION_ID)\
+            .update({RulesVersion.version: RulesVersion.version + 1}, synchronize_session=False)
+        if not updated:
+            session.add(RulesVersion(id=self.RULES_VERSION_ID, version=1))
+    
+    def get_rules_version(self) -> int:
+        """
+        Получение текущей версии правил
+        
+        Returns:
+            int: Номер версии (0, если правила ещё не изменялись)
+        """
+        session = self.get_session()
+        try:
+            version = session.query(RulesVersion.version)\
+                .filter(RulesVersion.id == self.RULES_VERSION_ID).scalar()
+            return version or 0
+        finally:
+            session.close()
+    
     # Методы для работы с пользователями
     def create_user(self, username: str, password_hash: str, role: UserRole = UserRole.ADMIN) -> User:
         """Создание нового пользователя"""
@@ -123,26 +257,35 @@ class Database:
         finally:
             session.close()
     
-    def get_user_by_username(self, username: str) -> User:
+    def get_user_by_username(self, username: str) -> Optional[UserRecord]:
         """Получение пользователя по имени"""
-        session = self.get_session()
+        stmt = select(*self._record_columns(User, UserRecord)).where(User.username == username).limit(1)
+        records = self._fetch_records(UserRecord, stmt)
+        return records[0] if records else None
+    
+    def update_user_password(self, username: str, password_hash: str) -> bool:
+        """Замена хеша пароля пользователя одним UPDATE"""
+        stmt = update(User).where(User.username == username).values(password_hash=password_hash)
         try:
-            return session.query(User).filter(User.username == username).first()
-        finally:
-            session.close()
+            with self.engine.begin() as connection:
+                return connection.execute(stmt).rowcount > 0
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка смены пароля: {e}")
+            raise
     
     # Методы для работы с правилами сайтов
-    def add_site_rule(self, url: str, time_limit: int = 0, schedule_start=None, schedule_end=None) -> SiteRule:
+    def add_site_rule(self, url: str, time_limit: int = 0, schedule_start=None, schedule_end=None) -> SiteRuleRecord:
         """Добавление правила блокировки сайта"""
         session = self.get_session()
         try:
             rule = SiteRule(url=url, time_limit=time_limit, 
                           schedule_start=schedule_start, schedule_end=schedule_end)
             session.add(rule)
+            self._bump_rules_version(session)
             session.commit()
             session.refresh(rule)
             logger.info(f"Добавлено правило для сайта: {url}")
-            return rule
+            return record_from_entity(SiteRuleRecord, rule)
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"Ошибка добавления правила сайта: {e}")
@@ -151,12 +294,9 @@ class Database:
             session.close()
     
     def get_all_site_rules(self) -> list:
-        """Получение всех правил блокировки сайтов"""
-        session = self.get_session()
-        try:
-            return session.query(SiteRule).all()
-        finally:
-            session.close()
+        """Получение всех правил блокировки сайтов (список SiteRuleRecord)"""
+        stmt = select(*self._record_columns(SiteRule, SiteRuleRecord)).order_by(SiteRule.id)
+        return self._fetch_records(SiteRuleRecord, stmt)
     
     def delete_site_rule(self, rule_id: int) -> bool:
         """Удаление правила блокировки сайта"""
@@ -165,6 +305,7 @@ class Database:
             rule = session.query(SiteRule).filter(SiteRule.id == rule_id).first()
             if rule:
                 session.delete(rule)
+                self._bump_rules_version(session)
                 session.commit()
                 logger.info(f"Удалено правило сайта с ID: {rule_id}")
                 return True
@@ -178,17 +319,18 @@ class Database:
     
     # Методы для работы с правилами приложений
     def add_app_rule(self, app_path: str, app_name: str, time_limit: int = 0,
-                     schedule_start=None, schedule_end=None) -> AppRule:
+                     schedule_start=None, schedule_end=None) -> AppRuleRecord:
         """Добавление правила блокировки приложения"""
         session = self.get_session()
         try:
             rule = AppRule(app_path=app_path, app_name=app_name, time_limit=time_limit,
                           schedule_start=schedule_start, schedule_end=schedule_end)
             session.add(rule)
+            self._bump_rules_version(session)
             session.commit()
             session.refresh(rule)
             logger.info(f"Добавлено правило для приложения: {app_name}")
-            return rule
+            return record_from_entity(AppRuleRecord, rule)
         except SQLAlchemyError as e:
             session.rollback()
             logger.error(f"Ошибка добавления правила приложения: {e}")
@@ -197,12 +339,9 @@ class Database:
             session.close()
     
     def get_all_app_rules(self) -> list:
-        """Получение всех правил блокировки приложений"""
-        session = self.get_session()
-        try:
-            return session.query(AppRule).all()
-        finally:
-            session.close()
+        """Получение всех правил блокировки приложений (список AppRuleRecord)"""
+        stmt = select(*self._record_columns(AppRule, AppRuleRecord)).order_by(AppRule.id)
+        return self._fetch_records(AppRuleRecord, stmt)
     
     def delete_app_rule(self, rule_id: int) -> bool:
         """Удаление правила блокировки приложения"""
@@ -211,6 +350,7 @@ class Database:
             rule = session.query(AppRule).filter(AppRule.id == rule_id).first()
             if rule:
                 session.delete(rule)
+                self._bump_rules_version(session)
                 session.commit()
                 logger.info(f"Удалено правило приложения с ID: {rule_id}")
                 return True
@@ -222,6 +362,35 @@ class Database:
         finally:
             session.close()
     
+    def bulk_upsert_rules(self, sites: list, apps: list):
+        """
+        Массовая вставка/обновление правил в одной транзакции
+        
+        Строки пишутся пачками INSERT ... ON DUPLICATE KEY UPDATE,
+        поэтому уже существующий URL или путь обновляет правило,
+        а не прерывает импорт. Версия правил увеличивается один раз.
+        
+        Args:
+            sites: Словари с ключами url, time_limit, schedule_start, schedule_end
+            apps: Словари с ключами app_path, app_name, time_limit,
+                  schedule_start, schedule_end
+        """
+        session = self.get_session()
+        try:
+            self._upsert(session, SiteRule, sites, key_columns=['url'],
+                         update_columns=['time_limit', 'schedule_start', 'schedule_end'])
+            self._upsert(session, AppRule, apps, key_columns=['app_path'],
+                         update_columns=['app_name', 'time_limit', 'schedule_start', 'schedule_end'])
+            self._bump_rules_version(session)
+            session.commit()
+            logger.info(f"Импортировано правил: {len(sites)} сайтов, {len(apps)} приложений")
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Ошибка массового импорта правил: {e}")
+            raise
+        finally:
+            session.close()
+    
     # Методы для работы с логами
     def add_usage_log(self, item_type: ItemType, item_name: str, 
                      start_time=None, end_time=None, duration: float = 0.0) -> UsageLog:
@@ -246,12 +415,302 @@ class Database:
             session.close()
     
     def get_usage_logs(self, limit: int = 100) -> list:
-        """Получение логов использования"""
+        """Получение логов использования (список UsageLogRecord)"""
+        stmt = select(*self._record_columns(UsageLog, UsageLogRecord))\
+            .order_by(UsageLog.start_time.desc()).limit(limit)
+        return self._fetch_records(UsageLogRecord, stmt)
+    
+    # Колонки, по которым можно сортировать постраничный просмотр логов;
+    # у незакрытого лога окончанием считается начало, чтобы ключ не был NULL
+    USAGE_LOG_SORT_COLUMNS = {
+        'item_type': UsageLog.item_type,
+        'item_name': UsageLog.item_name,
+        'start_time': UsageLog.start_time,
+        'end_time': func.coalesce(UsageLog.end_time, UsageLog.start_time),
+        'duration': UsageLog.duration,
+    }
+    
+    def get_usage_logs_page(self, limit: int = 500, sort_column: str = 'start_time',
+                            descending: bool = True, search: Optional[str] = None,
+                            after: Optional[tuple] = None) -> list:
+        """
+        Страница логов использования для постраничного просмотра
+        
+        Страницы выбираются по ключу (значение колонки сортировки, id)
+        последней строки предыдущей страницы, а не через OFFSET, поэтому
+        чтение любой страницы стоит одинаково независимо от её номера.
+        
+        Args:
+            limit: Размер страницы
+            sort_column: Колонка сортировки (ключ USAGE_LOG_SORT_COLUMNS)
+            descending: Сортировка по убыванию
+            search: Подстрока названия (None — без фильтра)
+            after: Ключ последней строки предыдущей страницы (None — первая страница)
+            
+        Returns:
+            list: Список UsageLogRecord
+        """
+        column = self.USAGE_LOG_SORT_COLUMNS[sort_column]
+        stmt = select(*self._record_columns(UsageLog, UsageLogRecord))
+        if search:
+            pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            stmt = stmt.where(UsageLog.item_name.like(f"%{pattern}%", escape='\\'))
+        if after is not None:
+            value, last_id = after
+            # Отдельное условие на колонку позволяет базе читать индекс с нужного места
+            if descending:
+                stmt = stmt.where(column <= value, (column < value) | (UsageLog.id < last_id))
+            else:
+                stmt = stmt.where(column >= value, (column > value) | (UsageLog.id > last_id))
+        if descending:
+            stmt = stmt.order_by(column.desc(), UsageLog.id.desc())
+        else:
+            stmt = stmt.order_by(column.asc(), UsageLog.id.asc())
+        return self._fetch_records(UsageLogRecord, stmt.limit(limit))
+    
+    def get_usage_intervals(self, start_time, end_time) -> list:
+        """
+        Интервалы логов, пересекающих период [start_time, end_time)
+        
+        Returns:
+            list: Кортежи (item_type, item_name, start_time, end_time, duration);
+                  end_time пуст у незакрытых логов
+        """
+        stmt = select(UsageLog.item_type, UsageLog.item_name, UsageLog.start_time,
+                      UsageLog.end_time, UsageLog.duration)\
+            .where(UsageLog.start_time < end_time)\
+            .where((UsageLog.end_time.is_(None)) | (UsageLog.end_time > start_time))
+        with self.engine.connect() as connection:
+            return connection.execute(stmt).all()
+    
+    def get_usage_watermark(self, start_time, end_time) -> tuple:
+        """
+        Отметка данных использования за период для проверки кэша отчётов
+        
+        Складывается из максимального ID лога (новые логи) и суммы суточной
+        сводки за дни периода (контрольные точки и завершение сессий
+        обновляют сводку в той же транзакции, что и логи).
+        
+        Returns:
+            tuple: (max id, строк сводки, сумма минут, сумма сессий)
+        """
+        last_day = (end_time - timedelta(microseconds=1)).date()
+        daily = select(func.count(), func.coalesce(func.sum(UsageDaily.total_minutes), 0.0),
+                       func.coalesce(func.sum(UsageDaily.sessions), 0))\
+            .where(UsageDaily.date >= start_time.date())\
+            .where(UsageDaily.date <= last_day)
+        with self.engine.connect() as connection:
+            max_id = connection.execute(select(func.max(UsageLog.id))).scalar() or 0
+            rows, minutes, sessions = connection.execute(daily).one()
+        return max_id, rows, round(float(minutes), 6), int(sessions)
+    
+    def reconcile_open_usage_logs(self, keep_session_keys=()) -> int:
+        """
+        Закрытие логов, оставшихся открытыми после аварийного завершения
+        
+        Один запрос: сессия закрывается на последней контрольной точке
+        (или в момент начала, если контрольных точек не было); длительность
+        уже соответствует этой точке.
+        
+        Args:
+            keep_session_keys: Ключи сессий текущего запуска, которые не закрываются
+        
+        Returns:
+            int: Количество закрытых логов
+        """
+        stmt = update(UsageLog)\
+            .where(UsageLog.end_time.is_(None))\
+            .values(end_time=func.coalesce(UsageLog.checkpoint_time, UsageLog.start_time))
+        if keep_session_keys:
+            stmt = stmt.where(or_(UsageLog.session_key.is_(None),
+                                  UsageLog.session_key.not_in(list(keep_session_keys))))
+        try:
+            with self.engine.begin() as connection:
+                closed = connection.execute(stmt).rowcount
+            if closed:
+                logger.info(f"Закрыто незавершённых логов после прошлого запуска: {closed}")
+            return closed
+        except SQLAlchemyError as e:
+            logger.error(f"Ошибка закрытия незавершённых логов: {e}")
+            raise
+    
+    # Перенос журнала событий
+    def get_spool_offset(self, spool_id: str) -> int:
+        """Смещение, до которого журнал spool_id уже перенесён (0 если не переносился)"""
+        stmt = select(SpoolOffset.position).where(SpoolOffset.spool_id == spool_id)
+        with self.engine.connect() as connection:
+            return connection.execute(stmt).scalar() or 0
+    
+    def delete_spool_offset(self, spool_id: str):
+        """Удаление отметки переноса очищенного журнала"""
+        with self.engine.begin() as connection:
+            connection.execute(delete(SpoolOffset).where(SpoolOffset.spool_id == spool_id))
+    
+    def apply_usage_events(self, spool_id: str, records: list, position: int):
+        """
+        Применение пачки событий журнала одной транзакцией
+        
+        Логи вставляются по session_key без дублей, их длительность
+        и время окончания обновляются одним executemany, суточная сводка —
+        одним upsert. В той же транзакции сохраняется отметка переноса,
+        поэтому каждое событие применяется ровно один раз.
+        
+        Args:
+            spool_id: Идентификатор журнала
+            records: События (SpoolRecord) в порядке записи
+            position: Смещение в журнале после последнего события пачки
+        """
+        sessions = {}
+        totals = {}
+        for record in records:
+            sessions[record.session_key] = record
+            accumulate_daily(totals, record.item_type, record.item_name,
+                             record.interval_start, record.interval_end,
+                             new_session=record.kind == EVENT_START)
+        
+        logs = [{
+            'session_key': key,
+            'item_type': record.item_type,
+            'item_name': record.item_name,
+            'start_time': record.session_start,
+            'duration': 0.0,
+        } for key, record in sessions.items()]
+        states = [{
+            'b_session_key': key,
+            'b_duration': record.duration,
+            'b_checkpoint_time': record.interval_end,
+            'b_end_time': record.interval_end if record.kind == EVENT_END else None,
+        } for key, record in sessions.items() if record.kind != EVENT_START]
+        
+        table = UsageLog.__table__
+        session = self.get_session()
+        try:
+            self._upsert(session, UsageLog, logs, key_columns=['session_key'], update_columns=[])
+            if states:
+                session.execute(
+                    update(table)
+                    .where(table.c.session_key == bindparam('b_session_key'))
+                    .values(duration=bindparam('b_duration'),
+                            checkpoint_time=bindparam('b_checkpoint_time'),
+                            end_time=bindparam('b_end_time')),
+                    states
+                )
+            self._upsert(session, UsageDaily, list(rows_from_totals(totals)),
+                         key_columns=['date', 'item_type', 'item_name'],
+                         update_columns=['total_minutes', 'sessions'],
+                         accumulate=True)
+            self._upsert(session, SpoolOffset, [{'spool_id': spool_id, 'position': position}],
+                         key_columns=['spool_id'], update_columns=['position'])
+            session.commit()
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Ошибка переноса событий журнала: {e}")
+            raise
+        finally:
+            session.close()
+    
+    # Методы для работы с суточной сводкой
+    def rebuild_usage_daily(self) -> int:
+        """
+        Полное перестроение суточной сводки из usage_logs
+        
+        Логи читаются потоком, суммы собираются в памяти и записываются
+        пачками в одной транзакции вместе с очисткой старой сводки.
+        
+        Returns:
+            int: Количество строк в новой сводке
+        """
+        session = self.get_session()
+        try:
+            totals = {}
+            query = session.query(UsageLog.item_type, UsageLog.item_name, UsageLog.start_time,
+                                  UsageLog.end_time, UsageLog.duration)
+            for item_type, item_name, start_time, end_time, duration in query.yield_per(10000):
+                if end_time is None:
+                    end_time = start_time + timedelta(minutes=duration or 0.0)
+                accumulate_daily(totals, item_type, item_name, start_time, end_time)
+            
+            rows = list(rows_from_totals(totals))
+            session.execute(delete(UsageDaily))
+            for offset in range(0, len(rows), self.BULK_CHUNK_SIZE):
+                session.execute(UsageDaily.__table__.insert(), rows[offset:offset + self.BULK_CHUNK_SIZE])
+            session.commit()
+            logger.info(f"Суточная сводка перестроена: {len(rows)} строк")
+            return len(rows)
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.error(f"Ошибка перестроения суточной сводки: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def get_daily_usage(self, start_date: date, end_date: date) -> list:
+        """
+        Получение суточной сводки за период (включительно)
+        
+        Returns:
+            list: Строки (date, item_type, item_name, total_minutes, sessions)
+        """
         session = self.get_session()
         try:
-            return session.query(UsageLog).order_by(UsageLog.start_time.desc()).limit(limit).all()
+            return session.query(UsageDaily.date, UsageDaily.item_type, UsageDaily.item_name,
+                                 UsageDaily.total_minutes, UsageDaily.sessions)\
+                .filter(UsageDaily.date >= start_date, UsageDaily.date <= end_date)\
+                .order_by(UsageDaily.date).all()
         finally:
             session.close()
+    
+    def get_usage_totals(self, start_date: date, end_date: date) -> list:
+        """
+        Суммарное использование по элементам за период (включительно)
+        
+        Returns:
+            list: Строки (item_type, item_name, total_minutes, sessions),
+                  отсортированные по убыванию времени
+        """
+        session = self.get_session()
+        try:
+            total = func.sum(UsageDaily.total_minutes)
+            return session.query(UsageDaily.item_type, UsageDaily.item_name,
+                                 total, func.sum(UsageDaily.sessions))\
+                .filter(UsageDaily.date >= start_date, UsageDaily.date <= end_date)\
+                .group_by(UsageDaily.item_type, UsageDaily.item_name)\
+                .order_by(total.desc()).all()
+        finally:
+            session.close()
+
+
+def upgrade_schema(engine):
+    """
+    Добавление новых nullable-колонок и индексов в уже существующие таблицы
+    
+    create_all создаёт только отсутствующие таблицы, поэтому колонки,
+    появившиеся в моделях позже, добавляются через ALTER TABLE.
+    
+    Args:
+        engine: Engine SQLAlchemy
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                logger.warning(f"Колонка {table.name}.{column.name} не добавлена: NOT NULL без значения")
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info(f"Добавлена колонка {table.name}.{column.name}")
+        
+        existing_indexes = {index['name'] for index in inspect(engine).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(engine)
+                logger.info(f"Добавлен индекс {index.name}")
 
 
 def init_db():
@@ -263,7 +722,9 @@ def init_db():
     """
     try:
         # Создаём все таблицы
-        Base.metadata.create_all(Database().engine)
+        engine = Database().engine
+        Base.metadata.create_all(engine)
+        upgrade_schema(engine)
         logger.info("База данных инициализирована успешно")
         return True
     except Exception as e:
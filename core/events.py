@@ -0,0 +1,236 @@
+"""
+Модуль шины событий внутри процесса
+"""
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from threading import Condition, Lock, Thread
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Поведение при переполнении очереди подписчика
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+
+@dataclass(frozen=True)
+class SubscriberStats:
+    """
+    Состояние очереди подписчика
+
+    Attributes:
+        name: Имя подписчика
+        queued: Событий в очереди
+        max_queued: Наибольшая длина очереди
+        delivered: Доставлено событий
+        dropped: Отброшено при переполнении
+        coalesced: Заменено более новым событием с тем же ключом
+        lag: Сколько секунд ждёт самое старое событие в очереди
+    """
+    name: str
+    queued: int
+    max_queued: int
+    delivered: int
+    dropped: int
+    coalesced: int
+    lag: float
+
+
+class Subscription:
+    """
+    Подписка на события шины
+
+    Без очереди (max_queue=None) обработчик вызывается в потоке публикации.
+    С очередью события складываются в ограниченную очередь, а обработчик
+    вызывается в отдельном потоке подписки, поэтому медленный подписчик
+    не задерживает публикующий поток. Если coalesce возвращает ключ,
+    событие заменяет ещё не доставленное событие с тем же ключом.
+    """
+
+    def __init__(self, callback: Callable, types: Tuple[type, ...], name: str,
+                 max_queue: Optional[int] = None, overflow: str = DROP_OLDEST,
+                 coalesce: Optional[Callable[[object], Optional[Hashable]]] = None):
+        self.callback = callback
+        self.types = types
+        self.name = name
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.coalesce = coalesce
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_queued = 0
+        # Элементы очереди: [ключ объединения, событие, момент публикации]
+        self._queue: Deque[list] = deque()
+        self._pending: Dict[Hashable, list] = {}
+        self._condition = Condition()
+        self._closed = False
+        self._thread: Optional[Thread] = None
+        if max_queue is not None:
+            self._thread = Thread(target=self._dispatch_loop, name=f"events-{name}", daemon=True)
+            self._thread.start()
+
+    @property
+    def queued(self) -> bool:
+        """Подписка с собственной очередью и потоком"""
+        return self._thread is not None
+
+    def put(self, event):
+        """Доставка события (вызывается потоком публикации)"""
+        if self._thread is None:
+            self._deliver(event)
+            return
+        key = self.coalesce(event) if self.coalesce is not None else None
+        with self._condition:
+            if self._closed:
+                return
+            entry = self._pending.get(key) if key is not None else None
+            if entry is not None:
+                # Место в очереди сохраняется, событие заменяется более новым
+                entry[1] = event
+                self.coalesced += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.overflow == DROP_NEWEST:
+                    return
+                old_key = self._queue.popleft()[0]
+                if old_key is not None:
+                    del self._pending[old_key]
+            entry = [key, event, time.monotonic()]
+            self._queue.append(entry)
+            if key is not None:
+                self._pending[key] = entry
+            self.max_queued = max(self.max_queued, len(self._queue))
+            self._condition.notify()
+
+    def stats(self) -> SubscriberStats:
+        """Текущее состояние очереди"""
+        with self._condition:
+            lag = time.monotonic() - self._queue[0][2] if self._queue else 0.0
+            return SubscriberStats(self.name, len(self._queue), self.max_queued, self.delivered,
+                                   self.dropped, self.coalesced, lag)
+
+    def close(self, timeout: float = 1.0):
+        """
+        Остановка потока подписки
+
+        Уже поставленные в очередь события доставляются, если поток
+        успевает сделать это за timeout.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _deliver(self, event):
+        try:
+            self.callback(event)
+        except Exception as e:
+            logger.error(f"Ошибка обработки события {type(event).__name__} подписчиком {self.name}: {e}",
+                         exc_info=True)
+        self.delivered += 1
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                key, event, _ = self._queue.popleft()
+                if key is not None:
+                    del self._pending[key]
+            self._deliver(event)
+
+
+class EventBus:
+    """
+    Шина событий внутри процесса
+
+    Компоненты публикуют типизированные события (MonitorEvent, RuleDelta),
+    подписчики получают события выбранных типов. Публикация не берёт
+    блокировок: список подписок заменяется целиком при подписке и отписке.
+    Подписчики, влияющие на блокировку (Blocker, Scheduler), вызываются
+    сразу в потоке публикации; медленные подписчики (окно, IPC) получают
+    события через собственную ограниченную очередь.
+    """
+
+    def __init__(self):
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._lock = Lock()
+
+    def subscribe(self, callback: Callable, types, name: Optional[str] = None,
+                  max_queue: Optional[int] = None, overflow: str = DROP_OLDEST,
+                  coalesce: Optional[Callable[[object], Optional[Hashable]]] = None) -> Subscription:
+        """
+        Подписка на события
+
+        Args:
+            callback: Обработчик события
+            types: Тип события или кортеж типов
+            name: Имя подписчика для статистики и журнала
+            max_queue: Размер очереди (None — вызов в потоке публикации)
+            overflow: Что отбрасывать при переполнении (DROP_OLDEST, DROP_NEWEST)
+            coalesce: Ключ объединения событий (None — событие не объединяется)
+
+        Returns:
+            Subscription: Подписка
+        """
+        if not isinstance(types, tuple):
+            types = (types,)
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Неизвестное поведение при переполнении: {overflow}")
+        name = name or getattr(callback, '__qualname__', repr(callback))
+        subscription = Subscription(callback, types, name, max_queue, overflow, coalesce)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, callback: Callable, types=None):
+        """
+        Отписка обработчика
+
+        Args:
+            callback: Обработчик или Subscription
+            types: Отписать только от этих типов (None — от всех)
+        """
+        if types is not None and not isinstance(types, tuple):
+            types = (types,)
+        with self._lock:
+            removed = [subscription for subscription in self._subscriptions
+                       if (subscription is callback or subscription.callback == callback)
+                       and (types is None or subscription.types == types)]
+            self._subscriptions = tuple(subscription for subscription in self._subscriptions
+                                        if subscription not in removed)
+        for subscription in removed:
+            subscription.close()
+
+    def has_subscribers(self, event_type: type) -> bool:
+        """Есть ли подписчики на события этого типа"""
+        return any(issubclass(event_type, subscription.types) for subscription in self._subscriptions)
+
+    def publish(self, event):
+        """
+        Публикация события
+
+        Подписчики без очереди вызываются сразу и по порядку подписки,
+        остальным событие ставится в очередь.
+        """
+        for subscription in self._subscriptions:
+            if isinstance(event, subscription.types):
+                subscription.put(event)
+
+    def stats(self) -> List[SubscriberStats]:
+        """Состояние очередей подписчиков с очередью"""
+        return [subscription.stats() for subscription in self._subscriptions if subscription.queued]
+
+    def close(self):
+        """Остановка потоков всех подписок"""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, ()
+        for subscription in subscriptions:
+            subscription.close()
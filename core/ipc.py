@@ -0,0 +1,555 @@
+"""
+Модуль локального IPC агента: состояние, правила и поток событий
+
+Кадр протокола — длина (4 байта, big-endian) и JSON в UTF-8.
+Запрос: {"id": 1, "method": "status", "params": {...}},
+ответ: {"id": 1, "result": ...} или {"id": 1, "error": "..."}.
+После subscribe сервер присылает кадры {"type": "events", "events": [...]},
+в которых события накапливаются, пока клиент не успевает читать.
+"""
+import asyncio
+import dataclasses
+import enum
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+from collections import deque
+from datetime import date, datetime, time
+from typing import Callable, Deque, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Адрес по умолчанию: именованный канал в Windows, Unix-сокет в остальных системах
+DEFAULT_ADDRESS = r'\\.\pipe\saveconfe-agent' if sys.platform == 'win32' else 'saveconfe-agent.sock'
+# Максимальный размер кадра
+MAX_FRAME_SIZE = 16 * 2 ** 20
+
+_HEADER = struct.Struct('>I')
+
+
+class IpcError(Exception):
+    """Ошибка IPC: отказ сервера или разрыв соединения"""
+
+
+def _to_json(value):
+    """Преобразование значений, которые json не сериализует сам"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def encode_frame(message: dict) -> bytes:
+    """Кадр протокола: длина и JSON"""
+    payload = json.dumps(message, default=_to_json, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_FRAME_SIZE:
+        raise IpcError(f"Кадр слишком большой: {len(payload)} байт")
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[dict]:
+    """
+    Чтение кадра из потока asyncio
+
+    Returns:
+        Optional[dict]: Сообщение или None, если соединение закрыто
+    """
+    try:
+        header = await reader.readexactly(_HEADER.size)
+        (size,) = _HEADER.unpack(header)
+        if size > MAX_FRAME_SIZE:
+            raise IpcError(f"Кадр слишком большой: {size} байт")
+        return json.loads(await reader.readexactly(size))
+    except asyncio.IncompleteReadError:
+        return None
+
+
+def event_to_message(event) -> dict:
+    """Событие монитора в виде сообщения потока событий"""
+    return dict(dataclasses.asdict(event), type='monitor')
+
+
+def event_from_message(message: dict):
+    """
+    Восстановление MonitorEvent из сообщения потока событий
+
+    Args:
+        message: Сообщение с type == 'monitor'
+
+    Returns:
+        MonitorEvent
+    """
+    from core.monitor import MonitorEvent
+
+    fields = {field.name for field in dataclasses.fields(MonitorEvent)}
+    values = {key: value for key, value in message.items() if key in fields}
+    for key in ('at', 'start_time', 'next_boundary'):
+        if values.get(key):
+            values[key] = datetime.fromisoformat(values[key])
+    return MonitorEvent(**values)
+
+
+def _records(records) -> list:
+    """Записи (именованные кортежи) в виде словарей: json записал бы их списками"""
+    return [record._asdict() for record in records]
+
+
+def _parse_time(value: Optional[str]) -> Optional[time]:
+    return time.fromisoformat(value) if value else None
+
+
+def _parse_date(value: Optional[str]) -> date:
+    return date.fromisoformat(value) if value else datetime.now().date()
+
+
+class _Connection:
+    """Подключённый клиент: очередь событий и признак авторизации"""
+
+    def __init__(self, writer: asyncio.StreamWriter, max_pending: int):
+        self.writer = writer
+        self.user = None
+        self.subscribed = False
+        self.pending: Deque[dict] = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.wakeup = asyncio.Event()
+        # Ответы и пачки событий пишутся разными задачами
+        self.write_lock = asyncio.Lock()
+
+    async def send(self, message: dict):
+        """Отправка кадра с ожиданием освобождения буфера"""
+        async with self.write_lock:
+            self.writer.write(encode_frame(message))
+            await self.writer.drain()
+
+    def push(self, message: dict):
+        """Добавление события; при переполнении вытесняется самое старое"""
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(message)
+        self.wakeup.set()
+
+
+class IpcServer:
+    """
+    Локальный IPC-сервер агента
+
+    Работает в отдельном потоке со своим циклом asyncio. Запросы
+    к базе данных выполняются в пуле потоков, чтобы медленный запрос
+    не задерживал остальных клиентов. События публикуются из любого
+    потока через publish(); каждому подписчику они отправляются отдельной
+    задачей: пока клиент не дочитал предыдущий кадр, события копятся
+    и уходят следующим кадром пачкой до max_batch штук. Если очередь
+    клиента переполнена, старые события вытесняются, а их количество
+    передаётся в поле dropped.
+
+    Чтение состояния, сводок, метрик и подписка доступны без входа; изменение
+    правил и профилирование требуют входа администратора (метод login).
+    """
+
+    def __init__(self, agent, address: str = DEFAULT_ADDRESS, auth=None,
+                 max_batch: int = 500, max_pending: int = 10000):
+        """
+        Инициализация сервера
+
+        Args:
+            agent: Агент (db, rules, monitor, scheduler, blocker)
+            address: Путь Unix-сокета или имя именованного канала
+            auth: AuthManager для входа (по умолчанию на базе агента)
+            max_batch: Максимум событий в одном кадре
+            max_pending: Максимум неотправленных событий на клиента
+        """
+        self.agent = agent
+        self.address = address
+        self._auth = auth
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._servers = []
+        self._connections = set()
+        self._handlers = set()
+        self._stopped: Optional[asyncio.Event] = None
+        self._methods: Dict[str, Callable] = {
+            'status': self._status,
+            'rules.list': self._rules_list,
+            'rules.add_site': self._add_site,
+            'rules.delete_site': self._delete_site,
+            'rules.add_app': self._add_app,
+            'rules.delete_app': self._delete_app,
+            'usage.summary': self._usage_summary,
+            'metrics': self._metrics,
+            'profile': self._profile,
+        }
+        # Профилирование включает tracemalloc во всём процессе и пишет архивы на диск
+        self._admin_methods = {'rules.add_site', 'rules.delete_site', 'rules.add_app', 'rules.delete_app',
+                               'profile'}
+
+    @property
+    def auth(self):
+        """AuthManager создаётся при первом входе (bcrypt не нужен, пока нет запросов на изменение)"""
+        if self._auth is None:
+            from core.auth import AuthManager
+            self._auth = AuthManager(self.agent.db)
+        return self._auth
+
+    def start(self, timeout: float = 5.0):
+        """Запуск сервера в отдельном потоке (возвращается после начала приёма подключений)"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.ProactorEventLoop() if sys.platform == 'win32' else asyncio.new_event_loop()
+            self.loop = loop
+            try:
+                loop.run_until_complete(self._serve(started))
+            except Exception as e:
+                errors.append(e)
+                started.set()
+            finally:
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name='ipc', daemon=True)
+        self._thread.start()
+        if not started.wait(timeout):
+            raise IpcError("IPC-сервер не запустился")
+        if errors:
+            raise errors[0]
+        logger.info(f"IPC-сервер слушает {self.address}")
+
+    def stop(self):
+        """Остановка сервера и закрытие подключений"""
+        if self.loop is None or self._thread is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+        except RuntimeError:
+            pass  # Цикл уже закрыт
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.loop = None
+
+    def publish(self, message: dict):
+        """
+        Публикация события подписчикам (из любого потока)
+
+        Args:
+            message: Сообщение с полем type
+        """
+        loop = self.loop
+        if loop is None or not self._connections:
+            return
+        try:
+            loop.call_soon_threadsafe(self._publish, message)
+        except RuntimeError:
+            pass  # Сервер остановлен
+
+    def publish_monitor_event(self, event):
+        """Подписчик событий монитора"""
+        self.publish(event_to_message(event))
+
+    def publish_rules_delta(self, delta):
+        """Подписчик изменений правил"""
+        self.publish({'type': 'rules', 'version': delta.version,
+                      'added_sites': _records(delta.added_sites), 'removed_sites': _records(delta.removed_sites),
+                      'added_apps': _records(delta.added_apps), 'removed_apps': _records(delta.removed_apps)})
+
+    # Цикл asyncio
+
+    async def _serve(self, started: threading.Event):
+        self._stopped = asyncio.Event()
+        if sys.platform == 'win32':
+            def factory():
+                reader = asyncio.StreamReader()
+                return asyncio.StreamReaderProtocol(reader, self._on_client)
+            self._servers = await self.loop.start_serving_pipe(factory, self.address)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)  # Сокет, оставшийся после аварийного завершения
+            self._servers = [await asyncio.start_unix_server(self._on_client, path=self.address)]
+        started.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            for server in self._servers:
+                server.close()
+            # Закрытие соединений завершает обработчики клиентов (чтение получает конец потока)
+            for connection in list(self._connections):
+                connection.writer.close()
+            if self._handlers:
+                await asyncio.wait(list(self._handlers), timeout=1.0)
+            if sys.platform != 'win32' and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    def _publish(self, message: dict):
+        for connection in self._connections:
+            if connection.subscribed:
+                connection.push(message)
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = _Connection(writer, self.max_pending)
+        self._connections.add(connection)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        sender = asyncio.ensure_future(self._send_events(connection))
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                await connection.send(await self._handle(connection, request))
+        except (ConnectionError, IpcError, ValueError) as e:
+            logger.warning(f"IPC-клиент отключён: {e}")
+        finally:
+            self._connections.discard(connection)
+            self._handlers.discard(handler)
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            writer.close()
+
+    async def _send_events(self, connection: _Connection):
+        """Отправка накопленных событий клиенту пачками"""
+        try:
+            while True:
+                await connection.wakeup.wait()
+                connection.wakeup.clear()
+                while connection.pending:
+                    count = min(self.max_batch, len(connection.pending))
+                    message = {'type': 'events', 'events': [connection.pending.popleft() for _ in range(count)]}
+                    if connection.dropped:
+                        message['dropped'], connection.dropped = connection.dropped, 0
+                    await connection.send(message)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+    async def _handle(self, connection: _Connection, request: dict) -> dict:
+        """Выполнение запроса клиента"""
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+        try:
+            if method == 'subscribe':
+                connection.subscribed = True
+                return {'id': request_id, 'result': True}
+            if method == 'unsubscribe':
+                connection.subscribed = False
+                connection.pending.clear()
+                return {'id': request_id, 'result': True}
+            if method == 'login':
+                user = await self.loop.run_in_executor(
+                    None, self.auth.verify_credentials, params.get('username', ''), params.get('password', ''))
+                connection.user = user
+                return {'id': request_id, 'result': user is not None}
+            handler = self._methods.get(method)
+            if handler is None:
+                return {'id': request_id, 'error': f"Неизвестный метод: {method}"}
+            if method in self._admin_methods and not self._is_admin(connection):
+                return {'id': request_id, 'error': "Требуется вход администратора"}
+            result = await self.loop.run_in_executor(None, lambda: handler(**params))
+            return {'id': request_id, 'result': result}
+        except TypeError as e:
+            return {'id': request_id, 'error': f"Неверные параметры: {e}"}
+        except Exception as e:
+            logger.error(f"Ошибка IPC-запроса {method}: {e}", exc_info=True)
+            return {'id': request_id, 'error': str(e)}
+
+    @staticmethod
+    def _is_admin(connection: _Connection) -> bool:
+        from models.user import UserRole
+        return connection.user is not None and connection.user.role == UserRole.ADMIN
+
+    # Методы (выполняются в пуле потоков)
+
+    def _status(self) -> dict:
+        agent = self.agent
+        # Опубликованное состояние монитора читается без блокировок и копирования
+        state = agent.monitor.state
+        return {
+            'pid': os.getpid(),
+            'at': state.at,
+            'monitoring': state.monitoring,
+            'blocking': agent.blocker.is_blocking_enabled,
+            'db_available': state.db_available,
+            'rules_version': agent.rules.db_version,
+            'sites': len(agent.rules.sites),
+            'apps': len(agent.rules.apps),
+            'active': [dataclasses.asdict(session) for session in state.sessions],
+            'subscribers': sum(1 for connection in list(self._connections) if connection.subscribed),
+            'queues': [dataclasses.asdict(stats) for stats in agent.bus.stats()],
+        }
+
+    def _rules_list(self) -> dict:
+        return {'sites': _records(self.agent.rules.get_site_rules()),
+                'apps': _records(self.agent.rules.get_app_rules())}
+
+    def _add_site(self, url: str, time_limit: int = 0, schedule_start: str = None, schedule_end: str = None):
+        rule = self.agent.rules.add_site(url, time_limit, _parse_time(schedule_start), _parse_time(schedule_end))
+        return rule._asdict()
+
+    def _delete_site(self, rule_id: int) -> bool:
+        return self.agent.rules.delete_site(rule_id)
+
+    def _add_app(self, app_path: str, app_name: str, time_limit: int = 0,
+                 schedule_start: str = None, schedule_end: str = None):
+        rule = self.agent.rules.add_app(app_path, app_name, time_limit,
+                                        _parse_time(schedule_start), _parse_time(schedule_end))
+        return rule._asdict()
+
+    def _delete_app(self, rule_id: int) -> bool:
+        return self.agent.rules.delete_app(rule_id)
+
+    def _metrics(self) -> dict:
+        metrics = self.agent.monitor.metrics
+        return {'enabled': metrics.enabled, 'rows': metrics.summary() if metrics.enabled else []}
+
+    def _profile(self, seconds: float = 30) -> dict:
+        return {'path': self.agent.profile(seconds), 'seconds': seconds}
+
+    def _usage_summary(self, start: str = None, end: str = None) -> list:
+        rows = self.agent.db.get_usage_totals(_parse_date(start), _parse_date(end))
+        return [{'item_type': item_type, 'item_name': item_name,
+                 'minutes': float(minutes or 0), 'sessions': int(sessions or 0)}
+                for item_type, item_name, minutes, sessions in rows]
+
+
+class IpcClient:
+    """
+    Клиент IPC агента (блокирующий)
+
+    Ответы на запросы и события идут по одному соединению: события,
+    пришедшие во время ожидания ответа, сохраняются и выдаются events().
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: Optional[float] = 5.0):
+        """
+        Подключение к агенту
+
+        Args:
+            address: Путь Unix-сокета или имя именованного канала
+            timeout: Таймаут ожидания ответа в секундах (Unix-сокет)
+        """
+        self.address = address
+        self.timeout = timeout
+        self._next_id = 0
+        self._events: Deque[dict] = deque()
+        self.dropped = 0
+        try:
+            if sys.platform == 'win32':
+                self._pipe = open(address, 'r+b', buffering=0)
+                self._sock = None
+            else:
+                self._pipe = None
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.settimeout(timeout)
+                self._sock.connect(address)
+        except OSError as e:
+            raise IpcError(f"Агент недоступен по адресу {address}: {e}") from e
+
+    def close(self):
+        """Закрытие соединения"""
+        if self._sock is not None:
+            self._sock.close()
+        if self._pipe is not None:
+            self._pipe.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, data: bytes):
+        if self._sock is not None:
+            self._sock.sendall(data)
+        else:
+            self._pipe.write(data)
+
+    def _read_exact(self, size: int) -> bytes:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            if self._sock is not None:
+                count = self._sock.recv_into(view[received:])
+            else:
+                count = self._pipe.readinto(view[received:])
+            if not count:
+                raise IpcError("Соединение с агентом закрыто")
+            received += count
+        return bytes(buffer)
+
+    def _read_frame(self) -> dict:
+        (size,) = _HEADER.unpack(self._read_exact(_HEADER.size))
+        if size > MAX_FRAME_SIZE:
+            raise IpcError(f"Кадр слишком большой: {size} байт")
+        return json.loads(self._read_exact(size))
+
+    def _take_events(self, message: dict):
+        self._events.extend(message['events'])
+        self.dropped += message.get('dropped', 0)
+
+    def call(self, method: str, **params):
+        """
+        Вызов метода агента
+
+        Args:
+            method: Название метода
+            **params: Параметры
+
+        Returns:
+            Результат метода
+
+        Raises:
+            IpcError: Ошибка метода или соединения
+        """
+        self._next_id += 1
+        request_id = self._next_id
+        try:
+            self._send(encode_frame({'id': request_id, 'method': method, 'params': params}))
+            while True:
+                message = self._read_frame()
+                if message.get('type') == 'events':
+                    self._take_events(message)
+                elif message.get('id') == request_id:
+                    break
+        except (OSError, ValueError) as e:
+            raise IpcError(f"Ошибка обмена с агентом: {e}") from e
+        if 'error' in message:
+            raise IpcError(message['error'])
+        return message.get('result')
+
+    def subscribe(self):
+        """Подписка на поток событий"""
+        self.call('subscribe')
+
+    def events(self, timeout: Optional[float] = None) -> Iterator[dict]:
+        """
+        События агента по одному (бесконечный итератор)
+
+        Args:
+            timeout: Таймаут ожидания кадра (None — без ограничения)
+
+        Raises:
+            IpcError: Соединение закрыто или истёк таймаут
+        """
+        if self._sock is not None:
+            self._sock.settimeout(timeout)
+        try:
+            while True:
+                while self._events:
+                    yield self._events.popleft()
+                try:
+                    message = self._read_frame()
+                except (OSError, ValueError) as e:
+                    raise IpcError(f"Ошибка чтения событий: {e}") from e
+                if message.get('type') == 'events':
+                    self._take_events(message)
+        finally:
+            if self._sock is not None and self._sock.fileno() != -1:
+                self._sock.settimeout(self.timeout)
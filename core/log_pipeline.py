@@ -0,0 +1,286 @@
+"""
+Модуль асинхронного логирования: очередь, ротация со сжатием, JSON и подавление повторов
+"""
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Флаг командной строки: писать лог в формате JSON lines
+LOG_JSON_FLAG = '--log-json'
+# Формат текстового лога
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Размер файла лога, после которого он сжимается и начинается новый
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+# Сколько сжатых файлов хранить
+DEFAULT_BACKUP_COUNT = 5
+# Окно подавления повторяющихся сообщений, секунды
+DEFAULT_DEDUPE_WINDOW = 60.0
+# Наибольшая длина очереди; при переполнении сообщения отбрасываются
+DEFAULT_QUEUE_SIZE = 10000
+
+_NUMBERS = re.compile(r'\d+')
+
+
+def _compress_namer(name: str) -> str:
+    return name + '.gz'
+
+
+def _compress_rotator(source: str, dest: str):
+    """Сжатие закрытого файла лога в архив ротации"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Запись лога одной строкой JSON
+
+    Поля: time, level, logger, thread, message, а также exc (текст
+    исключения) и repeated (подавлено повторов), если они есть.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        repeated = getattr(record, 'repeated', 0)
+        if repeated:
+            entry['repeated'] = repeated
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DedupeFilter(logging.Filter):
+    """
+    Подавление повторяющихся сообщений
+
+    Сообщения сравниваются без чисел (PID, счётчики), поэтому завершение
+    того же приложения на каждой проверке считается повтором. Первое
+    сообщение пропускается, повторы в течение window секунд подавляются;
+    следующее после окна сообщение выводится с количеством подавленных
+    (атрибут repeated и приписка к тексту). CRITICAL не подавляется.
+    """
+
+    def __init__(self, window: float = DEFAULT_DEDUPE_WINDOW, clock: Callable[[], float] = time.monotonic,
+                 max_keys: int = 1000):
+        """
+        Инициализация
+
+        Args:
+            window: Окно подавления, секунды
+            clock: Источник времени (монотонный)
+            max_keys: Сколько разных сообщений помнить
+        """
+        super().__init__()
+        self.window = window
+        self.clock = clock
+        self.max_keys = max_keys
+        self._seen: Dict[tuple, list] = {}  # ключ -> [начало окна, подавлено, последняя запись]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, record.levelno, _NUMBERS.sub('#', record.getMessage()))
+        now = self.clock()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.window:
+                seen[1] += 1
+                seen[2] = record
+                return False
+            if seen is not None and seen[1]:
+                self._mark_repeated(record, seen[1])
+            if len(self._seen) >= self.max_keys:
+                self._prune(now)
+            self._seen[key] = [now, 0, None]
+        return True
+
+    def pending(self) -> List[logging.LogRecord]:
+        """
+        Последние подавленные записи, о которых ещё не сообщено (при остановке)
+
+        Returns:
+            List[logging.LogRecord]: Записи с количеством подавленных повторов
+        """
+        with self._lock:
+            records = []
+            for seen in self._seen.values():
+                if seen[1]:
+                    records.append(self._mark_repeated(seen[2], seen[1]))
+                    seen[1] = 0
+            return records
+
+    def _prune(self, now: float):
+        """Забыть сообщения с истёкшим окном без подавленных повторов"""
+        for key, seen in list(self._seen.items()):
+            if now - seen[0] >= self.window and not seen[1]:
+                del self._seen[key]
+
+    def _mark_repeated(self, record: logging.LogRecord, count: int) -> logging.LogRecord:
+        record.msg = f"{record.getMessage()} (повторов за {self.window:.0f} с: {count})"
+        record.args = None
+        record.repeated = count
+        return record
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который при переполнении очереди отбрасывает запись и считает её
+
+    В очередь попадает копия записи с готовым текстом сообщения и текстом
+    исключения (exc_text), а форматирование строки выполняют обработчики
+    потока записи, поэтому JSON сохраняет исключение отдельным полем.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """
+    Асинхронное логирование
+
+    Логгеры пишут только в очередь (QueueHandler), а файл и консоль
+    обслуживает отдельный поток QueueListener, поэтому запись на диск
+    и сжатие архивов не задерживают поток мониторинга. Файл лога
+    сжимается в .gz при достижении max_bytes или, если задан when,
+    по времени (как TimedRotatingFileHandler). Повторяющиеся сообщения
+    подавляются DedupeFilter до постановки в очередь.
+    """
+
+    def __init__(self, filename: str, json_lines: bool = False, level: int = logging.INFO,
+                 max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT,
+                 when: Optional[str] = None, dedupe_window: float = DEFAULT_DEDUPE_WINDOW,
+                 console: bool = True, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Инициализация
+
+        Args:
+            filename: Файл лога
+            json_lines: Писать файл в формате JSON lines
+            level: Уровень логирования
+            max_bytes: Размер файла для ротации (если when не задан)
+            backup_count: Сколько сжатых файлов хранить
+            when: Ротация по времени ('midnight', 'H', ...) вместо размера
+            dedupe_window: Окно подавления повторов, секунды (0 — не подавлять)
+            console: Дублировать лог в консоль (всегда текстом)
+            queue_size: Наибольшая длина очереди
+        """
+        self.level = level
+        if when is not None:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                filename, when=when, backupCount=backup_count, encoding='utf-8')
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        file_handler.namer = _compress_namer
+        file_handler.rotator = _compress_rotator
+        file_handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+        self.handlers: List[logging.Handler] = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            self.handlers.append(console_handler)
+
+        self.queue_handler = _DroppingQueueHandler(queue.Queue(queue_size))
+        self.dedupe = DedupeFilter(dedupe_window) if dedupe_window > 0 else None
+        if self.dedupe is not None:
+            self.queue_handler.addFilter(self.dedupe)
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, *self.handlers,
+                                                       respect_handler_level=True)
+        self._logger: Optional[logging.Logger] = None
+
+    @property
+    def dropped(self) -> int:
+        """Отброшено записей из-за переполнения очереди"""
+        return self.queue_handler.dropped
+
+    def start(self, logger: Optional[logging.Logger] = None):
+        """
+        Подключение к логгеру и запуск потока записи
+
+        Args:
+            logger: Логгер (по умолчанию корневой); его прежние обработчики удаляются
+        """
+        self._logger = logger or logging.getLogger()
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+        self._logger.addHandler(self.queue_handler)
+        self._logger.setLevel(self.level)
+        self.listener.start()
+
+    def stop(self):
+        """Запись подавленных повторов и оставшейся очереди, остановка потока"""
+        if self._logger is None:
+            return
+        self._logger.removeHandler(self.queue_handler)
+        if self.dedupe is not None:
+            for record in self.dedupe.pending():
+                self.queue_handler.enqueue(self.queue_handler.prepare(record))
+        if self.dropped:
+            record = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                       f"Отброшено сообщений лога из-за переполнения очереди: {self.dropped}",
+                                       None, None)
+            self.queue_handler.enqueue(record)
+        self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+        self._logger = None
+
+
+def setup_logging(filename: str, argv: Optional[List[str]] = None) -> LogPipeline:
+    """
+    Настройка логирования приложения или агента
+
+    Запускает LogPipeline на корневом логгере и останавливает его при выходе.
+
+    Args:
+        filename: Файл лога
+        argv: Аргументы командной строки (--log-json включает JSON lines)
+
+    Returns:
+        LogPipeline: Запущенный конвейер
+    """
+    pipeline = LogPipeline(filename, json_lines=LOG_JSON_FLAG in (argv or []))
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    return pipeline
@@ -0,0 +1,323 @@
+"""
+Модуль метрик мониторинга и их выдачи в формате Prometheus
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Флаг командной строки агента для включения метрик
+METRICS_FLAG = '--metrics'
+# Порт выдачи метрик по умолчанию (только localhost)
+DEFAULT_METRICS_PORT = 9464
+# Границы корзин гистограмм времени, секунды
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def metrics_port_from_args(argv: List[str]) -> Optional[int]:
+    """
+    Порт метрик из командной строки: --metrics или --metrics=ПОРТ
+
+    Returns:
+        Optional[int]: Порт или None, если метрики не включены
+    """
+    for arg in argv:
+        if arg == METRICS_FLAG:
+            return DEFAULT_METRICS_PORT
+        if arg.startswith(METRICS_FLAG + '='):
+            return int(arg.split('=', 1)[1])
+    return None
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: str = '') -> str:
+    items = [f'{key}="{value}"' for key, value in labels]
+    if extra:
+        items.append(extra)
+    return '{' + ','.join(items) + '}' if items else ''
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами
+
+    Каждую гистограмму пишет один поток, читатели получают значения без блокировок:
+    при чтении во время записи одно наблюдение может попасть в сумму,
+    но ещё не в корзину, что для диагностики несущественно.
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последняя — больше всех границ
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Добавление наблюдения"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху: граница корзины, в которую он попадает"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class _Timer:
+    """Замер длительности блока в гистограмму"""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    """Замер при выключенных метриках: ничего не делает"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Метрики: счётчики, гистограммы времени и показатели
+
+    Счётчики и гистограммы обновляют поток мониторинга и поток переноса
+    в базу данных (каждый — свои), показатели
+    (количество сессий, длина очередей) вычисляются функциями в момент
+    чтения. Выключенные метрики ничего не записывают: timer() возвращает
+    общий пустой замер, а inc() сразу выходит.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Инициализация
+
+        Args:
+            enabled: Включить сбор метрик
+            buckets: Границы корзин гистограмм, секунды
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.gauges: Dict[str, Callable[[], object]] = {}
+        self._kinds: Dict[str, str] = {}  # Тип показателей, читаемых функцией: gauge или counter
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str):
+        """Описание метрики для выдачи Prometheus (# HELP)"""
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Увеличение счётчика
+
+        Args:
+            name: Название счётчика (с суффиксом _total)
+            value: Приращение
+            **labels: Метки
+        """
+        if not self.enabled:
+            return
+        key = (name, _labels(labels) if labels else ())
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def timer(self, name: str, **labels):
+        """
+        Замер длительности блока with в гистограмму
+
+        Args:
+            name: Название гистограммы (с суффиксом _seconds)
+            **labels: Метки
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        key = (name, _labels(labels) if labels else ())
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.buckets)
+        return _Timer(histogram)
+
+    def gauge(self, name: str, read: Callable[[], object]):
+        """
+        Регистрация показателя
+
+        Args:
+            name: Название показателя
+            read: Функция, возвращающая число или список (метки, число)
+        """
+        self.gauges[name] = read
+        self._kinds[name] = 'gauge'
+
+    def counter(self, name: str, read: Callable[[], object]):
+        """
+        Регистрация счётчика, который ведёт другой компонент (читается функцией)
+
+        Args:
+            name: Название счётчика (с суффиксом _total)
+            read: Функция, возвращающая число или список (метки, число)
+        """
+        self.gauges[name] = read
+        self._kinds[name] = 'counter'
+
+    def _gauge_values(self) -> List[Tuple[str, Labels, float]]:
+        values = []
+        for name, read in list(self.gauges.items()):
+            try:
+                value = read()
+            except Exception as e:
+                logger.error(f"Ошибка чтения показателя {name}: {e}")
+                continue
+            if isinstance(value, list):
+                values.extend((name, _labels(labels), float(item)) for labels, item in value)
+            else:
+                values.append((name, (), float(value)))
+        return values
+
+    def summary(self) -> List[dict]:
+        """
+        Метрики для панели диагностики
+
+        Returns:
+            List[dict]: Строки {name, labels, value, count, p95}; для гистограмм
+            value — среднее, p95 — оценка 95-го процентиля (секунды)
+        """
+        rows = []
+        for (name, labels), value in sorted(self.counters.items()):
+            rows.append({'name': name, 'labels': _format_labels(labels), 'value': value,
+                         'count': None, 'p95': None})
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            mean = histogram.sum / histogram.count if histogram.count else 0.0
+            rows.append({'name': name, 'labels': _format_labels(labels), 'value': mean,
+                         'count': histogram.count, 'p95': histogram.quantile(0.95)})
+        for name, labels, value in self._gauge_values():
+            rows.append({'name': name, 'labels': _format_labels(labels), 'value': value,
+                         'count': None, 'p95': None})
+        return rows
+
+    def render(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        families = set()
+
+        def header(name: str, kind: str):
+            if name not in families:
+                families.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            header(name, 'histogram')
+            total = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                total += count
+                bucket = _format_labels(labels, 'le="%g"' % bound)
+                lines.append(f"{name}_bucket{bucket} {total}")
+            bucket = _format_labels(labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{bucket} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, labels, value in self._gauge_values():
+            header(name, self._kinds[name])
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Выдача метрик по HTTP для Prometheus (GET /metrics)
+
+    Слушает только localhost и работает в отдельном потоке.
+    """
+
+    def __init__(self, metrics: Metrics, port: int = DEFAULT_METRICS_PORT, host: str = '127.0.0.1'):
+        """
+        Инициализация
+
+        Args:
+            metrics: Экземпляр Metrics
+            port: Порт (0 — любой свободный)
+            host: Адрес
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запуск сервера"""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"Метрики: {format % args}")
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+        logger.info(f"Метрики доступны по адресу http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """Остановка сервера"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
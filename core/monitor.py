@@ -1,28 +1,169 @@
 """
 Модуль мониторинга процессов и активности
 """
+import os
 import psutil
-import time
 import logging
+import uuid
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Tuple
 from threading import Thread, Event
 
+from core.clock import SYSTEM_CLOCK
 from core.database import Database
+from core.events import EventBus
+from core.metrics import Metrics
+from core.processes import SYSTEM_PROCESSES
+from core.rollup import split_by_day
+from core.spool import UsageSpool, SpoolReplayer, EVENT_START, EVENT_CHECKPOINT, EVENT_END
 from models.usage_log import ItemType
 
 logger = logging.getLogger(__name__)
 
+# Виды событий монитора
+EVENT_SESSION_START = 'start'
+EVENT_SESSION_STOP = 'stop'
+EVENT_ACCRUAL = 'accrual'
+EVENT_KILL = 'kill'
+EVENT_LIMIT_WARNING = 'limit_warning'
+
+# За сколько минут до окончания лимита предупреждать (один раз за день)
+LIMIT_WARNING_MINUTES = 10
+
+# Метрики цикла мониторинга
+METRIC_TICK = 'saveconfe_monitor_tick_seconds'
+METRIC_PHASE = 'saveconfe_monitor_phase_seconds'
+METRIC_SCANNED = 'saveconfe_processes_scanned_total'
+METRIC_EXE_LOOKUPS = 'saveconfe_exe_lookups_total'
+METRIC_KILLS = 'saveconfe_kills_total'
+METRIC_DB_ERRORS = 'saveconfe_db_errors_total'
+METRIC_SESSIONS = 'saveconfe_active_sessions'
+METRIC_QUEUE_DEPTH = 'saveconfe_event_queue_depth'
+METRIC_QUEUE_LAG = 'saveconfe_event_queue_lag_seconds'
+METRIC_QUEUE_DROPPED = 'saveconfe_event_queue_dropped'
+
+
+@dataclass(frozen=True)
+class MonitorEvent:
+    """
+    Событие монитора для подписчиков (панель мониторинга, уведомления)
+
+    Событие несёт состояние планировщика на момент события, поэтому
+    подписчику не нужно обращаться ни к базе данных, ни к монитору.
+
+    Attributes:
+        kind: Вид события (EVENT_SESSION_START, EVENT_SESSION_STOP, EVENT_ACCRUAL,
+            EVENT_KILL, EVENT_LIMIT_WARNING)
+        app_name: Название приложения (None — несколько заблокированных приложений)
+        at: Момент события
+        session_key: Ключ сессии
+        start_time: Начало сессии
+        used_minutes: Использовано за сегодня, минуты
+        remaining_minutes: Осталось до лимита, минуты (None — без лимита)
+        next_boundary: Ближайшая смена разрешения по расписанию (None — без расписания)
+        count: Количество завершённых процессов (для EVENT_KILL)
+        reason: Причина завершения (для EVENT_KILL)
+    """
+    kind: str
+    app_name: Optional[str]
+    at: datetime
+    session_key: Optional[str] = None
+    start_time: Optional[datetime] = None
+    used_minutes: float = 0.0
+    remaining_minutes: Optional[float] = None
+    next_boundary: Optional[datetime] = None
+    count: int = 0
+    reason: str = ''
+
+
+def accrual_key(event: MonitorEvent) -> Optional[str]:
+    """
+    Ключ объединения начислений в очереди подписчика
+
+    Из нескольких недоставленных начислений одной сессии нужно только
+    последнее; остальные события не объединяются.
+    """
+    return event.session_key if event.kind == EVENT_ACCRUAL else None
+
+
+@dataclass(frozen=True)
+class SpoolFlushed:
+    """
+    Журнал событий сброшен на диск: события можно переносить в базу данных
+
+    Публикуется потоком мониторинга в конце каждой проверки. Перенос
+    выполняет подписка монитора с собственной очередью и потоком.
+
+    Attributes:
+        at: Момент проверки
+        session_keys: Ключи открытых сессий (их логи не закрываются при восстановлении)
+    """
+    at: datetime
+    session_keys: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SessionState:
+    """
+    Открытая сессия в опубликованном состоянии монитора
+
+    Attributes:
+        app_name: Название приложения
+        session_key: Ключ сессии
+        start_time: Начало сессии
+        pid: PID первого найденного процесса
+        used_minutes: Использовано за сегодня, минуты
+        remaining_minutes: Осталось до лимита, минуты (None — без лимита)
+        next_boundary: Ближайшая смена разрешения по расписанию
+    """
+    app_name: str
+    session_key: str
+    start_time: datetime
+    pid: int
+    used_minutes: float
+    remaining_minutes: Optional[float]
+    next_boundary: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class MonitorState:
+    """
+    Неизменяемое состояние монитора для чтения из других потоков
+
+    Монитор собирает новое состояние после каждой проверки и заменяет
+    ссылку на него целиком. Читатель получает согласованное состояние
+    без блокировок и копирования: опубликованный объект больше не меняется.
+
+    Attributes:
+        at: Момент публикации
+        monitoring: Мониторинг запущен
+        db_available: База данных доступна
+        sessions: Открытые сессии
+        used_time: Использованное за сегодня время, {название: минуты} (только чтение)
+    """
+    at: datetime
+    monitoring: bool = False
+    db_available: bool = True
+    sessions: Tuple[SessionState, ...] = ()
+    used_time: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+
 
 class Monitor:
     """
     Монитор процессов и активности
     
     Отслеживает запущенные процессы, записывает логи активности
-    и проверяет правила блокировки.
+    и проверяет правила блокировки. События сессий сначала пишутся
+    в локальный журнал и переносятся в базу данных, когда она доступна,
+    поэтому учёт и ограничения не зависят от связи с MySQL.
     """
     
-    def __init__(self, blocker, scheduler, database: Database):
+    def __init__(self, blocker, scheduler, database: Database,
+                 spool: Optional[UsageSpool] = None, rules=None,
+                 samples=None, bus: Optional[EventBus] = None,
+                 metrics: Optional[Metrics] = None, clock=None, processes=None):
         """
         Инициализация монитора
         
@@ -30,15 +171,133 @@ class Monitor:
             blocker: Экземпляр Blocker для блокировки
             scheduler: Экземпляр Scheduler для проверки лимитов
             database: Экземпляр Database для записи логов
+            spool: Локальный журнал событий (по умолчанию saveconfe.spool)
+            rules: RuleRepository для ID правил в журнале отсчётов
+            samples: SampleJournal (по умолчанию каталог samples, создаётся при запуске)
+            bus: Шина событий (по умолчанию своя)
+            metrics: Метрики цикла мониторинга (по умолчанию выключены)
+            clock: Источник времени (по умолчанию системное время)
+            processes: Источник процессов (по умолчанию psutil)
         """
+        self.clock = clock or SYSTEM_CLOCK
+        self.processes = processes or SYSTEM_PROCESSES
         self.blocker = blocker
         self.scheduler = scheduler
         self.db = database
         self.is_monitoring = False
         self.monitor_thread: Optional[Thread] = None
         self.stop_event = Event()
-        self.active_processes: Dict[str, dict] = {}  # {app_path: {pid, start_time, log_id}}
+        self.spool = spool or UsageSpool()
+        self.replayer = SpoolReplayer(self.spool, database)
+        self.db_available = True
+        self.rules = rules
+        self.samples = samples
+        self.samples_keep_days = 180  # Сколько дней хранить журнал отсчётов
+        self._rule_ids: Dict[str, int] = {}
+        self._rule_ids_version: Optional[int] = None
+        self.active_processes: Dict[str, dict] = {}  # {app_path: {pid, start_time, session_key, rolled_until}}
         self.check_interval = 5  # Интервал проверки в секундах
+        self.checkpoint_interval = 60  # Интервал контрольных точек открытых сессий в секундах
+        self.last_checkpoint: Optional[datetime] = None
+        self.recovered = False  # Восстановление после прошлого запуска выполнено
+        # Итог восстановления для потока мониторинга: (день, {название: минуты}, отметка журнала)
+        self._recovery = None
+        self.db_retry_max = 300  # Наибольшая пауза между попытками при недоступной базе, секунды
+        self._db_failures = 0
+        self._db_retry_at: Optional[float] = None
+        self._db_subscription = None
+        self.bus = bus or EventBus()
+        self._limit_warned = set()  # Приложения, о скором окончании лимита которых уже предупредили
+        self._day = None  # День, за который планировщик считает использованное время
+        self._state = MonitorState(self.clock.now())
+        self.metrics = metrics or Metrics()
+        self._describe_metrics()
+    
+    def _describe_metrics(self):
+        """Описание метрик и регистрация показателей"""
+        metrics = self.metrics
+        metrics.describe(METRIC_TICK, "Длительность проверки монитора")
+        metrics.describe(METRIC_PHASE, "Длительность этапов проверки: scan, match, accounting, kill, db")
+        metrics.describe(METRIC_SCANNED, "Просмотрено процессов")
+        metrics.describe(METRIC_EXE_LOOKUPS, "Получено путей исполняемых файлов")
+        metrics.describe(METRIC_KILLS, "Завершено процессов")
+        metrics.describe(METRIC_DB_ERRORS, "Ошибки переноса журнала в базу данных")
+        metrics.describe(METRIC_SESSIONS, "Открытые сессии")
+        metrics.describe(METRIC_QUEUE_DEPTH, "Событий в очереди подписчика")
+        metrics.describe(METRIC_QUEUE_LAG, "Ожидание самого старого события в очереди подписчика")
+        metrics.describe(METRIC_QUEUE_DROPPED, "Событий, отброшенных при переполнении очереди подписчика")
+        metrics.gauge(METRIC_SESSIONS, lambda: len(self.state.sessions))
+        metrics.gauge(METRIC_QUEUE_DEPTH, lambda: [({'subscriber': stats.name}, stats.queued)
+                                                   for stats in self.bus.stats()])
+        metrics.gauge(METRIC_QUEUE_LAG, lambda: [({'subscriber': stats.name}, stats.lag)
+                                                 for stats in self.bus.stats()])
+        metrics.gauge(METRIC_QUEUE_DROPPED, lambda: [({'subscriber': stats.name}, stats.dropped)
+                                                     for stats in self.bus.stats()])
+    
+    @property
+    def state(self) -> MonitorState:
+        """
+        Последнее опубликованное состояние
+        
+        Безопасно читать из любого потока: ссылка заменяется атомарно,
+        а сам объект неизменяем.
+        """
+        return self._state
+    
+    def _publish_state(self):
+        """Сборка и публикация состояния (вызывается потоком мониторинга)"""
+        now = self.clock.now()
+        scheduler = self.scheduler
+        sessions = tuple(
+            SessionState(info['name'], info['session_key'], info['start_time'], info['pid'],
+                         scheduler.get_used_time(info['name']), scheduler.get_remaining_time(info['name']),
+                         scheduler.next_schedule_boundary(info['name'], now))
+            for info in self.active_processes.values()
+        )
+        self._state = MonitorState(now, self.is_monitoring, self.db_available, sessions,
+                                   MappingProxyType(dict(scheduler.used_time)))
+    
+    def subscribe(self, callback: Callable[[MonitorEvent], None], **options):
+        """
+        Подписка на события монитора
+        
+        Без очереди обработчик вызывается в потоке мониторинга и не должен
+        блокировать его. Медленным подписчикам (окно, IPC) нужна очередь:
+        например, max_queue=1000 и coalesce=accrual_key.
+        
+        Args:
+            callback: Функция, принимающая MonitorEvent
+            **options: Параметры подписки EventBus.subscribe (name, max_queue, overflow, coalesce)
+        """
+        self.bus.subscribe(callback, MonitorEvent, **options)
+    
+    def unsubscribe(self, callback: Callable[[MonitorEvent], None]):
+        """Отписка от событий монитора"""
+        self.bus.unsubscribe(callback, MonitorEvent)
+    
+    def _notify(self, kind: str, app_name: Optional[str], proc_info: Optional[dict] = None,
+                at: Optional[datetime] = None, **extra):
+        """
+        Отправка события подписчикам
+        
+        Args:
+            kind: Вид события
+            app_name: Название приложения
+            proc_info: Информация об активном процессе
+            at: Момент события (по умолчанию сейчас)
+            **extra: Остальные поля MonitorEvent
+        """
+        if not self.bus.has_subscribers(MonitorEvent):
+            return
+        at = at or self.clock.now()
+        if app_name is not None:
+            extra.setdefault('used_minutes', self.scheduler.get_used_time(app_name))
+            extra.setdefault('remaining_minutes', self.scheduler.get_remaining_time(app_name))
+            extra.setdefault('next_boundary', self.scheduler.next_schedule_boundary(app_name, at))
+        if proc_info is not None:
+            extra.setdefault('session_key', proc_info['session_key'])
+            extra.setdefault('start_time', proc_info['start_time'])
+        self.bus.publish(MonitorEvent(kind, app_name, at, **extra))
     
     def start_monitoring(self):
         """Запуск мониторинга"""
@@ -46,8 +305,28 @@ class Monitor:
             logger.warning("Мониторинг уже запущен")
             return
         
+        if self.samples is None:
+            # NumPy загружается только когда мониторинг действительно запускается
+            from core.samples import SampleJournal
+            self.samples = SampleJournal()
+        try:
+            self.samples.prune(self.samples_keep_days)
+        except Exception as e:
+            logger.error(f"Ошибка очистки журнала отсчётов: {e}")
+        
+        # Восстановление после прошлого запуска и перенос журнала в базу выполняет
+        # подписка с собственным потоком: медленная или недоступная база
+        # не задерживает проверки, учёт и завершение процессов
+        self.recovered = False
+        self._recovery = None
+        self._db_failures = 0
+        self._db_retry_at = None
+        self._db_subscription = self.bus.subscribe(self._sync_database, SpoolFlushed, name='database',
+                                                   max_queue=1, coalesce=lambda event: SpoolFlushed)
         self.is_monitoring = True
         self.stop_event.clear()
+        self.last_checkpoint = self.clock.now()
+        self._publish_state()
         self.monitor_thread = Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         logger.info("Мониторинг запущен")
@@ -61,69 +340,205 @@ class Monitor:
         self.stop_event.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
+        if self._db_subscription is not None:
+            self.bus.unsubscribe(self._db_subscription)
+            self._db_subscription = None
         
         # Завершаем все активные логи
         self._finalize_all_logs()
+        self._publish_state()
         logger.info("Мониторинг остановлен")
     
+    def _sync_database(self, event: SpoolFlushed):
+        """
+        Перенос журнала в базу данных, а до первого успешного переноса —
+        восстановление после прошлого запуска
+
+        Вызывается в потоке подписки (или в самой проверке, если мониторинг
+        не запущен: моделирование, тесты). После ошибки следующая попытка
+        откладывается, пауза удваивается от check_interval до db_retry_max.
+        """
+        if self._recovery is not None:
+            return  # Поток мониторинга ещё не применил итог восстановления
+        if self._db_retry_at is not None and self.clock.monotonic() < self._db_retry_at:
+            return
+        with self.metrics.timer(METRIC_PHASE, phase='db'):
+            synced = self._replay() if self.recovered else self._recover_previous_session(event)
+        if synced:
+            self._db_failures = 0
+            self._db_retry_at = None
+        else:
+            delay = min(self.check_interval * 2 ** self._db_failures, self.db_retry_max)
+            self._db_failures += 1
+            self._db_retry_at = self.clock.monotonic() + delay
+    
+    def _recover_previous_session(self, event: SpoolFlushed) -> bool:
+        """Закрытие логов прошлого запуска и подсчёт времени за сегодня (поток подписки)"""
+        try:
+            # Сначала переносим события, не дошедшие до базы в прошлый раз
+            self.replayer.replay()
+            # Сессии, начатые уже в этом запуске, остаются открытыми
+            self.db.reconcile_open_usage_logs(keep_session_keys=event.session_keys)
+            today = event.at.date()
+            used = {item_name: minutes
+                    for _, item_name, minutes, _ in self.db.get_usage_totals(today, today)}
+            self._recovery = (today, used, self.replayer.position)
+            self.recovered = True
+            if not self.db_available:
+                logger.info("Связь с базой данных восстановлена")
+            self.db_available = True
+            return True
+        except Exception as e:
+            if self.db_available:
+                logger.error(f"Ошибка восстановления после прошлого запуска: {e}")
+            self.metrics.inc(METRIC_DB_ERRORS)
+            self.db_available = False
+            return False
+    
+    def _apply_recovery(self):
+        """
+        Восстановление использованного за сегодня времени (поток мониторинга)
+
+        К сумме из базы добавляются события, записанные в журнал после
+        переноса, и время, уже учтённое в планировщике, но ещё не записанное
+        в журнал (например, процесса, запущенного до старта монитора).
+        """
+        recovery = self._recovery
+        if recovery is None:
+            return
+        self._recovery = None
+        day, used, (spool_id, offset) = recovery
+        if day != self._day:
+            return  # Прошла полночь: время нового дня считается с нуля
+        if spool_id is None or spool_id != self.spool.spool_id:
+            offset = 0  # Журнал очищен после переноса: всё, что в нём есть, записано позже
+        while True:
+            records, offset = self.spool.read(offset)
+            if not records:
+                break
+            for record in records:
+                for part_day, minutes in split_by_day(record.interval_start, record.interval_end):
+                    if part_day == day:
+                        used[record.item_name] = used.get(record.item_name, 0.0) + minutes
+        midnight = datetime.combine(day, datetime.min.time())
+        for info in self.active_processes.values():
+            minutes = (info['accounted_until'] - max(info['rolled_until'], midnight)).total_seconds() / 60
+            if minutes > 0:
+                used[info['name']] = used.get(info['name'], 0.0) + minutes
+        self.scheduler.restore_used_time(used)
+    
     def _monitor_loop(self):
         """Основной цикл мониторинга"""
         while not self.stop_event.is_set():
             try:
-                self._check_processes()
-                self._check_blocked_apps()
-                time.sleep(self.check_interval)
+                with self.metrics.timer(METRIC_TICK):
+                    self._tick()
             except Exception as e:
                 logger.error(f"Ошибка в цикле мониторинга: {e}")
-                time.sleep(self.check_interval)
+            # Ожидание на событии: остановка не ждёт конца интервала
+            self.stop_event.wait(self.check_interval)
+    
+    def _tick(self):
+        """Одна проверка: процессы, учёт времени, завершение, перенос в базу"""
+        metrics = self.metrics
+        self._roll_day(self.clock.now())
+        self._apply_recovery()
+        self._check_processes()
+        with metrics.timer(METRIC_PHASE, phase='accounting'):
+            self._maybe_checkpoint()
+        with metrics.timer(METRIC_PHASE, phase='kill'):
+            self._check_blocked_apps()
+        with metrics.timer(METRIC_PHASE, phase='accounting'):
+            self.spool.flush()
+            self.samples.flush()
+        event = SpoolFlushed(self.clock.now(),
+                             tuple(info['session_key'] for info in self.active_processes.values()))
+        if self._db_subscription is not None:
+            self.bus.publish(event)
+        else:
+            self._sync_database(event)
+        self._publish_state()
     
     def _check_processes(self):
         """Проверка запущенных процессов"""
+        metrics = self.metrics
         try:
-            current_processes = {}
-            
             # Получаем все процессы
-            for proc in psutil.process_iter(['pid', 'name', 'exe', 'create_time']):
-                try:
-                    exe_path = proc.info.get('exe', '')
-                    if not exe_path:
-                        continue
-                    
-                    normalized_path = exe_path.lower()
-                    
-                    # Проверяем, есть ли это приложение в списке отслеживания
-                    # (заблокированные приложения)
-                    for blocked_path in self.blocker.blocked_apps:
-                        if normalized_path.endswith(blocked_path) or blocked_path in normalized_path:
-                            app_name = proc.info['name']
-                            current_processes[normalized_path] = {
-                                'pid': proc.info['pid'],
-                                'name': app_name,
-                                'path': exe_path,
-                                'start_time': datetime.fromtimestamp(proc.info['create_time'])
-                            }
-                            break
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-            
-            # Обрабатываем новые процессы
-            for app_path, proc_info in current_processes.items():
-                if app_path not in self.active_processes:
-                    # Новый процесс - начинаем логирование
-                    self._start_logging(app_path, proc_info)
-            
-            # Обрабатываем завершённые процессы
-            for app_path in list(self.active_processes.keys()):
-                if app_path not in current_processes:
-                    # Процесс завершён - завершаем логирование
-                    self._stop_logging(app_path)
+            with metrics.timer(METRIC_PHASE, phase='scan'):
+                processes = list(self.processes.process_iter(['pid', 'name', 'exe', 'create_time']))
+            with metrics.timer(METRIC_PHASE, phase='match'):
+                current_processes = self._match_processes(processes)
             
-            # Обновляем информацию о времени использования
-            self._update_usage_time()
+            with metrics.timer(METRIC_PHASE, phase='accounting'):
+                # Обрабатываем новые процессы
+                for app_path, proc_info in current_processes.items():
+                    session_info = self.active_processes.get(app_path)
+                    if session_info is None:
+                        # Новый процесс - начинаем логирование
+                        self._start_logging(app_path, proc_info)
+                    else:
+                        # Приложение могли перезапустить между проверками:
+                        # завершать нужно процессы, найденные сейчас
+                        session_info['pids'] = proc_info['pids']
+                
+                # Обрабатываем завершённые процессы
+                for app_path in list(self.active_processes.keys()):
+                    if app_path not in current_processes:
+                        # Процесс завершён - завершаем логирование
+                        self._stop_logging(app_path)
+                
+                # Обновляем информацию о времени использования
+                self._update_usage_time()
+                self._record_samples(current_processes)
             
         except Exception as e:
             logger.error(f"Ошибка при проверке процессов: {e}")
     
+    def _match_processes(self, processes: list) -> Dict[str, dict]:
+        """
+        Поиск отслеживаемых приложений среди процессов
+        
+        Args:
+            processes: Процессы psutil с info (pid, name, exe, create_time)
+        
+        Returns:
+            Dict[str, dict]: {путь в нижнем регистре: сведения о приложении}
+        """
+        current_processes = {}
+        exe_lookups = 0
+        for proc in processes:
+            try:
+                exe_path = proc.info.get('exe', '')
+                if not exe_path:
+                    continue
+                exe_lookups += 1
+                
+                normalized_path = exe_path.lower()
+                
+                # Проверяем, есть ли это приложение в списке отслеживания
+                # (заблокированные приложения)
+                for blocked_path in self.blocker.blocked_apps:
+                    if normalized_path.endswith(blocked_path) or blocked_path in normalized_path:
+                        entry = current_processes.get(normalized_path)
+                        if entry is None:
+                            entry = current_processes[normalized_path] = {
+                                'pid': proc.info['pid'],
+                                'name': proc.info['name'],
+                                'path': exe_path,
+                                'start_time': datetime.fromtimestamp(proc.info['create_time']),
+                                'rule_path': blocked_path,
+                                'pids': [],
+                                'cpu_time': 0.0
+                            }
+                        entry['pids'].append(proc.info['pid'])
+                        entry['cpu_time'] += self._cpu_seconds(proc)
+                        break
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        self.metrics.inc(METRIC_SCANNED, len(processes))
+        self.metrics.inc(METRIC_EXE_LOOKUPS, exe_lookups)
+        return current_processes
+    
     def _start_logging(self, app_path: str, proc_info: dict):
         """Начало логирования использования приложения"""
         try:
@@ -131,30 +546,30 @@ class Monitor:
             start_time = proc_info['start_time']
             
             # Проверяем, разрешён ли доступ
-            allowed, reason = self.scheduler.is_access_allowed(app_name)
+            allowed, reason = self.scheduler.is_access_allowed(app_name, self.clock.now())
             if not allowed:
                 logger.info(f"Доступ к {app_name} запрещён: {reason}")
                 # Завершаем процесс
-                try:
-                    proc = psutil.Process(proc_info['pid'])
-                    proc.terminate()
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+                killed = self._terminate(proc_info)
+                self.metrics.inc(METRIC_KILLS, killed)
+                self._notify(EVENT_KILL, app_name, count=killed, reason=reason)
                 return
             
-            # Создаём лог
-            log = self.db.add_usage_log(
-                item_type=ItemType.APP,
-                item_name=app_name,
-                start_time=start_time
-            )
-            
-            self.active_processes[app_path] = {
+            session_info = {
                 'pid': proc_info['pid'],
+                'pids': proc_info.get('pids') or [proc_info['pid']],
                 'start_time': start_time,
-                'log_id': log.id,
-                'name': app_name
+                'session_key': uuid.uuid4().hex,
+                'name': app_name,
+                'rolled_until': start_time,  # до какого момента время записано в журнал
+                'accounted_until': start_time,  # до какого момента время учтено в планировщике
+                'rule_path': proc_info.get('rule_path'),
+                'cpu_time': proc_info.get('cpu_time', 0.0),
+                'sampled_until': self.clock.now()  # момент последнего отсчёта
             }
+            self._spool_event(EVENT_START, session_info, start_time)
+            self.active_processes[app_path] = session_info
+            self._notify(EVENT_SESSION_START, app_name, session_info)
             
             logger.info(f"Начато логирование использования: {app_name}")
         except Exception as e:
@@ -166,64 +581,196 @@ class Monitor:
             if app_path not in self.active_processes:
                 return
             
-            proc_info = self.active_processes[app_path]
+            proc_info = self.active_processes.pop(app_path)
             app_name = proc_info['name']
-            start_time = proc_info['start_time']
-            log_id = proc_info['log_id']
             
             # Вычисляем длительность
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds() / 60  # в минутах
-            
-            # Обновляем лог в базе данных
-            session = self.db.get_session()
-            try:
-                from models.usage_log import UsageLog
-                log = session.query(UsageLog).filter(UsageLog.id == log_id).first()
-                if log:
-                    log.end_time = end_time
-                    log.duration = duration
-                    session.commit()
-                    
-                    # Обновляем использованное время в планировщике
-                    self.scheduler.add_used_time(app_name, duration)
-            finally:
-                session.close()
+            end_time = self.clock.now()
+            duration = (end_time - proc_info['start_time']).total_seconds() / 60  # в минутах
             
-            del self.active_processes[app_path]
+            # Обновляем использованное время в планировщике и журнал
+            self._accrue(proc_info, end_time)
+            self._spool_event(EVENT_END, proc_info, end_time)
+            self._notify(EVENT_SESSION_STOP, app_name, proc_info, end_time)
             logger.info(f"Завершено логирование использования: {app_name} (длительность: {duration:.2f} мин)")
         except Exception as e:
             logger.error(f"Ошибка завершения логирования: {e}")
     
+    def _spool_event(self, kind: int, proc_info: dict, until: datetime):
+        """
+        Запись события сессии в локальный журнал
+        
+        Args:
+            kind: Вид события (EVENT_START, EVENT_CHECKPOINT, EVENT_END)
+            proc_info: Информация об активном процессе
+            until: Момент события
+        """
+        self.spool.append(kind, ItemType.APP, proc_info['session_key'], proc_info['name'],
+                          proc_info['start_time'], proc_info['rolled_until'], until)
+        proc_info['rolled_until'] = until
+    
+    def _replay(self) -> bool:
+        """Перенос журнала в базу данных; недоступность базы не мешает мониторингу"""
+        try:
+            self.replayer.replay()
+            if not self.db_available:
+                logger.info("Связь с базой данных восстановлена")
+            self.db_available = True
+            return True
+        except Exception as e:
+            if self.db_available:
+                logger.warning(f"База данных недоступна, события сохраняются в журнал: {e}")
+            self.metrics.inc(METRIC_DB_ERRORS)
+            self.db_available = False
+            return False
+    
+    def _accrue(self, proc_info: dict, until: datetime):
+        """Добавление ещё не учтённого времени сессии в планировщик"""
+        minutes = (until - proc_info['accounted_until']).total_seconds() / 60
+        if minutes > 0:
+            self.scheduler.add_used_time(proc_info['name'], minutes)
+            proc_info['accounted_until'] = until
+    
+    def _roll_day(self, now: datetime):
+        """
+        Переход через полночь: время до полуночи относится к прошедшему дню,
+        после чего использованное время в планировщике сбрасывается
+        """
+        today = now.date()
+        if self._day is None:
+            self._day = today
+            return
+        if today == self._day:
+            return
+        midnight = datetime.combine(today, datetime.min.time())
+        for proc_info in self.active_processes.values():
+            self._accrue(proc_info, midnight)
+        self.scheduler.reset_daily_usage()
+        self._limit_warned.clear()
+        self._day = today
+    
+    def _maybe_checkpoint(self):
+        """Контрольная точка открытых сессий, если подошёл интервал"""
+        now = self.clock.now()
+        if self.last_checkpoint and (now - self.last_checkpoint).total_seconds() < self.checkpoint_interval:
+            return
+        self._checkpoint(now)
+    
+    def _checkpoint(self, now: datetime):
+        """
+        Сохранение текущей длительности всех открытых сессий
+        
+        Для каждой открытой сессии в журнал пишется событие контрольной
+        точки; при переносе вся пачка применяется одной транзакцией.
+        После аварийного завершения сессии закрываются на последней
+        контрольной точке.
+        """
+        self.last_checkpoint = now
+        for proc_info in self.active_processes.values():
+            try:
+                self._spool_event(EVENT_CHECKPOINT, proc_info, now)
+            except Exception as e:
+                logger.error(f"Ошибка контрольной точки сессии {proc_info['name']}: {e}")
+    
+    @staticmethod
+    def _cpu_seconds(proc) -> float:
+        """Суммарное процессорное время процесса в секундах (0, если недоступно)"""
+        try:
+            times = proc.cpu_times()
+            return times.user + times.system
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return 0.0
+    
+    def _app_rule_ids(self) -> Dict[str, int]:
+        """Соответствие нормализованного пути приложения и ID правила"""
+        if self.rules is None:
+            return {}
+        if self._rule_ids_version != self.rules.version:
+            self._rule_ids = {os.path.normpath(rule.app_path).lower(): rule.id
+                              for rule in self.rules.get_app_rules()}
+            self._rule_ids_version = self.rules.version
+        return self._rule_ids
+    
+    def _record_samples(self, current_processes: dict):
+        """
+        Запись отсчёта по всем открытым сессиям в журнал отсчётов
+        
+        Args:
+            current_processes: Найденные на этой проверке приложения
+        """
+        now = self.clock.now()
+        rule_ids = self._app_rule_ids()
+        columns = ([], [], [], [])
+        for app_path, proc_info in self.active_processes.items():
+            current = current_processes.get(app_path)
+            duration = (now - proc_info['sampled_until']).total_seconds()
+            if current is None or duration < 1:
+                continue
+            columns[0].append(rule_ids.get(proc_info['rule_path'], 0))
+            columns[1].append(len(current['pids']))
+            columns[2].append(max(0.0, current['cpu_time'] - proc_info['cpu_time']))
+            columns[3].append(duration)
+            proc_info['cpu_time'] = current['cpu_time']
+            proc_info['sampled_until'] = now
+        try:
+            self.samples.append(now, *columns)
+        except Exception as e:
+            logger.error(f"Ошибка записи журнала отсчётов: {e}")
+    
     def _update_usage_time(self):
         """Обновление времени использования для активных процессов"""
-        current_time = datetime.now()
+        current_time = self.clock.now()
         for app_path, proc_info in self.active_processes.items():
             try:
-                start_time = proc_info['start_time']
-                duration = (current_time - start_time).total_seconds() / 60
+                self._accrue(proc_info, current_time)
                 app_name = proc_info['name']
+                self._notify(EVENT_ACCRUAL, app_name, proc_info, current_time)
+                self._check_limit_warning(app_name, proc_info, current_time)
                 
-                # Проверяем лимит времени
-                if self.scheduler.is_time_limit_exceeded(app_name):
-                    logger.info(f"Превышен лимит времени для {app_name}, завершаем процесс")
-                    try:
-                        proc = psutil.Process(proc_info['pid'])
-                        proc.terminate()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
+                # Проверяем лимит времени и расписание: сессия, начатая в разрешённое
+                # время, завершается, когда разрешённое время заканчивается
+                allowed, reason = self.scheduler.is_access_allowed(app_name, current_time)
+                if not allowed:
+                    logger.info(f"Доступ к {app_name} запрещён: {reason}, завершаем процесс")
+                    killed = self._terminate(proc_info)
+                    self.metrics.inc(METRIC_KILLS, killed)
+                    self._notify(EVENT_KILL, app_name, proc_info, current_time, count=killed, reason=reason)
             except Exception as e:
                 logger.error(f"Ошибка обновления времени использования: {e}")
     
+    def _terminate(self, proc_info: dict) -> int:
+        """Завершение всех найденных процессов приложения; возвращает количество завершённых"""
+        pids = proc_info.get('pids') or [proc_info['pid']]
+        return sum(1 for pid in pids if self.processes.terminate(pid))
+    
+    def _check_limit_warning(self, app_name: str, proc_info: dict, at: datetime):
+        """Предупреждение о скором окончании лимита (один раз, пока лимит не увеличат)"""
+        remaining = self.scheduler.get_remaining_time(app_name)
+        if remaining is None or remaining > LIMIT_WARNING_MINUTES:
+            self._limit_warned.discard(app_name)
+        elif remaining > 0 and app_name not in self._limit_warned:
+            self._limit_warned.add(app_name)
+            self._notify(EVENT_LIMIT_WARNING, app_name, proc_info, at, remaining_minutes=remaining)
+    
     def _check_blocked_apps(self):
         """Проверка и завершение заблокированных приложений"""
         if self.blocker.is_blocking_enabled:
             killed = self.blocker.kill_blocked_apps()
             if killed > 0:
                 logger.info(f"Завершено {killed} заблокированных процессов")
+                self.metrics.inc(METRIC_KILLS, killed)
+                self._notify(EVENT_KILL, None, count=killed, reason="Приложение заблокировано")
     
     def _finalize_all_logs(self):
         """Завершение всех активных логов при остановке мониторинга"""
         for app_path in list(self.active_processes.keys()):
             self._stop_logging(app_path)
+        try:
+            self.spool.flush()
+        except Exception as e:
+            logger.error(f"Ошибка записи журнала событий: {e}")
+        # Пока база недоступна, остановка не ждёт подключения:
+        # события перенесутся из журнала при следующем запуске
+        if self.db_available:
+            self._replay()
 
@@ -0,0 +1,43 @@
+"""
+Модуль источника процессов: список запущенных процессов и их завершение
+"""
+import psutil
+
+
+class PsutilProcessSource:
+    """
+    Процессы операционной системы через psutil
+
+    Монитор и блокировщик получают процессы и завершают их только
+    через источник, поэтому при моделировании его заменяет
+    core.simulation.FakeProcessSource.
+    """
+
+    def process_iter(self, attrs: list):
+        """
+        Запущенные процессы
+
+        Args:
+            attrs: Поля proc.info (pid, name, exe, create_time)
+
+        Returns:
+            Итератор процессов psutil
+        """
+        return psutil.process_iter(attrs)
+
+    def terminate(self, pid: int) -> bool:
+        """
+        Завершение процесса
+
+        Returns:
+            bool: True, если сигнал завершения отправлен
+        """
+        try:
+            psutil.Process(pid).terminate()
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+
+# Общий экземпляр (значение по умолчанию для компонентов)
+SYSTEM_PROCESSES = PsutilProcessSource()
@@ -0,0 +1,266 @@
+"""
+Модуль профилирования по запросу без перезапуска
+"""
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Переменная окружения: профилировать N секунд после запуска
+PROFILE_ENV = 'SAVECONFE_PROFILE'
+# Каталог архивов профилирования (рядом с saveconfe.log)
+DEFAULT_PROFILE_DIR = 'profiles'
+# Наибольшая длительность одного профилирования, секунды
+MAX_PROFILE_SECONDS = 600
+
+Stack = Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ProfileResult:
+    """
+    Результат профилирования
+
+    Attributes:
+        path: Архив с результатами
+        samples: Снято отсчётов стека
+        seconds: Длительность профилирования
+    """
+    path: str
+    samples: int
+    seconds: float
+
+
+def profile_seconds_from_env() -> Optional[float]:
+    """
+    Длительность профилирования при запуске из SAVECONFE_PROFILE
+
+    Returns:
+        Optional[float]: Секунды или None, если переменная не задана
+    """
+    value = os.environ.get(PROFILE_ENV)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Неверное значение {PROFILE_ENV}: {value}")
+        return None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> Stack:
+    """Стек от внешнего вызова к текущему"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+class Profiler:
+    """
+    Профилирование работающего процесса по запросу
+
+    За заданное время снимает отсчёты стека выбранного потока (обычно
+    потока мониторинга) с частотой 1/interval и снимки tracemalloc в начале
+    и в конце, затем пишет небольшой zip-архив для приложения к обращению:
+    summary.txt (самые частые функции и места выделения памяти)
+    и stacks.folded (свёрнутые стеки для flamegraph). Мониторинг и
+    блокировка при этом продолжают работать; одновременно выполняется
+    только одно профилирование.
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, interval: float = 0.005,
+                 top: int = 40, max_stacks: int = 500, keep: int = 10):
+        """
+        Инициализация
+
+        Args:
+            output_dir: Каталог архивов
+            interval: Интервал отсчётов стека, секунды
+            top: Строк в каждой таблице summary.txt
+            max_stacks: Наибольшее количество стеков в stacks.folded
+            keep: Сколько последних архивов хранить
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top = top
+        self.max_stacks = max_stacks
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Профилирование выполняется"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, thread: Optional[threading.Thread] = None,
+              callback: Optional[Callable[[ProfileResult], None]] = None) -> str:
+        """
+        Запуск профилирования в фоне
+
+        Args:
+            seconds: Длительность (не больше MAX_PROFILE_SECONDS)
+            thread: Профилируемый поток (None — все потоки)
+            callback: Вызывается с ProfileResult в потоке профилирования
+
+        Returns:
+            str: Путь к будущему архиву
+
+        Raises:
+            RuntimeError: Профилирование уже выполняется
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("Профилирование уже выполняется")
+            path = self._new_path()
+
+            def run():
+                try:
+                    result = self.run(seconds, thread, path)
+                except Exception as e:
+                    logger.error(f"Ошибка профилирования: {e}", exc_info=True)
+                    return
+                if callback is not None:
+                    callback(result)
+
+            self._thread = threading.Thread(target=run, name='profiler', daemon=True)
+            self._thread.start()
+        return path
+
+    def run(self, seconds: float, thread: Optional[threading.Thread] = None,
+            path: Optional[str] = None) -> ProfileResult:
+        """
+        Профилирование в текущем потоке
+
+        Args:
+            seconds: Длительность (не больше MAX_PROFILE_SECONDS)
+            thread: Профилируемый поток (None — все потоки, кроме текущего)
+            path: Путь архива (по умолчанию новый файл в output_dir)
+
+        Returns:
+            ProfileResult: Результат
+        """
+        seconds = max(0.0, min(float(seconds), MAX_PROFILE_SECONDS))
+        path = path or self._new_path()
+        target = thread.name if thread is not None else "все потоки"
+        logger.info(f"Профилирование ({target}) на {seconds:.0f} с")
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        first = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        try:
+            stacks, samples = self._sample(seconds, thread)
+            last = tracemalloc.take_snapshot()
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        elapsed = time.perf_counter() - started
+
+        self._write(path, target, elapsed, samples, stacks, first, last)
+        self._prune()
+        logger.info(f"Профилирование завершено: {samples} отсчётов, {path}")
+        return ProfileResult(path, samples, elapsed)
+
+    def _sample(self, seconds: float, thread: Optional[threading.Thread]) -> Tuple[Counter, int]:
+        """Отсчёты стека потока (или всех потоков) до истечения времени"""
+        own = threading.get_ident()
+        names: Dict[int, str] = {}
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            if thread is not None:
+                frame = frames.get(thread.ident)
+                if frame is not None:
+                    stacks[_stack(frame)] += 1
+                    samples += 1
+            else:
+                if len(names) != len(frames):
+                    names = {item.ident: item.name for item in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident != own:
+                        stacks[(names.get(ident, str(ident)),) + _stack(frame)] += 1
+                samples += 1
+            del frames
+            time.sleep(self.interval)
+        return stacks, samples
+
+    def _write(self, path: str, target: str, elapsed: float, samples: int,
+               stacks: Counter, first, last):
+        """Запись архива: summary.txt и stacks.folded"""
+        exclude = (tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, __file__),
+                   tracemalloc.Filter(False, '<frozen importlib._bootstrap>'))
+        first = first.filter_traces(exclude)
+        last = last.filter_traces(exclude)
+
+        own_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in stacks.items():
+            if stack:
+                own_samples[stack[-1]] += count
+            for label in set(stack):
+                total_samples[label] += count
+
+        lines = [
+            f"SaveConfe: профилирование {datetime.now():%Y-%m-%d %H:%M:%S}",
+            f"PID {os.getpid()}, Python {platform.python_version()}, {platform.platform()}",
+            f"Поток: {target}, длительность {elapsed:.1f} с, отсчётов {samples}, "
+            f"интервал {self.interval * 1000:.0f} мс",
+            "",
+            "Функции по собственным отсчётам (где выполнялся код):",
+        ]
+        lines += [f"{count:>8} {count / max(samples, 1):>7.1%}  {label}"
+                  for label, count in own_samples.most_common(self.top)]
+        lines += ["", "Функции по отсчётам с вложенными вызовами:"]
+        lines += [f"{count:>8} {count / max(samples, 1):>7.1%}  {label}"
+                  for label, count in total_samples.most_common(self.top)]
+        lines += ["", "Память по местам выделения (в конце профилирования):"]
+        lines += [f"{stat.size / 1024:>10.1f} КБ {stat.count:>8}  {stat.traceback}"
+                  for stat in last.statistics('lineno')[:self.top]]
+        lines += ["", "Изменение памяти за время профилирования:"]
+        lines += [f"{stat.size_diff / 1024:>+10.1f} КБ {stat.count_diff:>+8}  {stat.traceback}"
+                  for stat in last.compare_to(first, 'lineno')[:self.top]]
+
+        folded = [f"{';'.join(stack)} {count}" for stack, count in stacks.most_common(self.max_stacks)]
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('summary.txt', '\n'.join(lines) + '\n')
+            archive.writestr('stacks.folded', '\n'.join(folded) + '\n')
+
+    def _new_path(self) -> str:
+        name = f"saveconfe-profile-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.zip"
+        return str(Path(self.output_dir).resolve() / name)
+
+    def _prune(self):
+        """Удаление старых архивов сверх keep"""
+        try:
+            archives = sorted(Path(self.output_dir).glob('saveconfe-profile-*.zip'),
+                              key=lambda item: item.stat().st_mtime)
+            for old in archives[:-self.keep]:
+                old.unlink()
+        except OSError as e:
+            logger.warning(f"Ошибка очистки каталога профилирования: {e}")
@@ -0,0 +1,280 @@
+"""
+Модуль учёта запросов SQLAlchemy: задержка, строки, вызывающий метод
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, Dict, List
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Порог медленного запроса по умолчанию, секунды
+DEFAULT_SLOW_THRESHOLD = 0.1
+# Сколько последних медленных запросов хранить
+SLOW_LOG_SIZE = 100
+# Наибольшая длина текста запроса в журнале
+STATEMENT_LIMIT = 300
+
+_DATABASE_FILE = os.path.join('core', 'database.py')
+_SKIP_PREFIXES = ('sqlalchemy', 'pymysql', 'contextlib', 'query_stats')
+_SPACES = re.compile(r'\s+')
+_PARAMETER_LISTS = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s)\s*,)+\s*(?:\?|%s|%\(\w+\)s)\s*\)')
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Текст запроса без различий в пробелах и длине списков IN (...)
+
+    Args:
+        statement: SQL с параметрами-заполнителями
+
+    Returns:
+        str: Нормализованный текст (не длиннее STATEMENT_LIMIT)
+    """
+    text = _SPACES.sub(' ', statement).strip()
+    text = _PARAMETER_LISTS.sub('(...)', text)
+    return text[:STATEMENT_LIMIT]
+
+
+def _caller() -> str:
+    """
+    Вызвавший запрос метод: Database.<метод> или первая функция вне SQLAlchemy
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.endswith(_DATABASE_FILE) and not frame.f_code.co_name.startswith('_'):
+            return f"Database.{frame.f_code.co_name}"
+        if fallback is None:
+            module = frame.f_globals.get('__name__', '')
+            if not module.startswith(_SKIP_PREFIXES) and not module.endswith(_SKIP_PREFIXES):
+                fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+
+@dataclass(frozen=True)
+class QueryRecord:
+    """
+    Выполненный запрос
+
+    Attributes:
+        at: Момент завершения
+        seconds: Длительность
+        rows: Затронуто или получено строк (-1, если драйвер не сообщает)
+        caller: Вызвавший метод
+        statement: Нормализованный текст запроса
+        batch: Выполнен как executemany
+    """
+    at: datetime
+    seconds: float
+    rows: int
+    caller: str
+    statement: str
+    batch: bool = False
+
+
+@dataclass
+class QueryTotals:
+    """
+    Итоги по методу или действию
+
+    Attributes:
+        calls: Выполнений действия (для методов не считается)
+        queries: Запросов
+        seconds: Суммарное время запросов
+        max_seconds: Самый долгий запрос
+        rows: Строк
+    """
+    calls: int = 0
+    queries: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+    def add(self, record: QueryRecord):
+        self.queries += 1
+        self.seconds += record.seconds
+        self.max_seconds = max(self.max_seconds, record.seconds)
+        self.rows += max(record.rows, 0)
+
+
+class QueryCapture:
+    """
+    Запросы, выполненные в блоке QueryStats.capture() в текущем потоке
+
+    Используется в тестах для проверки количества запросов и поиска
+    N+1: один и тот же запрос, повторённый для каждой строки.
+    """
+
+    def __init__(self):
+        self.queries: List[QueryRecord] = []
+
+    @property
+    def count(self) -> int:
+        """Количество запросов"""
+        return len(self.queries)
+
+    def repeated(self, threshold: int = 5) -> Dict[str, int]:
+        """
+        Запросы, выполненные по отдельности threshold и более раз
+
+        executemany считается одним запросом, поэтому пакетная запись
+        сюда не попадает.
+
+        Returns:
+            Dict[str, int]: {текст запроса: количество}
+        """
+        counts = Counter(query.statement for query in self.queries)
+        return {statement: count for statement, count in counts.items() if count >= threshold}
+
+    def assert_no_n_plus_one(self, threshold: int = 5):
+        """
+        Проверка отсутствия N+1
+
+        Raises:
+            AssertionError: Какой-то запрос повторился threshold и более раз
+        """
+        repeated = self.repeated(threshold)
+        if repeated:
+            details = '\n'.join(f"  {count} × {statement}" for statement, count in repeated.items())
+            raise AssertionError(f"Повторяющиеся запросы (N+1):\n{details}")
+
+
+class QueryStats:
+    """
+    Учёт запросов движка SQLAlchemy
+
+    Обработчики событий движка замеряют каждый запрос и относят его
+    к вызвавшему методу Database. Запросы дольше slow_threshold попадают
+    в скользящий журнал медленных запросов и в лог. Запросы внутри
+    action() считаются для действия пользователя (ключ DbExecutor),
+    а внутри capture() — сохраняются для проверок в тестах.
+    """
+
+    def __init__(self, slow_threshold: float = DEFAULT_SLOW_THRESHOLD, slow_log_size: int = SLOW_LOG_SIZE):
+        """
+        Инициализация
+
+        Args:
+            slow_threshold: Порог медленного запроса, секунды
+            slow_log_size: Сколько последних медленных запросов хранить
+        """
+        self.slow_threshold = slow_threshold
+        self.slow_queries: Deque[QueryRecord] = deque(maxlen=slow_log_size)
+        self.slow_total = 0
+        self.by_caller: Dict[str, QueryTotals] = {}
+        self.by_action: Dict[str, QueryTotals] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Ключ в conn.info: к одному движку можно подключить несколько экземпляров
+        self._started_key = ('query_started', id(self))
+
+    def attach(self, engine):
+        """Подключение обработчиков событий к движку"""
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Соединение выполняет один запрос за раз; после ошибки значение перезапишется
+        conn.info[self._started_key] = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop(self._started_key, None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        record = QueryRecord(datetime.now(), seconds, cursor.rowcount, _caller(),
+                             fingerprint(statement), executemany)
+        local = self._local
+        with self._lock:
+            totals = self.by_caller.get(record.caller)
+            if totals is None:
+                totals = self.by_caller[record.caller] = QueryTotals()
+            totals.add(record)
+            action = getattr(local, 'action', None)
+            if action is not None:
+                self.by_action[action].add(record)
+            if seconds >= self.slow_threshold:
+                self.slow_queries.append(record)
+                self.slow_total += 1
+        for capture in getattr(local, 'captures', ()):
+            capture.queries.append(record)
+        if seconds >= self.slow_threshold:
+            logger.warning(f"Медленный запрос {seconds * 1000:.0f} мс ({record.caller}, строк {record.rows}): "
+                           f"{record.statement}")
+
+    @contextmanager
+    def action(self, name: str):
+        """
+        Учёт запросов действия пользователя в текущем потоке
+
+        Args:
+            name: Название действия (например, ключ запроса DbExecutor)
+        """
+        local = self._local
+        previous = getattr(local, 'action', None)
+        with self._lock:
+            totals = self.by_action.get(name)
+            if totals is None:
+                totals = self.by_action[name] = QueryTotals()
+            totals.calls += 1
+        local.action = name
+        try:
+            yield totals
+        finally:
+            local.action = previous
+
+    @contextmanager
+    def capture(self):
+        """
+        Сбор запросов текущего потока для проверок в тестах
+
+        Yields:
+            QueryCapture: Запросы, выполненные внутри блока
+        """
+        local = self._local
+        if not hasattr(local, 'captures'):
+            local.captures = []
+        captured = QueryCapture()
+        local.captures.append(captured)
+        try:
+            yield captured
+        finally:
+            local.captures.remove(captured)
+
+    def register_metrics(self, metrics):
+        """
+        Выдача итогов через метрики (Metrics)
+
+        Args:
+            metrics: Экземпляр core.metrics.Metrics
+        """
+        def per(totals: Dict[str, QueryTotals], label: str, field: str):
+            def read():
+                with self._lock:
+                    return [({label: name}, getattr(item, field)) for name, item in totals.items()]
+            return read
+
+        metrics.describe('saveconfe_db_queries_total', "Запросы к базе данных по методам Database")
+        metrics.describe('saveconfe_db_query_seconds_total', "Время запросов к базе данных по методам")
+        metrics.describe('saveconfe_db_query_max_seconds', "Самый долгий запрос метода")
+        metrics.describe('saveconfe_db_slow_queries_total', "Медленные запросы")
+        metrics.describe('saveconfe_db_action_calls_total', "Действия пользователя с запросами к базе")
+        metrics.describe('saveconfe_db_action_queries_total', "Запросы к базе данных по действиям пользователя")
+        metrics.counter('saveconfe_db_queries_total', per(self.by_caller, 'caller', 'queries'))
+        metrics.counter('saveconfe_db_query_seconds_total', per(self.by_caller, 'caller', 'seconds'))
+        metrics.gauge('saveconfe_db_query_max_seconds', per(self.by_caller, 'caller', 'max_seconds'))
+        metrics.counter('saveconfe_db_slow_queries_total', lambda: self.slow_total)
+        metrics.counter('saveconfe_db_action_calls_total', per(self.by_action, 'action', 'calls'))
+        metrics.counter('saveconfe_db_action_queries_total', per(self.by_action, 'action', 'queries'))
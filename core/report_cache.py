@@ -0,0 +1,180 @@
+"""
+Модуль кэша результатов отчётов
+"""
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+
+from core.reports import UsageReport
+from models.usage_log import ItemType
+
+logger = logging.getLogger(__name__)
+
+# Файл кэша по умолчанию (рядом с saveconfe.log)
+DEFAULT_CACHE_PATH = 'report_cache.json'
+
+
+def _size_of(value) -> int:
+    """Оценка занимаемой значением памяти в байтах"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, UsageReport):
+        return value.minutes.nbytes + value.bins.nbytes + \
+            sum(sys.getsizeof(name) + 64 for _, name in value.items)
+    return sys.getsizeof(value)
+
+
+def _encode(value) -> dict:
+    """Преобразование результата отчёта в JSON-совместимый словарь"""
+    if isinstance(value, UsageReport):
+        return {
+            'type': 'usage_report',
+            'unit': value.unit,
+            'bins': value.bins.astype('int64').tolist(),
+            'items': [[item_type.value, name] for item_type, name in value.items],
+            'minutes': value.minutes.tolist(),
+        }
+    if isinstance(value, np.ndarray):
+        return {'type': 'array', 'dtype': value.dtype.str, 'data': value.tolist()}
+    raise TypeError(f"Значение типа {type(value).__name__} не сохраняется на диск")
+
+
+def _decode(data: dict):
+    """Восстановление результата отчёта из словаря"""
+    if data['type'] == 'usage_report':
+        items = [(ItemType(item_type), name) for item_type, name in data['items']]
+        minutes = np.array(data['minutes'], dtype=float).reshape(len(items), len(data['bins']))
+        return UsageReport(data['unit'], np.array(data['bins'], dtype='datetime64[s]'), items, minutes)
+    if data['type'] == 'array':
+        return np.array(data['data'], dtype=data['dtype'])
+    raise ValueError(f"Неизвестный тип значения: {data['type']}")
+
+
+def _to_tuple(value):
+    """Списки из JSON обратно в кортежи (ключи и отметки сравниваются как кортежи)"""
+    if isinstance(value, list):
+        return tuple(_to_tuple(item) for item in value)
+    return value
+
+
+class ReportCache:
+    """
+    LRU-кэш результатов отчётов
+
+    Запись хранится под ключом (вид отчёта, параметры) вместе с отметкой
+    данных — состоянием логов и суточной сводки за период отчёта. Если при
+    чтении отметка другая, значит в период попали новые данные, и запись
+    считается устаревшей. Объём ограничен по памяти: при превышении
+    вытесняются давно не использованные записи. Кэш можно сохранить
+    на диск, чтобы после запуска сразу показать последний отчёт.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, path: Optional[str] = None):
+        """
+        Инициализация кэша
+
+        Args:
+            max_bytes: Максимальный объём значений в байтах
+            path: Файл для сохранения на диск (None — только в памяти)
+        """
+        self.max_bytes = max_bytes
+        self.path = path
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Any, int]]" = OrderedDict()
+        self._lock = Lock()
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, watermark) -> Optional[Any]:
+        """
+        Получение актуального значения
+
+        Args:
+            key: Ключ отчёта
+            watermark: Текущая отметка данных
+
+        Returns:
+            Значение или None, если записи нет или она устарела
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != watermark:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Значение без проверки отметки (может быть устаревшим)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key: Hashable, watermark, value):
+        """
+        Сохранение значения
+
+        Args:
+            key: Ключ отчёта
+            watermark: Отметка данных, для которой посчитано значение
+            value: Результат отчёта
+        """
+        size = _size_of(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (watermark, value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        """Очистка кэша"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def save(self):
+        """Сохранение кэша в файл (атомарно через временный файл)"""
+        if not self.path:
+            return
+        with self._lock:
+            entries = [[list(key), list(watermark), _encode(value)]
+                       for key, (watermark, value, _) in self._entries.items()]
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.path)
+        except (OSError, TypeError) as e:
+            logger.error(f"Ошибка сохранения кэша отчётов: {e}")
+
+    def load(self):
+        """Загрузка кэша из файла; повреждённый файл игнорируется"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            for key, watermark, data in entries:
+                self.put(_to_tuple(key), _to_tuple(watermark), _decode(data))
+            logger.info(f"Загружено записей кэша отчётов: {len(entries)}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Не удалось загрузить кэш отчётов {self.path}: {e}")
+            self.clear()
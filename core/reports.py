@@ -0,0 +1,337 @@
+"""
+Модуль векторизованных отчётов об использовании
+"""
+import csv
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from models.usage_log import ItemType
+
+logger = logging.getLogger(__name__)
+
+# Ширина интервалов отчёта в секундах
+BIN_SECONDS = {
+    'hour': 3600,
+    'day': 86400,
+    'week': 7 * 86400,
+}
+
+# Понедельник, от которого отсчитываются недели
+_WEEK_ORIGIN = np.datetime64('1969-12-29T00:00:00', 's')
+_SECOND = np.timedelta64(1, 's')
+
+
+def bin_start(moment: datetime, unit: str) -> np.datetime64:
+    """
+    Начало интервала отчёта, в который попадает момент
+
+    Args:
+        moment: Момент времени
+        unit: 'hour', 'day' или 'week'
+
+    Returns:
+        np.datetime64: Начало часа, дня или недели (с понедельника)
+    """
+    value = np.datetime64(moment, 's')
+    width = BIN_SECONDS[unit]
+    offset = (value - _WEEK_ORIGIN) // _SECOND
+    return value - np.timedelta64(int(offset % width), 's')
+
+
+def distribute(starts: np.ndarray, ends: np.ndarray, origin: np.datetime64, bin_seconds: int,
+               n_bins: int, groups: Optional[np.ndarray] = None, n_groups: int = 1) -> np.ndarray:
+    """
+    Распределение длительностей интервалов по равным временным интервалам
+
+    Интервал, пересекающий границы, делится на неполные части в первом
+    и последнем интервалах и целые интервалы между ними. Части считаются
+    через bincount, а целые интервалы — разностным массивом с
+    накопительной суммой, так что время не зависит от длины сессий.
+
+    Args:
+        starts: Начала интервалов (datetime64)
+        ends: Концы интервалов (datetime64)
+        origin: Начало первого интервала отчёта
+        bin_seconds: Ширина интервала отчёта в секундах
+        n_bins: Количество интервалов отчёта
+        groups: Номер группы (элемента) каждого интервала
+        n_groups: Количество групп
+
+    Returns:
+        np.ndarray: Секунды использования, матрица [группа, интервал]
+    """
+    if groups is None:
+        groups = np.zeros(len(starts), dtype=np.int64)
+    span = float(n_bins * bin_seconds)
+    s = np.clip((starts - origin) / _SECOND, 0.0, span)
+    e = np.clip((ends - origin) / _SECOND, 0.0, span)
+
+    valid = e > s
+    s, e, g = s[valid], e[valid], groups[valid].astype(np.int64)
+    first = (s // bin_seconds).astype(np.int64)
+    last = np.ceil(e / bin_seconds).astype(np.int64) - 1
+    size = n_groups * n_bins
+    row = g * n_bins
+
+    same = first == last
+    head = np.where(same, e - s, (first + 1) * bin_seconds - s)
+    result = np.bincount(row + first, weights=head, minlength=size)
+
+    multi = ~same
+    result += np.bincount(row[multi] + last[multi],
+                          weights=e[multi] - last[multi] * bin_seconds, minlength=size)
+
+    full = last > first + 1
+    diff = np.bincount(row[full] + first[full] + 1, minlength=size) - \
+        np.bincount(row[full] + last[full], minlength=size)
+    result = result.reshape(n_groups, n_bins)
+    result += np.cumsum(diff.reshape(n_groups, n_bins), axis=1) * bin_seconds
+    return result
+
+
+@dataclass(frozen=True)
+class UsageIntervals:
+    """
+    Интервалы использования в виде массивов NumPy
+
+    Attributes:
+        items: Элементы (тип, название) в порядке номеров
+        item_index: Номер элемента каждого интервала
+        starts: Начала интервалов (datetime64[s])
+        ends: Концы интервалов (datetime64[s])
+    """
+    items: List[Tuple[ItemType, str]]
+    item_index: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> 'UsageIntervals':
+        """
+        Построение из строк (item_type, item_name, start_time, end_time, duration)
+
+        У незакрытого лога конец берётся как start_time + duration,
+        то есть последняя контрольная точка.
+        """
+        index = {}
+        codes, starts, ends, durations = [], [], [], []
+        for item_type, item_name, start_time, end_time, duration in rows:
+            codes.append(index.setdefault((item_type, item_name), len(index)))
+            starts.append(start_time)
+            ends.append(end_time)
+            durations.append(duration or 0.0)
+
+        starts = np.array(starts, dtype='datetime64[s]')
+        ends = np.array(ends, dtype='datetime64[s]')
+        open_logs = np.isnat(ends)
+        if open_logs.any():
+            seconds = np.array(durations)[open_logs] * 60
+            ends[open_logs] = starts[open_logs] + seconds.astype('timedelta64[s]')
+        return cls(list(index), np.array(codes, dtype=np.int64), starts, ends)
+
+
+@dataclass(frozen=True)
+class UsageReport:
+    """
+    Отчёт об использовании по временным интервалам
+
+    Attributes:
+        unit: Ширина интервала ('hour', 'day', 'week')
+        bins: Начала интервалов (datetime64[s])
+        items: Элементы (тип, название)
+        minutes: Минуты использования, матрица [элемент, интервал]
+    """
+    unit: str
+    bins: np.ndarray
+    items: List[Tuple[ItemType, str]]
+    minutes: np.ndarray
+
+    def totals(self) -> np.ndarray:
+        """Суммарные минуты каждого элемента за период"""
+        return self.minutes.sum(axis=1)
+
+    def bin_labels(self) -> List[str]:
+        """Подписи интервалов для таблиц и экспорта"""
+        if self.unit == 'hour':
+            return [str(value)[11:16] if i else str(value)[:16].replace('T', ' ')
+                    for i, value in enumerate(self.bins)]
+        return [str(value)[:10] for value in self.bins]
+
+    def rows(self) -> Iterator[Tuple[ItemType, str, np.ndarray, float]]:
+        """Строки отчёта (тип, название, минуты по интервалам, итог) по убыванию итога"""
+        totals = self.totals()
+        for position in np.argsort(-totals, kind='stable'):
+            item_type, item_name = self.items[position]
+            yield item_type, item_name, self.minutes[position], float(totals[position])
+
+
+class ReportEngine:
+    """
+    Построение отчётов по логам использования
+
+    Логи периода загружаются одним запросом в массивы NumPy, после чего
+    сессии, пересекающие границы часов, дней или недель, делятся
+    векторно, без цикла по строкам. С кэшем (ReportCache) повторный
+    отчёт за тот же период без новых данных не пересчитывается.
+    """
+
+    def __init__(self, database, cache=None):
+        """
+        Инициализация
+
+        Args:
+            database: Экземпляр Database
+            cache: ReportCache для результатов отчётов (None — без кэша)
+        """
+        self.db = database
+        self.cache = cache
+
+    @staticmethod
+    def cache_key(kind: str, start: datetime, end: datetime, unit: Optional[str] = None) -> tuple:
+        """Ключ кэша для отчёта вида kind за период"""
+        return kind, unit, start.isoformat(), end.isoformat()
+
+    def peek(self, kind: str, start: datetime, end: datetime, unit: Optional[str] = None):
+        """
+        Последний посчитанный результат без проверки актуальности
+
+        Позволяет сразу показать отчёт (например, при запуске), пока
+        актуальный результат получается в фоне.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.peek(self.cache_key(kind, start, end, unit))
+
+    def _cached(self, key: tuple, start: datetime, end: datetime, compute):
+        """Результат из кэша, если данные за период не менялись, иначе compute()"""
+        if self.cache is None:
+            return compute()
+        watermark = tuple(self.db.get_usage_watermark(start, end))
+        value = self.cache.get(key, watermark)
+        if value is None:
+            value = compute()
+            self.cache.put(key, watermark, value)
+        return value
+
+    def load_intervals(self, start: datetime, end: datetime) -> UsageIntervals:
+        """Загрузка логов, пересекающих период [start, end)"""
+        return UsageIntervals.from_rows(self.db.get_usage_intervals(start, end))
+
+    def usage_report(self, start: datetime, end: datetime, unit: str = 'day',
+                     intervals: Optional[UsageIntervals] = None) -> UsageReport:
+        """
+        Отчёт по часам, дням или неделям
+
+        Args:
+            start: Начало периода
+            end: Конец периода (не включительно)
+            unit: 'hour', 'day' или 'week'
+            intervals: Уже загруженные интервалы (по умолчанию загружаются)
+
+        Returns:
+            UsageReport: Минуты каждого элемента по интервалам
+        """
+        if intervals is None:
+            return self._cached(self.cache_key('usage_report', start, end, unit), start, end,
+                                lambda: self.usage_report(start, end, unit, self.load_intervals(start, end)))
+        width = BIN_SECONDS[unit]
+        origin = bin_start(start, unit)
+        period_start = np.datetime64(start, 's')
+        period_end = np.datetime64(end, 's')
+        n_bins = max(1, -(-int((period_end - origin) // _SECOND) // width))
+
+        # Время до start и после end в крайних интервалах не учитывается
+        seconds = distribute(np.maximum(intervals.starts, period_start),
+                             np.minimum(intervals.ends, period_end),
+                             origin, width, n_bins, intervals.item_index, len(intervals.items))
+        bins = origin + np.arange(n_bins) * width * _SECOND
+        return UsageReport(unit, bins, intervals.items, seconds / 60)
+
+    def heatmap(self, start: datetime, end: datetime,
+                intervals: Optional[UsageIntervals] = None) -> np.ndarray:
+        """
+        Тепловая карта: минуты использования по дням недели и часам
+
+        Returns:
+            np.ndarray: Матрица 7×24 (понедельник — строка 0)
+        """
+        if intervals is None:
+            return self._cached(self.cache_key('heatmap', start, end), start, end,
+                                lambda: self.heatmap(start, end, self.load_intervals(start, end)))
+        report = self.usage_report(start, end, 'hour', intervals)
+        per_hour = report.minutes.sum(axis=0)
+        hours = (report.bins - _WEEK_ORIGIN) // np.timedelta64(1, 'h')
+        cells = (hours // 24 % 7) * 24 + hours % 24
+        return np.bincount(cells, weights=per_hour, minlength=7 * 24).reshape(7, 24)
+
+
+def period_for(unit: str, today: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """
+    Период отчёта по умолчанию для ширины интервала
+
+    Часы — сегодня, дни — последние 7 дней, недели — последние 8 недель.
+    """
+    today = today or date.today()
+    end = datetime.combine(today + timedelta(days=1), time.min)
+    days = {'hour': 1, 'day': 7, 'week': 56}[unit]
+    return end - timedelta(days=days), end
+
+
+def write_report_csv(report: UsageReport, path: str):
+    """
+    Экспорт отчёта в CSV
+
+    Args:
+        report: Отчёт
+        path: Путь к файлу
+    """
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Тип', 'Название', *report.bin_labels(), 'Итого (мин)'])
+        for item_type, item_name, minutes, total in report.rows():
+            writer.writerow([item_type.value, item_name, *(f"{value:.2f}" for value in minutes),
+                             f"{total:.2f}"])
+    logger.info(f"Отчёт сохранён в {path}")
+
+
+def write_usage_logs_csv(logs: list, path: str):
+    """
+    Экспорт логов использования в CSV
+
+    Args:
+        logs: Список UsageLogRecord
+        path: Путь к файлу
+    """
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Тип', 'Название', 'Начало', 'Окончание', 'Длительность (мин)'])
+        for log in logs:
+            writer.writerow([log.item_type.value, log.item_name,
+                             log.start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                             log.end_time.strftime("%Y-%m-%d %H:%M:%S") if log.end_time else "",
+                             log.duration])
+    logger.info(f"Логи использования сохранены в {path}")
+
+
+# Подписи строк тепловой карты
+WEEKDAY_LABELS = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+
+
+def write_heatmap_csv(heatmap: np.ndarray, path: str):
+    """
+    Экспорт тепловой карты (дни недели × часы) в CSV
+
+    Args:
+        heatmap: Матрица 7×24 минут
+        path: Путь к файлу
+    """
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['День', *(f"{hour:02d}:00" for hour in range(24))])
+        for label, row in zip(WEEKDAY_LABELS, heatmap):
+            writer.writerow([label, *(f"{value:.2f}" for value in row)])
+    logger.info(f"Тепловая карта сохранена в {path}")
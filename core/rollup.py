@@ -0,0 +1,68 @@
+"""
+Модуль суточной сводки использования (usage_daily)
+"""
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def split_by_day(start_time: datetime, end_time: datetime) -> List[Tuple[date, float]]:
+    """
+    Разбиение интервала по границам суток
+
+    Args:
+        start_time: Начало интервала
+        end_time: Конец интервала
+
+    Returns:
+        List[Tuple[date, float]]: Пары (день, минуты) в хронологическом порядке
+    """
+    if end_time <= start_time:
+        return []
+
+    parts = []
+    current = start_time
+    while current < end_time:
+        next_midnight = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+        part_end = min(end_time, next_midnight)
+        parts.append((current.date(), (part_end - current).total_seconds() / 60))
+        current = part_end
+    return parts
+
+
+def accumulate_daily(totals: Dict[tuple, list], item_type, item_name: str,
+                     start_time: datetime, end_time: Optional[datetime],
+                     new_session: bool = True):
+    """
+    Добавление интервала в словарь суточных сумм
+
+    Сессия засчитывается дню, в котором она началась.
+
+    Args:
+        totals: Словарь {(день, тип, название): [минуты, сессии]}
+        item_type: Тип элемента (ItemType)
+        item_name: Название сайта или приложения
+        start_time: Начало интервала
+        end_time: Конец интервала
+        new_session: Засчитывать ли интервал как новую сессию
+    """
+    parts = split_by_day(start_time, end_time) if end_time else []
+    if not parts and new_session:
+        parts = [(start_time.date(), 0.0)]
+
+    for index, (day, minutes) in enumerate(parts):
+        entry = totals.setdefault((day, item_type, item_name), [0.0, 0])
+        entry[0] += minutes
+        if new_session and index == 0:
+            entry[1] += 1
+
+
+def rows_from_totals(totals: Dict[tuple, list]) -> Iterable[dict]:
+    """Преобразование словаря суточных сумм в строки для вставки в usage_daily"""
+    for (day, item_type, item_name), (minutes, sessions) in totals.items():
+        yield {
+            'date': day,
+            'item_type': item_type,
+            'item_name': item_name,
+            'total_minutes': minutes,
+            'sessions': sessions,
+        }
@@ -0,0 +1,259 @@
+"""
+Модуль массового импорта и экспорта правил блокировки
+"""
+import csv
+import json
+import logging
+import os
+from datetime import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from core.blocker import Blocker
+
+logger = logging.getLogger(__name__)
+
+# Колонки CSV при экспорте (и допустимые при импорте)
+CSV_COLUMNS = ['type', 'url', 'app_path', 'app_name', 'time_limit', 'schedule_start', 'schedule_end']
+
+
+def _detect_format(path: Path) -> str:
+    """Определение формата файла по расширению"""
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix == '.json':
+        return 'json'
+    if suffix == '.jsonl':
+        return 'jsonl'
+    return 'list'
+
+
+def _iter_records(path: Path, fmt: str) -> Iterator[Optional[dict]]:
+    """
+    Потоковое чтение записей из файла
+
+    Для CSV, JSON Lines и списков доменов файл читается построчно;
+    обычный JSON загружается целиком. Вместо нечитаемой строки JSON Lines
+    возвращается None, чтобы она попала в пропущенные, а не прервала импорт.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        elif fmt == 'jsonl':
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Пропущена некорректная строка JSON Lines {line!r}: {e}")
+                    yield None
+                    continue
+                yield record if isinstance(record, dict) else {'url': record}
+        elif fmt == 'json':
+            data = json.load(f)
+            if isinstance(data, dict):
+                for record in data.get('sites', []):
+                    yield {'type': 'site', **record} if isinstance(record, dict) else {'url': record}
+                for record in data.get('apps', []):
+                    yield {'type': 'app', **record} if isinstance(record, dict) else {'app_path': record}
+            else:
+                for record in data:
+                    yield record if isinstance(record, dict) else {'url': record}
+        else:
+            # Список доменов: один на строку, поддерживаются комментарии и формат hosts
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                tokens = line.split()
+                if len(tokens) >= 2 and tokens[0] in ('0.0.0.0', '127.0.0.1', '::1'):
+                    for token in tokens[1:]:
+                        yield {'url': token}
+                else:
+                    yield {'url': tokens[0]}
+
+
+def _parse_time(value) -> Optional[time]:
+    """Разбор времени расписания в формате HH:MM[:SS]"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, time):
+        return value
+    return time.fromisoformat(str(value).strip())
+
+
+def _parse_limit(value) -> int:
+    """Разбор лимита времени в минутах"""
+    if value in (None, ''):
+        return 0
+    return max(0, int(float(value)))
+
+
+def _normalize(record: dict) -> Optional[Tuple[str, dict]]:
+    """
+    Нормализация одной записи
+
+    Returns:
+        Optional[Tuple[str, dict]]: ('site' | 'app', строка для вставки) или None
+    """
+    kind = str(record.get('type') or '').strip().lower()
+    if not kind:
+        kind = 'app' if record.get('app_path') else 'site'
+
+    values = {
+        'time_limit': _parse_limit(record.get('time_limit')),
+        'schedule_start': _parse_time(record.get('schedule_start')),
+        'schedule_end': _parse_time(record.get('schedule_end')),
+    }
+
+    if kind == 'site':
+        domain = Blocker.normalize_domain(str(record.get('url') or ''))
+        if not domain:
+            return None
+        return 'site', {'url': domain, **values}
+
+    if kind == 'app':
+        app_path = str(record.get('app_path') or '').strip()
+        if not app_path:
+            return None
+        app_path = os.path.normpath(app_path)
+        app_name = str(record.get('app_name') or '').strip() or app_path.replace('\\', '/').split('/')[-1]
+        return 'app', {'app_path': app_path, 'app_name': app_name, **values}
+
+    return None
+
+
+def read_rules(path, fmt: Optional[str] = None) -> Tuple[list, list, int]:
+    """
+    Чтение, нормализация и дедупликация правил из файла
+
+    Поддерживаются CSV (с заголовком), JSON (список или {"sites": [], "apps": []}),
+    JSON Lines и простые списки доменов (в том числе в формате hosts).
+    При повторе URL или пути побеждает последняя запись.
+
+    Args:
+        path: Путь к файлу
+        fmt: Формат ('csv', 'json', 'jsonl', 'list'); по умолчанию — по расширению
+
+    Returns:
+        Tuple[list, list, int]: (сайты, приложения, число пропущенных записей)
+    """
+    path = Path(path)
+    fmt = fmt or _detect_format(path)
+
+    sites: Dict[str, dict] = {}
+    apps: Dict[str, dict] = {}
+    skipped = 0
+    for record in _iter_records(path, fmt):
+        try:
+            normalized = _normalize(record) if record is not None else None
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Пропущена некорректная запись {record}: {e}")
+            normalized = None
+        if normalized is None:
+            skipped += 1
+            continue
+        kind, row = normalized
+        if kind == 'site':
+            sites[row['url']] = row
+        else:
+            apps[row['app_path'].lower()] = row
+
+    return list(sites.values()), list(apps.values()), skipped
+
+
+def _count_changes(added: list, removed: list) -> Tuple[int, int]:
+    """
+    Количество новых и изменённых правил в изменении хранилища
+
+    Изменённое правило приходит в RuleDelta как удалённое и добавленное
+    с тем же id, поэтому новыми считаются только id, которых не было.
+    """
+    removed_ids = {rule.id for rule in removed}
+    updated = sum(1 for rule in added if rule.id in removed_ids)
+    return len(added) - updated, updated
+
+
+def import_rules(repository, path, fmt: Optional[str] = None) -> dict:
+    """
+    Массовый импорт правил в базу данных одной транзакцией
+
+    После записи хранилище правил перечитывается один раз, а подписчики
+    (в том числе Blocker) получают одно изменение, так что hosts файл
+    обновляется одной записью.
+
+    Args:
+        repository: Экземпляр RuleRepository
+        path: Путь к файлу
+        fmt: Формат файла (см. read_rules)
+
+    Returns:
+        dict: Статистика импорта (sites, apps, skipped, added_sites, updated_sites,
+              added_apps, updated_apps)
+    """
+    sites, apps, skipped = read_rules(path, fmt)
+    added_sites = updated_sites = added_apps = updated_apps = 0
+    if sites or apps:
+        repository.db.bulk_upsert_rules(sites, apps)
+        delta = repository.load()
+        added_sites, updated_sites = _count_changes(delta.added_sites, delta.removed_sites)
+        added_apps, updated_apps = _count_changes(delta.added_apps, delta.removed_apps)
+
+    logger.info(f"Импорт из {path}: {len(sites)} сайтов, {len(apps)} приложений, пропущено {skipped}")
+    return {
+        'sites': len(sites),
+        'apps': len(apps),
+        'skipped': skipped,
+        'added_sites': added_sites,
+        'updated_sites': updated_sites,
+        'added_apps': added_apps,
+        'updated_apps': updated_apps,
+    }
+
+
+def export_rules(repository, path, fmt: Optional[str] = None) -> int:
+    """
+    Экспорт правил из хранилища в файл
+
+    Args:
+        repository: Экземпляр RuleRepository
+        path: Путь к файлу
+        fmt: Формат ('csv', 'json', 'jsonl' или 'list'); по умолчанию — по расширению
+
+    Returns:
+        int: Количество экспортированных правил
+    """
+    path = Path(path)
+    fmt = fmt or _detect_format(path)
+
+    def _time(value):
+        return value.strftime('%H:%M') if value else ''
+
+    sites = [{'type': 'site', 'url': rule.url, 'time_limit': rule.time_limit or 0,
+              'schedule_start': _time(rule.schedule_start), 'schedule_end': _time(rule.schedule_end)}
+             for rule in repository.get_site_rules()]
+    apps = [{'type': 'app', 'app_path': rule.app_path, 'app_name': rule.app_name,
+             'time_limit': rule.time_limit or 0,
+             'schedule_start': _time(rule.schedule_start), 'schedule_end': _time(rule.schedule_end)}
+            for rule in repository.get_app_rules()]
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(sites)
+            writer.writerows(apps)
+        elif fmt == 'json':
+            json.dump({'sites': sites, 'apps': apps}, f, ensure_ascii=False, indent=2)
+        elif fmt == 'jsonl':
+            for record in sites + apps:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            f.writelines(f"{site['url']}\n" for site in sites)
+            apps = []
+
+    logger.info(f"Экспортировано правил в {path}: {len(sites)} сайтов, {len(apps)} приложений")
+    return len(sites) + len(apps)
@@ -0,0 +1,251 @@
+"""
+Модуль хранилища правил блокировки в памяти
+"""
+import logging
+from dataclasses import dataclass, field
+from threading import RLock
+from typing import Callable, Dict, List, Optional
+
+from core.database import Database
+from core.events import EventBus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RuleDelta:
+    """
+    Изменение набора правил
+
+    Изменённое правило передаётся как удалённое старое и добавленное новое.
+
+    Attributes:
+        version: Локальная версия хранилища после изменения
+        added_sites: Добавленные правила сайтов
+        removed_sites: Удалённые правила сайтов
+        added_apps: Добавленные правила приложений
+        removed_apps: Удалённые правила приложений
+    """
+    version: int
+    added_sites: List = field(default_factory=list)
+    removed_sites: List = field(default_factory=list)
+    added_apps: List = field(default_factory=list)
+    removed_apps: List = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        """Проверка, что изменение ничего не содержит"""
+        return not (self.added_sites or self.removed_sites or
+                    self.added_apps or self.removed_apps)
+
+
+def _rule_key(rule) -> tuple:
+    """Значения полей правила для сравнения при перезагрузке"""
+    return (getattr(rule, 'url', None), getattr(rule, 'app_path', None),
+            getattr(rule, 'app_name', None), rule.time_limit,
+            rule.schedule_start, rule.schedule_end)
+
+
+class RuleRepository:
+    """
+    Хранилище правил блокировки в памяти
+
+    Держит правила сайтов и приложений в памяти с монотонно растущей
+    версией, применяет добавления и удаления инкрементально и уведомляет
+    подписчиков (Blocker, Scheduler, таблицы UI) изменениями RuleDelta.
+    Внешние изменения обнаруживаются чтением одной строки rules_version.
+    """
+
+    def __init__(self, database: Database, bus: Optional[EventBus] = None):
+        """
+        Инициализация хранилища
+
+        Args:
+            database: Экземпляр Database
+            bus: Шина событий (по умолчанию своя)
+        """
+        self.db = database
+        self.sites: Dict[int, object] = {}
+        self.apps: Dict[int, object] = {}
+        self.version = 0  # Локальная версия, растёт при каждом изменении
+        self.db_version: Optional[int] = None  # Последняя известная версия rules_version
+        self.bus = bus or EventBus()
+        self._lock = RLock()
+
+    def subscribe(self, callback: Callable[[RuleDelta], None], **options):
+        """
+        Подписка на изменения правил
+
+        Без очереди обработчик вызывается сразу в потоке, изменившем правила.
+
+        Args:
+            callback: Функция, принимающая RuleDelta
+            **options: Параметры подписки EventBus.subscribe (name, max_queue, overflow)
+        """
+        self.bus.subscribe(callback, RuleDelta, **options)
+
+    def unsubscribe(self, callback: Callable[[RuleDelta], None]):
+        """Отписка от изменений правил"""
+        self.bus.unsubscribe(callback, RuleDelta)
+
+    def get_site_rules(self) -> list:
+        """Получение правил сайтов, упорядоченных по ID"""
+        with self._lock:
+            return [self.sites[rule_id] for rule_id in sorted(self.sites)]
+
+    def get_app_rules(self) -> list:
+        """Получение правил приложений, упорядоченных по ID"""
+        with self._lock:
+            return [self.apps[rule_id] for rule_id in sorted(self.apps)]
+
+    def load(self) -> RuleDelta:
+        """
+        Полная загрузка правил из базы данных
+
+        Повторная загрузка сравнивается с текущим состоянием, и подписчики
+        получают только разницу.
+
+        Returns:
+            RuleDelta: Применённое изменение
+        """
+        db_version = self.db.get_rules_version()
+        sites = self.db.get_all_site_rules()
+        apps = self.db.get_all_app_rules()
+        delta = self._replace(sites, apps, db_version)
+        logger.info(f"Загружено правил: {len(sites)} сайтов, {len(apps)} приложений "
+                    f"(версия {db_version})")
+        return delta
+
+    def restore(self, sites: list, apps: list) -> RuleDelta:
+        """
+        Загрузка правил из локального снимка без обращения к базе данных
+
+        Версия базы остаётся неизвестной, поэтому следующий poll()
+        выполнит полную загрузку, и подписчики получат только разницу
+        между снимком и базой.
+
+        Args:
+            sites: Правила сайтов
+            apps: Правила приложений
+
+        Returns:
+            RuleDelta: Применённое изменение
+        """
+        return self._replace(sites, apps, None)
+
+    def _replace(self, sites: list, apps: list, db_version: Optional[int]) -> RuleDelta:
+        """Замена набора правил с уведомлением подписчиков о разнице"""
+        sites = {rule.id: rule for rule in sites}
+        apps = {rule.id: rule for rule in apps}
+        with self._lock:
+            added_sites, removed_sites = self._diff(self.sites, sites)
+            added_apps, removed_apps = self._diff(self.apps, apps)
+            self.sites = sites
+            self.apps = apps
+            self.db_version = db_version
+            delta = self._next_delta(added_sites, removed_sites, added_apps, removed_apps)
+        self._notify(delta)
+        return delta
+
+    def poll(self) -> bool:
+        """
+        Проверка внешних изменений по строке rules_version
+
+        Returns:
+            bool: True если правила были перезагружены
+        """
+        db_version = self.db.get_rules_version()
+        if db_version == self.db_version:
+            return False
+        logger.info(f"Обнаружено внешнее изменение правил (версия {self.db_version} -> {db_version})")
+        self.load()
+        return True
+
+    def add_site(self, url: str, time_limit: int = 0, schedule_start=None, schedule_end=None):
+        """Добавление правила сайта в базу данных и в память"""
+        rule = self.db.add_site_rule(url, time_limit, schedule_start, schedule_end)
+        with self._lock:
+            self.sites[rule.id] = rule
+            delta = self._next_delta(added_sites=[rule])
+        self._after_local_write(delta)
+        return rule
+
+    def delete_site(self, rule_id: int) -> bool:
+        """Удаление правила сайта из базы данных и из памяти"""
+        if not self.db.delete_site_rule(rule_id):
+            return False
+        with self._lock:
+            rule = self.sites.pop(rule_id, None)
+            delta = self._next_delta(removed_sites=[rule] if rule else [])
+        self._after_local_write(delta)
+        return True
+
+    def add_app(self, app_path: str, app_name: str, time_limit: int = 0,
+                schedule_start=None, schedule_end=None):
+        """Добавление правила приложения в базу данных и в память"""
+        rule = self.db.add_app_rule(app_path, app_name, time_limit, schedule_start, schedule_end)
+        with self._lock:
+            self.apps[rule.id] = rule
+            delta = self._next_delta(added_apps=[rule])
+        self._after_local_write(delta)
+        return rule
+
+    def delete_app(self, rule_id: int) -> bool:
+        """Удаление правила приложения из базы данных и из памяти"""
+        if not self.db.delete_app_rule(rule_id):
+            return False
+        with self._lock:
+            rule = self.apps.pop(rule_id, None)
+            delta = self._next_delta(removed_apps=[rule] if rule else [])
+        self._after_local_write(delta)
+        return True
+
+    @staticmethod
+    def _diff(old: dict, new: dict) -> tuple:
+        """Вычисление добавленных и удалённых правил между двумя состояниями"""
+        added = []
+        removed = []
+        for rule_id, rule in old.items():
+            new_rule = new.get(rule_id)
+            if new_rule is None or _rule_key(new_rule) != _rule_key(rule):
+                removed.append(rule)
+        for rule_id, rule in new.items():
+            old_rule = old.get(rule_id)
+            if old_rule is None or _rule_key(old_rule) != _rule_key(rule):
+                added.append(rule)
+        return added, removed
+
+    def _next_delta(self, added_sites=None, removed_sites=None,
+                    added_apps=None, removed_apps=None) -> RuleDelta:
+        """Создание RuleDelta со следующим номером версии"""
+        self.version += 1
+        return RuleDelta(
+            version=self.version,
+            added_sites=added_sites or [],
+            removed_sites=removed_sites or [],
+            added_apps=added_apps or [],
+            removed_apps=removed_apps or []
+        )
+
+    def _after_local_write(self, delta: RuleDelta):
+        """
+        Синхронизация версии после собственной записи
+
+        Собственное изменение увеличивает rules_version ровно на единицу.
+        Если версия выросла сильнее, значит правила параллельно изменил
+        кто-то ещё, и нужна полная перезагрузка.
+        """
+        self._notify(delta)
+        try:
+            db_version = self.db.get_rules_version()
+            if self.db_version is not None and db_version == self.db_version + 1:
+                self.db_version = db_version
+            else:
+                self.load()
+        except Exception as e:
+            logger.error(f"Ошибка проверки версии правил: {e}")
+            self.db_version = None
+
+    def _notify(self, delta: RuleDelta):
+        """Уведомление подписчиков об изменении"""
+        if not delta.is_empty():
+            self.bus.publish(delta)
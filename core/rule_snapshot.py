@@ -0,0 +1,133 @@
+"""
+Модуль локального снимка правил для блокировки до подключения к базе данных
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from threading import Lock
+from typing import Dict, List, Mapping, Optional
+
+from models.records import SiteRuleRecord, AppRuleRecord
+
+logger = logging.getLogger(__name__)
+
+# Файл снимка по умолчанию (рядом с saveconfe.spool)
+DEFAULT_SNAPSHOT_PATH = 'rules.snapshot.json'
+# Версия формата файла; снимок другой версии не загружается
+SNAPSHOT_FORMAT = 1
+
+_TIME_FIELDS = ('schedule_start', 'schedule_end')
+
+
+@dataclass(frozen=True)
+class RuleSnapshot:
+    """
+    Снимок правил и счётчиков за день
+
+    Attributes:
+        db_version: Версия rules_version, с которой совпадали правила
+        saved_at: Момент сохранения
+        sites: Правила сайтов
+        apps: Правила приложений
+        used_time: Использованное время за день сохранения, {название: минуты}
+    """
+    db_version: Optional[int]
+    saved_at: datetime
+    sites: List[SiteRuleRecord]
+    apps: List[AppRuleRecord]
+    used_time: Dict[str, float]
+
+    def used_time_for(self, day: date) -> Dict[str, float]:
+        """Счётчики, если снимок сохранён в этот день (иначе пусто)"""
+        return dict(self.used_time) if self.saved_at.date() == day else {}
+
+
+def _encode_rule(rule) -> dict:
+    data = rule._asdict()
+    for name in _TIME_FIELDS:
+        if data[name] is not None:
+            data[name] = data[name].isoformat()
+    return data
+
+
+def _decode_rule(record_type, data: dict):
+    for name in _TIME_FIELDS:
+        if data.get(name):
+            data[name] = time.fromisoformat(data[name])
+    return record_type(**data)
+
+
+class RuleSnapshotStore:
+    """
+    Хранилище снимка правил в локальном файле
+
+    Снимок записывается атомарно (временный файл, fsync, замена), поэтому
+    после сбоя питания остаётся либо старая, либо новая версия целиком.
+    При загрузке повреждённый файл или файл другой версии формата
+    пропускается, и правила берутся из базы данных.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        """
+        Инициализация
+
+        Args:
+            path: Путь к файлу снимка
+        """
+        self.path = path
+        self._lock = Lock()
+
+    def save(self, rules, used_time: Mapping[str, float]):
+        """
+        Сохранение правил и счётчиков
+
+        Args:
+            rules: RuleRepository
+            used_time: Использованное за сегодня время (например, Monitor.state.used_time)
+        """
+        data = {
+            'format': SNAPSHOT_FORMAT,
+            'db_version': rules.db_version,
+            'saved_at': datetime.now().isoformat(),
+            'sites': [_encode_rule(rule) for rule in rules.get_site_rules()],
+            'apps': [_encode_rule(rule) for rule in rules.get_app_rules()],
+            'used_time': dict(used_time),
+        }
+        temp_path = f"{self.path}.tmp"
+        with self._lock:
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.error(f"Ошибка сохранения снимка правил: {e}")
+
+    def load(self) -> Optional[RuleSnapshot]:
+        """
+        Загрузка снимка
+
+        Returns:
+            Optional[RuleSnapshot]: Снимок или None, если файла нет или он непригоден
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') != SNAPSHOT_FORMAT:
+                logger.warning(f"Снимок правил {self.path} другой версии формата: {data.get('format')}")
+                return None
+            return RuleSnapshot(
+                db_version=data['db_version'],
+                saved_at=datetime.fromisoformat(data['saved_at']),
+                sites=[_decode_rule(SiteRuleRecord, rule) for rule in data['sites']],
+                apps=[_decode_rule(AppRuleRecord, rule) for rule in data['apps']],
+                used_time={name: float(minutes) for name, minutes in data['used_time'].items()},
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Не удалось загрузить снимок правил {self.path}: {e}")
+            return None
@@ -0,0 +1,301 @@
+"""
+Модуль колоночного журнала отсчётов использования
+"""
+import logging
+import os
+import shutil
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Каталог журнала по умолчанию (рядом с saveconfe.log)
+DEFAULT_SAMPLES_DIR = 'samples'
+
+# Колонки отсчёта: имя и тип элемента массива
+COLUMNS = (
+    ('timestamp', '<f8'),   # момент отсчёта (секунды Unix)
+    ('rule_id', '<i4'),     # ID правила приложения (0 — неизвестно)
+    ('pid_count', '<i4'),   # количество процессов приложения
+    ('cpu_delta', '<f4'),   # процессорное время с прошлого отсчёта, секунды
+    ('duration', '<f4'),    # длительность интервала отсчёта, секунды
+)
+
+# Рост файлов колонок порциями, чтобы не переотображать их на каждом отсчёте
+CHUNK_ROWS = 16384
+
+_DAY_FORMAT = '%Y-%m-%d'
+
+
+class _DayFiles:
+    """Отображённые в память файлы колонок одного дня"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.count = np.memmap(directory / 'count.i8', dtype='<i8', mode='r+', shape=(1,))
+        self.columns = {}
+        self.capacity = 0
+        self._map()
+
+    def _map(self):
+        """Отображение файлов колонок текущего размера"""
+        for name, dtype in COLUMNS:
+            path = self.directory / f'{name}.bin'
+            rows = path.stat().st_size // np.dtype(dtype).itemsize
+            self.columns[name] = np.memmap(path, dtype=dtype, mode='r+', shape=(rows,)) if rows else \
+                np.empty(0, dtype=dtype)
+            self.capacity = rows
+
+    def grow(self, rows: int):
+        """Увеличение ёмкости файлов колонок"""
+        self.flush()
+        self.columns.clear()
+        for name, dtype in COLUMNS:
+            with open(self.directory / f'{name}.bin', 'r+b') as f:
+                f.truncate(rows * np.dtype(dtype).itemsize)
+        self._map()
+
+    def flush(self):
+        """Сброс изменений на диск"""
+        for column in self.columns.values():
+            if isinstance(column, np.memmap):
+                column.flush()
+        self.count.flush()
+
+
+class SampleJournal:
+    """
+    Колоночный журнал отсчётов использования
+
+    Каждый отсчёт монитора (момент, правило, число процессов, процессорное
+    время) дописывается в файлы колонок текущего дня, отображённые в память.
+    Для каждого дня создаётся отдельный каталог, поэтому запись всегда идёт
+    в небольшие файлы, а старые дни можно читать и удалять целиком.
+    Количество записанных строк хранится отдельно и обновляется последним,
+    так что читатель не увидит недописанную строку.
+    """
+
+    def __init__(self, root: str = DEFAULT_SAMPLES_DIR):
+        """
+        Инициализация журнала
+
+        Args:
+            root: Каталог журнала
+        """
+        self.root = Path(root)
+        self._day: Optional[date] = None
+        self._files: Optional[_DayFiles] = None
+        self._dirty = False  # Есть отсчёты, ещё не сброшенные на диск
+        self._lock = Lock()
+
+    def append(self, timestamp: datetime, rule_ids, pid_counts, cpu_deltas, durations):
+        """
+        Добавление отсчётов одного момента времени
+
+        Args:
+            timestamp: Момент отсчёта
+            rule_ids: ID правил приложений
+            pid_counts: Количество процессов каждого приложения
+            cpu_deltas: Процессорное время с прошлого отсчёта, секунды
+            durations: Длительность интервала отсчёта, секунды
+        """
+        rows = len(rule_ids)
+        if not rows:
+            return
+        with self._lock:
+            files = self._files_for(timestamp.date())
+            start = int(files.count[0])
+            if start + rows > files.capacity:
+                files.grow(max(files.capacity + CHUNK_ROWS, start + rows))
+            end = start + rows
+            columns = files.columns
+            columns['timestamp'][start:end] = timestamp.timestamp()
+            columns['rule_id'][start:end] = rule_ids
+            columns['pid_count'][start:end] = pid_counts
+            columns['cpu_delta'][start:end] = cpu_deltas
+            columns['duration'][start:end] = durations
+            files.count[0] = end
+            self._dirty = True
+
+    def flush(self):
+        """Сброс текущего дня на диск (если были новые отсчёты)"""
+        with self._lock:
+            if self._files is not None and self._dirty:
+                self._files.flush()
+                self._dirty = False
+
+    def close(self):
+        """Сброс и закрытие текущего дня"""
+        with self._lock:
+            self._close_day()
+
+    def prune(self, keep_days: int) -> int:
+        """
+        Удаление дней старше keep_days
+
+        Returns:
+            int: Количество удалённых дней
+        """
+        border = date.today() - timedelta(days=keep_days)
+        removed = 0
+        for day in SampleReader(self.root).days():
+            if day < border and day != self._day:
+                shutil.rmtree(self.root / day.strftime(_DAY_FORMAT), ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"Удалено дней журнала отсчётов: {removed}")
+        return removed
+
+    def _files_for(self, day: date) -> _DayFiles:
+        """Файлы колонок дня; при смене дня журнал переходит в новый каталог"""
+        if self._day == day:
+            return self._files
+        self._close_day()
+
+        directory = self.root / day.strftime(_DAY_FORMAT)
+        directory.mkdir(parents=True, exist_ok=True)
+        count_path = directory / 'count.i8'
+        if not count_path.exists():
+            for name, _ in COLUMNS:
+                (directory / f'{name}.bin').touch()
+            count_path.write_bytes(np.zeros(1, dtype='<i8').tobytes())
+
+        self._files = _DayFiles(directory)
+        self._day = day
+        return self._files
+
+    def _close_day(self):
+        """Закрытие файлов текущего дня"""
+        if self._files is not None:
+            self._files.flush()
+        self._files = None
+        self._day = None
+        self._dirty = False
+
+
+class SampleReader:
+    """
+    Чтение журнала отсчётов в массивы NumPy
+
+    Дни загружаются и обрабатываются по одному, поэтому расход памяти
+    не зависит от длины периода.
+    """
+
+    def __init__(self, root: str = DEFAULT_SAMPLES_DIR):
+        """
+        Инициализация читателя
+
+        Args:
+            root: Каталог журнала
+        """
+        self.root = Path(root)
+
+    def days(self) -> List[date]:
+        """Дни, за которые есть отсчёты, по возрастанию"""
+        if not self.root.is_dir():
+            return []
+        days = []
+        for entry in os.scandir(self.root):
+            try:
+                days.append(datetime.strptime(entry.name, _DAY_FORMAT).date())
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def load_day(self, day: date) -> Dict[str, np.ndarray]:
+        """
+        Загрузка отсчётов дня
+
+        Args:
+            day: День
+
+        Returns:
+            Dict[str, np.ndarray]: Массивы колонок (пустые, если отсчётов нет)
+        """
+        directory = self.root / day.strftime(_DAY_FORMAT)
+        count_path = directory / 'count.i8'
+        if not count_path.exists():
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        # Файлы читаются, а не отображаются: запись в них может расширять их
+        # и в это время, а отображённый файл нельзя расширить в Windows
+        count = int(np.fromfile(count_path, dtype='<i8', count=1)[0])
+        return {name: np.fromfile(directory / f'{name}.bin', dtype=dtype, count=count)
+                for name, dtype in COLUMNS}
+
+    def hourly_usage(self, start_date: date, end_date: date) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Время использования приложений по часам суток
+
+        Args:
+            start_date: Начальная дата (включительно)
+            end_date: Конечная дата (включительно)
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: ID правил и матрица минут [правило, час]
+        """
+        totals: Dict[int, np.ndarray] = {}
+        for day, samples in self._iter_days(start_date, end_date):
+            rule_ids, positions = np.unique(samples['rule_id'], return_inverse=True)
+            hours = self._seconds_of_day(day, samples['timestamp']) // 3600
+            minutes = np.bincount(positions * 24 + hours, weights=samples['duration'],
+                                  minlength=len(rule_ids) * 24).reshape(len(rule_ids), 24) / 60
+            for rule_id, row in zip(rule_ids.tolist(), minutes):
+                totals[rule_id] = totals[rule_id] + row if rule_id in totals else row
+
+        rule_ids = np.array(sorted(totals), dtype='<i4')
+        matrix = np.array([totals[rule_id] for rule_id in rule_ids.tolist()]).reshape(len(rule_ids), 24)
+        return rule_ids, matrix
+
+    def minute_heatmap(self, day: date) -> np.ndarray:
+        """
+        Среднее количество одновременно запущенных приложений по минутам дня
+
+        Returns:
+            np.ndarray: Массив из 1440 значений
+        """
+        samples = self.load_day(day)
+        minutes = self._seconds_of_day(day, samples['timestamp']) // 60
+        return np.bincount(minutes, weights=samples['duration'], minlength=1440)[:1440] / 60
+
+    def concurrency_timeline(self, day: date) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Количество отслеживаемых приложений в каждый момент отсчёта
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Моменты (секунды Unix) и количества
+        """
+        samples = self.load_day(day)
+        return np.unique(samples['timestamp'], return_counts=True)
+
+    def cpu_by_rule(self, start_date: date, end_date: date) -> Dict[int, float]:
+        """
+        Процессорное время приложений за период
+
+        Returns:
+            Dict[int, float]: {ID правила: секунды процессорного времени}
+        """
+        totals: Dict[int, float] = {}
+        for _, samples in self._iter_days(start_date, end_date):
+            rule_ids, positions = np.unique(samples['rule_id'], return_inverse=True)
+            sums = np.bincount(positions, weights=samples['cpu_delta'], minlength=len(rule_ids))
+            for rule_id, seconds in zip(rule_ids.tolist(), sums.tolist()):
+                totals[rule_id] = totals.get(rule_id, 0.0) + seconds
+        return totals
+
+    def _iter_days(self, start_date: date, end_date: date):
+        """Непустые дни периода с их отсчётами"""
+        for day in self.days():
+            if start_date <= day <= end_date:
+                samples = self.load_day(day)
+                if len(samples['timestamp']):
+                    yield day, samples
+
+    @staticmethod
+    def _seconds_of_day(day: date, timestamps: np.ndarray) -> np.ndarray:
+        """Секунды от начала дня для моментов отсчётов"""
+        midnight = datetime.combine(day, time.min).timestamp()
+        return np.clip(timestamps - midnight, 0, 86399).astype(np.int64)
@@ -5,6 +5,8 @@ from datetime import datetime, time, timedelta
 from typing import Dict, Optional, Tuple
 import logging
 
+from core.clock import SYSTEM_CLOCK
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,11 +17,21 @@ class Scheduler:
     Управляет расписанием доступа и лимитами времени.
     """
     
-    def __init__(self):
-        """Инициализация планировщика"""
+    def __init__(self, clock=None):
+        """
+        Инициализация планировщика
+        
+        Args:
+            clock: Источник времени (по умолчанию системное время)
+        """
+        self.clock = clock or SYSTEM_CLOCK
         self.time_limits: Dict[str, int] = {}  # Лимиты времени в минутах
-        self.used_time: Dict[str, float] = {}  # Использованное время в минутах
+        # Использованное время в минутах; пишет только поток мониторинга,
+        # другие потоки читают его из опубликованного состояния монитора (Monitor.state)
+        self.used_time: Dict[str, float] = {}
         self.schedules: Dict[str, tuple] = {}  # Расписания (start_time, end_time)
+        # Правила по названию: у нескольких правил приложений может быть одно название
+        self._rules: Dict[str, Dict[tuple, object]] = {}
         self.is_enabled = True
     
     def set_time_limit(self, item_name: str, minutes: int):
@@ -31,8 +43,6 @@ class Scheduler:
             minutes: Лимит времени в минутах (0 = без лимита)
         """
         self.time_limits[item_name] = minutes
-        if item_name not in self.used_time:
-            self.used_time[item_name] = 0.0
         logger.info(f"Установлен лимит {minutes} минут для {item_name}")
     
     def get_time_limit(self, item_name: str) -> int:
@@ -60,6 +70,20 @@ class Scheduler:
         self.used_time[item_name] += minutes
         logger.debug(f"Добавлено {minutes} минут использования для {item_name}")
     
+    def restore_used_time(self, used: Dict[str, float]):
+        """
+        Восстановление использованного времени (например, из суточной сводки)
+        
+        Значения не суммируются с текущими: берётся большее, поэтому
+        повторное восстановление не удваивает время.
+        
+        Args:
+            used: Словарь {название: минуты}
+        """
+        for item_name, minutes in used.items():
+            self.used_time[item_name] = max(self.used_time.get(item_name, 0.0), minutes)
+        logger.info(f"Восстановлено использованное время для {len(used)} элементов")
+    
     def get_used_time(self, item_name: str) -> float:
         """
         Получение использованного времени
@@ -125,7 +149,7 @@ class Scheduler:
         
         Args:
             item_name: Название сайта или приложения
-            current_time: Текущее время (если None, используется datetime.now())
+            current_time: Текущее время (если None, берётся из clock)
             
         Returns:
             bool: True если время в разрешённом диапазоне
@@ -134,7 +158,7 @@ class Scheduler:
             return True  # Нет расписания - всегда разрешено
         
         if current_time is None:
-            current_time = datetime.now()
+            current_time = self.clock.now()
         
         schedule = self.schedules[item_name]
         start_time, end_time = schedule
@@ -147,17 +171,101 @@ class Scheduler:
         else:
             return start_time <= current_time_only <= end_time
     
+    def next_schedule_boundary(self, item_name: str,
+                               current_time: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        Ближайший момент, когда доступ по расписанию откроется или закроется
+        
+        Args:
+            item_name: Название сайта или приложения
+            current_time: Текущее время (если None, берётся из clock)
+            
+        Returns:
+            Optional[datetime]: Начало или конец разрешённого интервала, None если расписания нет
+        """
+        schedule = self.schedules.get(item_name)
+        if schedule is None:
+            return None
+        if current_time is None:
+            current_time = self.clock.now()
+        
+        today = current_time.date()
+        candidates = [datetime.combine(day, moment)
+                      for day in (today, today + timedelta(days=1))
+                      for moment in schedule]
+        return min(moment for moment in candidates if moment > current_time)
+    
+    def remove_item(self, item_name: str):
+        """
+        Удаление лимита и расписания элемента
+        
+        Args:
+            item_name: Название сайта или приложения
+        """
+        self.time_limits.pop(item_name, None)
+        self.schedules.pop(item_name, None)
+    
+    def apply_rule_delta(self, delta):
+        """
+        Применение изменения правил из RuleRepository
+        
+        Сайты учитываются по URL, приложения — по названию. Лимит и
+        расписание названия пересчитываются из всех его оставшихся правил,
+        поэтому удаление одного из правил с общим названием не снимает
+        ограничения другого.
+        
+        Args:
+            delta: Экземпляр RuleDelta
+        """
+        removed = ([(rule.url, ('site', rule.id)) for rule in delta.removed_sites] +
+                   [(rule.app_name, ('app', rule.id)) for rule in delta.removed_apps])
+        added = ([(rule.url, ('site', rule.id), rule) for rule in delta.added_sites] +
+                 [(rule.app_name, ('app', rule.id), rule) for rule in delta.added_apps])
+        
+        affected = set()
+        for item_name, key in removed:
+            self._rules.get(item_name, {}).pop(key, None)
+            affected.add(item_name)
+        for item_name, key, rule in added:
+            self._rules.setdefault(item_name, {})[key] = rule
+            affected.add(item_name)
+        
+        for item_name in affected:
+            rules = self._rules.get(item_name)
+            if not rules:
+                self._rules.pop(item_name, None)
+            # Итог считается заранее и записывается одним присваиванием: монитор
+            # читает словари параллельно и не должен видеть снятых ограничений.
+            # Как при последовательной загрузке, более позднее правило перекрывает раннее
+            limit, schedule = 0, None
+            for key in sorted(rules or {}):
+                rule = rules[key]
+                if rule.time_limit and rule.time_limit > 0:
+                    limit = rule.time_limit
+                if rule.schedule_start and rule.schedule_end:
+                    schedule = (rule.schedule_start, rule.schedule_end)
+            if limit:
+                self.set_time_limit(item_name, limit)
+            else:
+                self.time_limits.pop(item_name, None)
+            if schedule:
+                self.set_schedule(item_name, *schedule)
+            else:
+                self.schedules.pop(item_name, None)
+    
     def reset_daily_usage(self):
         """Сброс ежедневного использования (вызывать в начале дня)"""
         self.used_time.clear()
         logger.info("Ежедневное использование сброшено")
     
-    def is_access_allowed(self, item_name: str) -> Tuple[bool, str]:
+    def is_access_allowed(self, item_name: str,
+                          current_time: Optional[datetime] = None) -> Tuple[bool, str]:
         """
         Проверка, разрешён ли доступ к элементу
         
         Args:
             item_name: Название сайта или приложения
+            current_time: Текущее время (если None, берётся из clock)
             
         Returns:
             tuple[bool, str]: (разрешён ли доступ, причина отказа если нет)
@@ -166,7 +274,7 @@ class Scheduler:
             return True, ""
         
         # Проверка расписания
-        if not self.is_within_schedule(item_name):
+        if not self.is_within_schedule(item_name, current_time):
             schedule = self.schedules.get(item_name)
             if schedule:
                 return False, f"Вне разрешённого времени ({schedule[0]} - {schedule[1]})"
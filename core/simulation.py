@@ -0,0 +1,458 @@
+"""
+Модуль моделирования: поддельные процессы и прогон монитора в виртуальном времени
+"""
+import logging
+import random
+import time
+from collections import defaultdict, namedtuple
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.blocker import Blocker
+from core.clock import VirtualClock
+from core.database import Database
+from core.monitor import Monitor
+from core.samples import SampleJournal
+from core.scheduler import Scheduler
+from core.spool import UsageSpool
+from models.base import Base
+
+logger = logging.getLogger(__name__)
+
+# Первый PID поддельных процессов
+FIRST_PID = 1000
+
+_CpuTimes = namedtuple('_CpuTimes', 'user system')
+
+
+def _basename(path: str) -> str:
+    """Имя файла из пути Windows или POSIX"""
+    return path.replace('\\', '/').rsplit('/', 1)[-1]
+
+
+@dataclass(frozen=True)
+class ProcessSpec:
+    """
+    Запуск приложения в сценарии
+
+    Attributes:
+        path: Путь к исполняемому файлу
+        start: Момент запуска
+        end: Момент, когда приложение закроют (если его не завершит монитор)
+    """
+    path: str
+    start: datetime
+    end: datetime
+
+    @property
+    def name(self) -> str:
+        """Имя процесса"""
+        return _basename(self.path)
+
+
+@dataclass(frozen=True)
+class AppRule:
+    """
+    Правило приложения в сценарии
+
+    Attributes:
+        path: Путь к исполняемому файлу
+        time_limit: Лимит в минутах за день (0 — без лимита)
+        schedule: Разрешённый интервал (начало, конец) или None
+    """
+    path: str
+    time_limit: int = 0
+    schedule: Optional[Tuple] = None
+
+    @property
+    def name(self) -> str:
+        """Имя приложения (по нему планировщик ведёт лимиты)"""
+        return _basename(self.path)
+
+
+def session(path: str, start: datetime, minutes: float) -> ProcessSpec:
+    """Запуск приложения на minutes минут"""
+    return ProcessSpec(path, start, start + timedelta(minutes=minutes))
+
+
+def random_timeline(paths: List[str], start: datetime, hours: float = 24, launches: int = 20,
+                    mean_minutes: float = 10, seed: int = 0) -> List[ProcessSpec]:
+    """
+    Случайные запуски приложений
+
+    Приложение не запускается повторно, пока открыто: следующий
+    запуск того же приложения начинается после его закрытия.
+
+    Args:
+        paths: Пути приложений
+        start: Начало сценария
+        hours: Продолжительность сценария
+        launches: Количество запусков
+        mean_minutes: Средняя длительность запуска (экспоненциальное распределение)
+        seed: Зерно генератора (один seed — один и тот же сценарий)
+
+    Returns:
+        List[ProcessSpec]: Запуски в порядке начала
+    """
+    rng = random.Random(seed)
+    span = hours * 3600
+    specs = []
+    busy_until: Dict[str, datetime] = {}
+    for offset in sorted(rng.uniform(0, span) for _ in range(launches)):
+        path = rng.choice(paths)
+        begin = max(start + timedelta(seconds=offset), busy_until.get(path, start))
+        minutes = max(0.5, rng.expovariate(1 / mean_minutes))
+        spec = session(path, begin, minutes)
+        busy_until[path] = spec.end + timedelta(seconds=1)
+        specs.append(spec)
+    specs.sort(key=lambda spec: spec.start)
+    return specs
+
+
+class _NoSamples:
+    """Журнал отсчётов, который ничего не пишет"""
+
+    def append(self, *args):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeProcess:
+    """Поддельный процесс с полями psutil: info и cpu_times()"""
+
+    __slots__ = ('pid', 'spec', 'info', 'killed_at')
+
+    def __init__(self, pid: int, spec: ProcessSpec):
+        self.pid = pid
+        self.spec = spec
+        self.info = {'pid': pid, 'name': spec.name, 'exe': spec.path,
+                     'create_time': spec.start.timestamp()}
+        self.killed_at: Optional[datetime] = None
+
+    @property
+    def end(self) -> datetime:
+        """Момент, когда процесс перестал работать"""
+        return self.killed_at or self.spec.end
+
+    def cpu_times(self):
+        return _CpuTimes(0.0, 0.0)
+
+
+class FakeProcessSource:
+    """
+    Поддельный источник процессов для Monitor и Blocker
+
+    Отдаёт процессы сценария, запущенные к текущему виртуальному времени,
+    и запоминает, когда каждый был завершён.
+    """
+
+    def __init__(self, clock: VirtualClock, specs: Iterable[ProcessSpec]):
+        """
+        Инициализация
+
+        Args:
+            clock: Виртуальное время
+            specs: Запуски приложений
+        """
+        self.clock = clock
+        self.processes = [FakeProcess(FIRST_PID + index, spec)
+                          for index, spec in enumerate(sorted(specs, key=lambda spec: spec.start))]
+        self._by_pid = {process.pid: process for process in self.processes}
+        self._next = 0  # первый ещё не запущенный процесс
+        self._running: List[FakeProcess] = []
+
+    def process_iter(self, attrs: list = None) -> List[FakeProcess]:
+        """Процессы, работающие в текущий момент"""
+        now = self.clock.now()
+        processes = self.processes
+        while self._next < len(processes) and processes[self._next].spec.start <= now:
+            self._running.append(processes[self._next])
+            self._next += 1
+        self._running = [process for process in self._running if process.end > now]
+        return list(self._running)
+
+    def terminate(self, pid: int) -> bool:
+        """Завершение процесса в текущий момент"""
+        process = self._by_pid.get(pid)
+        now = self.clock.now()
+        if process is None or process.spec.start > now or process.end <= now:
+            return False
+        process.killed_at = now
+        return True
+
+    def next_start(self) -> Optional[datetime]:
+        """Момент следующего запуска (None — запусков больше нет)"""
+        if self._next < len(self.processes):
+            return self.processes[self._next].spec.start
+        return None
+
+
+@dataclass(frozen=True)
+class Enforcement:
+    """
+    Запуск, который должен был быть завершён
+
+    Attributes:
+        app_name: Приложение
+        pid: PID
+        due: Момент, с которого доступ запрещён
+        killed_at: Момент завершения монитором (None — не завершён)
+        end: Момент, когда процесс перестал работать
+    """
+    app_name: str
+    pid: int
+    due: datetime
+    killed_at: Optional[datetime]
+    end: datetime
+
+    @property
+    def latency(self) -> float:
+        """Сколько секунд процесс работал после запрета"""
+        return (self.end - self.due).total_seconds()
+
+
+@dataclass
+class SimulationReport:
+    """
+    Итоги моделирования
+
+    Attributes:
+        ticks: Выполнено проверок монитора
+        simulated_seconds: Смоделированное время
+        wall_seconds: Затраченное реальное время
+        enforcements: Запуски, которые должны были быть завершены
+        unexpected_kills: Завершённые процессы, для которых запрета не было
+        expected_minutes: Фактическое время по дням, {(день, приложение): минуты}
+        recorded_minutes: Время в суточной сводке базы данных
+        sessions: Запусков по дням, {(день, приложение): количество}
+        db_queries: Запросов к базе данных
+        db_writes: Из них INSERT, UPDATE и DELETE
+    """
+    ticks: int = 0
+    simulated_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    enforcements: List[Enforcement] = field(default_factory=list)
+    unexpected_kills: List[FakeProcess] = field(default_factory=list)
+    expected_minutes: Dict[Tuple[date, str], float] = field(default_factory=dict)
+    recorded_minutes: Dict[Tuple[date, str], float] = field(default_factory=dict)
+    sessions: Dict[Tuple[date, str], int] = field(default_factory=dict)
+    db_queries: int = 0
+    db_writes: int = 0
+
+    @property
+    def max_latency(self) -> float:
+        """Наибольшая задержка завершения, секунды (0 — завершать было нечего)"""
+        return max((item.latency for item in self.enforcements), default=0.0)
+
+    def accounting_errors(self) -> Dict[Tuple[date, str], float]:
+        """Расхождение сводки с фактическим временем, {(день, приложение): минуты}"""
+        keys = set(self.expected_minutes) | set(self.recorded_minutes)
+        return {key: self.recorded_minutes.get(key, 0.0) - self.expected_minutes.get(key, 0.0)
+                for key in keys}
+
+
+def _split_by_day(start: datetime, end: datetime):
+    """Интервал, разбитый по суткам: (день, начало, конец)"""
+    while start < end:
+        midnight = datetime.combine(start.date() + timedelta(days=1), datetime.min.time())
+        part_end = min(end, midnight)
+        yield start.date(), start, part_end
+        start = part_end
+
+
+def _union(intervals: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class Simulation:
+    """
+    Прогон монитора по сценарию в виртуальном времени
+
+    Монитор, планировщик и блокировщик работают с настоящими журналом
+    событий во временном каталоге и базой SQLite в памяти, а время
+    и процессы берут из VirtualClock и FakeProcessSource.
+    Проверки выполняются с интервалом монитора; пока ни одно приложение
+    сценария не запущено, время сразу переходит к ближайшей проверке
+    перед следующим запуском. После прогона фактическое время работы
+    процессов сравнивается со сводкой в базе, а моменты завершения —
+    с моментами, когда доступ стал запрещён.
+    """
+
+    def __init__(self, workdir: str, rules: List[AppRule], timeline: List[ProcessSpec],
+                 start: datetime, check_interval: float = 5, checkpoint_interval: float = 60,
+                 blocking: bool = False, record_samples: bool = False):
+        """
+        Инициализация
+
+        Args:
+            workdir: Каталог для базы и журналов
+            rules: Правила приложений
+            timeline: Запуски приложений
+            start: Начало моделирования
+            check_interval: Интервал проверки монитора, секунды
+            checkpoint_interval: Интервал контрольных точек, секунды
+            blocking: Включить блокировку (завершение всех приложений из правил)
+            record_samples: Писать журнал отсчётов (медленнее: сброс файлов на каждой проверке)
+        """
+        self.rules = {rule.name: rule for rule in rules}
+        self.blocking = blocking
+        self.clock = VirtualClock(start)
+        self.source = FakeProcessSource(self.clock, timeline)
+        workdir = Path(workdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        self.db = Database('sqlite://')
+        Base.metadata.create_all(self.db.engine)
+
+        self.scheduler = Scheduler(clock=self.clock)
+        for rule in rules:
+            if rule.time_limit:
+                self.scheduler.set_time_limit(rule.name, rule.time_limit)
+            if rule.schedule:
+                self.scheduler.set_schedule(rule.name, *rule.schedule)
+        self.blocker = Blocker(processes=self.source)
+        self.blocker.load_blocked_apps([rule.path for rule in rules])
+        if blocking:
+            self.blocker.enable_blocking()
+        self.monitor = Monitor(self.blocker, self.scheduler, self.db,
+                               spool=UsageSpool(str(workdir / 'simulation.spool')),
+                               samples=SampleJournal(str(workdir / 'samples')) if record_samples else _NoSamples(),
+                               clock=self.clock, processes=self.source)
+        self.monitor.check_interval = check_interval
+        self.monitor.checkpoint_interval = checkpoint_interval
+        self.monitor.last_checkpoint = start
+        self.ticks = 0
+
+    def run(self, until: datetime) -> SimulationReport:
+        """
+        Моделирование до момента until
+
+        Returns:
+            SimulationReport: Итоги
+        """
+        started = time.perf_counter()
+        first = self.clock.now()
+        interval = timedelta(seconds=self.monitor.check_interval)
+        with self.db.query_stats.capture() as captured:
+            while self.clock.now() < until:
+                self.monitor._tick()
+                self.ticks += 1
+                now = self.clock.now()
+                following = now + interval
+                next_start = self.source.next_start()
+                if not self.monitor.active_processes and not self.source.process_iter():
+                    # Пока ничего не запущено, проверки ничего не меняют
+                    target = min(next_start, until) if next_start else until
+                    if target > following:
+                        following += interval * ((target - following) // interval)
+                self.clock.set(min(following, until))
+            self.monitor._finalize_all_logs()
+            self.monitor.spool.close()
+            self.monitor.samples.close()
+
+        report = SimulationReport(ticks=self.ticks,
+                                  simulated_seconds=(self.clock.now() - first).total_seconds(),
+                                  db_queries=captured.count,
+                                  db_writes=sum(1 for query in captured.queries
+                                                if query.statement.split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')))
+        self._check_usage(report, first)
+        self._check_enforcement(report)
+        report.wall_seconds = time.perf_counter() - started
+        return report
+
+    def _intervals(self, until: datetime) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """Фактические интервалы работы приложений, {имя: [(начало, конец)]}"""
+        intervals = defaultdict(list)
+        for process in self.source.processes:
+            if process.spec.start < until:
+                intervals[process.spec.name].append((process.spec.start, min(process.end, until)))
+        return intervals
+
+    def _check_usage(self, report: SimulationReport, first: datetime):
+        """Фактическое время по дням и время в суточной сводке"""
+        now = self.clock.now()
+        for name, intervals in self._intervals(now).items():
+            for start, end in intervals:
+                key = (start.date(), name)
+                report.sessions[key] = report.sessions.get(key, 0) + 1
+            for start, end in _union(intervals):
+                for day, part_start, part_end in _split_by_day(start, end):
+                    key = (day, name)
+                    report.expected_minutes[key] = (report.expected_minutes.get(key, 0.0)
+                                                    + (part_end - part_start).total_seconds() / 60)
+        for day, _, name, minutes, _ in self.db.get_daily_usage(first.date(), now.date()):
+            report.recorded_minutes[(day, name)] = minutes
+
+    def _check_enforcement(self, report: SimulationReport):
+        """Моменты запрета и завершения каждого процесса"""
+        now = self.clock.now()
+        # Время разрешённых запусков: запуск, запрещённый с самого начала,
+        # лимит не расходует. Для самого процесса берётся запланированный конец,
+        # чтобы найти момент запрета и для завершённого раньше срока
+        allowed = defaultdict(list)
+        for process in self.source.processes:
+            if process.spec.start >= now:
+                continue
+            name = process.spec.name
+            planned_end = min(process.spec.end, now)
+            due = self._due(process, planned_end, allowed[name] + [(process.spec.start, planned_end)])
+            if due is None or due > process.spec.start:
+                allowed[name].append((process.spec.start, min(process.end, now)))
+            if process.killed_at is not None and due is None:
+                report.unexpected_kills.append(process)
+            elif due is not None and (process.killed_at is not None or due < process.end):
+                report.enforcements.append(Enforcement(process.spec.name, process.pid, due,
+                                                       process.killed_at, process.end))
+
+    def _due(self, process: FakeProcess, end: datetime,
+             intervals: List[Tuple[datetime, datetime]]) -> Optional[datetime]:
+        """Первый момент до end, когда доступ процесса запрещён (None — не запрещён)"""
+        rule = self.rules.get(process.spec.name)
+        if rule is None:
+            return None
+        start = process.spec.start
+        if self.blocking:
+            return start
+        candidates = []
+        if rule.schedule:
+            moment = start
+            while moment < end:
+                if not self.scheduler.is_within_schedule(rule.name, moment):
+                    candidates.append(moment)
+                    break
+                moment = (self.scheduler.next_schedule_boundary(rule.name, moment)
+                          + timedelta(microseconds=1))
+        if rule.time_limit:
+            for day, _, part_end in _split_by_day(start, end):
+                exhausted = self._limit_reached(intervals, day, rule.time_limit)
+                if exhausted is not None and exhausted < part_end:
+                    candidates.append(max(exhausted, start))
+                    break
+        return min(candidates) if candidates else None
+
+    @staticmethod
+    def _limit_reached(intervals: List[Tuple[datetime, datetime]], day: date,
+                       limit: int) -> Optional[datetime]:
+        """Момент, когда за день набрано limit минут работы приложения"""
+        remaining = limit * 60
+        for start, end in _union(intervals):
+            for part_day, part_start, part_end in _split_by_day(start, end):
+                if part_day != day:
+                    continue
+                seconds = (part_end - part_start).total_seconds()
+                if seconds >= remaining:
+                    return part_start + timedelta(seconds=remaining)
+                remaining -= seconds
+        return None
@@ -0,0 +1,347 @@
+"""
+Модуль локального журнала событий использования (write-ahead spool)
+"""
+import logging
+import os
+import struct
+import uuid
+import zlib
+from datetime import datetime
+from threading import Lock
+from typing import List, NamedTuple, Optional, Tuple
+
+from models.usage_log import ItemType
+
+logger = logging.getLogger(__name__)
+
+# Путь к журналу по умолчанию (рядом с saveconfe.log)
+DEFAULT_SPOOL_PATH = 'saveconfe.spool'
+
+# Заголовок файла: сигнатура и идентификатор журнала
+MAGIC = b'SCSPOOL1'
+HEADER = struct.Struct('<8s16s8x')
+
+# Запись фиксированного размера: вид события, тип элемента, ключ сессии,
+# начало сессии, начало и конец учтённого интервала, название, CRC32
+RECORD = struct.Struct('<BB2x16sddd255sxI')
+RECORD_BODY_SIZE = RECORD.size - 4
+NAME_SIZE = 255
+
+# Виды событий
+EVENT_START = 1
+EVENT_CHECKPOINT = 2
+EVENT_END = 3
+
+_ITEM_TYPE_CODES = {ItemType.SITE: 1, ItemType.APP: 2}
+_ITEM_TYPES = {code: item_type for item_type, code in _ITEM_TYPE_CODES.items()}
+
+
+class SpoolRecord(NamedTuple):
+    """
+    Событие сессии из журнала
+
+    Attributes:
+        kind: Вид события (EVENT_START, EVENT_CHECKPOINT, EVENT_END)
+        item_type: Тип элемента
+        session_key: Ключ сессии (hex, 32 символа)
+        item_name: Название сайта или приложения
+        session_start: Начало сессии
+        interval_start: Начало интервала, ещё не учтённого в сводке
+        interval_end: Конец интервала (момент события)
+    """
+    kind: int
+    item_type: ItemType
+    session_key: str
+    item_name: str
+    session_start: datetime
+    interval_start: datetime
+    interval_end: datetime
+
+    @property
+    def duration(self) -> float:
+        """Длительность сессии на момент события в минутах"""
+        return (self.interval_end - self.session_start).total_seconds() / 60
+
+
+def _encode_name(name: str) -> bytes:
+    """Кодирование названия в UTF-8 с обрезкой до размера поля"""
+    return name.encode('utf-8')[:NAME_SIZE]
+
+
+def _decode_name(raw: bytes) -> str:
+    """Декодирование названия, обрезанного, возможно, посреди символа"""
+    return raw.rstrip(b'\0').decode('utf-8', 'ignore')
+
+
+class UsageSpool:
+    """
+    Журнал событий использования в локальном файле
+
+    Монитор сначала пишет каждое событие сессии сюда, и только потом
+    SpoolReplayer переносит их в базу данных. Записи имеют фиксированный
+    размер и контрольную сумму, дописываются в конец файла и сбрасываются
+    на диск пачками (один fsync на вызов flush). Недописанный хвост после
+    аварийного завершения отбрасывается при открытии.
+
+    Файл открывается при первом обращении, поэтому пустой журнал
+    не создаётся, пока не появится первое событие.
+    """
+
+    def __init__(self, path: str = DEFAULT_SPOOL_PATH, max_pending: int = 512):
+        """
+        Инициализация журнала
+
+        Args:
+            path: Путь к файлу журнала
+            max_pending: Сколько записей копить в памяти до принудительного сброса
+        """
+        self.path = path
+        self.max_pending = max_pending
+        self._file = None
+        self._spool_id: Optional[str] = None
+        self._pending: List[bytes] = []
+        self._lock = Lock()
+
+    @property
+    def spool_id(self) -> Optional[str]:
+        """Идентификатор журнала (меняется после очистки)"""
+        with self._lock:
+            if self._file is None and os.path.exists(self.path):
+                self._open()
+            return self._spool_id
+
+    def append(self, kind: int, item_type: ItemType, session_key: str, item_name: str,
+               session_start: datetime, interval_start: datetime, interval_end: datetime):
+        """
+        Добавление события в буфер журнала
+
+        Args:
+            kind: Вид события
+            item_type: Тип элемента
+            session_key: Ключ сессии (hex, 32 символа)
+            item_name: Название сайта или приложения
+            session_start: Начало сессии
+            interval_start: Начало интервала, ещё не учтённого в сводке
+            interval_end: Конец интервала (момент события)
+        """
+        body = RECORD.pack(
+            kind, _ITEM_TYPE_CODES[item_type], bytes.fromhex(session_key),
+            session_start.timestamp(), interval_start.timestamp(), interval_end.timestamp(),
+            _encode_name(item_name), 0
+        )[:RECORD_BODY_SIZE]
+        with self._lock:
+            self._pending.append(body + struct.pack('<I', zlib.crc32(body)))
+            if len(self._pending) >= self.max_pending:
+                self._flush()
+
+    def flush(self):
+        """Запись накопленных событий в файл и fsync"""
+        with self._lock:
+            self._flush()
+
+    def read(self, offset: int, limit: int = 5000) -> Tuple[List[SpoolRecord], int]:
+        """
+        Чтение событий начиная со смещения
+
+        Args:
+            offset: Смещение в байтах (0 — с начала журнала)
+            limit: Максимальное количество событий
+
+        Returns:
+            Tuple[List[SpoolRecord], int]: События и смещение после последнего из них
+        """
+        with self._lock:
+            if self._file is None:
+                if not os.path.exists(self.path):
+                    return [], offset
+                self._open()
+            offset = max(offset, HEADER.size)
+            self._file.seek(offset)
+            data = self._file.read(limit * RECORD.size)
+
+        records = []
+        for start in range(0, len(data) - RECORD.size + 1, RECORD.size):
+            records.append(self._unpack(data[start:start + RECORD.size]))
+        return records, offset + len(records) * RECORD.size
+
+    def size(self) -> int:
+        """Размер записанной на диск части журнала в байтах"""
+        with self._lock:
+            if self._file is None:
+                return 0
+            return self._file.seek(0, os.SEEK_END)
+
+    def reset_if_drained(self, offset: int, min_size: int = 0) -> bool:
+        """
+        Очистка журнала, если все события до offset уже перенесены
+
+        Журнал получает новый идентификатор, чтобы отметка переноса
+        старого журнала в базе данных не применялась к новым событиям.
+
+        Args:
+            offset: Смещение, до которого события перенесены в базу
+            min_size: Не очищать журнал меньше этого размера
+
+        Returns:
+            bool: True если журнал очищен
+        """
+        with self._lock:
+            if self._file is None or self._pending:
+                return False
+            size = self._file.seek(0, os.SEEK_END)
+            if offset < size or size < max(min_size, HEADER.size + RECORD.size):
+                return False
+            self._file.truncate(0)
+            self._write_header()
+            logger.info(f"Журнал {self.path} перенесён в базу данных и очищен")
+            return True
+
+    def close(self):
+        """Сброс буфера и закрытие файла"""
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        """Открытие файла журнала с проверкой заголовка и хвоста"""
+        self._file = open(self.path, 'a+b')
+        self._file.seek(0)
+        header = self._file.read(HEADER.size)
+        magic, raw_id = HEADER.unpack(header) if len(header) == HEADER.size else (None, None)
+        if magic != MAGIC:
+            if header:
+                logger.warning(f"Повреждённый заголовок журнала {self.path}, журнал пересоздан")
+            self._file.truncate(0)
+            self._write_header()
+            return
+
+        self._spool_id = raw_id.hex()
+        self._truncate_torn_tail()
+
+    def _write_header(self):
+        """Запись заголовка с новым идентификатором журнала"""
+        self._spool_id = uuid.uuid4().hex
+        self._file.write(HEADER.pack(MAGIC, bytes.fromhex(self._spool_id)))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _truncate_torn_tail(self):
+        """Отбрасывание недописанной или повреждённой записи в конце файла"""
+        size = self._file.seek(0, os.SEEK_END)
+        valid_end = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+        # Проверяем только последнюю целую запись: запись идёт в конец файла
+        if valid_end > HEADER.size:
+            self._file.seek(valid_end - RECORD.size)
+            last = self._file.read(RECORD.size)
+            if zlib.crc32(last[:RECORD_BODY_SIZE]) != struct.unpack('<I', last[RECORD_BODY_SIZE:])[0]:
+                valid_end -= RECORD.size
+        if valid_end != size:
+            logger.warning(f"Отброшен повреждённый хвост журнала {self.path}: {size - valid_end} байт")
+            self._file.truncate(valid_end)
+
+    def _flush(self):
+        """Запись буфера в файл (вызывается под блокировкой)"""
+        if not self._pending:
+            return
+        if self._file is None:
+            self._open()
+        self._file.write(b''.join(self._pending))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending.clear()
+
+    @staticmethod
+    def _unpack(raw: bytes) -> SpoolRecord:
+        """Разбор записи журнала"""
+        kind, item_type, session_key, session_start, interval_start, interval_end, name, _ = \
+            RECORD.unpack(raw)
+        return SpoolRecord(
+            kind=kind,
+            item_type=_ITEM_TYPES[item_type],
+            session_key=session_key.hex(),
+            item_name=_decode_name(name),
+            session_start=datetime.fromtimestamp(session_start),
+            interval_start=datetime.fromtimestamp(interval_start),
+            interval_end=datetime.fromtimestamp(interval_end),
+        )
+
+
+class SpoolReplayer:
+    """
+    Перенос событий из журнала в базу данных
+
+    События применяются пачками, каждая пачка — одной транзакцией вместе
+    с отметкой переноса (spool_id, смещение). Поэтому повторный запуск
+    после сбоя или потери связи не применяет события дважды.
+    """
+
+    def __init__(self, spool: UsageSpool, database, batch_size: int = 5000,
+                 compact_size: int = 1024 * 1024):
+        """
+        Инициализация переноса
+
+        Args:
+            spool: Журнал событий
+            database: Экземпляр Database
+            batch_size: Количество событий в одной транзакции
+            compact_size: Размер журнала, после которого перенесённый журнал очищается
+        """
+        self.spool = spool
+        self.db = database
+        self.batch_size = batch_size
+        self.compact_size = compact_size
+        # Отметка последнего переноса (spool_id, смещение): пока в журнале нет
+        # новых событий, база данных не запрашивается
+        self._offset: Optional[Tuple[str, int]] = None
+        # Перенос из потока подписки и при остановке монитора не должен идти одновременно
+        self._lock = Lock()
+
+    @property
+    def position(self) -> Tuple[Optional[str], int]:
+        """Отметка переноса (spool_id, смещение): события журнала до неё уже в базе данных"""
+        return self._offset or (self.spool.spool_id, 0)
+
+    def replay(self) -> int:
+        """
+        Перенос всех ещё не перенесённых событий
+
+        Returns:
+            int: Количество перенесённых событий
+
+        Raises:
+            Exception: Ошибка базы данных (журнал остаётся нетронутым)
+        """
+        with self._lock:
+            return self._replay()
+
+    def _replay(self) -> int:
+        """Перенос под блокировкой"""
+        spool_id = self.spool.spool_id
+        if spool_id is None:
+            return 0
+
+        if self._offset is not None and self._offset[0] == spool_id:
+            offset = self._offset[1]
+            if offset >= self.spool.size():
+                return 0
+        else:
+            offset = self.db.get_spool_offset(spool_id)
+        replayed = 0
+        while True:
+            records, next_offset = self.spool.read(offset, self.batch_size)
+            if not records:
+                break
+            self.db.apply_usage_events(spool_id, records, next_offset)
+            replayed += len(records)
+            offset = next_offset
+            self._offset = (spool_id, offset)
+
+        if replayed:
+            logger.info(f"Перенесено событий из журнала в базу данных: {replayed}")
+        self._offset = (spool_id, offset)
+        if self.spool.reset_if_drained(offset, self.compact_size):
+            self.db.delete_spool_offset(spool_id)
+            self._offset = None
+        return replayed
@@ -0,0 +1,109 @@
+"""
+Модуль замера времени запуска приложения
+"""
+import builtins
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Флаг командной строки для вывода замеров запуска
+PROFILE_FLAG = '--profile-startup'
+
+
+class StartupProfiler:
+    """
+    Замер времени запуска: этапы и импорт модулей
+
+    Этапы отмечаются через phase() и mark(), время считается от создания
+    профилировщика. Импорты замеряются подменой builtins.__import__:
+    для каждого модуля сохраняется полное время первого импорта (вместе
+    с вложенными). Выключенный профилировщик ничего не замеряет.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Инициализация
+
+        Args:
+            enabled: Включить замеры
+        """
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.marks: List[Tuple[str, float]] = []
+        self.imports: Dict[str, float] = {}
+        self._original_import = None
+
+    def install_import_timer(self):
+        """Начало замера импортов"""
+        if not self.enabled or self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                imports.setdefault(name, time.perf_counter() - started)
+
+        builtins.__import__ = timed_import
+
+    def uninstall_import_timer(self):
+        """Окончание замера импортов"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Замер длительности этапа запуска
+
+        Args:
+            name: Название этапа
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark(self, name: str):
+        """Отметка момента от начала запуска (например, первая отрисовка окна)"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.started))
+
+    def report(self, top: int = 15) -> str:
+        """
+        Текстовый отчёт о запуске
+
+        Args:
+            top: Сколько самых долгих импортов показать
+
+        Returns:
+            str: Этапы, отметки и самые долгие импорты в миллисекундах
+        """
+        lines = ["Замер запуска:"]
+        lines += [f"  этап    {name:<28} {seconds * 1000:>8.1f} мс" for name, seconds in self.phases]
+        lines += [f"  момент  {name:<28} {seconds * 1000:>8.1f} мс" for name, seconds in self.marks]
+        slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:top]
+        lines += [f"  импорт  {name:<28} {seconds * 1000:>8.1f} мс" for name, seconds in slowest]
+        return "\n".join(lines)
+
+    def log_report(self):
+        """Запись отчёта в лог и окончание замера импортов"""
+        if not self.enabled:
+            return
+        self.uninstall_import_timer()
+        logger.info(self.report())
@@ -4,32 +4,28 @@
 """
 import sys
 import logging
+import threading
 from pathlib import Path
-from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon
 
-from ui.main_window import MainWindow
-from ui.login_window import LoginWindow
-from core.database import init_db, Database
-from core.auth import AuthManager
-from core.admin_check import require_admin, is_admin
+from core.startup import StartupProfiler, PROFILE_FLAG
+from core.log_pipeline import setup_logging
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('saveconfe.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+# Тяжёлые модули (PyQt6, SQLAlchemy, окна) импортируются внутри main(),
+# чтобы их время попадало в замер запуска и не задерживало проверку прав
+profiler = StartupProfiler(enabled=PROFILE_FLAG in sys.argv)
+profiler.install_import_timer()
+
+# Настройка логирования: запись в файл и консоль в отдельном потоке,
+# ротация со сжатием, --log-json включает формат JSON lines
+setup_logging('saveconfe.log', sys.argv[1:])
 
 logger = logging.getLogger(__name__)
 
 
 def setup_application():
     """Настройка приложения"""
+    from PyQt6.QtWidgets import QApplication
+
     app = QApplication(sys.argv)
     app.setApplicationName("SaveConfe")
     app.setOrganizationName("SaveConfe")
@@ -45,12 +41,24 @@ def setup_application():
     return app
 
 
+def _preload_main_window():
+    """Импорт модулей главного окна в фоне, пока открыто окно входа"""
+    try:
+        import ui.main_window  # noqa: F401
+    except Exception as e:
+        logger.warning(f"Не удалось заранее загрузить главное окно: {e}")
+
+
 def main():
     """Главная функция"""
     try:
         # Проверка и запрос прав администратора
         # Важно: это должно быть ДО создания QApplication
-        if not require_admin():
+        from core.admin_check import require_admin, is_admin
+
+        with profiler.phase("admin_check"):
+            admin_ok = require_admin()
+        if not admin_ok:
             logger.info("Приложение не запущено с правами администратора. Выход.")
             return 1
         
@@ -64,18 +72,31 @@ def main():
         
         # Инициализация базы данных
         logger.info("Инициализация базы данных...")
-        if not init_db():
+        with profiler.phase("init_db"):
+            from core.database import init_db
+            db_ok = init_db()
+        if not db_ok:
             logger.error("Не удалось инициализировать базу данных")
             return 1
         
         # Создание приложения
-        app = setup_application()
+        with profiler.phase("qt_application"):
+            app = setup_application()
+            from PyQt6.QtCore import QTimer
+            from PyQt6.QtWidgets import QMessageBox
         
         # Создание менеджера авторизации
-        auth = AuthManager()
+        with profiler.phase("login_window"):
+            from core.auth import AuthManager
+            from ui.login_window import LoginWindow
+            auth = AuthManager()
+            login_window = LoginWindow(auth)
+        
+        # Пока пользователь вводит пароль, модули главного окна грузятся в фоне
+        threading.Thread(target=_preload_main_window, name="preload", daemon=True).start()
         
         # Показываем окно входа
-        login_window = LoginWindow(auth)
+        QTimer.singleShot(0, lambda: profiler.mark("login_shown"))
         if login_window.exec() != LoginWindow.DialogCode.Accepted:
             logger.info("Вход отменён пользователем")
             return 0
@@ -87,11 +108,19 @@ def main():
             return 1
         
         # Создание главного окна с передачей авторизованного менеджера
-        main_window = MainWindow(auth_manager=auth)
-        main_window.show()
+        with profiler.phase("main_window"):
+            from ui.main_window import MainWindow
+            main_window = MainWindow(auth_manager=auth)
+            main_window.show()
         
         logger.info("Приложение запущено с правами администратора")
         
+        def first_paint():
+            profiler.mark("main_window_shown")
+            profiler.log_report()
+        
+        QTimer.singleShot(0, first_paint)
+        
         # Запуск приложения
         return app.exec()
     
@@ -6,6 +6,11 @@ from .user import User, UserRole
 from .site_rule import SiteRule
 from .app_rule import AppRule
 from .usage_log import UsageLog, ItemType
+from .usage_daily import UsageDaily
+from .rules_version import RulesVersion
+from .spool_offset import SpoolOffset
+from .records import UserRecord, SiteRuleRecord, AppRuleRecord, UsageLogRecord
 
-__all__ = ['Base', 'User', 'UserRole', 'SiteRule', 'AppRule', 'UsageLog', 'ItemType']
+__all__ = ['Base', 'User', 'UserRole', 'SiteRule', 'AppRule', 'UsageLog', 'ItemType', 'UsageDaily',
+           'RulesVersion', 'SpoolOffset', 'UserRecord', 'SiteRuleRecord', 'AppRuleRecord', 'UsageLogRecord']
 
@@ -0,0 +1,63 @@
+"""
+Облегчённые записи для чтения
+
+Неизменяемые именованные кортежи, в которые колонки выбираются напрямую,
+без создания ORM-объектов. Их можно безопасно передавать между потоками
+и использовать после закрытия сессии. ORM-модели остаются для записи.
+"""
+from datetime import datetime, time
+from typing import NamedTuple, Optional
+
+from .user import UserRole
+from .usage_log import ItemType
+
+
+class UserRecord(NamedTuple):
+    """Пользователь (только чтение)"""
+    id: int
+    username: str
+    password_hash: str
+    role: UserRole
+
+
+class SiteRuleRecord(NamedTuple):
+    """Правило блокировки сайта (только чтение)"""
+    id: int
+    url: str
+    time_limit: int
+    schedule_start: Optional[time]
+    schedule_end: Optional[time]
+
+
+class AppRuleRecord(NamedTuple):
+    """Правило блокировки приложения (только чтение)"""
+    id: int
+    app_path: str
+    app_name: str
+    time_limit: int
+    schedule_start: Optional[time]
+    schedule_end: Optional[time]
+
+
+class UsageLogRecord(NamedTuple):
+    """Лог использования (только чтение)"""
+    id: int
+    item_type: ItemType
+    item_name: str
+    start_time: datetime
+    end_time: Optional[datetime]
+    duration: float
+
+
+def record_from_entity(record_type, entity):
+    """
+    Создание записи из ORM-объекта (например, после вставки)
+
+    Args:
+        record_type: Класс записи
+        entity: ORM-объект с загруженными атрибутами
+
+    Returns:
+        Экземпляр record_type
+    """
+    return record_type._make(getattr(entity, name) for name in record_type._fields)
@@ -0,0 +1,26 @@
+"""
+Модель версии набора правил
+"""
+from sqlalchemy import Column, Integer
+from .base import Base
+
+
+class RulesVersion(Base):
+    """
+    Единственная строка с версией правил блокировки
+
+    Увеличивается в той же транзакции, что и любое изменение
+    blocked_sites/blocked_apps, чтобы клиенты могли обнаружить внешние
+    изменения одним чтением вместо перезагрузки обеих таблиц.
+
+    Attributes:
+        id: Всегда 1
+        version: Монотонно растущий номер версии
+    """
+    __tablename__ = 'rules_version'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<RulesVersion(version={self.version})>"
@@ -0,0 +1,26 @@
+"""
+Модель отметки переноса локального журнала событий
+"""
+from sqlalchemy import Column, String, BigInteger
+from .base import Base
+
+
+class SpoolOffset(Base):
+    """
+    Отметка, до какого места журнал событий перенесён в базу данных
+
+    Обновляется в той же транзакции, что и применённые события, поэтому
+    повторный перенос после сбоя начинается ровно с первого непринятого
+    события.
+
+    Attributes:
+        spool_id: Идентификатор файла журнала
+        position: Смещение в байтах после последнего перенесённого события
+    """
+    __tablename__ = 'spool_offsets'
+
+    spool_id = Column(String(32), primary_key=True)
+    position = Column(BigInteger, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<SpoolOffset(spool_id='{self.spool_id}', position={self.position})>"
@@ -0,0 +1,39 @@
+"""
+Модель суточной сводки использования
+"""
+from sqlalchemy import Column, Integer, String, Date, Float, Enum, UniqueConstraint
+from .base import Base
+from .usage_log import ItemType
+
+
+class UsageDaily(Base):
+    """
+    Суточная сводка использования сайтов и приложений
+
+    Поддерживается инкрементально монитором и может быть полностью
+    перестроена из usage_logs. Отчёты за произвольный период читают
+    не больше одной строки на элемент за день.
+
+    Attributes:
+        id: Уникальный идентификатор
+        date: День
+        item_type: Тип элемента (site/app)
+        item_name: Название сайта или приложения
+        total_minutes: Суммарное время за день в минутах
+        sessions: Количество сессий, начатых в этот день
+    """
+    __tablename__ = 'usage_daily'
+    __table_args__ = (
+        UniqueConstraint('date', 'item_type', 'item_name', name='uq_usage_daily_item'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    date = Column(Date, nullable=False, index=True)
+    item_type = Column(Enum(ItemType), nullable=False)
+    item_name = Column(String(255), nullable=False)
+    total_minutes = Column(Float, default=0.0, nullable=False)
+    sessions = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return (f"<UsageDaily(date={self.date}, item_type='{self.item_type.value}', "
+                f"item_name='{self.item_name}', total_minutes={self.total_minutes})>")
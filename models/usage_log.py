@@ -1,7 +1,7 @@
 """
 Модель лога использования
 """
-from sqlalchemy import Column, Integer, String, DateTime, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Enum, Index
 from datetime import datetime
 import enum
 from .base import Base
@@ -24,8 +24,16 @@ class UsageLog(Base):
         start_time: Время начала использования
         end_time: Время окончания использования
         duration: Длительность в минутах
+        checkpoint_time: Время последней контрольной точки открытой сессии
+        session_key: Ключ сессии из журнала событий (для идемпотентного переноса)
     """
     __tablename__ = 'usage_logs'
+    __table_args__ = (
+        Index('uq_usage_logs_session_key', 'session_key', unique=True),
+        # Постраничный просмотр логов с сортировкой по началу и названию
+        Index('ix_usage_logs_start_time', 'start_time'),
+        Index('ix_usage_logs_item_name', 'item_name'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     item_type = Column(Enum(ItemType), nullable=False)
@@ -33,6 +41,8 @@ class UsageLog(Base):
     start_time = Column(DateTime, default=datetime.now, nullable=False)
     end_time = Column(DateTime, nullable=True)
     duration = Column(Float, default=0.0)  # в минутах
+    checkpoint_time = Column(DateTime, nullable=True)  # duration актуальна на этот момент
+    session_key = Column(String(32), nullable=True)
 
     def __repr__(self):
         return f"<UsageLog(id={self.id}, item_type='{self.item_type.value}', item_name='{self.item_name}', duration={self.duration})>"
@@ -139,8 +139,36 @@ def init_tables():
         traceback.print_exc()
         return False
 
+def rebuild_rollup():
+    """Перестроение суточной сводки usage_daily из сырых логов"""
+    try:
+        print()
+        print("=" * 60)
+        print("Перестроение суточной сводки")
+        print("=" * 60)
+        print()
+        
+        from core.database import init_db, Database
+        
+        if not init_db():
+            print("[ERROR] Ошибка создания таблиц")
+            return False
+        
+        rows = Database().rebuild_usage_daily()
+        print(f"[OK] Сводка перестроена: {rows} строк")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 if __name__ == "__main__":
     try:
+        # Только перестроение сводки: python setup_database.py --rebuild-rollup
+        if '--rebuild-rollup' in sys.argv:
+            sys.exit(0 if rebuild_rollup() else 1)
+        
         # Создаём базу данных
         if create_database():
             # Инициализируем таблицы
@@ -0,0 +1,72 @@
+"""
+Тесты фонового агента
+"""
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from core.agent import Agent, read_agent_pid, is_agent_running
+from core.database import Database
+from models.base import Base
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    """Агент на базе SQLite; журналы монитора во временном каталоге"""
+    monkeypatch.chdir(tmp_path)
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    database.add_app_rule("c:\\games\\game.exe", "game.exe", 30)
+    agent = Agent(database, poll_interval=0.05, pid_file=str(tmp_path / 'agent.pid'))
+    agent.monitor.check_interval = 0.05
+    yield agent
+    agent.stop()
+
+
+def test_agent_enforces_rules_and_tracks_pid(agent):
+    """Тест: агент загружает и подхватывает правила, файл агента живёт вместе с ним"""
+    thread = threading.Thread(target=agent.run)
+    thread.start()
+    try:
+        for _ in range(100):
+            if agent.monitor.is_monitoring and agent.rules.db_version is not None:
+                break
+            threading.Event().wait(0.01)
+        assert agent.blocker.is_blocking_enabled
+        assert agent.scheduler.get_time_limit("game.exe") == 30
+        assert read_agent_pid(agent.pid_file) == os.getpid()
+
+        # Правило, добавленное другим процессом (окном настроек)
+        Database(agent.db.database).add_app_rule("c:\\apps\\chat.exe", "chat.exe", 15)
+        for _ in range(100):
+            if agent.scheduler.get_time_limit("chat.exe") == 15:
+                break
+            threading.Event().wait(0.02)
+        assert agent.scheduler.get_time_limit("chat.exe") == 15
+    finally:
+        agent.stop()
+        thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert not agent.monitor.is_monitoring
+    assert not is_agent_running(agent.pid_file)
+
+
+def test_stale_pid_file_is_ignored(tmp_path):
+    """Тест: файл, оставшийся после аварийного завершения, не считается работающим агентом"""
+    pid_file = tmp_path / 'agent.pid'
+    pid_file.write_text(f"{os.getpid()} 1.0", encoding='utf-8')
+    assert read_agent_pid(str(pid_file)) is None
+    assert read_agent_pid(str(tmp_path / 'missing.pid')) is None
+
+
+def test_agent_does_not_import_qt():
+    """Тест: модуль агента не загружает Qt"""
+    code = "import sys, core.agent; print(any(m.startswith('PyQt6') for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.stdout.strip() == "False", result.stderr
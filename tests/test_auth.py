@@ -2,11 +2,20 @@
 Тесты для модуля авторизации
 """
 import pytest
-from core.auth import AuthManager
+from core.auth import AuthManager, LoginRateLimiter
 from core.database import Database
+from models.base import Base
 from models.user import UserRole
 
 
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
 def test_hash_password():
     """Тест хеширования пароля"""
     password = "test_password"
@@ -54,3 +63,51 @@ def test_login():
     assert not auth.login("test_user", "wrong_password")
     assert not auth.is_authenticated()
 
+
+
+def test_rehash_on_login(sqlite_db):
+    """Тест: хеш с устаревшей стоимостью пересчитывается при входе"""
+    AuthManager(sqlite_db, bcrypt_rounds=4).create_admin("admin", "secret")
+    auth = AuthManager(sqlite_db, bcrypt_rounds=5)
+    
+    assert auth.login("admin", "secret")
+    stored = sqlite_db.get_user_by_username("admin").password_hash
+    assert AuthManager.hash_rounds(stored) == 5
+    assert AuthManager.verify_password("secret", stored)
+
+
+def test_rate_limit_skips_bcrypt(sqlite_db, monkeypatch):
+    """Тест: во время блокировки пароль не проверяется"""
+    now = [0.0]
+    limiter = LoginRateLimiter(free_attempts=2, base_delay=10, clock=lambda: now[0])
+    auth = AuthManager(sqlite_db, bcrypt_rounds=4, rate_limiter=limiter)
+    auth.create_admin("admin", "secret")
+    
+    calls = []
+    verify = AuthManager.verify_password
+    monkeypatch.setattr(AuthManager, 'verify_password',
+                        staticmethod(lambda p, h: calls.append(p) or verify(p, h)))
+    
+    assert not auth.login("admin", "wrong")
+    assert not auth.login("admin", "wrong")
+    assert auth.lockout_remaining("admin") == 10
+    assert not auth.login("admin", "secret")
+    assert len(calls) == 2
+    
+    now[0] = 11.0
+    assert not auth.login("admin", "wrong")
+    assert auth.lockout_remaining("admin") == 20
+    now[0] = 40.0
+    assert auth.login("admin", "secret")
+    assert auth.lockout_remaining("admin") == 0
+
+
+def test_change_password(sqlite_db):
+    """Тест смены пароля"""
+    auth = AuthManager(sqlite_db, bcrypt_rounds=4)
+    auth.create_admin("admin", "secret")
+    
+    assert not auth.change_password("admin", "wrong", "new_secret")
+    assert auth.change_password("admin", "secret", "new_secret")
+    assert auth.login("admin", "new_secret")
+    assert not auth.login("admin", "secret")
@@ -0,0 +1,60 @@
+"""
+Тесты автозапуска фонового агента
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from core.autostart import AutostartManager, agent_command
+
+
+class _Schtasks:
+    """Запись вызовов schtasks вместо реального планировщика"""
+
+    def __init__(self, returncode: int = 0):
+        self.calls = []
+        self.returncode = returncode
+
+    def __call__(self, *args):
+        self.calls.append(args)
+        return subprocess.CompletedProcess(['schtasks', *args], self.returncode, '', 'ошибка')
+
+
+def test_agent_command_from_sources():
+    """Тест: из исходников агент запускается текущим интерпретатором с agent.py"""
+    command = agent_command()
+    assert command[0] == sys.executable
+    assert Path(command[1]).name == "agent.py" and Path(command[1]).exists()
+
+
+def test_enable_agent_registers_boot_task(monkeypatch, tmp_path):
+    """Тест: агент регистрируется задачей при загрузке от имени SYSTEM"""
+    manager = AutostartManager()
+    schtasks = _Schtasks()
+    monkeypatch.setattr(manager, '_schtasks', schtasks)
+    agent = tmp_path / "saveconfe-agent.exe"
+
+    assert not manager.enable_agent([str(agent)])
+    assert schtasks.calls == []
+
+    agent.touch()
+    assert manager.enable_agent([str(agent)])
+    args = schtasks.calls[-1]
+    assert args[:4] == ('/Create', '/F', '/TN', "SaveConfe Agent")
+    assert args[args.index('/TR') + 1] == str(agent)
+    assert args[args.index('/SC') + 1] == 'ONSTART'
+    assert args[args.index('/RU') + 1] == 'SYSTEM'
+
+    assert manager.disable_agent()
+    assert schtasks.calls[-1] == ('/Delete', '/F', '/TN', "SaveConfe Agent")
+
+
+def test_enable_agent_reports_schtasks_error(monkeypatch, tmp_path):
+    """Тест: ошибка планировщика возвращается как False"""
+    manager = AutostartManager()
+    monkeypatch.setattr(manager, '_schtasks', _Schtasks(returncode=1))
+    agent = tmp_path / "agent.py"
+    agent.touch()
+
+    assert not manager.enable_agent([sys.executable, str(agent)])
+    assert not manager.is_agent_enabled()
@@ -0,0 +1,80 @@
+"""
+Тесты данных графиков и прореживания рядов
+"""
+import numpy as np
+import pytest
+from datetime import datetime, date, timedelta
+from core.charts import ChartDataSource, lttb, unit_for_width
+from core.database import Database
+from core.reports import ReportEngine
+from core.samples import SampleJournal, SampleReader
+from models.base import Base
+from models.usage_log import UsageLog, ItemType
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_lttb_keeps_ends_and_peaks():
+    """Тест: прореживание сохраняет крайние точки и выбросы"""
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 500)
+    y[4321] = 10.0
+    y[7777] = -10.0
+
+    sx, sy = lttb(x, y, 200)
+    assert len(sx) == 200
+    assert sx[0] == 0 and sx[-1] == 9999
+    assert np.all(np.diff(sx) > 0)
+    assert 10.0 in sy and -10.0 in sy
+
+    same_x, _ = lttb(x[:50], y[:50], 200)
+    assert len(same_x) == 50
+
+
+def test_unit_for_width():
+    """Тест выбора ширины интервала под ширину графика"""
+    start = datetime(2024, 1, 1)
+    assert unit_for_width(start, start + timedelta(days=1), 400) == 'hour'
+    assert unit_for_width(start, start + timedelta(days=7), 800) == 'day'
+    assert unit_for_width(start, start + timedelta(days=90), 400) == 'week'
+
+
+def test_stacked_usage_folds_small_items(db, tmp_path):
+    """Тест: элементы сверх top объединяются в «Другое»"""
+    start = datetime(2024, 1, 1)
+    session = db.get_session()
+    try:
+        session.add_all(
+            UsageLog(item_type=ItemType.APP, item_name=f"app{i}.exe", start_time=start + timedelta(hours=i),
+                     end_time=start + timedelta(hours=i, minutes=10 * (i + 1)), duration=10.0 * (i + 1))
+            for i in range(5)
+        )
+        session.commit()
+    finally:
+        session.close()
+
+    source = ChartDataSource(ReportEngine(db), SampleReader(str(tmp_path / 'samples')))
+    series = source.stacked_usage(start, start + timedelta(days=7), 800, top=3)
+    assert series.unit == 'day'
+    assert series.names == ["app4.exe", "app3.exe", "app2.exe", "Другое"]
+    assert series.minutes.shape == (4, 7)
+    assert series.minutes[3, 0] == pytest.approx(30.0)
+
+
+def test_concurrency_is_downsampled(tmp_path):
+    """Тест: поминутный ряд прореживается до ширины графика"""
+    journal = SampleJournal(str(tmp_path))
+    journal.append(datetime(2024, 1, 2, 12, 0, 30), [1, 2], [1, 1], [0.0, 0.0], [60.0, 60.0])
+    journal.close()
+
+    source = ChartDataSource(None, SampleReader(str(tmp_path)))
+    series = source.concurrency(date(2024, 1, 1), date(2024, 1, 3), 300)
+    assert series.source_points == 3 * 1440
+    assert len(series.x) == 300
+    assert series.y.max() == pytest.approx(2.0)
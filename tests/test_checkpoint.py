@@ -0,0 +1,104 @@
+"""
+Тесты контрольных точек сессий и восстановления после сбоя
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, inspect, text
+from core.blocker import Blocker
+from core.clock import VirtualClock
+from core.database import Database, upgrade_schema
+from core.monitor import Monitor
+from core.samples import SampleJournal
+from core.scheduler import Scheduler
+from core.simulation import FakeProcessSource, session
+from core.spool import UsageSpool
+from models.base import Base
+from models.usage_log import UsageLog, ItemType
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def _open_log(db, name, start_time, checkpoint_time=None, duration=0):
+    """Создание открытого лога использования (с контрольной точкой или без)"""
+    session = db.get_session()
+    try:
+        log = UsageLog(item_type=ItemType.APP, item_name=name, start_time=start_time,
+                       checkpoint_time=checkpoint_time, duration=duration)
+        session.add(log)
+        session.commit()
+        return log.id
+    finally:
+        session.close()
+
+
+def test_checkpoint_and_reconcile(db):
+    """Тест: после сбоя логи закрываются на последней контрольной точке"""
+    start = datetime(2024, 1, 1, 10, 0)
+    checkpoint = datetime(2024, 1, 1, 10, 30)
+    first = _open_log(db, "a.exe", start, checkpoint, 30.0)
+    _open_log(db, "b.exe", start, checkpoint, 30.0)
+    never = _open_log(db, "c.exe", start)
+
+    assert db.reconcile_open_usage_logs() == 3
+    logs = {log.id: log for log in db.get_usage_logs()}
+    assert logs[first].end_time == checkpoint
+    assert logs[first].duration == pytest.approx(30.0)
+    assert logs[never].end_time == start
+    assert db.reconcile_open_usage_logs() == 0
+
+
+def test_recovery_keeps_time_accrued_before_first_checkpoint(db, tmp_path):
+    """Тест: время процесса, запущенного до старта монитора, добавляется к сумме из базы"""
+    game = "C:\\Games\\game.exe"
+    db.add_usage_log(ItemType.APP, "game.exe", start_time=datetime(2024, 1, 1, 9, 0),
+                     end_time=datetime(2024, 1, 1, 9, 40), duration=40.0)
+    db.rebuild_usage_daily()
+
+    now = datetime(2024, 1, 1, 12, 0)
+    clock = VirtualClock(now)
+    source = FakeProcessSource(clock, [session(game, now - timedelta(minutes=30), 120)])
+    blocker = Blocker(processes=source)
+    blocker.load_blocked_apps([game])
+    scheduler = Scheduler(clock=clock)
+    monitor = Monitor(blocker, scheduler, db, spool=UsageSpool(str(tmp_path / 'spool')),
+                      samples=SampleJournal(str(tmp_path / 'samples')), clock=clock, processes=source)
+    monitor.last_checkpoint = now
+
+    monitor._tick()
+    clock.advance(60)
+    monitor._tick()
+
+    assert monitor.recovered
+    # 40 минут из базы, 30 минут до старта монитора и минута между проверками
+    assert scheduler.get_used_time("game.exe") == pytest.approx(71)
+    monitor.spool.close()
+
+
+def test_restore_used_time_takes_max():
+    """Тест: повторное восстановление не удваивает время"""
+    scheduler = Scheduler()
+    scheduler.add_used_time("a.exe", 10)
+    scheduler.restore_used_time({"a.exe": 25, "b.exe": 5})
+    scheduler.restore_used_time({"a.exe": 25})
+    assert scheduler.get_used_time("a.exe") == pytest.approx(25)
+    assert scheduler.get_used_time("b.exe") == pytest.approx(5)
+
+
+def test_upgrade_schema_adds_column(tmp_path):
+    """Тест добавления новой колонки в существующую таблицу"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE usage_logs (id INTEGER PRIMARY KEY, item_type VARCHAR(10), "
+            "item_name VARCHAR(500), start_time DATETIME, end_time DATETIME, duration FLOAT)"
+        ))
+    Base.metadata.create_all(engine)
+    upgrade_schema(engine)
+    columns = {column['name'] for column in inspect(engine).get_columns('usage_logs')}
+    assert 'checkpoint_time' in columns
@@ -0,0 +1,100 @@
+"""
+Тесты событий монитора и панели мониторинга
+"""
+import os
+from datetime import datetime, time, timedelta
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from core.blocker import Blocker
+from core.database import Database
+from core.monitor import (Monitor, MonitorEvent, EVENT_SESSION_START, EVENT_SESSION_STOP,
+                          EVENT_ACCRUAL, EVENT_LIMIT_WARNING, accrual_key)
+from core.samples import SampleJournal
+from core.scheduler import Scheduler
+from core.spool import UsageSpool
+from models.base import Base
+from ui.dashboard import DashboardModel
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    """Монитор с базой SQLite и журналами во временном каталоге"""
+    db = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(db.engine)
+    scheduler = Scheduler()
+    scheduler.set_time_limit("game.exe", 60)
+    return Monitor(Blocker(), scheduler, db, spool=UsageSpool(str(tmp_path / 'spool')),
+                   samples=SampleJournal(str(tmp_path / 'samples')))
+
+
+def test_next_schedule_boundary():
+    """Тест ближайшей смены разрешения по расписанию"""
+    scheduler = Scheduler()
+    scheduler.set_schedule("game.exe", time(16, 0), time(20, 0))
+    now = datetime(2024, 1, 1, 12, 0)
+
+    assert scheduler.next_schedule_boundary("game.exe", now) == datetime(2024, 1, 1, 16, 0)
+    assert scheduler.next_schedule_boundary("game.exe", now.replace(hour=18)) == datetime(2024, 1, 1, 20, 0)
+    assert scheduler.next_schedule_boundary("game.exe", now.replace(hour=21)) == datetime(2024, 1, 2, 16, 0)
+    assert scheduler.next_schedule_boundary("other.exe", now) is None
+
+
+def test_monitor_emits_session_events(monitor):
+    """Тест: монитор сообщает о начале, начислении и конце сессии"""
+    events = []
+    monitor.subscribe(events.append)
+    start = datetime.now() - timedelta(minutes=5)
+    monitor._start_logging("c:\\games\\game.exe", {'pid': 1, 'name': "game.exe", 'start_time': start})
+    monitor._update_usage_time()
+    monitor._stop_logging("c:\\games\\game.exe")
+
+    assert [event.kind for event in events] == [EVENT_SESSION_START, EVENT_ACCRUAL, EVENT_SESSION_STOP]
+    accrual = events[1]
+    assert accrual.session_key == events[0].session_key
+    assert accrual.used_minutes == pytest.approx(5, abs=0.1)
+    assert accrual.remaining_minutes == pytest.approx(55, abs=0.1)
+    monitor.spool.close()
+
+
+def test_dashboard_updates_only_changed_cells():
+    """Тест: начисление времени обновляет только изменившиеся ячейки строки"""
+    model = DashboardModel()
+    at = datetime(2024, 1, 1, 12, 0)
+    base = dict(app_name="game.exe", session_key="a" * 32, start_time=at, remaining_minutes=30.0)
+    changes = []
+    model.dataChanged.connect(lambda first, last, roles: changes.append(
+        (first.row(), first.column(), last.column())))
+
+    model.apply_event(MonitorEvent(EVENT_SESSION_START, at=at, used_minutes=0.0, **base))
+    assert model.rowCount() == 1
+
+    model.apply_event(MonitorEvent(EVENT_ACCRUAL, at=at, used_minutes=0.2, **base))
+    assert changes == []
+
+    base['remaining_minutes'] = 25.0
+    model.apply_event(MonitorEvent(EVENT_ACCRUAL, at=at, used_minutes=5.0, **base))
+    assert changes == [(0, 2, 3)]
+    assert model.data(model.index(0, 3)) == "25"
+
+    model.apply_event(MonitorEvent(EVENT_SESSION_STOP, at=at, used_minutes=5.0, **base))
+    assert model.rowCount() == 0
+
+
+def test_monitor_warns_once_before_limit(monitor):
+    """Тест: предупреждение о скором окончании лимита приходит один раз"""
+    events = []
+    monitor.subscribe(events.append)
+    start = datetime.now() - timedelta(minutes=52)
+    monitor._start_logging("c:\\games\\game.exe", {'pid': 1, 'name': "game.exe", 'start_time': start})
+    monitor._update_usage_time()
+    monitor._update_usage_time()
+
+    warnings = [event for event in events if event.kind == EVENT_LIMIT_WARNING]
+    assert len(warnings) == 1
+    assert warnings[0].remaining_minutes == pytest.approx(8, abs=0.1)
+    assert accrual_key(warnings[0]) is None and accrual_key(events[1]) == events[1].session_key
+    monitor._stop_logging("c:\\games\\game.exe")
+    monitor.spool.close()
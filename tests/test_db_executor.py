@@ -0,0 +1,77 @@
+"""
+Тесты для асинхронного исполнителя запросов к базе данных
+"""
+import os
+import threading
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+
+from ui.db_executor import DbExecutor
+
+
+@pytest.fixture(scope="module")
+def app():
+    """Экземпляр QApplication для доставки сигналов"""
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _wait_for(app, condition, timeout=5.0):
+    """Обработка событий Qt до выполнения условия"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_result_delivered_in_gui_thread(app):
+    """Тест доставки результата в GUI-поток"""
+    executor = DbExecutor()
+    results = []
+    executor.submit('query', lambda: threading.get_ident(),
+                    callback=lambda value: results.append((value, threading.get_ident())))
+    _wait_for(app, lambda: results)
+
+    worker_thread, callback_thread = results[0]
+    assert worker_thread != threading.get_ident()
+    assert callback_thread == threading.get_ident()
+    executor.shutdown()
+
+
+def test_pending_requests_coalesce(app):
+    """Тест объединения одинаковых ожидающих запросов"""
+    executor = DbExecutor(max_workers=1)
+    gate = threading.Event()
+    calls = []
+
+    delivered = []
+
+    executor.submit('blocker', gate.wait)
+    first = executor.submit('reports', lambda: calls.append(1) or len(calls),
+                            callback=lambda value: delivered.append(('first', value)))
+    second = executor.submit('reports', lambda: calls.append(2) or len(calls),
+                             callback=lambda value: delivered.append(('second', value)))
+    assert first is second
+
+    gate.set()
+    assert second.result(timeout=5) == 1
+    assert calls == [2]
+    _wait_for(app, lambda: delivered)
+    app.processEvents()
+    assert delivered == [('second', 1)]
+    executor.shutdown()
+
+
+def test_errors_reach_errback(app):
+    """Тест доставки исключения в errback"""
+    executor = DbExecutor()
+    errors = []
+    future = executor.submit('broken', lambda: 1 / 0, errback=errors.append)
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
+    _wait_for(app, lambda: errors)
+    assert isinstance(errors[0], ZeroDivisionError)
+    executor.shutdown()
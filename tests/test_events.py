@@ -0,0 +1,119 @@
+"""
+Тесты шины событий
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from core.events import EventBus, DROP_NEWEST
+
+
+@dataclass(frozen=True)
+class Tick:
+    key: str
+    value: int
+
+
+@dataclass(frozen=True)
+class Other:
+    value: int
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_inline_subscribers_filter_by_type():
+    """Тест: подписчик без очереди получает события своего типа сразу"""
+    bus = EventBus()
+    ticks, everything = [], []
+    bus.subscribe(ticks.append, Tick)
+    bus.subscribe(everything.append, (Tick, Other))
+
+    bus.publish(Tick("a", 1))
+    bus.publish(Other(2))
+
+    assert ticks == [Tick("a", 1)]
+    assert everything == [Tick("a", 1), Other(2)]
+    assert bus.has_subscribers(Other)
+    bus.unsubscribe(everything.append)
+    assert not bus.has_subscribers(Other)
+
+
+def test_queued_subscriber_does_not_block_publisher():
+    """Тест: медленный подписчик с очередью не задерживает публикацию и теряет старые события"""
+    bus = EventBus()
+    release = threading.Event()
+    received = []
+
+    def slow(event):
+        release.wait()
+        received.append(event.value)
+
+    subscription = bus.subscribe(slow, Tick, name='slow', max_queue=3)
+    bus.publish(Tick("0", 0))
+    assert _wait_for(lambda: subscription.stats().queued == 0)
+    started = time.perf_counter()
+    for value in range(1, 10):
+        bus.publish(Tick(str(value), value))
+    assert time.perf_counter() - started < 0.5
+
+    # Первое событие в обработчике, из остальных в очереди помещаются последние три
+    stats = subscription.stats()
+    assert stats.queued == 3
+    assert stats.name == 'slow' and stats.dropped == 6 and stats.lag > 0
+    release.set()
+    assert _wait_for(lambda: len(received) == 4)
+    assert received == [0, 7, 8, 9]
+    bus.close()
+
+
+def test_coalesce_keeps_latest_event_per_key():
+    """Тест: событие с тем же ключом заменяет недоставленное, не меняя порядок"""
+    bus = EventBus()
+    release = threading.Event()
+    received = []
+    bus.subscribe(lambda event: (release.wait(), received.append(event)), Tick, max_queue=100,
+                  coalesce=lambda event: event.key if event.key != 'keep' else None)
+
+    bus.publish(Tick("block", 0))
+    assert _wait_for(lambda: bus.stats()[0].delivered == 0 and bus.stats()[0].queued == 0)
+    for event in [Tick("a", 1), Tick("b", 1), Tick("a", 2), Tick("keep", 1), Tick("keep", 2), Tick("a", 3)]:
+        bus.publish(event)
+    assert bus.stats()[0].coalesced == 2
+    release.set()
+    assert _wait_for(lambda: len(received) == 5)
+    assert received[1:] == [Tick("a", 3), Tick("b", 1), Tick("keep", 1), Tick("keep", 2)]
+    bus.close()
+
+
+def test_drop_newest_and_failing_handler():
+    """Тест: DROP_NEWEST отбрасывает новые события, ошибка обработчика не останавливает поток"""
+    bus = EventBus()
+    release = threading.Event()
+    received = []
+
+    def handler(event):
+        release.wait()
+        if event.value == 1:
+            raise RuntimeError("сбой")
+        received.append(event.value)
+
+    subscription = bus.subscribe(handler, Tick, max_queue=2, overflow=DROP_NEWEST)
+    bus.publish(Tick("k", 0))
+    assert _wait_for(lambda: subscription.stats().queued == 0)
+    for value in range(1, 5):
+        bus.publish(Tick("k", value))
+    release.set()
+    assert _wait_for(lambda: subscription.stats().delivered == 3)
+    assert received == [0, 2]
+    assert subscription.stats().dropped == 2
+    with pytest.raises(ValueError):
+        bus.subscribe(handler, Tick, max_queue=1, overflow='block')
+    bus.close()
+    assert not subscription._thread.is_alive()
@@ -0,0 +1,115 @@
+"""
+Тесты локального IPC агента
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+from core.agent import Agent
+from core.auth import AuthManager
+from core.database import Database
+from core.ipc import IpcClient, IpcError, event_from_message, _Connection
+from core.monitor import EVENT_SESSION_START
+from models.base import Base
+
+
+@pytest.fixture
+def agent(tmp_path, monkeypatch):
+    """Агент на базе SQLite с запущенным IPC-сервером (мониторинг не запускается)"""
+    monkeypatch.chdir(tmp_path)
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    AuthManager(database, bcrypt_rounds=4).create_admin("admin", "secret")
+    address = rf'\\.\pipe\saveconfe-test-{os.getpid()}' if sys.platform == 'win32' else str(tmp_path / 'ipc.sock')
+    agent = Agent(database, ipc_address=address)
+    agent.rules.load()
+    agent.ipc.start()
+    yield agent
+    agent.ipc.stop()
+
+
+def test_status_and_rule_crud(agent):
+    """Тест: состояние, чтение правил и изменение правил только после входа"""
+    with IpcClient(agent.ipc.address) as client:
+        status = client.call('status')
+        assert status['pid'] == os.getpid()
+        assert status['sites'] == 0 and status['active'] == []
+
+        with pytest.raises(IpcError):
+            client.call('rules.add_site', url="example.com")
+        assert client.call('login', username="admin", password="wrong") is False
+        assert client.call('login', username="admin", password="secret") is True
+
+        rule = client.call('rules.add_app', app_path="c:\\games\\game.exe", app_name="game.exe",
+                           time_limit=30, schedule_start="09:00")
+        assert rule['app_name'] == "game.exe" and rule['schedule_start'] == "09:00:00"
+        assert agent.scheduler.get_time_limit("game.exe") == 30
+
+        site = client.call('rules.add_site', url="example.com")
+        assert [s['url'] for s in client.call('rules.list')['sites']] == ["example.com"]
+        assert client.call('rules.delete_site', rule_id=site['id']) is True
+        assert client.call('status')['sites'] == 0
+        assert client.call('usage.summary') == []
+
+        with pytest.raises(IpcError):
+            client.call('no.such.method')
+
+
+def test_event_stream(agent):
+    """Тест: события монитора и изменения правил приходят подписчику"""
+    with IpcClient(agent.ipc.address) as client:
+        client.subscribe()
+        at = datetime(2024, 5, 1, 12, 0)
+        agent.monitor._notify(EVENT_SESSION_START, "game.exe", at=at, session_key="k" * 32, start_time=at)
+        agent.rules.add_site("example.com")
+
+        events = client.events(timeout=5)
+        event = event_from_message(next(events))
+        assert event.kind == EVENT_SESSION_START
+        assert event.app_name == "game.exe" and event.start_time == at
+        rules = next(events)
+        assert rules['type'] == 'rules' and rules['added_sites'][0]['url'] == "example.com"
+
+
+def test_slow_client_gets_batches(agent):
+    """Тест: события для клиента, который не читает, отправляются пачками и без потерь"""
+    with IpcClient(agent.ipc.address) as client:
+        client.subscribe()
+        for number in range(2000):
+            agent.ipc.publish({'type': 'test', 'n': number})
+        events = client.events(timeout=5)
+        received = [next(events)['n'] for _ in range(2000)]
+        assert received == list(range(2000))
+        assert client.dropped == 0
+
+
+def test_overflow_reports_dropped():
+    """Тест: при переполнении очереди клиента старые события вытесняются и учитываются"""
+    async def fill():
+        connection = _Connection(writer=None, max_pending=10)
+        for number in range(25):
+            connection.push({'n': number})
+        return connection
+
+    connection = asyncio.run(fill())
+    assert connection.dropped == 15
+    assert [message['n'] for message in connection.pending] == list(range(15, 25))
+
+
+def test_metrics_and_profile(agent, tmp_path):
+    """Тест: метрики и профилирование агента по IPC без остановки (профилирование — после входа)"""
+    with IpcClient(agent.ipc.address) as client:
+        assert client.call('metrics') == {'enabled': False, 'rows': []}
+        with pytest.raises(IpcError):
+            client.call('profile', seconds=0.2)
+        assert agent.profiler._thread is None
+        assert client.call('login', username="admin", password="secret") is True
+        result = client.call('profile', seconds=0.2)
+        with pytest.raises(IpcError):
+            client.call('profile', seconds=0.2)
+    agent.profiler._thread.join(10)
+    assert result['path'].startswith(str(tmp_path / 'profiles'))
+    assert os.path.getsize(result['path']) > 0
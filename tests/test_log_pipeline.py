@@ -0,0 +1,72 @@
+"""
+Тесты асинхронного логирования
+"""
+import gzip
+import json
+import logging
+
+from core.log_pipeline import DedupeFilter, LogPipeline
+
+
+def _record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord('core.blocker', level, __file__, 0, message, None, None)
+
+
+def test_dedupe_suppresses_repeats_ignoring_numbers():
+    """Тест: повторы с другим PID подавляются, затем выводится их количество"""
+    now = [0.0]
+    dedupe = DedupeFilter(window=60, clock=lambda: now[0])
+
+    assert dedupe.filter(_record("Завершён процесс: game.exe (PID: 100)"))
+    for pid in range(101, 111):
+        now[0] += 5
+        assert not dedupe.filter(_record(f"Завершён процесс: game.exe (PID: {pid})"))
+    assert dedupe.filter(_record("Завершён процесс: other.exe (PID: 7)"))
+    assert dedupe.filter(_record("Завершён процесс: game.exe (PID: 7)", logging.CRITICAL))
+
+    now[0] = 61
+    record = _record("Завершён процесс: game.exe (PID: 200)")
+    assert dedupe.filter(record)
+    assert record.repeated == 10
+    assert record.getMessage().endswith("(повторов за 60 с: 10)")
+    assert dedupe.pending() == []
+
+
+def test_pipeline_writes_json_and_flushes_pending(tmp_path):
+    """Тест записи JSON lines через очередь и подавленных повторов при остановке"""
+    path = tmp_path / 'app.log'
+    pipeline = LogPipeline(str(path), json_lines=True, console=False)
+    logger = logging.getLogger('test_log_pipeline.json')
+    logger.propagate = False
+    pipeline.start(logger)
+    logger.info("Завершён процесс: game.exe (PID: 1)")
+    logger.info("Завершён процесс: game.exe (PID: 2)")
+    logger.info("Завершён процесс: game.exe (PID: 3)")
+    try:
+        raise ValueError("сбой")
+    except ValueError:
+        logger.exception("Ошибка")
+    pipeline.stop()
+
+    entries = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [entry['message'] for entry in entries][:2] == ["Завершён процесс: game.exe (PID: 1)", "Ошибка"]
+    assert 'ValueError: сбой' in entries[1]['exc']
+    assert entries[2]['repeated'] == 2
+    assert entries[2]['message'].startswith("Завершён процесс: game.exe (PID: 3)")
+
+
+def test_rotation_compresses_old_files(tmp_path):
+    """Тест: при превышении размера файл сжимается в .gz"""
+    path = tmp_path / 'app.log'
+    pipeline = LogPipeline(str(path), max_bytes=2000, backup_count=2, dedupe_window=0, console=False)
+    logger = logging.getLogger('test_log_pipeline.rotation')
+    logger.propagate = False
+    pipeline.start(logger)
+    for index in range(100):
+        logger.info(f"Сообщение {index} " + "x" * 50)
+    pipeline.stop()
+
+    assert sorted(item.name for item in tmp_path.iterdir()) == ['app.log', 'app.log.1.gz', 'app.log.2.gz']
+    with gzip.open(tmp_path / 'app.log.1.gz', 'rt', encoding='utf-8') as f:
+        assert 'Сообщение' in f.read()
+    assert 'Сообщение 99' in path.read_text(encoding='utf-8')
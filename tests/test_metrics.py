@@ -0,0 +1,83 @@
+"""
+Тесты метрик мониторинга
+"""
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.blocker import Blocker
+from core.database import Database
+from core.metrics import Metrics, MetricsServer, metrics_port_from_args, DEFAULT_METRICS_PORT
+from core.monitor import Monitor, METRIC_PHASE, METRIC_SCANNED, METRIC_SESSIONS
+from core.samples import SampleJournal
+from core.scheduler import Scheduler
+from core.spool import UsageSpool
+from models.base import Base
+
+
+def test_disabled_metrics_record_nothing():
+    """Тест: выключенные метрики ничего не записывают"""
+    metrics = Metrics()
+    with metrics.timer('work_seconds', phase='scan'):
+        pass
+    metrics.inc('events_total', 5)
+    assert metrics.counters == {} and metrics.histograms == {}
+
+
+def test_histogram_and_prometheus_text():
+    """Тест гистограммы и текстового формата Prometheus"""
+    metrics = Metrics(enabled=True, buckets=(0.01, 0.1, 1.0))
+    metrics.describe('work_seconds', "Длительность работы")
+    histogram = metrics.timer('work_seconds', phase='scan').histogram
+    for value in (0.005, 0.05, 0.05, 0.5):
+        histogram.observe(value)
+    metrics.inc('events_total', 3)
+    metrics.gauge('queue_depth', lambda: [({'subscriber': 'ui'}, 2)])
+
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == 0.5
+    text = metrics.render()
+    assert "# HELP work_seconds Длительность работы" in text
+    assert "# TYPE work_seconds histogram" in text
+    assert 'work_seconds_bucket{phase="scan",le="0.1"} 3' in text
+    assert 'work_seconds_bucket{phase="scan",le="+Inf"} 4' in text
+    assert 'work_seconds_count{phase="scan"} 4' in text
+    assert "events_total 3" in text
+    assert 'queue_depth{subscriber="ui"} 2' in text
+
+
+def test_metrics_server_serves_localhost():
+    """Тест выдачи метрик по HTTP"""
+    metrics = Metrics(enabled=True)
+    metrics.inc('events_total')
+    server = MetricsServer(metrics, port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert "events_total 1" in response.read().decode('utf-8')
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other", timeout=5)
+    finally:
+        server.stop()
+
+    assert metrics_port_from_args(['--metrics']) == DEFAULT_METRICS_PORT
+    assert metrics_port_from_args(['--metrics=9500']) == 9500
+    assert metrics_port_from_args([]) is None
+
+
+def test_monitor_tick_records_phases(tmp_path):
+    """Тест: проверка монитора замеряет этапы и считает процессы"""
+    db = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(db.engine)
+    monitor = Monitor(Blocker(), Scheduler(), db, spool=UsageSpool(str(tmp_path / 'spool')),
+                      samples=SampleJournal(str(tmp_path / 'samples')), metrics=Metrics(enabled=True))
+    monitor._tick()
+
+    phases = {dict(labels)['phase'] for name, labels in monitor.metrics.histograms if name == METRIC_PHASE}
+    assert phases == {'scan', 'match', 'accounting', 'kill', 'db'}
+    assert monitor.metrics.counters[(METRIC_SCANNED, ())] > 0
+    rows = {row['name']: row for row in monitor.metrics.summary()}
+    assert rows[METRIC_SESSIONS]['value'] == 0
+    monitor.spool.close()
@@ -0,0 +1,68 @@
+"""
+Тесты профилирования по запросу
+"""
+import threading
+import time
+import tracemalloc
+import zipfile
+
+import pytest
+
+from core.profiling import Profiler, profile_seconds_from_env, PROFILE_ENV
+
+
+def _busy_loop(stop):
+    data = []
+    while not stop.is_set():
+        data.append(sum(i * i for i in range(500)))
+        if len(data) > 1000:
+            data.clear()
+
+
+def test_profile_thread_writes_archive(tmp_path):
+    """Тест: отсчёты стека выбранного потока и память попадают в архив"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name='busy')
+    worker.start()
+    try:
+        result = Profiler(str(tmp_path), interval=0.002).run(0.3, thread=worker)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert result.samples > 10
+    assert not tracemalloc.is_tracing()
+    with zipfile.ZipFile(result.path) as archive:
+        assert sorted(archive.namelist()) == ['stacks.folded', 'summary.txt']
+        summary = archive.read('summary.txt').decode('utf-8')
+        folded = archive.read('stacks.folded').decode('utf-8')
+    assert "Поток: busy" in summary and "_busy_loop" in summary
+    assert "Память по местам выделения" in summary
+    top_stack, count = folded.splitlines()[0].rsplit(' ', 1)
+    assert "_busy_loop" in top_stack and int(count) > 0
+
+
+def test_start_in_background_once(tmp_path):
+    """Тест: фоновое профилирование, отказ во втором запуске и очистка старых архивов"""
+    profiler = Profiler(str(tmp_path), keep=2)
+    for index in range(3):
+        (tmp_path / f"saveconfe-profile-old{index}.zip").write_bytes(b"")
+    done = threading.Event()
+    results = []
+    path = profiler.start(0.2, callback=lambda result: (results.append(result), done.set()))
+    with pytest.raises(RuntimeError):
+        profiler.start(0.2)
+    assert done.wait(10)
+    assert results[0].path == path
+    time.sleep(0.05)
+    assert len(list(tmp_path.glob('saveconfe-profile-*.zip'))) == 2
+
+
+def test_profile_seconds_from_env(monkeypatch):
+    """Тест длительности профилирования из переменной окружения"""
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    assert profile_seconds_from_env() is None
+    monkeypatch.setenv(PROFILE_ENV, "45")
+    assert profile_seconds_from_env() == 45.0
+    monkeypatch.setenv(PROFILE_ENV, "abc")
+    assert profile_seconds_from_env() is None
@@ -0,0 +1,100 @@
+"""
+Тесты учёта запросов к базе данных
+"""
+import pytest
+
+from core.database import Database
+from core.metrics import Metrics
+from core.query_stats import QueryStats, fingerprint
+from models.base import Base
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_fingerprint_collapses_parameter_lists():
+    """Тест: списки IN разной длины дают один текст запроса"""
+    assert fingerprint("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == \
+        fingerprint("SELECT * FROM t WHERE id IN (?, ?)") == "SELECT * FROM t WHERE id IN (...)"
+
+
+def test_queries_attributed_to_database_method(db):
+    """Тест: запрос относится к вызвавшему методу Database"""
+    db.add_site_rule("youtube.com", time_limit=30)
+    db.get_all_site_rules()
+    db.get_all_site_rules()
+
+    totals = db.query_stats.by_caller['Database.get_all_site_rules']
+    assert totals.queries == 2
+    # SQLite не сообщает количество строк SELECT, только изменённые
+    assert db.query_stats.by_caller['Database.add_site_rule'].rows >= 1
+
+
+def test_slow_queries_logged(db):
+    """Тест скользящего журнала медленных запросов"""
+    stats = QueryStats(slow_threshold=0, slow_log_size=2)
+    stats.attach(db.engine)
+    for _ in range(3):
+        db.get_all_site_rules()
+
+    assert stats.slow_total == 3
+    assert len(stats.slow_queries) == 2
+    record = stats.slow_queries[-1]
+    assert record.caller == 'Database.get_all_site_rules'
+    assert record.statement.startswith('SELECT')
+
+
+def test_action_counts_queries(db):
+    """Тест учёта запросов действия пользователя"""
+    with db.query_stats.action('rules'):
+        db.get_all_site_rules()
+        db.get_all_app_rules()
+    db.get_all_site_rules()
+    with db.query_stats.action('rules'):
+        db.get_all_site_rules()
+
+    totals = db.query_stats.by_action['rules']
+    assert (totals.calls, totals.queries) == (2, 3)
+
+
+def test_n_plus_one_detection(db):
+    """Тест: запрос на каждую строку обнаруживается, пакетная запись — нет"""
+    with db.query_stats.capture() as per_row:
+        for index in range(5):
+            db.add_site_rule(f"site{index}.com")
+    assert per_row.repeated()
+    with pytest.raises(AssertionError, match="N\\+1"):
+        per_row.assert_no_n_plus_one()
+
+    sites = [{'url': f"bulk{index}.com", 'time_limit': 0, 'schedule_start': None, 'schedule_end': None}
+             for index in range(50)]
+    with db.query_stats.capture() as bulk:
+        db.bulk_upsert_rules(sites, [])
+    bulk.assert_no_n_plus_one()
+    assert bulk.count < 10
+
+
+def test_metrics_expose_query_totals(db):
+    """Тест выдачи итогов через метрики"""
+    metrics = Metrics(enabled=True)
+    db.query_stats.register_metrics(metrics)
+    with db.query_stats.action('reports'):
+        db.get_all_site_rules()
+
+    text = metrics.render()
+    assert '# TYPE saveconfe_db_queries_total counter' in text
+    assert 'saveconfe_db_queries_total{caller="Database.get_all_site_rules"} 1' in text
+    assert 'saveconfe_db_action_calls_total{action="reports"} 1' in text
+
+
+def test_separate_stats_per_instance():
+    """Тест: без подключения к движку ничего не считается"""
+    stats = QueryStats()
+    with stats.capture() as captured:
+        pass
+    assert captured.count == 0 and stats.by_caller == {}
@@ -0,0 +1,75 @@
+"""
+Тесты облегчённых записей для чтения
+"""
+import pytest
+from datetime import datetime, time
+from core.database import Database
+from models.base import Base
+from models.records import (UserRecord, SiteRuleRecord, AppRuleRecord, UsageLogRecord,
+                            record_from_entity)
+from models.usage_log import ItemType
+from models.user import User, UserRole
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_user_record(db):
+    """Тест: пользователь читается в UserRecord с ролью-перечислением"""
+    db.create_user("child", "hash", role=UserRole.CHILD)
+
+    user = db.get_user_by_username("child")
+    assert isinstance(user, UserRecord)
+    assert user.username == "child" and user.password_hash == "hash"
+    assert user.role is UserRole.CHILD
+    assert db.get_user_by_username("nobody") is None
+
+
+def test_rule_records_map_fields_and_times(db):
+    """Тест: правила читаются с полями по именам, расписание — как time или None"""
+    site = db.add_site_rule("youtube.com", time_limit=30, schedule_start=time(9), schedule_end=time(20, 30))
+    db.add_site_rule("vk.com")
+    app = db.add_app_rule("C:\\Games\\game.exe", "game.exe", 60)
+
+    sites = db.get_all_site_rules()
+    assert sites[0] == site
+    assert sites[0] == SiteRuleRecord(site.id, "youtube.com", 30, time(9), time(20, 30))
+    assert sites[1].schedule_start is None and sites[1].schedule_end is None
+    assert sites[1].time_limit == 0
+
+    apps = db.get_all_app_rules()
+    assert apps == [app]
+    assert isinstance(app, AppRuleRecord)
+    assert (app.app_path, app.app_name, app.time_limit) == ("C:\\Games\\game.exe", "game.exe", 60)
+    assert app.schedule_start is None
+
+
+def test_usage_log_records(db):
+    """Тест: тип элемента — перечисление, незакрытый лог без окончания, порядок от новых"""
+    db.add_usage_log(ItemType.SITE, "youtube.com", start_time=datetime(2024, 1, 1, 10, 0),
+                     end_time=datetime(2024, 1, 1, 10, 45), duration=45.0)
+    db.add_usage_log(ItemType.APP, "game.exe", start_time=datetime(2024, 1, 1, 11, 0))
+
+    opened, closed = db.get_usage_logs()
+    assert isinstance(opened, UsageLogRecord)
+    assert opened.item_type is ItemType.APP and opened.end_time is None
+    assert opened.duration == 0.0
+    assert closed.item_type is ItemType.SITE
+    assert closed.start_time == datetime(2024, 1, 1, 10, 0)
+    assert closed.end_time == datetime(2024, 1, 1, 10, 45)
+    assert db.get_usage_logs_page(limit=1, search="tube") == [closed]
+
+
+def test_record_from_entity():
+    """Тест: запись из ORM-объекта берёт только поля записи"""
+    user = User(id=5, username="admin", password_hash="hash", role=UserRole.ADMIN)
+
+    record = record_from_entity(UserRecord, user)
+    assert record == UserRecord(5, "admin", "hash", UserRole.ADMIN)
+    with pytest.raises(AttributeError):
+        record.username = "other"
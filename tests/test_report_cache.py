@@ -0,0 +1,80 @@
+"""
+Тесты кэша результатов отчётов
+"""
+import numpy as np
+import pytest
+from datetime import datetime
+from core.database import Database
+from core.report_cache import ReportCache
+from core.reports import ReportEngine
+from models.base import Base
+from models.usage_log import ItemType
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 8)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_watermark_and_lru_eviction():
+    """Тест устаревания по отметке и вытеснения по объёму"""
+    cache = ReportCache(max_bytes=2 * 8 * 100)
+    cache.put(('a',), (1,), np.zeros(100))
+    assert cache.get(('a',), (1,)) is not None
+    assert cache.get(('a',), (2,)) is None
+
+    cache.put(('b',), (1,), np.zeros(100))
+    cache.get(('a',), (1,))  # 'a' становится последним использованным
+    cache.put(('c',), (1,), np.zeros(100))
+    assert cache.peek(('b',)) is None
+    assert cache.peek(('a',)) is not None
+    assert cache.size <= cache.max_bytes
+
+
+def test_engine_recomputes_after_new_data(db):
+    """Тест: новые данные в периоде делают запись кэша устаревшей"""
+    engine = ReportEngine(db, cache=ReportCache())
+    db.add_usage_log(ItemType.APP, "a.exe", start_time=datetime(2024, 1, 2, 10),
+                     end_time=datetime(2024, 1, 2, 11), duration=60)
+
+    first = engine.usage_report(START, END, 'day')
+    assert engine.usage_report(START, END, 'day') is first
+    assert engine.cache.hits == 1
+
+    db.add_usage_log(ItemType.APP, "b.exe", start_time=datetime(2024, 1, 3, 10),
+                     end_time=datetime(2024, 1, 3, 10, 30), duration=30)
+    second = engine.usage_report(START, END, 'day')
+    assert second is not first
+    assert second.totals().sum() == pytest.approx(90.0)
+
+
+def test_persistence(tmp_path, db):
+    """Тест сохранения кэша на диск и загрузки при запуске"""
+    path = str(tmp_path / 'cache.json')
+    db.add_usage_log(ItemType.SITE, "example.com", start_time=datetime(2024, 1, 2, 10),
+                     end_time=datetime(2024, 1, 2, 11), duration=60)
+    engine = ReportEngine(db, cache=ReportCache(path=path))
+    report = engine.usage_report(START, END, 'day')
+    heatmap = engine.heatmap(START, END)
+    engine.cache.save()
+
+    restored = ReportEngine(db, cache=ReportCache(path=path))
+    peeked = restored.peek('usage_report', START, END, 'day')
+    assert peeked.items == report.items
+    assert np.array_equal(peeked.bins, report.bins)
+    assert np.array_equal(peeked.minutes, report.minutes)
+    assert np.array_equal(restored.heatmap(START, END), heatmap)
+    assert restored.cache.hits == 1
+
+
+def test_corrupted_file_is_ignored(tmp_path):
+    """Тест: повреждённый файл кэша не мешает запуску"""
+    path = tmp_path / 'cache.json'
+    path.write_text('{not json', encoding='utf-8')
+    assert len(ReportCache(path=str(path))) == 0
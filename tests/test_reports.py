@@ -0,0 +1,102 @@
+"""
+Тесты векторизованных отчётов
+"""
+import csv
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from core.database import Database
+from core.reports import ReportEngine, UsageIntervals, bin_start, distribute, write_report_csv
+from core.rollup import split_by_day
+from models.base import Base
+from models.usage_log import ItemType
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_bin_start():
+    """Тест начала часа, дня и недели"""
+    moment = datetime(2024, 1, 3, 15, 42, 10)  # среда
+    assert bin_start(moment, 'hour') == np.datetime64('2024-01-03T15:00:00')
+    assert bin_start(moment, 'day') == np.datetime64('2024-01-03T00:00:00')
+    assert bin_start(moment, 'week') == np.datetime64('2024-01-01T00:00:00')
+
+
+def test_distribute_matches_split_by_day():
+    """Тест: векторное деление совпадает с построчным"""
+    rng = np.random.default_rng(1)
+    origin = datetime(2024, 1, 1)
+    offsets = rng.integers(0, 10 * 86400, size=500)
+    lengths = rng.integers(0, 3 * 86400, size=500)
+    starts = [origin + timedelta(seconds=int(value)) for value in offsets]
+    ends = [start + timedelta(seconds=int(value)) for start, value in zip(starts, lengths)]
+
+    expected = np.zeros(14)
+    for start, end in zip(starts, ends):
+        for day, minutes in split_by_day(start, end):
+            expected[(day - origin.date()).days] += minutes * 60
+
+    result = distribute(np.array(starts, dtype='datetime64[s]'), np.array(ends, dtype='datetime64[s]'),
+                        np.datetime64(origin, 's'), 86400, 14)
+    assert result[0] == pytest.approx(expected)
+
+
+def test_distribute_groups_and_clipping():
+    """Тест групп и отсечения за пределами периода"""
+    starts = np.array(['2024-01-01T09:30', '2023-12-31T23:00', '2024-01-01T10:00'], dtype='datetime64[s]')
+    ends = np.array(['2024-01-01T12:15', '2024-01-01T01:00', '2024-01-01T10:00'], dtype='datetime64[s]')
+    result = distribute(starts, ends, np.datetime64('2024-01-01T00:00', 's'), 3600, 24,
+                        np.array([0, 1, 1]), 2)
+    assert result[0, 9:13].tolist() == [1800, 3600, 3600, 900]
+    assert result[1, 0] == 3600
+    assert result.sum() == pytest.approx(2.75 * 3600 + 3600)
+
+
+def test_open_logs_end_at_checkpoint():
+    """Тест: незакрытый лог заканчивается на последней контрольной точке"""
+    intervals = UsageIntervals.from_rows([
+        (ItemType.APP, "a.exe", datetime(2024, 1, 1, 10), None, 30.0),
+    ])
+    assert intervals.ends[0] == np.datetime64('2024-01-01T10:30:00')
+
+
+def test_usage_report_from_database(db, tmp_path):
+    """Тест отчёта по дням, тепловой карты и экспорта"""
+    db.add_usage_log(ItemType.APP, "game.exe", start_time=datetime(2024, 1, 1, 23, 0),
+                     end_time=datetime(2024, 1, 2, 1, 0), duration=120)
+    db.add_usage_log(ItemType.SITE, "example.com", start_time=datetime(2024, 1, 2, 10, 0),
+                     end_time=datetime(2024, 1, 2, 10, 30), duration=30)
+
+    engine = ReportEngine(db)
+    report = engine.usage_report(datetime(2024, 1, 1), datetime(2024, 1, 3), 'day')
+    assert report.bin_labels() == ['2024-01-01', '2024-01-02']
+    rows = list(report.rows())
+    assert rows[0][:2] == (ItemType.APP, "game.exe")
+    assert rows[0][2].tolist() == [60.0, 60.0]
+    assert rows[1][3] == pytest.approx(30.0)
+
+    heatmap = engine.heatmap(datetime(2024, 1, 1), datetime(2024, 1, 3))
+    assert heatmap.shape == (7, 24)
+    assert heatmap[0, 23] == pytest.approx(60.0)  # понедельник 23:00
+    assert heatmap[1, 10] == pytest.approx(30.0)
+    assert heatmap.sum() == pytest.approx(150.0)
+
+    path = tmp_path / 'report.csv'
+    write_report_csv(report, str(path))
+    with open(path, encoding='utf-8-sig') as f:
+        lines = list(csv.reader(f))
+    assert lines[0][-1] == 'Итого (мин)'
+    assert lines[1] == ['app', 'game.exe', '60.00', '60.00', '120.00']
+
+
+def test_empty_report(db):
+    """Тест отчёта за период без логов"""
+    report = ReportEngine(db).usage_report(datetime(2024, 1, 1), datetime(2024, 1, 2), 'hour')
+    assert report.minutes.shape == (0, 24)
+    assert list(report.rows()) == []
@@ -0,0 +1,78 @@
+"""
+Тесты для суточной сводки использования
+"""
+import pytest
+from datetime import datetime, date
+from core.database import Database
+from core.rollup import split_by_day
+from core.spool import EVENT_CHECKPOINT, EVENT_END, EVENT_START, SpoolRecord
+from models.base import Base
+from models.usage_log import ItemType
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_split_within_day():
+    """Тест интервала внутри одного дня"""
+    parts = split_by_day(datetime(2024, 1, 1, 10, 0), datetime(2024, 1, 1, 11, 30))
+    assert parts == [(date(2024, 1, 1), 90.0)]
+
+
+def test_split_across_midnight():
+    """Тест интервала, пересекающего полночь"""
+    parts = split_by_day(datetime(2024, 1, 1, 23, 0), datetime(2024, 1, 3, 0, 30))
+    assert parts == [
+        (date(2024, 1, 1), 60.0),
+        (date(2024, 1, 2), 1440.0),
+        (date(2024, 1, 3), 30.0),
+    ]
+
+
+def test_split_empty_interval():
+    """Тест пустого интервала"""
+    moment = datetime(2024, 1, 1, 12, 0)
+    assert split_by_day(moment, moment) == []
+
+
+def test_apply_usage_events_incremental(db):
+    """Тест инкрементального обновления сводки событиями журнала"""
+    key = "0" * 32
+    start = datetime(2024, 1, 1, 23, 30)
+    checkpoint = datetime(2024, 1, 2, 0, 15)
+    db.apply_usage_events("spool", [
+        SpoolRecord(EVENT_START, ItemType.APP, key, "game.exe", start, start, start),
+        SpoolRecord(EVENT_CHECKPOINT, ItemType.APP, key, "game.exe", start, start, checkpoint),
+    ], position=2)
+    db.apply_usage_events("spool", [
+        SpoolRecord(EVENT_END, ItemType.APP, key, "game.exe", start, checkpoint, datetime(2024, 1, 2, 0, 45)),
+    ], position=3)
+
+    rows = {row.date: row for row in db.get_daily_usage(date(2024, 1, 1), date(2024, 1, 2))}
+    assert rows[date(2024, 1, 1)].total_minutes == pytest.approx(30.0)
+    assert rows[date(2024, 1, 1)].sessions == 1
+    assert rows[date(2024, 1, 2)].total_minutes == pytest.approx(45.0)
+    assert rows[date(2024, 1, 2)].sessions == 0
+    assert db.get_spool_offset("spool") == 3
+
+
+def test_rebuild_usage_daily(db):
+    """Тест перестроения сводки из сырых логов"""
+    db.add_usage_log(ItemType.APP, "game.exe", start_time=datetime(2024, 1, 1, 23, 0),
+                     end_time=datetime(2024, 1, 2, 1, 0), duration=120.0)
+    db.add_usage_log(ItemType.APP, "game.exe", start_time=datetime(2024, 1, 2, 10, 0),
+                     end_time=datetime(2024, 1, 2, 10, 30), duration=30.0)
+
+    assert db.rebuild_usage_daily() == 2
+
+    totals = db.get_usage_totals(date(2024, 1, 1), date(2024, 1, 2))
+    assert len(totals) == 1
+    item_type, item_name, minutes, sessions = totals[0]
+    assert item_name == "game.exe"
+    assert minutes == pytest.approx(150.0)
+    assert sessions == 2
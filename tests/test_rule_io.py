@@ -0,0 +1,111 @@
+"""
+Тесты для массового импорта и экспорта правил
+"""
+import pytest
+from core.blocker import Blocker
+from core.database import Database
+from core.rule_io import read_rules, import_rules, export_rules
+from core.rule_repository import RuleRepository
+from models.base import Base
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Хранилище правил поверх SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    repository = RuleRepository(database)
+    repository.load()
+    return repository
+
+
+def test_read_domain_list_dedupes(tmp_path):
+    """Тест нормализации и дедупликации списка доменов"""
+    path = tmp_path / "sites.txt"
+    path.write_text(
+        "# комментарий\n"
+        "https://www.youtube.com/watch\n"
+        "youtube.com\n"
+        "HTTPS://WWW.YouTube.COM\n"
+        "0.0.0.0 facebook.com twitter.com\n"
+        "\n",
+        encoding='utf-8'
+    )
+
+    sites, apps, skipped = read_rules(path)
+    assert sorted(site['url'] for site in sites) == ["facebook.com", "twitter.com", "youtube.com"]
+    assert apps == []
+    assert skipped == 0
+
+
+def test_read_jsonl_skips_bad_lines(tmp_path):
+    """Тест, что битые строки JSON Lines пропускаются, а не прерывают чтение"""
+    path = tmp_path / "rules.jsonl"
+    path.write_text(
+        '"youtube.com"\n'
+        '{"type": 5, "url": "vk.com"}\n'
+        '{"type": "site", "url": \n'
+        '{"type": "site", "url": "ok.ru"}\n',
+        encoding='utf-8'
+    )
+
+    sites, apps, skipped = read_rules(path)
+    assert [site['url'] for site in sites] == ["youtube.com", "ok.ru"]
+    assert apps == []
+    assert skipped == 2
+
+
+def test_import_upserts_duplicates(repository, tmp_path):
+    """Тест, что повтор существующего URL обновляет правило, а не прерывает импорт"""
+    repository.add_site("youtube.com")
+
+    path = tmp_path / "rules.csv"
+    path.write_text(
+        "type,url,app_path,app_name,time_limit,schedule_start,schedule_end\n"
+        "site,youtube.com,,,30,09:00,20:00\n"
+        "site,vk.com,,,0,,\n"
+        "app,,C:\\Games\\game.exe,,60,,\n",
+        encoding='utf-8'
+    )
+
+    result = import_rules(repository, path)
+    assert result['sites'] == 2
+    assert result['apps'] == 1
+    assert (result['added_sites'], result['updated_sites']) == (1, 1)
+    assert (result['added_apps'], result['updated_apps']) == (1, 0)
+
+    sites = {rule.url: rule for rule in repository.get_site_rules()}
+    assert set(sites) == {"youtube.com", "vk.com"}
+    assert sites["youtube.com"].time_limit == 30
+    assert repository.get_app_rules()[0].app_name == "game.exe"
+
+
+def test_export_roundtrip(repository, tmp_path):
+    """Тест экспорта и повторного чтения правил"""
+    repository.add_site("youtube.com", time_limit=15)
+    repository.add_app("C:\\Games\\game.exe", "game.exe")
+
+    path = tmp_path / "rules.json"
+    assert export_rules(repository, path) == 2
+
+    sites, apps, skipped = read_rules(path)
+    assert sites[0]['url'] == "youtube.com"
+    assert sites[0]['time_limit'] == 15
+    assert apps[0]['app_name'] == "game.exe"
+
+
+def test_update_hosts_single_write(tmp_path):
+    """Тест пакетного изменения hosts файла"""
+    hosts = tmp_path / "hosts"
+    hosts.write_text("127.0.0.1 localhost\n", encoding='utf-8')
+    blocker = Blocker()
+    blocker.hosts_path = hosts
+
+    assert blocker.update_hosts(["a.com", "b.com"], []) == []
+    assert blocker.update_hosts([], ["a.com"]) == []
+
+    content = hosts.read_text(encoding='utf-8')
+    assert "localhost" in content
+    assert "b.com" in content
+    assert "a.com" not in content
+    assert blocker.blocked_sites == {"b.com"}
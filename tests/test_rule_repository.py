@@ -0,0 +1,85 @@
+"""
+Тесты для хранилища правил
+"""
+import pytest
+from datetime import time
+from core.database import Database
+from core.rule_repository import RuleRepository
+from core.scheduler import Scheduler
+from models.base import Base
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_add_delete_notifies_deltas(db):
+    """Тест инкрементальных изменений и уведомлений"""
+    repository = RuleRepository(db)
+    deltas = []
+    repository.subscribe(deltas.append)
+    repository.load()
+
+    site = repository.add_site("youtube.com", time_limit=30)
+    app = repository.add_app("C:\\Games\\game.exe", "game.exe")
+    assert [rule.url for rule in repository.get_site_rules()] == ["youtube.com"]
+    assert deltas[-2].added_sites == [site]
+    assert deltas[-1].added_apps == [app]
+
+    repository.delete_site(site.id)
+    assert repository.get_site_rules() == []
+    assert [rule.url for rule in deltas[-1].removed_sites] == ["youtube.com"]
+
+    # Версия растёт монотонно
+    versions = [delta.version for delta in deltas]
+    assert versions == sorted(versions)
+
+
+def test_poll_detects_external_change(db):
+    """Тест обнаружения внешних изменений по rules_version"""
+    repository = RuleRepository(db)
+    repository.load()
+    assert not repository.poll()
+
+    deltas = []
+    repository.subscribe(deltas.append)
+
+    # Изменение из другого процесса (например, агента)
+    db.add_site_rule("facebook.com")
+    assert repository.poll()
+    assert [rule.url for rule in deltas[-1].added_sites] == ["facebook.com"]
+    assert not repository.poll()
+
+
+def test_own_write_does_not_reload(db):
+    """Тест, что собственная запись не вызывает полной перезагрузки"""
+    repository = RuleRepository(db)
+    repository.load()
+    repository.add_site("twitter.com")
+    assert repository.db_version == db.get_rules_version()
+    assert not repository.poll()
+
+
+def test_scheduler_keeps_rules_with_shared_name(db):
+    """Тест: удаление одного из правил с общим названием не снимает ограничения другого"""
+    repository = RuleRepository(db)
+    scheduler = Scheduler()
+    repository.subscribe(scheduler.apply_rule_delta)
+    repository.load()
+
+    first = repository.add_app("C:\\Games\\game.exe", "game.exe", time_limit=30)
+    second = repository.add_app("D:\\Portable\\game.exe", "game.exe",
+                                schedule_start=time(9), schedule_end=time(21))
+    assert scheduler.get_time_limit("game.exe") == 30
+    assert scheduler.schedules["game.exe"] == (time(9), time(21))
+
+    repository.delete_app(first.id)
+    assert scheduler.get_time_limit("game.exe") == 0
+    assert scheduler.schedules["game.exe"] == (time(9), time(21))
+
+    repository.delete_app(second.id)
+    assert "game.exe" not in scheduler.schedules
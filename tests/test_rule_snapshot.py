@@ -0,0 +1,105 @@
+"""
+Тесты локального снимка правил
+"""
+import json
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from core.agent import Agent
+from core.database import Database
+from core.rule_snapshot import RuleSnapshotStore
+from core.rule_repository import RuleRepository
+from core.scheduler import Scheduler
+from models.base import Base
+from models.records import SiteRuleRecord, AppRuleRecord
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def test_snapshot_round_trip(db, tmp_path):
+    """Тест сохранения и загрузки правил, расписаний и счётчиков"""
+    rules = RuleRepository(db)
+    rules.add_site("example.com", 20)
+    rules.add_app("c:\\games\\game.exe", "game.exe", 30, time(9, 0), time(18, 30))
+    scheduler = Scheduler()
+    scheduler.add_used_time("game.exe", 12.5)
+
+    store = RuleSnapshotStore(str(tmp_path / 'rules.json'))
+    store.save(rules, scheduler.used_time)
+    snapshot = store.load()
+
+    assert snapshot.db_version == rules.db_version
+    assert snapshot.sites == rules.get_site_rules()
+    assert snapshot.apps == rules.get_app_rules()
+    assert snapshot.apps[0].schedule_end == time(18, 30)
+    assert snapshot.used_time_for(datetime.now().date()) == {"game.exe": 12.5}
+    assert snapshot.used_time_for(datetime.now().date() + timedelta(days=1)) == {}
+
+
+def test_unusable_snapshot_is_ignored(tmp_path):
+    """Тест: повреждённый снимок и снимок другой версии формата не загружаются"""
+    path = tmp_path / 'rules.json'
+    store = RuleSnapshotStore(str(path))
+    assert store.load() is None
+    path.write_text('{"format": 1, "sites": [', encoding='utf-8')
+    assert store.load() is None
+    path.write_text(json.dumps({"format": 99}), encoding='utf-8')
+    assert store.load() is None
+
+
+def test_agent_enforces_from_snapshot_without_database(tmp_path, monkeypatch):
+    """Тест: агент включает блокировку по снимку, когда база недоступна"""
+    monkeypatch.chdir(tmp_path)
+    store = RuleSnapshotStore(str(tmp_path / 'rules.json'))
+    rules = RuleRepository(database=None)
+    rules.restore([SiteRuleRecord(1, "example.com", 0, None, None)],
+                  [AppRuleRecord(2, "c:\\games\\game.exe", "game.exe", 30, None, None)])
+    scheduler = Scheduler()
+    scheduler.add_used_time("game.exe", 10.0)
+    store.save(rules, scheduler.used_time)
+
+    unreachable = Database(f"sqlite:///{tmp_path / 'missing' / 'test.db'}")
+    agent = Agent(unreachable, pid_file=str(tmp_path / 'agent.pid'), ipc_address=None,
+                  snapshot_path=store.path)
+    agent.start()
+    try:
+        assert agent.blocker.is_blocking_enabled
+        assert "c:\\games\\game.exe" in agent.blocker.blocked_apps
+        assert agent.scheduler.get_remaining_time("game.exe") == 20.0
+        assert agent.monitor.is_monitoring
+    finally:
+        agent.shutdown()
+
+
+def test_reconcile_notifies_only_difference(db, tmp_path, monkeypatch):
+    """Тест: сверка снимка с базой передаёт подписчикам только разницу"""
+    monkeypatch.chdir(tmp_path)
+    kept = db.add_app_rule("c:\\games\\game.exe", "game.exe", 30)
+    stale = SiteRuleRecord(999, "removed.com", 0, None, None)
+    rules = RuleRepository(db)
+    rules.restore([stale], [kept])
+    store = RuleSnapshotStore(str(tmp_path / 'rules.json'))
+    store.save(rules, {})
+    added = db.add_site_rule("new.com")
+
+    agent = Agent(db, pid_file=str(tmp_path / 'agent.pid'), ipc_address=None, snapshot_path=store.path)
+    agent.start()
+    deltas = []
+    agent.rules.subscribe(deltas.append)
+    try:
+        assert agent.rules.poll()
+    finally:
+        agent.shutdown()
+
+    assert len(deltas) == 1
+    assert deltas[0].added_sites == [added] and deltas[0].removed_sites == [stale]
+    assert deltas[0].added_apps == [] and deltas[0].removed_apps == []
+    # После сверки снимок сохраняется с версией базы
+    assert store.load().db_version == db.get_rules_version()
@@ -0,0 +1,65 @@
+"""
+Тесты колоночного журнала отсчётов
+"""
+import pytest
+from datetime import datetime, date, timedelta
+import core.samples
+from core.samples import SampleJournal, SampleReader
+
+
+def test_append_and_hourly_usage(tmp_path, monkeypatch):
+    """Тест записи с расширением файлов и почасовой сводки"""
+    monkeypatch.setattr(core.samples, 'CHUNK_ROWS', 4)
+    journal = SampleJournal(str(tmp_path))
+    moment = datetime(2024, 1, 1, 10, 0)
+    for _ in range(12):
+        moment += timedelta(seconds=5)
+        journal.append(moment, [1, 2], [1, 3], [0.5, 1.0], [5.0, 5.0])
+    journal.close()
+
+    reader = SampleReader(str(tmp_path))
+    samples = reader.load_day(date(2024, 1, 1))
+    assert len(samples['timestamp']) == 24
+    assert samples['pid_count'].tolist()[:2] == [1, 3]
+
+    rule_ids, minutes = reader.hourly_usage(date(2024, 1, 1), date(2024, 1, 1))
+    assert rule_ids.tolist() == [1, 2]
+    assert minutes[:, 10].tolist() == [1.0, 1.0]
+    assert minutes.sum() == pytest.approx(2.0)
+    assert reader.cpu_by_rule(date(2024, 1, 1), date(2024, 1, 1)) == {1: 6.0, 2: 12.0}
+
+
+def test_daily_rotation_and_reopen(tmp_path):
+    """Тест смены дня и дозаписи после перезапуска"""
+    journal = SampleJournal(str(tmp_path))
+    journal.append(datetime(2024, 1, 1, 23, 59, 58), [1], [1], [0.0], [5.0])
+    journal.append(datetime(2024, 1, 2, 0, 0, 3), [1], [1], [0.0], [5.0])
+    journal.close()
+    SampleJournal(str(tmp_path)).append(datetime(2024, 1, 2, 0, 0, 8), [1], [1], [0.0], [5.0])
+
+    reader = SampleReader(str(tmp_path))
+    assert reader.days() == [date(2024, 1, 1), date(2024, 1, 2)]
+    assert len(reader.load_day(date(2024, 1, 2))['timestamp']) == 2
+
+    heatmap = reader.minute_heatmap(date(2024, 1, 1))
+    assert heatmap.shape == (1440,)
+    assert heatmap[-1] == pytest.approx(5.0 / 60)
+    times, counts = reader.concurrency_timeline(date(2024, 1, 2))
+    assert counts.tolist() == [1, 1]
+
+
+def test_prune(tmp_path):
+    """Тест удаления старых дней"""
+    journal = SampleJournal(str(tmp_path))
+    journal.append(datetime(2020, 1, 1, 12, 0), [1], [1], [0.0], [5.0])
+    journal.append(datetime.now(), [1], [1], [0.0], [5.0])
+    assert journal.prune(keep_days=30) == 1
+    assert SampleReader(str(tmp_path)).days() == [date.today()]
+
+
+def test_empty_period(tmp_path):
+    """Тест чтения периода без отсчётов"""
+    reader = SampleReader(str(tmp_path / 'missing'))
+    rule_ids, minutes = reader.hourly_usage(date(2024, 1, 1), date(2024, 1, 31))
+    assert len(rule_ids) == 0
+    assert minutes.shape == (0, 24)
@@ -0,0 +1,106 @@
+"""
+Тесты моделирования монитора в виртуальном времени
+"""
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from core.clock import VirtualClock
+from core.simulation import AppRule, FakeProcessSource, Simulation, random_timeline, session
+
+GAME = r"C:\Games\game.exe"
+BROWSER = r"C:\Apps\browser.exe"
+INTERVAL = 5
+
+
+def _assert_accounting(report, interval: float = INTERVAL):
+    """Сводка в базе отличается от фактического времени не больше чем на проверку за запуск"""
+    for key, error in report.accounting_errors().items():
+        assert abs(error) * 60 <= report.sessions.get(key, 1) * interval + 1e-6, key
+
+
+def test_fake_source_follows_virtual_clock():
+    """Тест: процессы появляются и завершаются по виртуальному времени"""
+    clock = VirtualClock(datetime(2024, 3, 4, 10, 0))
+    source = FakeProcessSource(clock, [session(GAME, datetime(2024, 3, 4, 10, 1), 30)])
+    assert source.process_iter() == []
+
+    clock.advance(90)
+    process, = source.process_iter()
+    assert process.info['name'] == 'game.exe'
+    assert source.terminate(process.pid)
+    assert process.killed_at == datetime(2024, 3, 4, 10, 1, 30)
+    assert source.process_iter() == []
+    assert not source.terminate(process.pid)
+    with pytest.raises(ValueError):
+        clock.set(datetime(2024, 3, 4, 9, 0))
+
+
+def test_limit_enforced_within_one_check(tmp_path):
+    """Тест: процесс завершается не позже чем через проверку после исчерпания лимита"""
+    start = datetime(2024, 3, 4, 10, 0, 2)
+    simulation = Simulation(str(tmp_path), [AppRule(GAME, time_limit=60)],
+                            [session(GAME, start, 180)], datetime(2024, 3, 4, 9, 0))
+    report = simulation.run(datetime(2024, 3, 4, 14, 0))
+
+    enforcement, = report.enforcements
+    assert enforcement.due == start + timedelta(minutes=60)
+    assert enforcement.killed_at is not None
+    assert 0 <= enforcement.latency <= INTERVAL
+    assert report.unexpected_kills == []
+    _assert_accounting(report)
+
+
+def test_schedule_closes_running_session(tmp_path):
+    """Тест: сессия, начатая в разрешённое время, завершается в конце расписания"""
+    simulation = Simulation(str(tmp_path), [AppRule(GAME, schedule=(time(9), time(21)))],
+                            [session(GAME, datetime(2024, 3, 4, 20, 30), 120),
+                             session(GAME, datetime(2024, 3, 4, 22, 0), 10)],
+                            datetime(2024, 3, 4, 20, 0))
+    report = simulation.run(datetime(2024, 3, 5, 0, 0))
+
+    late, outside = report.enforcements
+    assert late.due.time() > time(21) and 0 <= late.latency <= INTERVAL
+    assert outside.due == datetime(2024, 3, 4, 22, 0) and 0 <= outside.latency <= INTERVAL
+
+
+def test_three_hours_across_midnight(tmp_path):
+    """Тест: 20 запусков за 3 часа через полночь, лимит 2 часа в день"""
+    timeline = random_timeline([GAME], datetime(2024, 3, 4, 22, 30), hours=3, launches=20,
+                               mean_minutes=12, seed=7)
+    simulation = Simulation(str(tmp_path), [AppRule(GAME, time_limit=120)], timeline,
+                            datetime(2024, 3, 4, 22, 0))
+    report = simulation.run(datetime(2024, 3, 5, 3, 0))
+
+    days = {day for day, _ in report.expected_minutes}
+    assert days == {datetime(2024, 3, 4).date(), datetime(2024, 3, 5).date()}
+    _assert_accounting(report)
+    # Время до полуночи не уменьшает лимит следующего дня
+    assert report.recorded_minutes[(datetime(2024, 3, 5).date(), 'game.exe')] <= 120 + INTERVAL / 60 * 20
+    assert report.unexpected_kills == []
+    assert report.max_latency <= INTERVAL
+    # Запись в базу — по событиям сессий и контрольным точкам, а не на каждой проверке
+    assert report.db_writes < report.ticks / 2
+
+
+def test_random_day_is_reproducible(tmp_path):
+    """Тест: один seed — одинаковый результат; блокировка завершает всё за проверку"""
+    rules = [AppRule(GAME, time_limit=90, schedule=(time(8), time(22))), AppRule(BROWSER)]
+    reports = []
+    for run in range(2):
+        timeline = random_timeline([GAME, BROWSER], datetime(2024, 3, 4), launches=20, seed=3)
+        simulation = Simulation(str(tmp_path / str(run)), rules, timeline, datetime(2024, 3, 4))
+        reports.append(simulation.run(datetime(2024, 3, 5)))
+    first, second = reports
+    assert first.simulated_seconds == 24 * 3600
+    assert first.recorded_minutes == second.recorded_minutes
+    assert first.enforcements == second.enforcements
+    _assert_accounting(first)
+    assert first.max_latency <= INTERVAL
+
+    timeline = random_timeline([GAME, BROWSER], datetime(2024, 3, 4), launches=20, seed=3)
+    blocked = Simulation(str(tmp_path / 'blocked'), rules, timeline, datetime(2024, 3, 4),
+                         blocking=True).run(datetime(2024, 3, 5))
+    assert len(blocked.enforcements) == 20
+    assert all(item.killed_at is not None for item in blocked.enforcements)
+    assert blocked.max_latency <= INTERVAL
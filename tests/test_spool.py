@@ -0,0 +1,97 @@
+"""
+Тесты локального журнала событий и его переноса в базу данных
+"""
+import pytest
+from datetime import datetime, date
+from core.database import Database
+from core.spool import UsageSpool, SpoolReplayer, EVENT_START, EVENT_CHECKPOINT, EVENT_END, RECORD
+from models.base import Base
+from models.usage_log import ItemType
+
+KEY = "0123456789abcdef0123456789abcdef"
+START = datetime(2024, 1, 1, 10, 0)
+CHECKPOINT = datetime(2024, 1, 1, 10, 30)
+END = datetime(2024, 1, 1, 10, 45)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite во временном каталоге"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    return database
+
+
+def _write_session(spool):
+    """Запись одной сессии: начало, контрольная точка, завершение"""
+    spool.append(EVENT_START, ItemType.APP, KEY, "game.exe", START, START, START)
+    spool.append(EVENT_CHECKPOINT, ItemType.APP, KEY, "game.exe", START, START, CHECKPOINT)
+    spool.append(EVENT_END, ItemType.APP, KEY, "game.exe", START, CHECKPOINT, END)
+    spool.flush()
+
+
+def test_round_trip(tmp_path):
+    """Тест записи и чтения событий"""
+    spool = UsageSpool(str(tmp_path / 'usage.spool'))
+    _write_session(spool)
+
+    records, offset = spool.read(0)
+    assert [record.kind for record in records] == [EVENT_START, EVENT_CHECKPOINT, EVENT_END]
+    assert records[2].item_name == "game.exe"
+    assert records[2].session_key == KEY
+    assert records[2].duration == pytest.approx(45.0)
+    assert spool.read(offset) == ([], offset)
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    """Тест: недописанная запись после сбоя отбрасывается"""
+    path = tmp_path / 'usage.spool'
+    spool = UsageSpool(str(path))
+    _write_session(spool)
+    spool.close()
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (RECORD.size // 2))
+
+    records, _ = UsageSpool(str(path)).read(0)
+    assert len(records) == 3
+
+
+def test_replay_is_idempotent(tmp_path, db):
+    """Тест: повторный перенос не дублирует логи и сводку"""
+    path = str(tmp_path / 'usage.spool')
+    spool = UsageSpool(path)
+    _write_session(spool)
+
+    assert SpoolReplayer(spool, db, compact_size=10 ** 9).replay() == 3
+    # Перезапуск: тот же файл, отметка переноса уже в базе
+    assert SpoolReplayer(UsageSpool(path), db, compact_size=10 ** 9).replay() == 0
+
+    logs = db.get_usage_logs()
+    assert len(logs) == 1
+    assert logs[0].end_time == END
+    assert logs[0].duration == pytest.approx(45.0)
+    row, = db.get_daily_usage(date(2024, 1, 1), date(2024, 1, 1))
+    assert row.total_minutes == pytest.approx(45.0)
+    assert row.sessions == 1
+
+
+def test_replay_in_batches(tmp_path, db):
+    """Тест переноса несколькими транзакциями"""
+    spool = UsageSpool(str(tmp_path / 'usage.spool'))
+    _write_session(spool)
+
+    assert SpoolReplayer(spool, db, batch_size=2, compact_size=10 ** 9).replay() == 3
+    row, = db.get_daily_usage(date(2024, 1, 1), date(2024, 1, 1))
+    assert row.total_minutes == pytest.approx(45.0)
+
+
+def test_drained_spool_is_reset(tmp_path, db):
+    """Тест очистки полностью перенесённого журнала"""
+    spool = UsageSpool(str(tmp_path / 'usage.spool'))
+    _write_session(spool)
+    old_id = spool.spool_id
+
+    SpoolReplayer(spool, db, compact_size=0).replay()
+    assert spool.spool_id != old_id
+    assert spool.read(0)[0] == []
+    assert db.get_spool_offset(old_id) == 0
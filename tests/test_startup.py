@@ -0,0 +1,40 @@
+"""
+Тесты замера времени запуска
+"""
+import builtins
+import sys
+
+from core.startup import StartupProfiler
+
+
+def test_profiler_records_phases_and_imports(monkeypatch):
+    """Тест: этапы, отметки и первый импорт модуля попадают в отчёт"""
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    original = builtins.__import__
+    profiler = StartupProfiler(enabled=True)
+    profiler.install_import_timer()
+    try:
+        with profiler.phase("init"):
+            import colorsys  # noqa: F401
+        profiler.mark("shown")
+    finally:
+        profiler.uninstall_import_timer()
+
+    assert builtins.__import__ is original
+    assert [name for name, _ in profiler.phases] == ["init"]
+    assert [name for name, _ in profiler.marks] == ["shown"]
+    assert "colorsys" in profiler.imports
+    report = profiler.report()
+    assert "init" in report and "shown" in report and "colorsys" in report
+
+
+def test_disabled_profiler_does_nothing():
+    """Тест: выключенный профилировщик не подменяет импорт и не копит замеры"""
+    original = builtins.__import__
+    profiler = StartupProfiler()
+    profiler.install_import_timer()
+    with profiler.phase("init"):
+        pass
+    profiler.mark("shown")
+    assert builtins.__import__ is original
+    assert profiler.phases == [] and profiler.marks == []
@@ -0,0 +1,109 @@
+"""
+Тесты моделей таблиц и постраничного чтения логов
+"""
+import os
+from datetime import datetime, timedelta
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from core.database import Database
+from models.base import Base
+from models.records import SiteRuleRecord
+from models.usage_log import UsageLog, ItemType
+from ui.table_models import UsageLogTableModel, SiteRuleTableModel
+
+
+@pytest.fixture
+def db(tmp_path):
+    """База данных SQLite с логами использования"""
+    database = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(database.engine)
+    start = datetime(2024, 1, 1, 10, 0)
+    session = database.get_session()
+    try:
+        session.add_all(
+            UsageLog(item_type=ItemType.APP, item_name=f"app{i % 7}.exe",
+                     start_time=start + timedelta(minutes=i // 3),
+                     end_time=None if i % 10 == 0 else start + timedelta(minutes=i // 3 + 5),
+                     duration=float(i % 5))
+            for i in range(95)
+        )
+        session.commit()
+    finally:
+        session.close()
+    return database
+
+
+def _all_pages(db, **kwargs):
+    """Все логи, прочитанные страницами по ключу последней строки"""
+    rows, after = [], None
+    while True:
+        page = db.get_usage_logs_page(limit=10, after=after, **kwargs)
+        rows.extend(page)
+        if len(page) < 10:
+            return rows
+        last = page[-1]
+        column = kwargs.get('sort_column', 'start_time')
+        value = last.end_time or last.start_time if column == 'end_time' else getattr(last, column)
+        after = (value, last.id)
+
+
+@pytest.mark.parametrize("column", ['start_time', 'end_time', 'duration', 'item_name'])
+def test_keyset_pages_cover_all_rows(db, column):
+    """Тест: страницы с равными значениями сортировки не теряют и не повторяют строки"""
+    for descending in (True, False):
+        rows = _all_pages(db, sort_column=column, descending=descending)
+        assert len(rows) == 95
+        assert len({row.id for row in rows}) == 95
+
+
+def test_search_escapes_wildcards(db):
+    """Тест фильтра по названию"""
+    assert len(_all_pages(db, search="app3")) == len([i for i in range(95) if i % 7 == 3])
+    assert _all_pages(db, search="app%") == []
+
+
+def test_usage_log_model_fetches_lazily(db):
+    """Тест постраничной подгрузки и сортировки в модели"""
+    model = UsageLogTableModel(db, page_size=20)
+    model.refresh()
+    assert model.rowCount() == 20
+    assert model.canFetchMore()
+
+    while model.canFetchMore():
+        model.fetchMore()
+    assert model.rowCount() == 95
+
+    model.sort(4, QtCore.Qt.SortOrder.AscendingOrder)
+    assert model.rowCount() == 20
+    assert model.record(0).duration == 0.0
+
+    model.set_filter("app1")
+    while model.canFetchMore():
+        model.fetchMore()
+    assert {model.record(row).item_name for row in range(model.rowCount())} == {"app1.exe"}
+
+
+def test_rule_model_applies_delta():
+    """Тест инкрементального изменения строк модели правил"""
+    rules = [SiteRuleRecord(i, f"site{i}.com", 0, None, None) for i in range(1, 4)]
+    model = SiteRuleTableModel()
+    model.set_rules(rules)
+
+    removed = []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.apply_delta([SiteRuleRecord(9, "new.com", 30, None, None)], [rules[1]])
+
+    assert removed == [(1, 1)]
+    assert [model.rule_at(row).id for row in range(model.rowCount())] == [1, 3, 9]
+    model.sort(2, QtCore.Qt.SortOrder.DescendingOrder)
+    assert model.rule_at(0).url == "new.com"
+
+    # Добавленные правила встают на место по выбранной сортировке
+    model.sort(1, QtCore.Qt.SortOrder.AscendingOrder)
+    model.apply_delta([SiteRuleRecord(10, "a.com", 0, None, None),
+                       SiteRuleRecord(11, "site2.com", 5, None, None)], [])
+    assert [model.rule_at(row).url for row in range(model.rowCount())] == \
+        ["a.com", "new.com", "site1.com", "site2.com", "site3.com"]
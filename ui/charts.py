@@ -0,0 +1,234 @@
+"""
+Графики использования на вкладке отчётов
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from PyQt6.QtCore import Qt, QPointF, QRectF, QTimer
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox
+
+from core.charts import ChartDataSource, StackedSeries, LineSeries
+from core.reports import WEEKDAY_LABELS, period_for
+
+logger = logging.getLogger(__name__)
+
+# Цвета рядов графика с накоплением
+PALETTE = ['#2196F3', '#4CAF50', '#FF9800', '#9C27B0', '#F44336',
+           '#00BCD4', '#795548', '#607D8B', '#BDBDBD']
+
+_MARGIN_LEFT = 48
+_MARGIN_BOTTOM = 22
+_MARGIN_TOP = 8
+
+
+class _ChartWidget(QWidget):
+    """Основа графика: область рисования и подпись при отсутствии данных"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(160)
+        self._data = None
+
+    def plot_width(self) -> int:
+        """Ширина области графика в пикселях (для выбора разрешения данных)"""
+        return max(1, self.width() - _MARGIN_LEFT - 8)
+
+    def set_data(self, data):
+        """Замена данных и перерисовка"""
+        self._data = data
+        self.update()
+
+    def _plot_rect(self) -> QRectF:
+        return QRectF(_MARGIN_LEFT, _MARGIN_TOP, self.plot_width(),
+                      max(1, self.height() - _MARGIN_TOP - _MARGIN_BOTTOM))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if self._data is None:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Нет данных")
+            return
+        self._paint(painter, self._plot_rect())
+
+    def _paint(self, painter: QPainter, rect: QRectF):
+        raise NotImplementedError
+
+    @staticmethod
+    def _paint_axis(painter: QPainter, rect: QRectF, peak: float, unit: str):
+        """Ось значений с подписью максимума"""
+        painter.setPen(QPen(QColor('#9E9E9E')))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        painter.drawLine(rect.bottomLeft(), rect.topLeft())
+        painter.drawText(QRectF(0, rect.top() - 4, _MARGIN_LEFT - 4, 16),
+                         Qt.AlignmentFlag.AlignRight, f"{peak:.0f} {unit}")
+
+
+class StackedBarChart(_ChartWidget):
+    """Столбцы с накоплением: минуты элементов по интервалам"""
+
+    def _paint(self, painter: QPainter, rect: QRectF):
+        series: StackedSeries = self._data
+        n_bins = len(series.labels)
+        stacked = np.cumsum(series.minutes, axis=0)
+        peak = float(stacked[-1].max()) if len(series.names) and n_bins else 0.0
+        self._paint_axis(painter, rect, peak, "мин")
+        if peak <= 0:
+            return
+
+        step = rect.width() / n_bins
+        scale = rect.height() / peak
+        painter.setPen(Qt.PenStyle.NoPen)
+        for row in range(len(series.names)):
+            painter.setBrush(QColor(PALETTE[row % len(PALETTE)]))
+            tops = stacked[row]
+            bottoms = stacked[row - 1] if row else np.zeros(n_bins)
+            for column in np.flatnonzero(tops > bottoms):
+                painter.drawRect(QRectF(rect.left() + column * step + 1, rect.bottom() - tops[column] * scale,
+                                        max(1.0, step - 2), (tops[column] - bottoms[column]) * scale))
+
+        # Подписи интервалов не чаще одной на 60 пикселей
+        painter.setPen(QPen(QColor('#616161')))
+        every = max(1, int(np.ceil(60 / step)))
+        for column in range(0, n_bins, every):
+            painter.drawText(QRectF(rect.left() + column * step, rect.bottom() + 2, 60, 16),
+                             Qt.AlignmentFlag.AlignLeft, series.labels[column][-5:])
+
+        # Легенда
+        x = rect.left() + 4
+        for row, name in enumerate(series.names):
+            painter.fillRect(QRectF(x, rect.top(), 10, 10), QColor(PALETTE[row % len(PALETTE)]))
+            painter.drawText(QPointF(x + 14, rect.top() + 10), name)
+            x += 24 + painter.fontMetrics().horizontalAdvance(name)
+
+
+class HeatmapChart(_ChartWidget):
+    """Тепловая карта: дни недели × часы суток"""
+
+    def _paint(self, painter: QPainter, rect: QRectF):
+        heatmap: np.ndarray = self._data
+        peak = float(heatmap.max()) or 1.0
+        cell_w = rect.width() / 24
+        cell_h = rect.height() / 7
+        painter.setPen(QPen(QColor('#616161')))
+        for row, label in enumerate(WEEKDAY_LABELS):
+            painter.drawText(QRectF(0, rect.top() + row * cell_h, _MARGIN_LEFT - 4, cell_h),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, label)
+            for hour in range(24):
+                painter.fillRect(QRectF(rect.left() + hour * cell_w, rect.top() + row * cell_h,
+                                        cell_w - 1, cell_h - 1),
+                                 QColor(33, 150, 243, int(20 + 220 * heatmap[row, hour] / peak)))
+        for hour in range(0, 24, 3):
+            painter.drawText(QRectF(rect.left() + hour * cell_w, rect.bottom() + 2, 40, 16),
+                             Qt.AlignmentFlag.AlignLeft, f"{hour:02d}")
+
+
+class LineChart(_ChartWidget):
+    """Линейный график прореженного поминутного ряда"""
+
+    def _paint(self, painter: QPainter, rect: QRectF):
+        series: LineSeries = self._data
+        if len(series.x) < 2:
+            return
+        peak = float(series.y.max()) or 1.0
+        self._paint_axis(painter, rect, peak, "прил.")
+        x0, span = series.x[0], (series.x[-1] - series.x[0]) or 1.0
+        xs = rect.left() + (series.x - x0) / span * rect.width()
+        ys = rect.bottom() - series.y / peak * rect.height()
+        painter.setPen(QPen(QColor('#2196F3'), 1.5))
+        painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())]))
+
+        painter.setPen(QPen(QColor('#616161')))
+        first = datetime.fromtimestamp(series.x[0])
+        last = datetime.fromtimestamp(series.x[-1])
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 2, 120, 16), Qt.AlignmentFlag.AlignLeft,
+                         f"{first:%d.%m}")
+        painter.drawText(QRectF(rect.right() - 120, rect.bottom() + 2, 120, 16), Qt.AlignmentFlag.AlignRight,
+                         f"{last:%d.%m}")
+
+
+class ChartsPanel(QWidget):
+    """
+    Панель графиков использования
+
+    Данные запрашиваются через DbExecutor под текущую ширину графиков;
+    после изменения размера окна запрос повторяется с задержкой,
+    чтобы не строить данные на каждом шаге перетаскивания.
+    """
+
+    PERIODS = [("7 дней", 7), ("8 недель", 56), ("90 дней", 90)]
+
+    def __init__(self, source: ChartDataSource, executor, parent=None):
+        """
+        Инициализация панели
+
+        Args:
+            source: Источник данных графиков
+            executor: DbExecutor для загрузки данных вне GUI-потока
+            parent: Родительский виджет
+        """
+        super().__init__(parent)
+        self.source = source
+        self.executor = executor
+        self._requested_width = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Период:"))
+        self.period_combo = QComboBox()
+        for label, days in self.PERIODS:
+            self.period_combo.addItem(label, days)
+        self.period_combo.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.period_combo)
+        controls.addStretch()
+        self.status_label = QLabel("")
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+
+        self.bars = StackedBarChart()
+        self.heatmap = HeatmapChart()
+        self.line = LineChart()
+        layout.addWidget(QLabel("Использование по интервалам"))
+        layout.addWidget(self.bars, 2)
+        layout.addWidget(QLabel("По дням недели и часам"))
+        layout.addWidget(self.heatmap, 1)
+        layout.addWidget(QLabel("Одновременно запущено приложений"))
+        layout.addWidget(self.line, 1)
+
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(300)
+        self._resize_timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        """Запрос данных графиков для текущего периода и ширины"""
+        days = self.period_combo.currentData()
+        _, end = period_for('day')
+        start = end - timedelta(days=days)
+        width = self.bars.plot_width()
+        self._requested_width = width
+        self.executor.submit('charts', self._load, start, end, width,
+                             callback=self._on_loaded,
+                             errback=lambda e: logger.error(f"Ошибка загрузки графиков: {e}"))
+
+    def _load(self, start: datetime, end: datetime, width: int) -> tuple:
+        """Загрузка данных всех графиков (выполняется в пуле потоков)"""
+        last_day = (end - timedelta(days=1)).date()
+        return (self.source.stacked_usage(start, end, width),
+                self.source.heatmap(start, end),
+                self.source.concurrency(start.date(), last_day, width))
+
+    def _on_loaded(self, data: tuple):
+        """Отображение загруженных данных"""
+        bars, heatmap, line = data
+        self.bars.set_data(bars)
+        self.heatmap.set_data(heatmap)
+        self.line.set_data(line if line.y.any() else None)
+        self.status_label.setText(f"Интервал: {bars.unit}, точек линии: {len(line.x)} из {line.source_points}")
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._requested_width is not None and abs(self.bars.plot_width() - self._requested_width) > 40:
+            self._resize_timer.start()
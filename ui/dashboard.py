@@ -0,0 +1,136 @@
+"""
+Панель мониторинга: запущенные приложения и оставшееся время
+"""
+import logging
+from typing import Dict, List
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView
+
+from core.monitor import MonitorEvent, EVENT_SESSION_START, EVENT_SESSION_STOP, EVENT_KILL
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardModel(QAbstractTableModel):
+    """
+    Модель запущенных отслеживаемых приложений
+
+    Строка соответствует открытой сессии и хранит последнее событие
+    монитора по ней. Начало сессии вставляет строку, конец — удаляет,
+    начисление времени обновляет только изменившиеся ячейки этой строки.
+    """
+
+    HEADERS = ["Приложение", "Запущено", "Сегодня (мин)", "Осталось (мин)", "Смена расписания"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._keys: List[str] = []
+        self._events: Dict[str, MonitorEvent] = {}
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._keys)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        event = self._events[self._keys[index.row()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._values(event)[index.column()]
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() in (2, 3):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    @staticmethod
+    def _values(event: MonitorEvent) -> tuple:
+        """Значения ячеек строки"""
+        remaining = event.remaining_minutes
+        boundary = event.next_boundary
+        return (
+            event.app_name,
+            event.start_time.strftime("%H:%M") if event.start_time else "",
+            f"{event.used_minutes:.0f}",
+            "без лимита" if remaining is None else f"{remaining:.0f}",
+            "—" if boundary is None else boundary.strftime("%H:%M" if boundary.date() == event.at.date()
+                                                           else "%d.%m %H:%M"),
+        )
+
+    def apply_event(self, event: MonitorEvent):
+        """
+        Применение события монитора
+
+        Args:
+            event: Событие монитора
+        """
+        key = event.session_key
+        if key is None or event.kind == EVENT_KILL:
+            return
+        if event.kind == EVENT_SESSION_STOP:
+            if key in self._events:
+                row = self._keys.index(key)
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._keys[row]
+                del self._events[key]
+                self.endRemoveRows()
+            return
+
+        previous = self._events.get(key)
+        if previous is None:
+            # Панель могла подписаться уже после начала сессии
+            row = len(self._keys)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._keys.append(key)
+            self._events[key] = event
+            self.endInsertRows()
+            return
+
+        self._events[key] = event
+        old_values, new_values = self._values(previous), self._values(event)
+        changed = [column for column, (old, new) in enumerate(zip(old_values, new_values)) if old != new]
+        if changed:
+            row = self._keys.index(key)
+            self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)),
+                                  [Qt.ItemDataRole.DisplayRole])
+
+
+class DashboardPanel(QWidget):
+    """
+    Панель мониторинга на главной вкладке
+
+    Обновляется только событиями монитора (apply_event), без таймеров
+    и запросов к базе данных.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = DashboardModel(self)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.verticalHeader().setVisible(False)
+        self.view.setSelectionMode(QTableView.SelectionMode.NoSelection)
+        layout.addWidget(self.view)
+
+        self.last_event_label = QLabel("")
+        self.last_event_label.setWordWrap(True)
+        layout.addWidget(self.last_event_label)
+
+    def apply_event(self, event: MonitorEvent):
+        """Применение события монитора к таблице и строке последнего события"""
+        self.model.apply_event(event)
+        if event.kind == EVENT_KILL:
+            name = event.app_name or f"процессов: {event.count}"
+            self.last_event_label.setText(f"{event.at:%H:%M:%S} Завершено ({name}): {event.reason}")
+        elif event.kind == EVENT_SESSION_START:
+            self.last_event_label.setText(f"{event.at:%H:%M:%S} Запущено: {event.app_name}")
@@ -0,0 +1,137 @@
+"""
+Асинхронный исполнитель запросов к базе данных для UI
+"""
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """Запрос в очереди исполнителя"""
+
+    __slots__ = ('key', 'fn', 'args', 'kwargs', 'future', 'callbacks', 'errbacks')
+
+    def __init__(self, key: str, fn: Callable, args: tuple, kwargs: dict):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.callbacks = []
+        self.errbacks = []
+
+
+class DbExecutor(QObject):
+    """
+    Исполнитель запросов к базе данных в отдельном пуле потоков
+
+    Возвращает Future, а результат доставляет в GUI-поток через
+    queued-сигналы. Запросы с одинаковым ключом, ещё не начавшие
+    выполняться, объединяются в один: повторные обновления одной
+    таблицы приводят к одному запросу. Каждый метод Database открывает
+    и закрывает свою сессию, поэтому задачи не делят сессии между потоками.
+
+    Signals:
+        finished(key, result): Запрос успешно выполнен
+        failed(key, error): Запрос завершился исключением
+    """
+
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, object)
+    _completed = pyqtSignal(object)
+
+    def __init__(self, max_workers: int = 2, parent=None, query_stats=None):
+        """
+        Инициализация исполнителя
+
+        Args:
+            max_workers: Количество потоков пула
+            parent: Родительский QObject
+            query_stats: QueryStats базы данных для подсчёта запросов по действиям
+                (действие — ключ запроса до первого двоеточия)
+        """
+        super().__init__(parent)
+        self.query_stats = query_stats
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._queued: Dict[str, _Request] = {}
+        self._lock = Lock()
+        self._completed.connect(self._on_completed, Qt.ConnectionType.QueuedConnection)
+
+    def submit(self, key: str, fn: Callable, *args,
+               callback: Optional[Callable] = None,
+               errback: Optional[Callable] = None, **kwargs) -> Future:
+        """
+        Постановка запроса в очередь
+
+        Args:
+            key: Ключ для объединения одинаковых запросов (например, "reports")
+            fn: Функция, выполняемая в пуле потоков
+            *args: Аргументы функции
+            callback: Вызывается в GUI-потоке с результатом
+                (при объединении заменяет обработчики ожидающего запроса)
+            errback: Вызывается в GUI-потоке с исключением
+            **kwargs: Именованные аргументы функции
+
+        Returns:
+            Future: Результат запроса (общий для объединённых запросов)
+        """
+        with self._lock:
+            request = self._queued.get(key)
+            if request is None:
+                request = _Request(key, fn, args, kwargs)
+                self._queued[key] = request
+                self._pool.submit(self._run, request)
+            else:
+                # Запрос ещё не начат: берём самые свежие аргументы и обработчики,
+                # прежние рассчитаны на результат другого запроса
+                request.fn, request.args, request.kwargs = fn, args, kwargs
+                request.callbacks.clear()
+                request.errbacks.clear()
+                logger.debug(f"Запрос {key} объединён с ожидающим")
+            if callback is not None:
+                request.callbacks.append(callback)
+            if errback is not None:
+                request.errbacks.append(errback)
+            return request.future
+
+    def shutdown(self, wait: bool = False):
+        """Остановка пула потоков"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, request: _Request):
+        """Выполнение запроса в потоке пула"""
+        with self._lock:
+            # После снятия из очереди новые запросы с тем же ключом не объединяются
+            if self._queued.get(request.key) is request:
+                del self._queued[request.key]
+        try:
+            if self.query_stats is not None:
+                with self.query_stats.action(request.key.split(':', 1)[0]):
+                    result = request.fn(*request.args, **request.kwargs)
+            else:
+                result = request.fn(*request.args, **request.kwargs)
+            request.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Ошибка запроса к базе данных ({request.key}): {e}")
+            request.future.set_exception(e)
+        self._completed.emit(request)
+
+    def _on_completed(self, request: _Request):
+        """Доставка результата в GUI-потоке"""
+        error = request.future.exception()
+        handlers = request.errbacks if error is not None else request.callbacks
+        value = error if error is not None else request.future.result()
+        for handler in handlers:
+            try:
+                handler(value)
+            except Exception as e:
+                logger.error(f"Ошибка обработки результата запроса {request.key}: {e}", exc_info=True)
+        if error is not None:
+            self.failed.emit(request.key, error)
+        else:
+            self.finished.emit(request.key, value)
@@ -0,0 +1,146 @@
+"""
+Панель диагностики: метрики цикла мониторинга и профилирование
+"""
+import logging
+from typing import List
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableView, QCheckBox, QPushButton
+
+logger = logging.getLogger(__name__)
+
+
+class DiagnosticsModel(QAbstractTableModel):
+    """
+    Модель метрик (строки Metrics.summary())
+
+    Для гистограмм показываются количество замеров, среднее и 95-й
+    процентиль в миллисекундах, для счётчиков и показателей — значение.
+    """
+
+    HEADERS = ["Метрика", "Метки", "Значение", "Замеров", "p95 (мс)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[dict] = []
+
+    def set_rows(self, rows: List[dict]):
+        """Замена строк"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._values(self._rows[index.row()])[index.column()]
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() >= 2:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    @staticmethod
+    def _values(row: dict) -> tuple:
+        if row['count'] is None:
+            return row['name'], row['labels'], f"{row['value']:g}", "", ""
+        return (row['name'], row['labels'], f"{row['value'] * 1000:.2f} мс", str(row['count']),
+                f"{row['p95'] * 1000:.2f}")
+
+
+class DiagnosticsPanel(QWidget):
+    """
+    Панель метрик мониторинга на вкладке настроек
+
+    Пока панель видна и метрики включены, раз в refresh_interval
+    запрашивает метрики сигналом refresh_requested; владелец отвечает
+    вызовом set_metrics(). Скрытая панель таймер не держит.
+
+    Signals:
+        refresh_requested(): Нужны свежие метрики
+        enabled_changed(bool): Пользователь включил или выключил сбор метрик
+        profile_requested(int): Нужно профилирование на указанное число секунд
+    """
+
+    refresh_requested = pyqtSignal()
+    enabled_changed = pyqtSignal(bool)
+    profile_requested = pyqtSignal(int)
+
+    def __init__(self, refresh_interval: int = 2000, profile_seconds: int = 30, parent=None):
+        super().__init__(parent)
+        self.model = DiagnosticsModel(self)
+        self._timer = QTimer(self)
+        self._timer.setInterval(refresh_interval)
+        self._timer.timeout.connect(self.refresh_requested.emit)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+        self.enabled_checkbox = QCheckBox("Собирать метрики")
+        self.enabled_checkbox.toggled.connect(self._on_toggled)
+        controls.addWidget(self.enabled_checkbox)
+        controls.addStretch()
+        self.source_label = QLabel("")
+        controls.addWidget(self.source_label)
+        self.profile_button = QPushButton(f"Профилирование ({profile_seconds} с)")
+        self.profile_button.setToolTip("Отсчёты стека потока мониторинга и выделения памяти "
+                                       "в архив для обращения в поддержку")
+        self.profile_button.clicked.connect(lambda: self.profile_requested.emit(profile_seconds))
+        controls.addWidget(self.profile_button)
+        layout.addLayout(controls)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.verticalHeader().setVisible(False)
+        self.view.setSelectionMode(QTableView.SelectionMode.NoSelection)
+        layout.addWidget(self.view)
+
+    def set_metrics(self, result: dict, source: str = ""):
+        """
+        Отображение метрик
+
+        Args:
+            result: {'enabled': bool, 'rows': Metrics.summary()}
+            source: Откуда метрики (окно или агент)
+        """
+        self.enabled_checkbox.blockSignals(True)
+        self.enabled_checkbox.setChecked(result['enabled'])
+        self.enabled_checkbox.blockSignals(False)
+        self.source_label.setText(source)
+        self.model.set_rows(result['rows'])
+        self._update_timer()
+
+    def set_toggle_allowed(self, allowed: bool, tooltip: str = ""):
+        """Разрешение включать и выключать сбор метрик из панели"""
+        self.enabled_checkbox.setEnabled(allowed)
+        self.enabled_checkbox.setToolTip(tooltip)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh_requested.emit()
+        self._update_timer()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+
+    def _on_toggled(self, checked: bool):
+        self.enabled_changed.emit(checked)
+        self.refresh_requested.emit()
+
+    def _update_timer(self):
+        if self.isVisible() and self.enabled_checkbox.isChecked():
+            self._timer.start()
+        else:
+            self._timer.stop()
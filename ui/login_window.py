@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import Qt
 
 from core.auth import AuthManager
+from ui.db_executor import DbExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,9 @@ class LoginWindow(QDialog):
         self.setFixedSize(450, 320)
         self.setModal(True)
         
+        # Проверка пароля и запросы к базе данных выполняются вне GUI-потока
+        self.executor = DbExecutor(max_workers=1, parent=self, query_stats=self.auth.db.query_stats)
+        
         self._create_ui()
         
         # Проверяем, есть ли администратор
@@ -139,6 +143,7 @@ class LoginWindow(QDialog):
         buttons_layout.setSpacing(15)
         login_button = QPushButton("Войти")
         login_button.setDefault(True)
+        self.login_button = login_button
         login_button.setStyleSheet("""
             QPushButton {
                 background-color: #4CAF50;
@@ -191,15 +196,17 @@ class LoginWindow(QDialog):
     
     def _check_admin_exists(self):
         """Проверка существования администратора"""
-        try:
-            from core.database import Database
-            db = Database()
-            admin = db.get_user_by_username("admin")
-            if not admin:
-                # Создаём администратора по умолчанию
-                self._create_default_admin()
-        except Exception as e:
-            logger.error(f"Ошибка проверки администратора: {e}")
+        self.executor.submit(
+            'admin_exists', self.auth.db.get_user_by_username, "admin",
+            callback=self._on_admin_checked,
+            errback=lambda e: logger.error(f"Ошибка проверки администратора: {e}")
+        )
+    
+    def _on_admin_checked(self, admin):
+        """Обработка результата проверки администратора"""
+        if not admin:
+            # Создаём администратора по умолчанию
+            self._create_default_admin()
     
     def _create_default_admin(self):
         """Создание администратора по умолчанию"""
@@ -214,17 +221,22 @@ class LoginWindow(QDialog):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.auth.create_admin("admin", "admin")
-                QMessageBox.information(
-                    self,
-                    "Успех",
-                    "Администратор создан:\nИмя: admin\nПароль: admin\n\n"
-                    "Смените пароль после первого входа!"
-                )
-                self.username_edit.setText("admin")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось создать администратора: {e}")
+            # Хеширование пароля тоже выполняется в фоне
+            self.executor.submit(
+                'create_admin', self.auth.create_admin, "admin", "admin",
+                callback=self._on_admin_created,
+                errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось создать администратора: {e}")
+            )
+    
+    def _on_admin_created(self, _):
+        """Обработка создания администратора по умолчанию"""
+        QMessageBox.information(
+            self,
+            "Успех",
+            "Администратор создан:\nИмя: admin\nПароль: admin\n\n"
+            "Смените пароль после первого входа!"
+        )
+        self.username_edit.setText("admin")
     
     def _login(self):
         """Обработка входа"""
@@ -262,68 +274,90 @@ class LoginWindow(QDialog):
             msg.exec()
             return
         
-        try:
-            if self.auth.login(username, password):
-                self.accept()
-            else:
-                msg = QMessageBox(self)
-                msg.setIcon(QMessageBox.Icon.Warning)
-                msg.setWindowTitle("Ошибка")
-                msg.setText("Неверное имя пользователя или пароль")
-                msg.setStyleSheet("""
-                    QMessageBox {
-                        background-color: white;
-                    }
-                    QMessageBox QLabel {
-                        color: #212121;
-                        font-size: 13px;
-                        font-weight: normal;
-                    }
-                    QPushButton {
-                        background-color: #2196F3;
-                        color: white;
-                        border: none;
-                        border-radius: 4px;
-                        padding: 8px 20px;
-                        font-size: 12px;
-                        font-weight: bold;
-                        min-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #1976D2;
-                    }
-                """)
-                msg.exec()
-                self.password_edit.clear()
-                self.password_edit.setFocus()
-        except Exception as e:
-            logger.error(f"Ошибка при входе: {e}")
-            msg = QMessageBox(self)
-            msg.setIcon(QMessageBox.Icon.Critical)
-            msg.setWindowTitle("Ошибка")
-            msg.setText(f"Ошибка подключения к базе данных:\n{str(e)}")
-            msg.setStyleSheet("""
-                QMessageBox {
-                    background-color: white;
-                }
-                QMessageBox QLabel {
-                    color: #212121;
-                    font-size: 12px;
-                    font-weight: normal;
-                }
-                QPushButton {
-                    background-color: #f44336;
-                    color: white;
-                    border: none;
-                    border-radius: 4px;
-                    padding: 8px 20px;
-                    font-size: 12px;
-                    font-weight: bold;
-                    min-width: 80px;
-                }
-                QPushButton:hover {
-                    background-color: #d32f2f;
-                }
-            """)
-            msg.exec()
+        # Блокируем кнопку, пока проверка выполняется в фоне
+        self.login_button.setEnabled(False)
+        self.password_edit.setEnabled(False)
+        self.executor.submit(
+            'login', self.auth.login, username, password,
+            callback=self._on_login_finished,
+            errback=self._on_login_error
+        )
+    
+    def _on_login_finished(self, success: bool):
+        """Обработка результата входа"""
+        self.login_button.setEnabled(True)
+        self.password_edit.setEnabled(True)
+        if success:
+            self.accept()
+            return
+        
+        remaining = self.auth.lockout_remaining(self.username_edit.text().strip())
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Icon.Warning)
+        msg.setWindowTitle("Ошибка")
+        if remaining > 0:
+            msg.setText(f"Неверное имя пользователя или пароль.\n"
+                        f"Слишком много попыток, повторите через {int(remaining) + 1} с")
+        else:
+            msg.setText("Неверное имя пользователя или пароль")
+        msg.setStyleSheet("""
+            QMessageBox {
+                background-color: white;
+            }
+            QMessageBox QLabel {
+                color: #212121;
+                font-size: 13px;
+                font-weight: normal;
+            }
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 20px;
+                font-size: 12px;
+                font-weight: bold;
+                min-width: 80px;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+        """)
+        msg.exec()
+        self.password_edit.clear()
+        self.password_edit.setFocus()
+    
+    def _on_login_error(self, e: Exception):
+        """Обработка ошибки входа"""
+        self.login_button.setEnabled(True)
+        self.password_edit.setEnabled(True)
+        logger.error(f"Ошибка при входе: {e}")
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Icon.Critical)
+        msg.setWindowTitle("Ошибка")
+        msg.setText(f"Ошибка подключения к базе данных:\n{str(e)}")
+        msg.setStyleSheet("""
+            QMessageBox {
+                background-color: white;
+            }
+            QMessageBox QLabel {
+                color: #212121;
+                font-size: 12px;
+                font-weight: normal;
+            }
+            QPushButton {
+                background-color: #f44336;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px 20px;
+                font-size: 12px;
+                font-weight: bold;
+                min-width: 80px;
+            }
+            QPushButton:hover {
+                background-color: #d32f2f;
+            }
+        """)
+        msg.exec()
 
@@ -1,26 +1,31 @@
 """
 Главное окно приложения SaveConfe
 """
-import sys
 import logging
+import threading
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QTabWidget, QTableWidget,
-                             QTableWidgetItem, QMessageBox, QSystemTrayIcon,
+                             QTableWidgetItem, QTableView, QMessageBox, QSystemTrayIcon,
                              QMenu, QApplication, QTimeEdit, QSpinBox, QGroupBox,
-                             QLineEdit, QFileDialog, QHeaderView, QInputDialog)
+                             QLineEdit, QFileDialog, QHeaderView, QInputDialog, QComboBox)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal
-from PyQt6.QtGui import QIcon, QAction
+from PyQt6.QtGui import QIcon, QAction, QColor
 
-from core.database import Database
 from core.blocker import Blocker
 from core.scheduler import Scheduler
-from core.monitor import Monitor
+from core.monitor import Monitor, EVENT_KILL, EVENT_LIMIT_WARNING, accrual_key
+from core.events import EventBus
+from core.rule_repository import RuleRepository
+from core.agent import read_agent_pid
+from core.ipc import IpcClient, IpcError, event_from_message
+from core.profiling import profile_seconds_from_env
+from ui.db_executor import DbExecutor
+from ui.table_models import UsageLogTableModel, SiteRuleTableModel, AppRuleTableModel
+from ui.dashboard import DashboardPanel
 from core.auth import AuthManager
-from core.autostart import AutostartManager
+from core.autostart import AutostartManager, agent_command
 from models.usage_log import ItemType
-from datetime import datetime, time
-import sys
-import os
+from datetime import datetime, time, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -28,26 +33,49 @@ logger = logging.getLogger(__name__)
 class MainWindow(QMainWindow):
     """Главное окно приложения"""
     
+    # Изменения правил могут прийти из потока DbExecutor, обработка — в GUI-потоке
+    rules_changed = pyqtSignal(object)
+    # События монитора приходят из потока мониторинга
+    monitor_event = pyqtSignal(object)
+    # Профилирование завершается в своём потоке
+    profile_finished = pyqtSignal(object)
+    
     def __init__(self, auth_manager=None):
         super().__init__()
         self.setWindowTitle("SaveConfe - Родительский контроль")
         self.setGeometry(100, 100, 900, 700)
         
-        # Инициализация компонентов
-        self.db = Database()
-        self.blocker = Blocker()
-        self.scheduler = Scheduler()
-        self.monitor = Monitor(self.blocker, self.scheduler, self.db)
         # Используем переданный auth_manager или создаём новый
         self.auth = auth_manager if auth_manager else AuthManager()
+        # Инициализация компонентов (подключение к базе данных общее с авторизацией)
+        self.db = self.auth.db
+        self.blocker = Blocker()
+        self.scheduler = Scheduler()
+        self.bus = EventBus()
+        self.rules = RuleRepository(self.db, self.bus)
+        self.monitor = Monitor(self.blocker, self.scheduler, self.db, rules=self.rules, bus=self.bus)
+        self.rules.subscribe(self.rules_changed.emit)
+        self.rules_changed.connect(self._on_rules_changed)
+        # Окно получает события через ограниченную очередь: занятый GUI-поток
+        # не задерживает монитор, а из нескольких начислений сессии остаётся последнее
+        self.monitor.subscribe(self.monitor_event.emit, name='ui', max_queue=1000, coalesce=accrual_key)
+        self.monitor_event.connect(self._on_monitor_event)
+        # Запросы к базе данных из UI выполняются вне GUI-потока
+        self.db_executor = DbExecutor(parent=self, query_stats=self.db.query_stats)
+        self.db.query_stats.register_metrics(self.monitor.metrics)
         self.autostart = AutostartManager()
+        self.agent_pid = None  # PID фонового агента, если блокировку выполняет он
+        self.profiler = None  # Создаётся при первом профилировании
+        self.profile_finished.connect(self._on_profile_finished)
         
-        # Загрузка данных
-        self._load_data()
-        
-        # Создание UI
+        # Создание UI; данные загружаются в фоне после первой отрисовки окна
         self._create_ui()
         self._create_tray_icon()
+        self._update_agent_status()
+        QTimer.singleShot(0, self._load_data)
+        seconds = profile_seconds_from_env()
+        if seconds:
+            QTimer.singleShot(0, lambda: self._start_profiling(seconds))
         
         # Таймер для обновления
         self.update_timer = QTimer()
@@ -79,23 +107,32 @@ class MainWindow(QMainWindow):
         status_layout.addWidget(self.toggle_button)
         layout.addLayout(status_layout)
         
-        # Вкладки
+        # Вкладки: главная строится сразу, остальные — при первом открытии
         self.tabs = QTabWidget()
-        self._create_main_tab()
-        self._create_sites_tab()
-        self._create_apps_tab()
-        self._create_time_tab()
-        self._create_reports_tab()
-        self._create_settings_tab()
+        self._tab_builders = {}
+        for title, builder in (("Главная", self._create_main_tab),
+                               ("Сайты", self._create_sites_tab),
+                               ("Приложения", self._create_apps_tab),
+                               ("Время", self._create_time_tab),
+                               ("Отчёты", self._create_reports_tab),
+                               ("Настройки", self._create_settings_tab)):
+            self._tab_builders[self.tabs.addTab(QWidget(), title)] = builder
+        self._ensure_tab(0)
+        self.tabs.currentChanged.connect(self._ensure_tab)
         
         layout.addWidget(self.tabs)
         
         # Статус бар
         self.statusBar().showMessage("Готово")
     
-    def _create_main_tab(self):
+    def _ensure_tab(self, index: int):
+        """Построение содержимого вкладки при первом открытии"""
+        builder = self._tab_builders.pop(index, None)
+        if builder is not None:
+            builder(self.tabs.widget(index))
+    
+    def _create_main_tab(self, tab: QWidget):
         """Создание главной вкладки"""
-        tab = QWidget()
         layout = QVBoxLayout(tab)
         
         title = QLabel("Главная панель")
@@ -109,12 +146,12 @@ class MainWindow(QMainWindow):
         info_label.setWordWrap(True)
         layout.addWidget(info_label)
         
-        layout.addStretch()
-        self.tabs.addTab(tab, "Главная")
+        # Запущенные приложения обновляются событиями монитора
+        self.dashboard = DashboardPanel()
+        layout.addWidget(self.dashboard)
     
-    def _create_sites_tab(self):
+    def _create_sites_tab(self, tab: QWidget):
         """Создание вкладки сайтов"""
-        tab = QWidget()
         layout = QVBoxLayout(tab)
         
         # Кнопки управления
@@ -124,26 +161,32 @@ class MainWindow(QMainWindow):
         delete_button = QPushButton("Удалить")
         delete_button.setProperty("class", "danger")
         delete_button.clicked.connect(self._delete_site)
+        import_button = QPushButton("Импорт")
+        import_button.clicked.connect(self._import_rules)
+        export_button = QPushButton("Экспорт")
+        export_button.clicked.connect(self._export_rules)
         
         buttons_layout.addWidget(add_button)
         buttons_layout.addWidget(delete_button)
         buttons_layout.addStretch()
+        buttons_layout.addWidget(import_button)
+        buttons_layout.addWidget(export_button)
         layout.addLayout(buttons_layout)
         
         # Таблица сайтов
-        self.sites_table = QTableWidget()
-        self.sites_table.setColumnCount(4)
-        self.sites_table.setHorizontalHeaderLabels(["ID", "URL", "Лимит (мин)", "Расписание"])
+        self.sites_model = SiteRuleTableModel(self)
+        self.sites_table = QTableView()
+        self.sites_table.setModel(self.sites_model)
         self.sites_table.horizontalHeader().setStretchLastSection(True)
-        self.sites_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.sites_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.sites_table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        self.sites_table.setSortingEnabled(True)
         layout.addWidget(self.sites_table)
         
-        self.tabs.addTab(tab, "Сайты")
         self._update_sites_table()
     
-    def _create_apps_tab(self):
+    def _create_apps_tab(self, tab: QWidget):
         """Создание вкладки приложений"""
-        tab = QWidget()
         layout = QVBoxLayout(tab)
         
         # Кнопки управления
@@ -160,19 +203,19 @@ class MainWindow(QMainWindow):
         layout.addLayout(buttons_layout)
         
         # Таблица приложений
-        self.apps_table = QTableWidget()
-        self.apps_table.setColumnCount(5)
-        self.apps_table.setHorizontalHeaderLabels(["ID", "Название", "Путь", "Лимит (мин)", "Расписание"])
+        self.apps_model = AppRuleTableModel(self)
+        self.apps_table = QTableView()
+        self.apps_table.setModel(self.apps_model)
         self.apps_table.horizontalHeader().setStretchLastSection(True)
-        self.apps_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.apps_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.apps_table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        self.apps_table.setSortingEnabled(True)
         layout.addWidget(self.apps_table)
         
-        self.tabs.addTab(tab, "Приложения")
         self._update_apps_table()
     
-    def _create_time_tab(self):
+    def _create_time_tab(self, tab: QWidget):
         """Создание вкладки времени"""
-        tab = QWidget()
         layout = QVBoxLayout(tab)
         
         group = QGroupBox("Общий лимит времени")
@@ -208,11 +251,20 @@ class MainWindow(QMainWindow):
         layout.addWidget(group)
         layout.addStretch()
         
-        self.tabs.addTab(tab, "Время")
     
-    def _create_reports_tab(self):
+    def _create_reports_tab(self, tab: QWidget):
         """Создание вкладки отчётов"""
-        tab = QWidget()
+        # Отчёты и графики используют NumPy: модули загружаются при первом открытии вкладки
+        from core.reports import ReportEngine
+        from core.report_cache import ReportCache, DEFAULT_CACHE_PATH
+        from core.charts import ChartDataSource
+        from ui.charts import ChartsPanel
+        
+        # Кэш отчётов сохраняется при выходе, чтобы сразу показать последнюю сводку
+        self.report_cache = ReportCache(path=DEFAULT_CACHE_PATH)
+        self.report_engine = ReportEngine(self.db, cache=self.report_cache)
+        QApplication.instance().aboutToQuit.connect(self.report_cache.save)
+        
         layout = QVBoxLayout(tab)
         
         # Кнопки
@@ -221,25 +273,52 @@ class MainWindow(QMainWindow):
         refresh_button.clicked.connect(self._update_reports_table)
         export_button = QPushButton("Экспорт в CSV")
         export_button.clicked.connect(self._export_reports)
+        # Вид отчёта: последние сессии или сводка по часам/дням/неделям
+        self.report_mode_combo = QComboBox()
+        self.report_mode_combo.addItem("Последние сессии", None)
+        self.report_mode_combo.addItem("По часам (сегодня)", 'hour')
+        self.report_mode_combo.addItem("По дням (7 дней)", 'day')
+        self.report_mode_combo.addItem("По неделям (8 недель)", 'week')
+        self.report_mode_combo.addItem("Тепловая карта (4 недели)", 'heatmap')
+        self.report_mode_combo.addItem("Графики", 'charts')
+        # По умолчанию — сводка за неделю: при запуске она берётся из кэша отчётов
+        self.report_mode_combo.setCurrentIndex(self.report_mode_combo.findData('day'))
+        self.report_mode_combo.currentIndexChanged.connect(self._update_reports_table)
         
         buttons_layout.addWidget(refresh_button)
         buttons_layout.addWidget(export_button)
+        buttons_layout.addWidget(self.report_mode_combo)
+        # Фильтр последних сессий по названию (выполняется в SQL)
+        self.logs_filter_edit = QLineEdit()
+        self.logs_filter_edit.setPlaceholderText("Фильтр по названию")
+        self.logs_filter_edit.textChanged.connect(lambda text: self.logs_model.set_filter(text))
+        buttons_layout.addWidget(self.logs_filter_edit)
         buttons_layout.addStretch()
         layout.addLayout(buttons_layout)
         
-        # Таблица отчётов
+        # Последние сессии: строки подгружаются страницами при прокрутке
+        self.logs_model = UsageLogTableModel(self.db, executor=self.db_executor, parent=self)
+        self.logs_view = QTableView()
+        self.logs_view.setModel(self.logs_model)
+        self.logs_view.horizontalHeader().setStretchLastSection(True)
+        self.logs_view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.logs_view.horizontalHeader().setSortIndicator(2, Qt.SortOrder.DescendingOrder)
+        self.logs_view.setSortingEnabled(True)
+        layout.addWidget(self.logs_view)
+        
+        # Сводные отчёты и тепловая карта
         self.reports_table = QTableWidget()
-        self.reports_table.setColumnCount(5)
-        self.reports_table.setHorizontalHeaderLabels(["Тип", "Название", "Начало", "Окончание", "Длительность (мин)"])
         self.reports_table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.reports_table)
         
-        self.tabs.addTab(tab, "Отчёты")
+        # Графики: данные подбираются под ширину виджета
+        self.charts_panel = ChartsPanel(ChartDataSource(self.report_engine), self.db_executor)
+        layout.addWidget(self.charts_panel)
+        
         self._update_reports_table()
     
-    def _create_settings_tab(self):
+    def _create_settings_tab(self, tab: QWidget):
         """Создание вкладки настроек"""
-        tab = QWidget()
         layout = QVBoxLayout(tab)
         
         # Пароль
@@ -253,6 +332,7 @@ class MainWindow(QMainWindow):
         change_password_layout.addWidget(self.new_password_edit)
         
         change_password_button = QPushButton("Изменить пароль")
+        self.change_password_button = change_password_button
         change_password_button.clicked.connect(self._change_password)
         change_password_layout.addWidget(change_password_button)
         password_layout.addLayout(change_password_layout)
@@ -282,8 +362,17 @@ class MainWindow(QMainWindow):
         autostart_group.setLayout(autostart_layout)
         layout.addWidget(autostart_group)
         
-        layout.addStretch()
-        self.tabs.addTab(tab, "Настройки")
+        # Диагностика: метрики цикла мониторинга
+        from ui.diagnostics import DiagnosticsPanel
+        diagnostics_group = QGroupBox("Диагностика")
+        diagnostics_layout = QVBoxLayout()
+        self.diagnostics = DiagnosticsPanel()
+        self.diagnostics.refresh_requested.connect(self._refresh_diagnostics)
+        self.diagnostics.enabled_changed.connect(self._set_metrics_enabled)
+        self.diagnostics.profile_requested.connect(self._start_profiling)
+        diagnostics_layout.addWidget(self.diagnostics)
+        diagnostics_group.setLayout(diagnostics_layout)
+        layout.addWidget(diagnostics_group)
     
     def _create_tray_icon(self):
         """Создание иконки в системном трее"""
@@ -314,35 +403,71 @@ class MainWindow(QMainWindow):
             self.show()
     
     def _load_data(self):
-        """Загрузка данных из базы"""
-        try:
-            # Загрузка сайтов
-            sites = self.db.get_all_site_rules()
-            site_urls = [site.url for site in sites]
-            self.blocker.load_blocked_sites(site_urls)
-            
-            # Загрузка приложений
-            apps = self.db.get_all_app_rules()
-            app_paths = [app.app_path for app in apps]
-            self.blocker.load_blocked_apps(app_paths)
-            
-            # Загрузка лимитов времени
-            for site in sites:
-                if site.time_limit > 0:
-                    self.scheduler.set_time_limit(site.url, site.time_limit)
-                if site.schedule_start and site.schedule_end:
-                    self.scheduler.set_schedule(site.url, site.schedule_start, site.schedule_end)
-            
-            for app in apps:
-                if app.time_limit > 0:
-                    self.scheduler.set_time_limit(app.app_name, app.time_limit)
-                if app.schedule_start and app.schedule_end:
-                    self.scheduler.set_schedule(app.app_name, app.schedule_start, app.schedule_end)
-        except Exception as e:
-            logger.error(f"Ошибка загрузки данных: {e}")
+        """Загрузка данных из базы (в пуле потоков)"""
+        # Правила попадают в Blocker, Scheduler и таблицы через _on_rules_changed
+        self.db_executor.submit(
+            'rules_load', self.rules.load,
+            errback=lambda e: logger.error(f"Ошибка загрузки данных: {e}")
+        )
+    
+    def _on_rules_changed(self, delta):
+        """Применение изменения правил к блокировщику, планировщику и таблицам"""
+        failed = self.blocker.apply_rule_delta(delta)
+        self.scheduler.apply_rule_delta(delta)
+        
+        if hasattr(self, 'sites_model'):
+            self.sites_model.apply_delta(delta.added_sites, delta.removed_sites)
+        if hasattr(self, 'apps_model'):
+            self.apps_model.apply_delta(delta.added_apps, delta.removed_apps)
+        
+        if failed and self.blocker.is_blocking_enabled:
+            QMessageBox.warning(
+                self,
+                "Предупреждение",
+                f"Сайты добавлены в список, но не заблокированы: {', '.join(failed)}\n\n"
+                "Возможные причины:\n"
+                "1. Нет прав администратора\n"
+                "2. Ошибка записи в hosts файл"
+            )
+    
+    def _update_agent_status(self):
+        """Отображение блокировки фоновым агентом"""
+        pid = read_agent_pid()
+        if pid == self.agent_pid:
+            return
+        self.agent_pid = pid
+        if pid is not None:
+            self._attach_to_agent()
+        # Пока работает агент, окно не запускает свой монитор, чтобы не считать время дважды
+        self.toggle_button.setEnabled(pid is None or self.blocker.is_blocking_enabled)
+        if pid is not None and not self.blocker.is_blocking_enabled:
+            self.status_label.setText("Статус: Включено (агент)")
+            self.status_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #4CAF50;")
+            self.toggle_button.setToolTip("Блокировку выполняет фоновый агент SaveConfe")
+        elif pid is None and not self.blocker.is_blocking_enabled:
+            self.status_label.setText("Статус: Отключено")
+            self.status_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #f44336;")
+            self.toggle_button.setToolTip("")
+    
+    def _attach_to_agent(self):
+        """Получение событий монитора агента по IPC для панели мониторинга и уведомлений"""
+        def run():
+            try:
+                with IpcClient(timeout=2.0) as client:
+                    client.subscribe()
+                    for message in client.events():
+                        if message.get('type') == 'monitor':
+                            self.monitor_event.emit(event_from_message(message))
+            except (IpcError, RuntimeError) as e:
+                logger.warning(f"Соединение с агентом потеряно: {e}")
+        
+        threading.Thread(target=run, name='agent-events', daemon=True).start()
     
     def _toggle_blocking(self):
         """Переключение блокировки"""
+        if self.agent_pid is not None and not self.blocker.is_blocking_enabled:
+            QMessageBox.information(self, "Блокировка", "Блокировку выполняет фоновый агент SaveConfe")
+            return
         if self.blocker.is_blocking_enabled:
             # Отключаем блокировку
             self.blocker.disable_blocking()
@@ -362,7 +487,7 @@ class MainWindow(QMainWindow):
             
             # Блокируем все сайты из базы данных
             try:
-                sites = self.db.get_all_site_rules()
+                sites = self.rules.get_site_rules()
                 blocked_count = 0
                 failed_count = 0
                 
@@ -402,120 +527,129 @@ class MainWindow(QMainWindow):
     
     def _update_status(self):
         """Обновление статуса"""
-        if self.blocker.is_blocking_enabled:
-            killed = self.blocker.kill_blocked_apps()
-            if killed > 0:
-                self.statusBar().showMessage(f"Завершено {killed} заблокированных процессов", 3000)
-                # Показываем уведомление в трее
-                if hasattr(self, 'tray_icon'):
-                    self.tray_icon.showMessage(
-                        "SaveConfe",
-                        f"Завершено {killed} заблокированных процессов",
-                        QSystemTrayIcon.MessageIcon.Warning,
-                        3000
-                    )
-            
-            # Проверка лимитов времени и показ уведомлений
-            self._check_time_limits()
+        # Одно чтение rules_version вместо перезагрузки таблиц правил;
+        # процессы и лимиты проверяет монитор и сообщает о них событиями
+        self.db_executor.submit('rules_poll', self.rules.poll)
+        self._update_agent_status()
+    
+    def _on_monitor_event(self, event):
+        """Обновление панели мониторинга и уведомления по событию монитора"""
+        self.dashboard.apply_event(event)
+        if event.kind == EVENT_KILL:
+            message = f"Завершено процессов: {event.count} ({event.app_name or event.reason})"
+            self.statusBar().showMessage(message, 3000)
+            if hasattr(self, 'tray_icon'):
+                self.tray_icon.showMessage("SaveConfe", message, QSystemTrayIcon.MessageIcon.Warning, 3000)
+        elif event.kind == EVENT_LIMIT_WARNING and hasattr(self, 'tray_icon'):
+            self.tray_icon.showMessage(
+                "SaveConfe",
+                f"Осталось {event.remaining_minutes:.0f} минут для {event.app_name}",
+                QSystemTrayIcon.MessageIcon.Warning,
+                5000
+            )
     
     def _add_site(self):
         """Добавление сайта"""
         url, ok = QInputDialog.getText(self, "Добавить сайт", "Введите URL сайта:")
         if ok and url:
-            try:
-                # Добавляем в базу данных
-                self.db.add_site_rule(url)
-                
-                # Блокируем сайт (если блокировка включена)
-                if self.blocker.is_blocking_enabled:
-                    success = self.blocker.block_site(url)
-                    if not success:
-                        QMessageBox.warning(
-                            self, 
-                            "Предупреждение", 
-                            f"Сайт {url} добавлен в список, но не заблокирован.\n\n"
-                            "Возможные причины:\n"
-                            "1. Блокировка не включена\n"
-                            "2. Нет прав администратора\n"
-                            "3. Ошибка записи в hosts файл"
-                        )
-                
-                # Обновляем список заблокированных сайтов
-                self.blocker.load_blocked_sites([site.url for site in self.db.get_all_site_rules()])
-                
-                self._update_sites_table()
-                self.statusBar().showMessage(f"Сайт {url} добавлен")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось добавить сайт: {e}")
-                logger.error(f"Ошибка добавления сайта: {e}", exc_info=True)
+            # Добавляем в базу данных; блокировка и таблица обновятся в _on_rules_changed
+            self.db_executor.submit(
+                f'add_site:{url}', self.rules.add_site, url,
+                callback=lambda _: self.statusBar().showMessage(f"Сайт {url} добавлен"),
+                errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось добавить сайт: {e}")
+            )
     
     def _delete_site(self):
         """Удаление сайта"""
-        selected = self.sites_table.selectedItems()
+        selected = self.sites_table.selectionModel().selectedRows()
         if not selected:
             QMessageBox.warning(self, "Предупреждение", "Выберите сайт для удаления")
             return
         
-        row = selected[0].row()
-        rule_id = int(self.sites_table.item(row, 0).text())
-        url = self.sites_table.item(row, 1).text()
+        site = self.sites_model.rule_at(selected[0].row())
+        rule_id, url = site.id, site.url
         
         reply = QMessageBox.question(self, "Подтверждение", f"Удалить сайт {url}?",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                # Удаляем из базы данных
-                self.db.delete_site_rule(rule_id)
-                
-                # Разблокируем сайт (удаляем из hosts файла)
-                if self.blocker.is_blocking_enabled:
-                    success = self.blocker.unblock_site(url)
-                    if not success:
-                        logger.warning(f"Не удалось удалить сайт {url} из hosts файла")
-                
-                # Обновляем список заблокированных сайтов
-                self.blocker.load_blocked_sites([site.url for site in self.db.get_all_site_rules()])
-                
-                self._update_sites_table()
-                self.statusBar().showMessage(f"Сайт {url} удалён")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить сайт: {e}")
-                logger.error(f"Ошибка удаления сайта: {e}", exc_info=True)
+            # Удаляем из базы данных; разблокировка и таблица обновятся в _on_rules_changed
+            self.db_executor.submit(
+                f'delete_site:{rule_id}', self.rules.delete_site, rule_id,
+                callback=lambda _: self.statusBar().showMessage(f"Сайт {url} удалён"),
+                errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось удалить сайт: {e}")
+            )
+    
+    def _import_rules(self):
+        """Массовый импорт правил из файла"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Импорт правил", "",
+            "Правила (*.csv *.json *.jsonl *.txt);;Все файлы (*)"
+        )
+        if not file_path:
+            return
+        
+        def on_imported(result):
+            QMessageBox.information(
+                self,
+                "Импорт завершён",
+                f"Сайтов: {result['sites']} (новых: {result['added_sites']}, "
+                f"изменённых: {result['updated_sites']})\n"
+                f"Приложений: {result['apps']} (новых: {result['added_apps']}, "
+                f"изменённых: {result['updated_apps']})\n"
+                f"Пропущено записей: {result['skipped']}"
+            )
+        
+        from core.rule_io import import_rules
+        self.statusBar().showMessage("Импорт правил...")
+        self.db_executor.submit(
+            'import_rules', import_rules, self.rules, file_path,
+            callback=on_imported,
+            errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось импортировать правила: {e}")
+        )
+    
+    def _export_rules(self):
+        """Экспорт правил в файл"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Экспорт правил", "", "CSV Files (*.csv);;JSON Files (*.json)"
+        )
+        if not file_path:
+            return
+        try:
+            from core.rule_io import export_rules
+            count = export_rules(self.rules, file_path)
+            self.statusBar().showMessage(f"Экспортировано правил: {count}")
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать правила: {e}")
+            logger.error(f"Ошибка экспорта правил: {e}", exc_info=True)
     
     def _add_app(self):
         """Добавление приложения"""
         file_path, _ = QFileDialog.getOpenFileName(self, "Выберите приложение", "", "Executable Files (*.exe)")
         if file_path:
             app_name = file_path.split('\\')[-1]
-            try:
-                self.db.add_app_rule(file_path, app_name)
-                self.blocker.block_app(file_path)
-                self._update_apps_table()
-                self.statusBar().showMessage(f"Приложение {app_name} добавлено")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось добавить приложение: {e}")
+            self.db_executor.submit(
+                f'add_app:{file_path}', self.rules.add_app, file_path, app_name,
+                callback=lambda _: self.statusBar().showMessage(f"Приложение {app_name} добавлено"),
+                errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось добавить приложение: {e}")
+            )
     
     def _delete_app(self):
         """Удаление приложения"""
-        selected = self.apps_table.selectedItems()
+        selected = self.apps_table.selectionModel().selectedRows()
         if not selected:
             QMessageBox.warning(self, "Предупреждение", "Выберите приложение для удаления")
             return
         
-        row = selected[0].row()
-        rule_id = int(self.apps_table.item(row, 0).text())
-        app_path = self.apps_table.item(row, 2).text()
+        rule_id = self.apps_model.rule_at(selected[0].row()).id
         
         reply = QMessageBox.question(self, "Подтверждение", f"Удалить приложение?",
                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.db.delete_app_rule(rule_id)
-                self.blocker.unblock_app(app_path)
-                self._update_apps_table()
-                self.statusBar().showMessage("Приложение удалено")
-            except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось удалить приложение: {e}")
+            self.db_executor.submit(
+                f'delete_app:{rule_id}', self.rules.delete_app, rule_id,
+                callback=lambda _: self.statusBar().showMessage("Приложение удалено"),
+                errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось удалить приложение: {e}")
+            )
     
     def _save_time_settings(self):
         """Сохранение настроек времени"""
@@ -525,75 +659,116 @@ class MainWindow(QMainWindow):
     def _update_sites_table(self):
         """Обновление таблицы сайтов"""
         try:
-            sites = self.db.get_all_site_rules()
-            self.sites_table.setRowCount(len(sites))
-            
-            for row, site in enumerate(sites):
-                self.sites_table.setItem(row, 0, QTableWidgetItem(str(site.id)))
-                self.sites_table.setItem(row, 1, QTableWidgetItem(site.url))
-                self.sites_table.setItem(row, 2, QTableWidgetItem(str(site.time_limit)))
-                schedule = f"{site.schedule_start or '—'} - {site.schedule_end or '—'}"
-                self.sites_table.setItem(row, 3, QTableWidgetItem(schedule))
+            self.sites_model.set_rules(self.rules.get_site_rules())
         except Exception as e:
             logger.error(f"Ошибка обновления таблицы сайтов: {e}")
     
     def _update_apps_table(self):
         """Обновление таблицы приложений"""
         try:
-            apps = self.db.get_all_app_rules()
-            self.apps_table.setRowCount(len(apps))
-            
-            for row, app in enumerate(apps):
-                self.apps_table.setItem(row, 0, QTableWidgetItem(str(app.id)))
-                self.apps_table.setItem(row, 1, QTableWidgetItem(app.app_name))
-                self.apps_table.setItem(row, 2, QTableWidgetItem(app.app_path))
-                self.apps_table.setItem(row, 3, QTableWidgetItem(str(app.time_limit)))
-                schedule = f"{app.schedule_start or '—'} - {app.schedule_end or '—'}"
-                self.apps_table.setItem(row, 4, QTableWidgetItem(schedule))
+            self.apps_model.set_rules(self.rules.get_app_rules())
         except Exception as e:
             logger.error(f"Ошибка обновления таблицы приложений: {e}")
     
+    @staticmethod
+    def _report_period(mode: str) -> tuple:
+        """Период отчёта для вида на вкладке «Отчёты»"""
+        from core.reports import period_for
+        if mode == 'heatmap':
+            _, end = period_for('day')
+            return end - timedelta(days=28), end
+        return period_for(mode)
+    
+    def _build_report(self, mode: str):
+        """Построение сводного отчёта или тепловой карты (выполняется в пуле потоков)"""
+        start, end = self._report_period(mode)
+        if mode == 'heatmap':
+            return self.report_engine.heatmap(start, end)
+        return self.report_engine.usage_report(start, end, mode)
+    
     def _update_reports_table(self):
         """Обновление таблицы отчётов"""
+        mode = self.report_mode_combo.currentData()
+        self.logs_view.setVisible(mode is None)
+        self.logs_filter_edit.setVisible(mode is None)
+        self.reports_table.setVisible(mode not in (None, 'charts'))
+        self.charts_panel.setVisible(mode == 'charts')
+        if mode is None:
+            self.logs_model.refresh()
+            return
+        if mode == 'charts':
+            self.charts_panel.refresh()
+            return
+        
+        errback = lambda e: logger.error(f"Ошибка обновления таблицы отчётов: {e}")
+        
+        fill = self._fill_heatmap_table if mode == 'heatmap' else self._fill_summary_table
+        # Последний посчитанный отчёт показываем сразу, актуальный приходит из пула
+        start, end = self._report_period(mode)
+        kind = 'heatmap' if mode == 'heatmap' else 'usage_report'
+        cached = self.report_engine.peek(kind, start, end, None if mode == 'heatmap' else mode)
+        if cached is not None:
+            fill(cached)
+        # Повторные нажатия «Обновить» до выполнения запроса объединяются
+        self.db_executor.submit('reports', self._build_report, mode, callback=fill, errback=errback)
+    
+    def _fill_summary_table(self, report):
+        """Заполнение таблицы сводным отчётом (элементы × интервалы)"""
         try:
-            logs = self.db.get_usage_logs(limit=100)
-            self.reports_table.setRowCount(len(logs))
-            
-            for row, log in enumerate(logs):
-                self.reports_table.setItem(row, 0, QTableWidgetItem(log.item_type.value))
-                self.reports_table.setItem(row, 1, QTableWidgetItem(log.item_name))
-                self.reports_table.setItem(row, 2, QTableWidgetItem(log.start_time.strftime("%Y-%m-%d %H:%M:%S")))
-                end_time_str = log.end_time.strftime("%Y-%m-%d %H:%M:%S") if log.end_time else "—"
-                self.reports_table.setItem(row, 3, QTableWidgetItem(end_time_str))
-                self.reports_table.setItem(row, 4, QTableWidgetItem(f"{log.duration:.2f}"))
+            labels = report.bin_labels()
+            self.reports_table.clear()
+            self.reports_table.setColumnCount(len(labels) + 3)
+            self.reports_table.setHorizontalHeaderLabels(["Тип", "Название", *labels, "Итого (мин)"])
+            rows = list(report.rows())
+            self.reports_table.setRowCount(len(rows))
+            for row, (item_type, item_name, minutes, total) in enumerate(rows):
+                self.reports_table.setItem(row, 0, QTableWidgetItem(item_type.value))
+                self.reports_table.setItem(row, 1, QTableWidgetItem(item_name))
+                for column, value in enumerate(minutes.tolist(), start=2):
+                    self.reports_table.setItem(row, column, QTableWidgetItem(f"{value:.0f}" if value else ""))
+                self.reports_table.setItem(row, len(labels) + 2, QTableWidgetItem(f"{total:.2f}"))
         except Exception as e:
             logger.error(f"Ошибка обновления таблицы отчётов: {e}")
     
-    def _export_reports(self):
-        """Экспорт отчётов в CSV"""
+    def _fill_heatmap_table(self, heatmap):
+        """Заполнение таблицы тепловой картой (дни недели × часы)"""
+        from core.reports import WEEKDAY_LABELS
         try:
-            import pandas as pd
-            logs = self.db.get_usage_logs(limit=1000)
-            
-            data = []
-            for log in logs:
-                data.append({
-                    'Тип': log.item_type.value,
-                    'Название': log.item_name,
-                    'Начало': log.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    'Окончание': log.end_time.strftime("%Y-%m-%d %H:%M:%S") if log.end_time else "",
-                    'Длительность (мин)': log.duration
-                })
-            
-            df = pd.DataFrame(data)
-            file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчёт", "", "CSV Files (*.csv)")
-            if file_path:
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                QMessageBox.information(self, "Успех", f"Отчёт сохранён в {file_path}")
-        except ImportError:
-            QMessageBox.warning(self, "Ошибка", "Библиотека pandas не установлена")
+            self.reports_table.clear()
+            self.reports_table.setColumnCount(24)
+            self.reports_table.setHorizontalHeaderLabels([f"{hour:02d}" for hour in range(24)])
+            self.reports_table.setRowCount(7)
+            self.reports_table.setVerticalHeaderLabels(WEEKDAY_LABELS)
+            peak = float(heatmap.max()) or 1.0
+            for row, values in enumerate(heatmap.tolist()):
+                for column, value in enumerate(values):
+                    item = QTableWidgetItem(f"{value:.0f}" if value else "")
+                    # Чем больше минут, тем насыщеннее синий
+                    item.setBackground(QColor(33, 150, 243, int(220 * value / peak)))
+                    self.reports_table.setItem(row, column, item)
         except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать отчёт: {e}")
+            logger.error(f"Ошибка обновления таблицы отчётов: {e}")
+    
+    def _export_reports(self):
+        """Экспорт отчётов в CSV"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчёт", "", "CSV Files (*.csv)")
+        if not file_path:
+            return
+        from core.reports import write_report_csv, write_heatmap_csv, write_usage_logs_csv
+        mode = self.report_mode_combo.currentData()
+        if mode == 'charts':
+            # Для графиков экспортируется сводка по дням
+            mode = 'day'
+        if mode is None:
+            export = lambda: write_usage_logs_csv(self.db.get_usage_logs(limit=1000), file_path)
+        else:
+            writer = write_heatmap_csv if mode == 'heatmap' else write_report_csv
+            export = lambda: writer(self._build_report(mode), file_path)
+        self.db_executor.submit(
+            'export_reports', export,
+            callback=lambda _: QMessageBox.information(self, "Успех", f"Отчёт сохранён в {file_path}"),
+            errback=lambda e: QMessageBox.critical(self, "Ошибка", f"Не удалось экспортировать отчёт: {e}")
+        )
     
     def _change_password(self):
         """Смена пароля"""
@@ -616,65 +791,124 @@ class MainWindow(QMainWindow):
         old_password, ok = QInputDialog.getText(self, "Подтверждение", "Введите текущий пароль:", 
                                                 QLineEdit.EchoMode.Password)
         if ok and old_password:
-            if self.auth.change_password(username, old_password, new_password):
-                QMessageBox.information(self, "Успех", "Пароль успешно изменён")
-                self.new_password_edit.clear()
-            else:
-                QMessageBox.warning(self, "Ошибка", "Неверный текущий пароль")
+            # Проверка и хеширование пароля (bcrypt) выполняются в фоне
+            self.change_password_button.setEnabled(False)
+            self.db_executor.submit(
+                'change_password', self.auth.change_password, username, old_password, new_password,
+                callback=self._on_password_changed,
+                errback=self._on_password_change_error
+            )
+    
+    def _on_password_changed(self, success: bool):
+        """Обработка результата смены пароля"""
+        self.change_password_button.setEnabled(True)
+        if success:
+            QMessageBox.information(self, "Успех", "Пароль успешно изменён")
+            self.new_password_edit.clear()
+            return
+        remaining = self.auth.lockout_remaining(self.auth.current_user.username)
+        if remaining > 0:
+            QMessageBox.warning(self, "Ошибка", f"Неверный текущий пароль.\n"
+                                f"Слишком много попыток, повторите через {int(remaining) + 1} с")
+        else:
+            QMessageBox.warning(self, "Ошибка", "Неверный текущий пароль")
+    
+    def _on_password_change_error(self, e: Exception):
+        """Обработка ошибки смены пароля"""
+        self.change_password_button.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка", f"Не удалось сменить пароль: {e}")
     
     def _update_autostart_status(self):
         """Обновление статуса автозапуска"""
-        if self.autostart.is_enabled():
-            self.autostart_checkbox.setText("Статус: Автозапуск включён")
+        if self.autostart.is_agent_enabled():
+            self.autostart_checkbox.setText("Статус: Агент запускается при загрузке Windows")
             self.autostart_checkbox.setStyleSheet("color: #4CAF50; font-weight: bold;")
         else:
             self.autostart_checkbox.setText("Статус: Автозапуск отключён")
             self.autostart_checkbox.setStyleSheet("color: #f44336; font-weight: bold;")
     
     def _enable_autostart(self):
-        """Включение автозапуска"""
-        if getattr(sys, 'frozen', False):
-            # Если запущено как EXE
-            app_path = sys.executable
-        else:
-            # Если запущено из исходников, используем python.exe с main.py
-            main_py = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'main.py')
-            app_path = f'{sys.executable} "{os.path.abspath(main_py)}"'
-        
-        if self.autostart.enable(app_path):
+        """Включение автозапуска фонового агента при загрузке Windows"""
+        # Блокировку при загрузке выполняет агент по локальному снимку правил:
+        # окно требует входа и до него ничего не блокирует
+        if self.autostart.enable_agent(agent_command()):
+            # Старая запись автозагрузки окна больше не нужна
+            self.autostart.disable()
             self._update_autostart_status()
-            QMessageBox.information(self, "Успех", "Автозапуск включён")
+            QMessageBox.information(self, "Успех",
+                                    "Фоновый агент будет запускаться при загрузке Windows")
         else:
-            QMessageBox.warning(self, "Ошибка", "Не удалось включить автозапуск")
+            QMessageBox.warning(self, "Ошибка",
+                                "Не удалось включить автозапуск агента (нужен saveconfe-agent рядом с приложением)")
     
     def _disable_autostart(self):
         """Отключение автозапуска"""
-        if self.autostart.disable():
+        if self.autostart.disable_agent() and self.autostart.disable():
             self._update_autostart_status()
             QMessageBox.information(self, "Успех", "Автозапуск отключён")
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось отключить автозапуск")
     
-    def _check_time_limits(self):
-        """Проверка лимитов времени и показ уведомлений"""
+    def _refresh_diagnostics(self):
+        """Метрики агента (по IPC) или собственного монитора для панели диагностики"""
+        from_agent = self.agent_pid is not None and not self.blocker.is_blocking_enabled
+        self.diagnostics.set_toggle_allowed(
+            not from_agent, "Метрики агента включаются параметром --metrics" if from_agent else "")
+        if from_agent:
+            def fetch():
+                with IpcClient(timeout=2.0) as client:
+                    return client.call('metrics')
+            self.db_executor.submit(
+                'metrics', fetch,
+                callback=lambda result: self.diagnostics.set_metrics(result, "Агент"),
+                errback=lambda e: logger.warning(f"Не удалось получить метрики агента: {e}"))
+            return
+        metrics = self.monitor.metrics
+        self.diagnostics.set_metrics({'enabled': metrics.enabled,
+                                      'rows': metrics.summary() if metrics.enabled else []}, "Окно")
+    
+    def _set_metrics_enabled(self, enabled: bool):
+        """Включение сбора метрик собственного монитора"""
+        self.monitor.metrics.enabled = enabled
+    
+    def _start_profiling(self, seconds: float):
+        """Профилирование агента (по IPC) или потока мониторинга окна без остановки блокировки"""
+        if self.agent_pid is not None and not self.blocker.is_blocking_enabled:
+            # Агент профилирует только после входа администратора
+            username = self.auth.current_user.username
+            password, ok = QInputDialog.getText(self, "Профилирование агента", "Введите пароль:",
+                                                QLineEdit.EchoMode.Password)
+            if not ok or not password:
+                return
+            
+            def start():
+                with IpcClient(timeout=2.0) as client:
+                    if not client.call('login', username=username, password=password):
+                        raise IpcError("Неверный пароль")
+                    return client.call('profile', seconds=seconds)
+            self.db_executor.submit(
+                'profile', start,
+                callback=lambda result: QMessageBox.information(
+                    self, "Профилирование",
+                    f"Профилирование агента запущено на {seconds:.0f} с.\nАрхив: {result['path']}"),
+                errback=lambda e: QMessageBox.warning(self, "Ошибка", f"Не удалось запустить профилирование: {e}"))
+            return
+        from core.profiling import Profiler
+        if self.profiler is None:
+            self.profiler = Profiler()
+        thread = self.monitor.monitor_thread
         try:
-            # Проверяем активные процессы
-            for app_path, proc_info in self.monitor.active_processes.items():
-                app_name = proc_info['name']
-                remaining = self.scheduler.get_remaining_time(app_name)
-                
-                if remaining is not None:
-                    # Показываем предупреждение за 10 минут до окончания
-                    if 0 < remaining <= 10:
-                        if hasattr(self, 'tray_icon'):
-                            self.tray_icon.showMessage(
-                                "SaveConfe",
-                                f"Осталось {remaining:.0f} минут для {app_name}",
-                                QSystemTrayIcon.MessageIcon.Warning,
-                                5000
-                            )
-        except Exception as e:
-            logger.error(f"Ошибка проверки лимитов времени: {e}")
+            self.profiler.start(seconds, thread=thread if thread is not None and thread.is_alive() else None,
+                                callback=self.profile_finished.emit)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Профилирование", str(e))
+            return
+        self.statusBar().showMessage(f"Профилирование на {seconds:.0f} с...", int(seconds * 1000))
+    
+    def _on_profile_finished(self, result):
+        """Сообщение о готовом архиве профилирования"""
+        QMessageBox.information(self, "Профилирование",
+                                f"Профилирование завершено ({result.samples} отсчётов).\nАрхив: {result.path}")
     
     def _on_close_event(self, event):
         """Обработка закрытия окна"""
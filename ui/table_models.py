@@ -0,0 +1,262 @@
+"""
+Модели таблиц для представлений Qt (model/view)
+"""
+import logging
+from typing import List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+logger = logging.getLogger(__name__)
+
+_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class UsageLogTableModel(QAbstractTableModel):
+    """
+    Модель логов использования с постраничной подгрузкой
+
+    Строки загружаются страницами через Database.get_usage_logs_page по мере
+    прокрутки (canFetchMore/fetchMore). Сортировка и фильтр по названию
+    выполняются в SQL: при их смене модель сбрасывается и загружает первую
+    страницу заново. С DbExecutor страницы читаются в пуле потоков, а
+    результат устаревшего запроса (после сброса) отбрасывается.
+    """
+
+    HEADERS = ["Тип", "Название", "Начало", "Окончание", "Длительность (мин)"]
+    SORT_COLUMNS = ['item_type', 'item_name', 'start_time', 'end_time', 'duration']
+
+    def __init__(self, database, executor=None, page_size: int = 500, parent=None):
+        """
+        Инициализация модели
+
+        Args:
+            database: Экземпляр Database
+            executor: DbExecutor для чтения страниц вне GUI-потока (None — синхронно)
+            page_size: Количество строк в странице
+            parent: Родительский QObject
+        """
+        super().__init__(parent)
+        self.db = database
+        self.executor = executor
+        self.page_size = page_size
+        self.sort_column = 'start_time'
+        self.descending = True
+        self.search: Optional[str] = None
+        self._rows: list = []
+        self._exhausted = False
+        self._loading = False
+        self._generation = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        log = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return log.item_type.value
+            if column == 1:
+                return log.item_name
+            if column == 2:
+                return log.start_time.strftime(_DATETIME_FORMAT)
+            if column == 3:
+                return log.end_time.strftime(_DATETIME_FORMAT) if log.end_time else "—"
+            return f"{log.duration:.2f}"
+        if role == Qt.ItemDataRole.TextAlignmentRole and column == 4:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._load_page()
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        """Сортировка в SQL по колонке представления"""
+        self.sort_column = self.SORT_COLUMNS[column]
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.refresh()
+
+    def set_filter(self, text: str):
+        """Фильтр по подстроке названия"""
+        self.search = text.strip() or None
+        self.refresh()
+
+    def refresh(self):
+        """Сброс модели и загрузка первой страницы"""
+        self.beginResetModel()
+        self._generation += 1
+        self._rows = []
+        self._exhausted = False
+        self._loading = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def record(self, row: int):
+        """Лог (UsageLogRecord) в строке"""
+        return self._rows[row]
+
+    def _sort_key(self, log) -> tuple:
+        """Ключ строки для выборки следующей страницы"""
+        if self.sort_column == 'end_time':
+            return log.end_time or log.start_time, log.id
+        return getattr(log, self.sort_column), log.id
+
+    def _load_page(self):
+        """Запрос следующей страницы"""
+        self._loading = True
+        generation = self._generation
+        after = self._sort_key(self._rows[-1]) if self._rows else None
+        args = (self.page_size, self.sort_column, self.descending, self.search, after)
+        if self.executor is None:
+            try:
+                self._append_page(generation, self.db.get_usage_logs_page(*args))
+            except Exception as e:
+                self._on_page_error(generation, e)
+            return
+        self.executor.submit(
+            'usage_logs_page', self.db.get_usage_logs_page, *args,
+            callback=lambda rows: self._append_page(generation, rows),
+            errback=lambda e: self._on_page_error(generation, e)
+        )
+
+    def _append_page(self, generation: int, rows: list):
+        """Добавление загруженной страницы в конец модели"""
+        if generation != self._generation:
+            return
+        self._loading = False
+        self._exhausted = len(rows) < self.page_size
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def _on_page_error(self, generation: int, error: Exception):
+        """Ошибка чтения страницы: подгрузка останавливается до следующего refresh"""
+        if generation != self._generation:
+            return
+        logger.error(f"Ошибка загрузки логов использования: {error}")
+        self._loading = False
+        self._exhausted = True
+
+
+class RuleTableModel(QAbstractTableModel):
+    """
+    Модель таблицы правил блокировки
+
+    Правила уже находятся в памяти (RuleRepository), поэтому модель хранит
+    их список и сортирует его сама. Изменения RuleDelta применяются
+    вставкой и удалением отдельных строк, без перестроения таблицы.
+    Подклассы задают HEADERS и _values.
+    """
+
+    HEADERS: List[str] = []
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rules: list = []
+        self._sort = None
+
+    @staticmethod
+    def _values(rule) -> tuple:
+        """Значения колонок правила"""
+        raise NotImplementedError
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rules)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return str(self._values(self._rules[index.row()])[index.column()])
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        """Сортировка правил по колонке"""
+        self._sort = (column, order)
+        self.layoutAboutToBeChanged.emit()
+        self._rules.sort(key=lambda rule: self._values(rule)[column],
+                         reverse=order == Qt.SortOrder.DescendingOrder)
+        self.layoutChanged.emit()
+
+    def set_rules(self, rules: list):
+        """Замена всех правил"""
+        self.beginResetModel()
+        self._rules = list(rules)
+        self.endResetModel()
+        if self._sort is not None:
+            self.sort(*self._sort)
+
+    def apply_delta(self, added: list, removed: list):
+        """
+        Применение изменения правил
+
+        Args:
+            added: Добавленные правила (вставляются в конец, при
+                   выбранной сортировке порядок затем восстанавливается)
+            removed: Удалённые правила
+        """
+        removed_ids = {rule.id for rule in removed}
+        for row in range(len(self._rules) - 1, -1, -1):
+            if self._rules[row].id in removed_ids:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rules[row]
+                self.endRemoveRows()
+        if added:
+            first = len(self._rules)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            self._rules.extend(added)
+            self.endInsertRows()
+            if self._sort is not None:
+                self.sort(*self._sort)
+
+    def rule_at(self, row: int):
+        """Правило в строке"""
+        return self._rules[row]
+
+
+def _schedule(rule) -> str:
+    """Подпись расписания правила"""
+    return f"{rule.schedule_start or '—'} - {rule.schedule_end or '—'}"
+
+
+class SiteRuleTableModel(RuleTableModel):
+    """Модель таблицы правил сайтов"""
+
+    HEADERS = ["ID", "URL", "Лимит (мин)", "Расписание"]
+
+    @staticmethod
+    def _values(rule) -> tuple:
+        return rule.id, rule.url, rule.time_limit, _schedule(rule)
+
+
+class AppRuleTableModel(RuleTableModel):
+    """Модель таблицы правил приложений"""
+
+    HEADERS = ["ID", "Название", "Путь", "Лимит (мин)", "Расписание"]
+
+    @staticmethod
+    def _values(rule) -> tuple:
+        return rule.id, rule.app_name, rule.app_path, rule.time_limit, _schedule(rule)